@@ -1,4 +1,5 @@
 import logging
+import os
 import signal
 import sys
 import time
@@ -62,6 +63,7 @@ from galaxy.util import (
     StructuredExecutionTimer,
 )
 from galaxy.util.task import IntervalTask
+from galaxy.util.template import configure_template_cache
 from galaxy.visualization.data_providers.registry import DataProviderRegistry
 from galaxy.visualization.genomes import Genomes
 from galaxy.visualization.plugins.registry import VisualizationsRegistry
@@ -120,6 +122,8 @@ class MinimalGalaxyApplication(BasicApp, config.ConfiguresGalaxyMixin, HaltableC
         self.config.check()
         if configure_logging:
             config.configure_logging(self.config)
+        # Share compiled Cheetah templates (tool commands, configfiles) between processes
+        configure_template_cache(os.path.join(self.config.template_cache_path, "cheetah"))
         self._configure_object_store(fsmon=True)
         config_file = kwargs.get('global_conf', {}).get('__file__', None)
         if config_file:
@@ -315,6 +319,15 @@ class UniverseApplication(StructuredApp, GalaxyManagerApplication):
                 time_execution=True)
             self.application_stack.register_postfork_function(self.prune_history_audit_task.start)
             self.haltables.append(("HistoryAuditTablePruneTask", self.prune_history_audit_task.shutdown))
+        if not self.config.enable_celery_tasks and self.config.disk_usage_ledger_compact_interval > 0:
+            self.compact_disk_usage_ledger_task = IntervalTask(
+                func=lambda: galaxy.model.UserDiskUsageDelta.compact(self.model.session, self.application_stack.supports_skip_locked()),
+                name="DiskUsageLedgerCompactTask",
+                interval=self.config.disk_usage_ledger_compact_interval,
+                immediate_start=False,
+                time_execution=True)
+            self.application_stack.register_postfork_function(self.compact_disk_usage_ledger_task.start)
+            self.haltables.append(("DiskUsageLedgerCompactTask", self.compact_disk_usage_ledger_task.shutdown))
         # Start the job manager
         self.application_stack.register_postfork_function(self.job_manager.start)
         self.proxy_manager = ProxyManager(self.config)
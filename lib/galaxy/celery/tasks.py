@@ -83,3 +83,12 @@ def prune_history_audit_table(sa_session: scoped_session):
     timer = ExecutionTimer()
     model.HistoryAudit.prune(sa_session)
     log.debug(f"Successfully pruned history_audit table {timer}")
+
+
+@celery_app.task
+@galaxy_task
+def compact_disk_usage_ledger(app: MinimalManagerApp, sa_session: scoped_session):
+    """Fold posted disk usage changes into users' disk usage per object store."""
+    timer = ExecutionTimer()
+    model.UserDiskUsageDelta.compact(sa_session, app.application_stack.supports_skip_locked())
+    log.debug(f"Successfully compacted disk usage ledger {timer}")
@@ -1191,7 +1191,11 @@ class ConfiguresGalaxyMixin:
         self.container_finder = containers.ContainerFinder(app_info, mulled_resolution_cache=mulled_resolution_cache)
         self._set_enabled_container_types()
         index_help = getattr(self.config, "index_tool_help", True)
-        self.toolbox_search = galaxy.tools.search.ToolBoxSearch(self.toolbox, index_dir=self.config.tool_search_index_dir, index_help=index_help)
+        if self.config.tool_search_backend == "memory":
+            toolbox_search_class = galaxy.tools.search.InMemoryToolBoxSearch
+        else:
+            toolbox_search_class = galaxy.tools.search.ToolBoxSearch
+        self.toolbox_search = toolbox_search_class(self.toolbox, index_dir=self.config.tool_search_index_dir, index_help=index_help)
 
     def reindex_tool_search(self):
         # Call this when tools are added or removed.
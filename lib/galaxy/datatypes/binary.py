@@ -333,6 +333,9 @@ class BamNative(CompressedArchive):
     def init_meta(self, dataset, copy_from=None):
         Binary.init_meta(self, dataset, copy_from=copy_from)
 
+    # BGZF compressed, the first 4 uncompressed bytes are 'BAM\1'
+    sniff_magic = ((0, b'BAM\1'),)
+
     def sniff(self, filename):
         return BamNative.is_bam(filename)
 
@@ -2225,6 +2228,8 @@ class ExcelXls(Binary):
     """Class describing an Excel (xls) file"""
     file_ext = "excel.xls"
     edam_format = "format_3468"
+    # OLE2 compound document or Excel 4 worksheet, the formats reported by `file` as excel
+    sniff_magic = ((0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'), (0, b'\x09\x04\x06\x00\x00\x00\x10\x00'))
 
     def sniff(self, filename):
         mime_type = subprocess.check_output(['file', '--mime-type', filename])
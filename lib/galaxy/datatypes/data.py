@@ -6,7 +6,7 @@ import shutil
 import string
 import tempfile
 from inspect import isclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import webob.exc
 from markupsafe import escape
@@ -14,6 +14,7 @@ from markupsafe import escape
 from galaxy import util
 from galaxy.datatypes.metadata import MetadataElement  # import directly to maintain ease of use in Datatype class definitions
 from galaxy.datatypes.sniff import build_sniff_from_prefix
+from galaxy.datatypes.util import block_scan
 from galaxy.util import (
     compression_utils,
     FILENAME_VALID_CHARS,
@@ -122,6 +123,9 @@ class Data(metaclass=DataMeta):
     # The dataset contains binary data --> do not space_to_tab or convert newlines, etc.
     # Allow binary file uploads of this type when True.
     is_binary = True
+    # (offset, bytes) signatures of the (uncompressed) contents of files of this
+    # datatype, files with none of them are not sniffed as this datatype.
+    sniff_magic: Optional[Tuple[Tuple[int, bytes], ...]] = None
     # Composite datatypes
     composite_type: Optional[str] = None
     composite_files: Dict[str, Any] = {}
@@ -412,19 +416,34 @@ class Data(metaclass=DataMeta):
                 trans.response.set_content_type("application/octet-stream")  # force octet-stream so Safari doesn't append mime extensions to filename
                 trans.response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
                 return open(data.file_name, 'rb')
-        if not os.path.exists(data.file_name):
+        if not self._dataset_file_exists(trans, data):
             raise webob.exc.HTTPNotFound(f"File Not Found ({data.file_name}).")
         max_peek_size = DEFAULT_MAX_PEEK_SIZE  # 1 MB
         if isinstance(data.datatype, datatypes.text.Html):
             max_peek_size = 10000000  # 10 MB for html
         preview = util.string_as_bool(preview)
-        if not preview or isinstance(data.datatype, datatypes.images.Image) or os.stat(data.file_name).st_size < max_peek_size:
-            return self._yield_user_file_content(trans, data, data.file_name)
-        else:
+        if preview and not isinstance(data.datatype, datatypes.images.Image) and data.get_size() >= max_peek_size:
+            if data.dataset.external_filename:
+                with open(data.file_name, 'rb') as fh:
+                    truncated_data = fh.read(max_peek_size)
+            else:
+                # Remote object stores serve the start of the dataset without
+                # pulling the whole dataset into their cache.
+                truncated_data = b"".join(trans.app.object_store.iter_data(data.dataset, count=max_peek_size))
             trans.response.set_content_type("text/html")
             return trans.stream_template_mako("/dataset/large_file.mako",
-                                              truncated_data=open(data.file_name, 'rb').read(max_peek_size),
+                                              truncated_data=truncated_data,
                                               data=data)
+        return self._yield_user_file_content(trans, data, data.file_name)
+
+    def _dataset_file_exists(self, trans, data):
+        # Ask the object store, remote object stores would pull the dataset into their cache for data.file_name
+        dataset = data.dataset
+        if dataset.purged:
+            return False
+        if dataset.external_filename:
+            return os.path.exists(dataset.file_name)
+        return trans.app.object_store.exists(dataset)
 
     def display_as_markdown(self, dataset_instance, markdown_format_helpers):
         """Prepare for embedding dataset into a basic Markdown document.
@@ -826,6 +845,9 @@ class Text(Data):
         Count the number of lines of data in dataset,
         skipping all blank lines and comments.
         """
+        data_lines = block_scan.count_data_lines(dataset.file_name)
+        if data_lines is not None:
+            return data_lines
         CHUNK_SIZE = 2 ** 15  # 32Kb
         data_lines = 0
         with compression_utils.get_fileobj(dataset.file_name) as in_file:
@@ -257,6 +257,10 @@ class LimitedOffsetDataProvider(FilteredDataProvider):
         if self.limit is not None and self.limit <= 0:
             return
 
+        # skip as many of the data before offset as possible without reading them
+        if self.offset:
+            self.num_valid_data_read = self.seek_offset()
+
         parent_gen = super().__iter__()
         for datum in parent_gen:
             self.num_data_returned -= 1
@@ -268,17 +272,18 @@ class LimitedOffsetDataProvider(FilteredDataProvider):
             if self.limit is not None and self.num_data_returned >= self.limit:
                 break
 
-    # TODO: skipping lines is inefficient - somehow cache file position/line_num pair and allow provider
-    #   to seek to a pos/line and then begin providing lines
-    # the important catch here is that we need to have accurate pos/line pairs
-    #   in order to preserve the functionality of limit and offset
-    # if file_seek and len( file_seek ) == 2:
-    #    seek_pos, new_line_num = file_seek
-    #    self.seek_and_set_curr_line( seek_pos, new_line_num )
-
-    # def seek_and_set_curr_line( self, file_seek, new_curr_line_num ):
-    #    self.seek( file_seek, os.SEEK_SET )
-    #    self.curr_line_num = new_curr_line_num
+    def seek_offset(self):
+        """
+        Move the source to a position at or before the datum at `offset` and
+        return the number of valid data before that position.
+
+        The data are then skipped (or provided) from that position on as usual,
+        so the returned number must be exact for `offset` and `limit` to hold.
+
+        Meant to be overridden by providers able to seek their source,
+        this one does not seek and returns 0.
+        """
+        return 0
 
 
 class MultiSourceDataProvider(DataProvider):
@@ -314,6 +314,9 @@ class ColumnarDataProvider(line.RegexLineDataProvider):
         except IndexError:
             return None
 
+    def filters_only_lines(self):
+        return super().filters_only_lines() and not self.column_filters
+
     def filter_by_columns(self, columns):
         for filter_fn in self.column_filters:
             if not filter_fn(columns):
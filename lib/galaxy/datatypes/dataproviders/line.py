@@ -2,20 +2,68 @@
 Dataproviders that iterate over lines from their sources.
 """
 import collections
+import io
 import logging
+import os
 import re
+import threading
 
 from . import base
 
 log = logging.getLogger(__name__)
 
 _TODO = """
-line offsets (skip to some place in a file) needs to work more efficiently than simply iterating till we're there
-    capture tell() when provider is done
-        def stop( self ): self.endpoint = source.tell(); raise StopIteration()
 a lot of the hierarchy here could be flattened since we're implementing pipes
 """
 
+# how many files to keep the data line offsets of (see `get_line_offsets`)
+MAX_LINE_OFFSETS_FILES = 64
+_line_offsets: "collections.OrderedDict[tuple, tuple]" = collections.OrderedDict()
+_line_offsets_lock = threading.Lock()
+
+
+def get_line_offsets(source_file, num_offsets, step, filter_line, filter_settings=()):
+    """
+    Return the positions (as returned by `tell()`) in the text file `source_file`
+    after every `step`th data line, up to the `num_offsets`th one or the end of the file.
+
+    Data lines are the lines `filter_line` does not return `None` for, with `filter_settings`
+    the settings it depends on. The positions are kept for the most recently paged files
+    and only the lines after the last position known are read.
+    """
+    file_name = source_file.name
+    stat = os.stat(file_name)
+    key = (file_name, stat.st_size, stat.st_mtime_ns, source_file.encoding, step) + tuple(filter_settings)
+    with _line_offsets_lock:
+        offsets, complete = _line_offsets.pop(key, ((), False))
+        _line_offsets[key] = (offsets, complete)
+        while len(_line_offsets) > MAX_LINE_OFFSETS_FILES:
+            _line_offsets.popitem(last=False)
+    if len(offsets) >= num_offsets or complete:
+        return offsets
+
+    new_offsets = list(offsets)
+    # readline rather than iterating, which disables tell()
+    with open(file_name, encoding=source_file.encoding, errors=source_file.errors) as fh:
+        if new_offsets:
+            fh.seek(new_offsets[-1])
+        num_lines = 0
+        while len(new_offsets) < num_offsets:
+            line = fh.readline()
+            if not line:
+                complete = True
+                break
+            if filter_line(line) is not None:
+                num_lines += 1
+                if num_lines == step:
+                    new_offsets.append(fh.tell())
+                    num_lines = 0
+    new_offsets = tuple(new_offsets)
+    with _line_offsets_lock:
+        if key in _line_offsets and len(_line_offsets[key][0]) < len(new_offsets):
+            _line_offsets[key] = (new_offsets, complete)
+    return new_offsets
+
 
 class FilteredLineDataProvider(base.LimitedOffsetDataProvider):
     """
@@ -24,6 +72,9 @@ class FilteredLineDataProvider(base.LimitedOffsetDataProvider):
     to return.
     """
     DEFAULT_COMMENT_CHAR = '#'
+    # index the position in file sources after every this many data lines to seek to
+    #   when skipping to an offset (0 never seeks)
+    line_offsets_step = 10000
     settings = {
         'strip_lines': 'bool',
         'strip_newlines': 'bool',
@@ -68,18 +119,66 @@ class FilteredLineDataProvider(base.LimitedOffsetDataProvider):
         :returns: a line or `None`
         """
         if line is not None:
-            # ??: shouldn't it strip newlines regardless, if not why not use on of the base.dprovs
-            if self.strip_lines:
-                line = line.strip()
-            elif self.strip_newlines:
-                line = line.strip('\n')
-            if not self.provide_blank and line == '':
-                return None
-            elif self.comment_char and line.startswith(self.comment_char):
+            line = self.filter_line(line)
+            if line is None:
                 return None
 
         return super().filter(line)
 
+    def filter_line(self, line):
+        """
+        Strips `line` (if set to) and returns it, or `None` if it's blank
+        (and blank lines aren't provided) or a comment.
+
+        :param line: the incoming line from the source
+        :type line: str
+        :returns: a line or `None`
+        """
+        # ??: shouldn't it strip newlines regardless, if not why not use on of the base.dprovs
+        if self.strip_lines:
+            line = line.strip()
+        elif self.strip_newlines:
+            line = line.strip('\n')
+        if not self.provide_blank and line == '':
+            return None
+        elif self.comment_char and line.startswith(self.comment_char):
+            return None
+        return line
+
+    def filters_only_lines(self):
+        """
+        Are the valid data exactly the lines passing `filter_line`?
+
+        Meant to be overridden by providers filtering data further.
+        """
+        return self.filter_fn is None
+
+    def seek_offset(self):
+        """
+        Seeks a text file source to the position after the last data line
+        indexed before `offset` (see `get_line_offsets`) and returns the number of
+        data lines before it.
+
+        Only seeks when all lines passing `filter_line` are provided.
+        """
+        step = self.line_offsets_step
+        num_offsets = self.offset // step if step else 0
+        if not num_offsets or not self.filters_only_lines():
+            return 0
+        source = self.source
+        while isinstance(source, base.DataProvider):
+            source = source.source
+        if not isinstance(source, io.TextIOWrapper) or not isinstance(source.name, str) or not source.seekable():
+            return 0
+
+        filter_settings = (self.strip_lines, self.strip_newlines, self.provide_blank, self.comment_char)
+        offsets = get_line_offsets(source, num_offsets, step, self.filter_line, filter_settings)
+        num_offsets = min(num_offsets, len(offsets))
+        if not num_offsets:
+            return 0
+        source.seek(offsets[num_offsets - 1])
+        return num_offsets * step
+
 
 class RegexLineDataProvider(FilteredLineDataProvider):
     """
@@ -120,6 +219,9 @@ class RegexLineDataProvider(FilteredLineDataProvider):
             line = self.filter_by_regex(line)
         return line
 
+    def filters_only_lines(self):
+        return super().filters_only_lines() and not self.compiled_regex_list
+
     def filter_by_regex(self, line):
         matches = any([regex.match(line) for regex in self.compiled_regex_list])
         if self.invert:
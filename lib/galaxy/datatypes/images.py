@@ -329,6 +329,8 @@ class Mrc2014(Binary):
     False
     """
     file_ext = 'mrc'
+    # the map field of the header, checked first by mrcfile.validate
+    sniff_magic = ((208, b'MAP '),)
 
     def sniff(self, filename):
         # Handle the wierdness of mrcfile:
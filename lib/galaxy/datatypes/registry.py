@@ -5,6 +5,7 @@ Provides mapping between extensions and datatypes, mime-types, etc.
 import imp
 import logging
 import os
+from inspect import isclass
 from string import Template
 from typing import Dict
 
@@ -77,6 +78,7 @@ class Registry:
         self._edam_formats_mapping = None
         self._edam_data_mapping = None
         self._converters_by_datatype = {}
+        self._conversion_destinations = {}
         # Build sites
         self.build_sites = {}
         self.display_sites = {}
@@ -898,24 +900,43 @@ class Registry:
             ext = dataset_or_ext
             dataset = None
 
-        if self.get_datatype_by_extension(ext) is not None and self.get_datatype_by_extension(ext).matches_any(accepted_formats):
+        direct_match, convert_exts = self.get_conversion_destinations(ext, accepted_formats)
+        if direct_match:
             return True, None, None
-
-        for convert_ext in self.get_converters_by_datatype(ext):
-            convert_ext_datatype = self.get_datatype_by_extension(convert_ext)
-            if convert_ext_datatype is None:
-                self.log.warning(f"Datatype class not found for extension '{convert_ext}', which is used as target for conversion from datatype '{dataset.ext}'")
-            elif convert_ext_datatype.matches_any(accepted_formats):
-                converted_dataset = dataset and dataset.get_converted_files_by_type(convert_ext)
-                if converted_dataset:
-                    ret_data = converted_dataset
-                elif not converter_safe:
-                    continue
-                else:
-                    ret_data = None
-                return False, convert_ext, ret_data
+        for convert_ext in convert_exts:
+            converted_dataset = dataset and dataset.get_converted_files_by_type(convert_ext)
+            if converted_dataset:
+                ret_data = converted_dataset
+            elif not converter_safe:
+                continue
+            else:
+                ret_data = None
+            return False, convert_ext, ret_data
         return False, None, None
 
+    def get_conversion_destinations(self, ext, accepted_formats):
+        """
+        returns (direct_match, convert_exts)
+        - direct match is True iff the extension is of an accepted format
+        - convert_exts are the extensions of accepted formats the extension can be converted to
+        """
+        accepted_classes = tuple(datatype if isclass(datatype) else datatype.__class__ for datatype in accepted_formats)
+        key = (ext, accepted_classes)
+        if key not in self._conversion_destinations:
+            datatype = self.get_datatype_by_extension(ext)
+            if datatype is not None and datatype.matches_any(accepted_classes):
+                self._conversion_destinations[key] = (True, [])
+            else:
+                convert_exts = []
+                for convert_ext in self.get_converters_by_datatype(ext):
+                    convert_ext_datatype = self.get_datatype_by_extension(convert_ext)
+                    if convert_ext_datatype is None:
+                        self.log.warning(f"Datatype class not found for extension '{convert_ext}', which is used as target for conversion from datatype '{ext}'")
+                    elif convert_ext_datatype.matches_any(accepted_classes):
+                        convert_exts.append(convert_ext)
+                self._conversion_destinations[key] = (False, convert_exts)
+        return self._conversion_destinations[key]
+
     def get_composite_extensions(self):
         return [ext for (ext, d_type) in self.datatypes_by_extension.items() if d_type.composite_type is not None]
 
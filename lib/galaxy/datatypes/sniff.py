@@ -489,6 +489,49 @@ def guess_ext(fname, sniff_order, is_binary=False):
     return 'txt'  # default text data type file extension
 
 
+def guess_exts(fnames, sniff_order, is_binary=False):
+    """
+    Returns the extensions guessed by :func:`guess_ext` for each of ``fnames``.
+
+    >>> from galaxy.datatypes.registry import example_datatype_registry_for_sample
+    >>> datatypes_registry = example_datatype_registry_for_sample()
+    >>> sniff_order = datatypes_registry.sniff_order
+    >>> fnames = [get_test_fname(fname) for fname in ('interval.interval', '1.mrc', '1.excel.xls', '1.fastqsanger.gz')]
+    >>> guess_exts(fnames, sniff_order)
+    ['interval', 'mrc', 'excel.xls', 'fastqsanger.gz']
+    """
+    # sniff_order may be a one-shot iterator
+    sniff_order = list(sniff_order)
+    return [guess_ext(fname, sniff_order, is_binary=is_binary) for fname in fnames]
+
+
+def sniffer_ruled_out(datatype, file_prefix, is_binary=False):
+    """
+    Check the features of the file computed once in ``file_prefix`` against those
+    the datatype declares, to skip running sniffers that cannot match.
+    """
+    if hasattr(datatype, "sniff_prefix"):
+        datatype_compressed = getattr(datatype, "compressed", False)
+        if datatype_compressed and not file_prefix.compressed_format:
+            return True
+        if not datatype_compressed and file_prefix.compressed_format:
+            return True
+        if file_prefix.compressed_format and getattr(datatype, "compressed_format", None):
+            # In this case go a step further and compare the compressed format detected
+            # to the expected.
+            if file_prefix.compressed_format != datatype.compressed_format:
+                return True
+        # Text datatypes sniff the decoded prefix, which is None if the file is not UTF-8.
+        if not datatype.is_binary and file_prefix.binary:
+            return True
+    elif is_binary and not datatype.is_binary:
+        return True
+    sniff_magic = getattr(datatype, "sniff_magic", None)
+    if sniff_magic and not file_prefix.has_magic(sniff_magic):
+        return True
+    return False
+
+
 def run_sniffers_raw(filename_or_file_prefix, sniff_order, is_binary=False):
     """Run through sniffers specified by sniff_order, return None of None match.
     """
@@ -510,22 +553,12 @@ def run_sniffers_raw(filename_or_file_prefix, sniff_order, is_binary=False):
         successfully discovered.
         """
         try:
+            if sniffer_ruled_out(datatype, file_prefix, is_binary):
+                continue
             if hasattr(datatype, "sniff_prefix"):
-                datatype_compressed = getattr(datatype, "compressed", False)
-                if datatype_compressed and not file_prefix.compressed_format:
-                    continue
-                if not datatype_compressed and file_prefix.compressed_format:
-                    continue
-                if file_prefix.compressed_format and getattr(datatype, "compressed_format", None):
-                    # In this case go a step further and compare the compressed format detected
-                    # to the expected.
-                    if file_prefix.compressed_format != datatype.compressed_format:
-                        continue
                 if datatype.sniff_prefix(file_prefix):
                     file_ext = datatype.file_ext
                     break
-            elif is_binary and not datatype.is_binary:
-                continue
             elif datatype.sniff(fname):
                 file_ext = datatype.file_ext
                 break
@@ -545,36 +578,46 @@ def zip_single_fileobj(path):
 class FilePrefix:
 
     def __init__(self, filename):
-        non_utf8_error = None
-        compressed_format = None
-        contents_header_bytes = None
-        contents_header = None  # First MAX_BYTES of the file.
-        truncated = False
-        # A future direction to optimize sniffing even more for sniffers at the top of the list
-        # is to lazy load contents_header based on what interface is requested. For instance instead
-        # of returning a StringIO directly in string_io() return an object that reads the contents and
-        # populates contents_header while providing a StringIO-like interface until the file is read
-        # but then would fallback to native string_io()
+        # The first SNIFF_PREFIX_BYTES of the file are read once here and shared by all the
+        # sniffers, they are only decoded (into contents_header) once a sniffer needs text.
+        compressed_format, f = compression_utils.get_fileobj_raw(filename, "rb")
         try:
-            compressed_format, f = compression_utils.get_fileobj_raw(filename, "rb")
-            try:
-                contents_header_bytes = f.read(SNIFF_PREFIX_BYTES)
-                truncated = len(contents_header_bytes) == SNIFF_PREFIX_BYTES
-                contents_header = contents_header_bytes.decode("utf-8")
-            finally:
-                f.close()
-        except UnicodeDecodeError as e:
-            non_utf8_error = e
-
-        self.truncated = truncated
+            contents_header_bytes = f.read(SNIFF_PREFIX_BYTES)
+        finally:
+            f.close()
+
+        self.truncated = len(contents_header_bytes) == SNIFF_PREFIX_BYTES
         self.filename = filename
-        self.non_utf8_error = non_utf8_error
-        self.binary = non_utf8_error is not None  # obviously wrong
         self.compressed_format = compressed_format
-        self.contents_header = contents_header
         self.contents_header_bytes = contents_header_bytes
+        self._contents_header = None
+        self._non_utf8_error = None
+        self._decoded = False
         self._file_size = None
 
+    def _decode(self):
+        if not self._decoded:
+            try:
+                self._contents_header = self.contents_header_bytes.decode("utf-8")
+            except UnicodeDecodeError as e:
+                self._non_utf8_error = e
+            self._decoded = True
+
+    @property
+    def contents_header(self):
+        """The first SNIFF_PREFIX_BYTES of the file decoded, None if not valid UTF-8."""
+        self._decode()
+        return self._contents_header
+
+    @property
+    def non_utf8_error(self):
+        self._decode()
+        return self._non_utf8_error
+
+    @property
+    def binary(self):
+        return self.non_utf8_error is not None  # obviously wrong
+
     @property
     def file_size(self):
         if self._file_size is None:
@@ -588,7 +631,9 @@ class FilePrefix:
         return rval
 
     def startswith(self, prefix):
-        return self.string_io().read(len(prefix)) == prefix
+        if self.non_utf8_error is not None:
+            raise self.non_utf8_error
+        return self.contents_header.startswith(prefix)
 
     def line_iterator(self):
         s = self.string_io()
@@ -621,6 +666,12 @@ class FilePrefix:
     def startswith_bytes(self, test_bytes):
         return self.contents_header_bytes.startswith(test_bytes)
 
+    def has_magic(self, magic):
+        """
+        Check for any of the ``(offset, bytes)`` signatures in ``magic``.
+        """
+        return any(self.contents_header_bytes[offset:offset + len(test_bytes)] == test_bytes for offset, test_bytes in magic)
+
 
 def build_sniff_from_prefix(klass):
     # Build and attach a sniff function to this class (klass) from the sniff_prefix function
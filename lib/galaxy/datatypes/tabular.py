@@ -25,6 +25,7 @@ from galaxy.datatypes.sniff import (
     iter_headers,
     validate_tabular,
 )
+from galaxy.datatypes.util import block_scan
 from galaxy.util import compression_utils
 from . import dataproviders
 
@@ -357,7 +358,24 @@ class Tabular(TabularData):
         column_names = None
         column_types = []
         first_line_column_types = [default_column_type]  # default value is one column of type str
+        scan = None
         if dataset.has_data():
+            # Scan uncompressed text files in blocks, this gives the same metadata as reading them line by line below
+            scan = block_scan.scan_tabular(dataset.file_name, guess_column_type, skip=skip,
+                                           first_line_is_header=requested_skip is None, max_data_lines=max_data_lines,
+                                           max_guess_type_data_lines=max_guess_type_data_lines)
+        if scan is not None:
+            if scan.first_line is not None:
+                column_names = self.get_column_names(first_line=scan.first_line)
+            data_lines = scan.data_lines
+            comment_lines = scan.comment_lines
+            column_types = scan.column_types
+            if scan.first_line_column_types is not None:
+                first_line_column_types = scan.first_line_column_types
+            if scan.position is not None and scan.position != dataset.get_size():
+                data_lines = None  # Clear optional data_lines metadata value
+                comment_lines = None  # Clear optional comment_lines metadata value; additional comment lines could appear below this point
+        elif dataset.has_data():
             # NOTE: if skip > num_check_lines, we won't detect any metadata, and will use default
             with compression_utils.get_fileobj(dataset.file_name) as dataset_fh:
                 i = 0
@@ -0,0 +1,265 @@
+"""
+Scan text files for metadata in blocks of bytes with NumPy.
+
+The results are those of reading the files line by line in text mode, as
+:meth:`galaxy.datatypes.data.Text.count_data_lines` and
+:meth:`galaxy.datatypes.tabular.Tabular.set_meta` do. Files that text mode
+could read differently from their bytes - compressed files, files with
+carriage returns not ending lines as part of ``\\r\\n`` or that are not valid
+UTF-8 - are not scanned, the functions return ``None`` for these instead.
+"""
+import codecs
+import collections
+
+import numpy as np
+
+from galaxy.util import compression_utils
+
+# blocks start small for (the many) small files and datatypes checking few lines
+MIN_BLOCK_SIZE = 2 ** 16
+MAX_BLOCK_SIZE = 2 ** 20
+# size of the lines Text.count_data_lines reads at most, longer lines count several times
+TEXT_CHUNK_SIZE = 2 ** 15
+# int() may refuse to convert longer strings of digits (CVE-2020-10735), leave these to guess_column_type
+MAX_INT_DIGITS = 4000
+# column types guessed for tabular data, each overruling the ones before it
+COLUMN_TYPES = ['int', 'float', 'list', 'str']
+INT, FLOAT, LIST, STR = range(len(COLUMN_TYPES))
+
+NEWLINE, CARRIAGE_RETURN, TAB, HASH = b'\n\r\t#'
+# characters str.strip() removes
+SPACE = np.zeros(256, dtype=bool)
+SPACE[[9, 10, 11, 12, 13, 28, 29, 30, 31, 32]] = True
+# classes of bytes in tabular fields: what int() and float() accept, commas making lists,
+# bytes that may be part of an int or float ('nan', 'inf', ' 1e5', non-ASCII digits or
+# whitespace, ...) and bytes that never are
+DIGIT, DOT, SIGN, COMMA, SOFT, HARD = range(6)
+BYTE_CLASSES = np.full(256, HARD, dtype=np.uint8)
+BYTE_CLASSES[SPACE] = SOFT
+BYTE_CLASSES[128:] = SOFT
+BYTE_CLASSES[list(b'eEiInNfFtTyYaA')] = SOFT
+BYTE_CLASSES[list(b'0123456789')] = DIGIT
+BYTE_CLASSES[list(b'.')] = DOT
+BYTE_CLASSES[list(b'+-')] = SIGN
+BYTE_CLASSES[list(b',')] = COMMA
+
+TabularScan = collections.namedtuple('TabularScan', [
+    'first_line', 'data_lines', 'comment_lines', 'column_types', 'first_line_column_types', 'position'
+])
+
+
+class UnsupportedFile(Exception):
+    """The file could be read differently in text mode than scanned."""
+
+
+def count_data_lines(filename):
+    """
+    Count the lines of data in the file, skipping blank lines and comments.
+
+    :returns: the number of data lines, or ``None`` if the file can't be scanned.
+    """
+    data_lines = 0
+    try:
+        for block, arr, starts, content_ends, line_ends in _line_blocks(filename, max_line_length=TEXT_CHUNK_SIZE):
+            if (line_ends - starts > TEXT_CHUNK_SIZE).any():
+                raise UnsupportedFile()
+            # find the first non-space byte of the lines, stepping over leading whitespace
+            padded = np.append(arr, NEWLINE)
+            first = starts.copy()
+            indented = np.flatnonzero(first < content_ends)
+            while len(indented):
+                indented = indented[SPACE[padded[first[indented]]] & (first[indented] < content_ends[indented])]
+                first[indented] += 1
+            non_blank = first < content_ends
+            first_bytes = padded[first]
+            # lines starting with non-ASCII characters may start with (non-ASCII) whitespace
+            unsure = non_blank & (first_bytes >= 128)
+            data_lines += int(np.count_nonzero(non_blank & ~unsure & (first_bytes != HASH)))
+            for i in np.flatnonzero(unsure):
+                line = block[starts[i]:line_ends[i]].decode('utf-8').strip()
+                if line and not line.startswith('#'):
+                    data_lines += 1
+    except UnsupportedFile:
+        return None
+    return data_lines
+
+
+def scan_tabular(filename, guess_column_type, skip=0, first_line_is_header=True,
+                 max_data_lines=None, max_guess_type_data_lines=None):
+    """
+    Count the data and comment lines of a tabular file and guess the types of its columns.
+
+    Comments are the first ``skip`` lines, blank lines and lines starting with '#'.
+    Column types are guessed from the fields of the first ``max_guess_type_data_lines``
+    data lines (all if ``None``), each type in ``COLUMN_TYPES`` overruling the ones before
+    it, and ``None`` for columns only ever empty. Fields whose type can't be told from
+    their bytes are passed to ``guess_column_type``. If ``first_line_is_header``, the
+    types of the first line are kept apart, as ``first_line_column_types``.
+
+    Scanning stops after ``max_data_lines`` data lines, ``position`` is then the
+    position after the last line scanned.
+
+    :returns: a ``TabularScan``, or ``None`` if the file can't be scanned.
+    """
+    first_line = None
+    first_line_column_types = None
+    data_lines = comment_lines = 0
+    column_ranks = np.full(0, -1, dtype=np.int8)
+    rank_by_field = {}
+    position = None
+    num_lines = 0
+    offset = 0
+
+    def guess_ranks(fields):
+        ranks = []
+        for field in fields:
+            if field not in rank_by_field:
+                column_type = guess_column_type(field.decode('utf-8'))
+                rank_by_field[field] = -1 if column_type is None else COLUMN_TYPES.index(column_type)
+            ranks.append(rank_by_field[field])
+        return np.array(ranks, dtype=np.int8)
+
+    try:
+        for block, arr, starts, content_ends, line_ends in _line_blocks(filename):
+            line_numbers = np.arange(num_lines, num_lines + len(starts))
+            first_bytes = arr[starts]
+            is_data = (line_numbers >= skip) & (content_ends > starts) & (first_bytes != HASH)
+            data_line_counts = data_lines + np.cumsum(is_data)
+            if max_data_lines is not None:
+                last = np.flatnonzero(data_line_counts >= max_data_lines)
+                if len(last):
+                    end = last[0] + 1
+                    starts, content_ends, line_ends = starts[:end], content_ends[:end], line_ends[:end]
+                    is_data, data_line_counts = is_data[:end], data_line_counts[:end]
+                    position = offset + int(line_ends[-1])
+            guessed = is_data.copy()
+            if max_guess_type_data_lines is not None:
+                guessed &= data_line_counts <= max_guess_type_data_lines
+
+            if num_lines == 0:
+                first_line = block[:content_ends[0]].decode('utf-8')
+                if is_data[0] and first_line_is_header:
+                    first_line_column_types = []
+                    if guessed[0]:
+                        first_line_ranks = guess_ranks(block[:content_ends[0]].split(b'\t'))
+                        first_line_column_types = [COLUMN_TYPES[r] if r >= 0 else None for r in first_line_ranks]
+                    column_ranks = np.full(len(first_line_column_types), -1, dtype=np.int8)
+                    guessed[0] = False
+            if guessed.any():
+                column_ranks = _guess_column_ranks(block, arr, starts[guessed], content_ends[guessed], column_ranks, guess_ranks)
+
+            num_lines += len(starts)
+            offset += len(block)
+            data_lines = int(data_line_counts[-1])
+            comment_lines = num_lines - data_lines
+            if position is not None:
+                break
+    except UnsupportedFile:
+        return None
+
+    column_types = [COLUMN_TYPES[r] if r >= 0 else None for r in column_ranks]
+    return TabularScan(first_line, data_lines, comment_lines, column_types, first_line_column_types, position)
+
+
+def _guess_column_ranks(block, arr, starts, ends, column_ranks, guess_ranks):
+    # split the lines into fields
+    tabs = np.flatnonzero(arr == TAB)
+    line_of_tab = np.searchsorted(starts, tabs, side='right') - 1
+    in_lines = line_of_tab >= 0
+    in_lines[in_lines] &= tabs[in_lines] < ends[line_of_tab[in_lines]]
+    tabs = tabs[in_lines]
+    field_starts = np.sort(np.concatenate((starts, tabs + 1)))
+    field_ends = np.sort(np.concatenate((tabs, ends)))
+    line_of_field = np.searchsorted(starts, field_starts, side='right') - 1
+    columns = np.arange(len(field_starts)) - np.searchsorted(field_starts, starts)[line_of_field]
+
+    # count the classes of bytes in each field
+    byte_classes = BYTE_CLASSES[arr]
+
+    def count(byte_class):
+        cumulative = np.zeros(len(arr) + 1, dtype=np.int32)
+        np.cumsum(byte_classes == byte_class, out=cumulative[1:])
+        return cumulative[field_ends] - cumulative[field_starts]
+
+    lengths = field_ends - field_starts
+    commas, hard, soft, dots, signs = (count(c) for c in (COMMA, HARD, SOFT, DOT, SIGN))
+    is_list = commas > 0
+    is_str = ~is_list & (hard > 0)
+    unsure = ~is_list & ~is_str & ((soft > 0) | (lengths > MAX_INT_DIGITS))
+    # only digits, dots and signs left
+    numeric = (lengths > 0) & ~is_list & ~is_str & ~unsure
+    leading_sign = np.append(byte_classes, HARD)[field_starts] == SIGN
+    is_number = numeric & (lengths - dots - signs > 0) & (dots <= 1) & ((signs == 0) | ((signs == 1) & leading_sign))
+    ranks = np.full(len(field_starts), -1, dtype=np.int8)
+    ranks[is_list] = LIST
+    ranks[is_str | (numeric & ~is_number)] = STR
+    ranks[is_number & (dots == 0)] = INT
+    ranks[is_number & (dots == 1)] = FLOAT
+
+    num_columns = max(len(column_ranks), int(columns.max()) + 1)
+    column_ranks = np.concatenate((column_ranks, np.full(num_columns - len(column_ranks), -1, dtype=np.int8)))
+    np.maximum.at(column_ranks, columns, ranks)
+    # nothing overrules str, guess the other fields
+    unsure &= column_ranks[columns] < STR
+    if unsure.any():
+        fields = [block[s:e] for s, e in zip(field_starts[unsure], field_ends[unsure])]
+        np.maximum.at(column_ranks, columns[unsure], guess_ranks(fields))
+    return column_ranks
+
+
+def _line_blocks(filename, max_line_length=None):
+    """
+    Yield the blocks of complete lines of an uncompressed file as the bytes, a NumPy
+    array of these and the positions of the starts, ends (before '\\n' or '\\r\\n') and
+    ends (after these) of the lines in the block.
+
+    Files with lines longer than ``max_line_length`` are not scanned to their end.
+    """
+    compressed_format, fh = compression_utils.get_fileobj_raw(filename, 'rb')
+    with fh:
+        if compressed_format:
+            raise UnsupportedFile()
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        block_size = MIN_BLOCK_SIZE
+        # the data read since the last newline, joined once the line is complete
+        pending = []
+        pending_size = 0
+        while True:
+            data = fh.read(block_size)
+            block_size = min(block_size * 2, MAX_BLOCK_SIZE)
+            try:
+                decoder.decode(data, final=not data)
+            except UnicodeDecodeError:
+                raise UnsupportedFile()
+            if data:
+                end = data.rfind(b'\n') + 1
+                if not end:
+                    pending.append(data)
+                    pending_size += len(data)
+                    if max_line_length is not None and pending_size > max_line_length:
+                        raise UnsupportedFile()
+                    continue
+                pending.append(data[:end])
+                block = b''.join(pending)
+                pending = [data[end:]]
+                pending_size = len(data) - end
+            else:
+                block = b''.join(pending)
+                if not block:
+                    return
+            arr = np.frombuffer(block, dtype=np.uint8)
+            carriage_returns = np.flatnonzero(arr == CARRIAGE_RETURN)
+            if len(carriage_returns) and (arr[np.minimum(carriage_returns + 1, len(arr) - 1)] != NEWLINE).any():
+                raise UnsupportedFile()
+            newlines = np.flatnonzero(arr == NEWLINE)
+            content_ends = newlines
+            line_ends = newlines + 1
+            if not len(newlines) or line_ends[-1] != len(arr):
+                content_ends = np.append(content_ends, len(arr))
+                line_ends = np.append(line_ends, len(arr))
+            starts = np.concatenate(([0], line_ends[:-1]))
+            # lines end with '\r\n' or '\n' here
+            content_ends = content_ends - ((content_ends > starts) & (arr[content_ends - 1] == CARRIAGE_RETURN))
+            yield block, arr, starts, content_ends, line_ends
+            if not data:
+                return
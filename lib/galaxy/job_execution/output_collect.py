@@ -194,7 +194,8 @@ class JobContext(ModelPersistenceContext, BaseJobContext):
             input_dbkey,
             object_store,
             final_job_state,
-            flush_per_n_datasets=None):
+            flush_per_n_datasets=None,
+            discovered_datasets_workers=1):
         self.tool = tool
         self.metadata_source_provider = metadata_source_provider
         self.permission_provider = permission_provider
@@ -207,6 +208,7 @@ class JobContext(ModelPersistenceContext, BaseJobContext):
         self.object_store = object_store
         self.final_job_state = final_job_state
         self.flush_per_n_datasets = flush_per_n_datasets
+        self.discovered_datasets_workers = discovered_datasets_workers
 
     @property
     def work_context(self):
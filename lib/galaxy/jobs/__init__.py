@@ -17,6 +17,7 @@ from abc import (
     ABCMeta,
     abstractmethod,
 )
+from collections import defaultdict
 from json import loads
 from typing import Any, Dict, List
 
@@ -53,6 +54,10 @@ from galaxy.jobs.mapper import (
     JobMappingException,
     JobRunnerMapper,
 )
+from galaxy.jobs.readiness import (
+    READY_TRACKING_METHODS,
+    READY_TRACKING_QUERY,
+)
 from galaxy.jobs.runners import BaseJobRunner, JobState
 from galaxy.metadata import get_metadata_compute_strategy
 from galaxy.model import store
@@ -314,6 +319,7 @@ class JobConfiguration(ConfiguresHandlers):
         self.handler_assignment_methods_configured = False
         self.handler_max_grab = None
         self.handler_ready_window_size = None
+        self.handler_ready_tracking = None
         self.destinations = {}
         self.default_destination_id = None
         self.tools = {}
@@ -405,6 +411,10 @@ class JobConfiguration(ConfiguresHandlers):
             log.info("Tag [%s] handlers: %s", tag, ', '.join(handlers))
         self.handler_ready_window_size = int(handling_config_dict.get(
             'ready_window_size', JobConfiguration.DEFAULT_HANDLER_READY_WINDOW_SIZE))
+        self.handler_ready_tracking = handling_config_dict.get('ready_tracking', READY_TRACKING_QUERY)
+        assert self.handler_ready_tracking in READY_TRACKING_METHODS, \
+            "Invalid job handler ready tracking method '{}', must be one of: {}".format(
+                self.handler_ready_tracking, ', '.join(READY_TRACKING_METHODS))
 
         # Parse environments
         job_metrics = self.app.job_metrics
@@ -560,6 +570,7 @@ class JobConfiguration(ConfiguresHandlers):
         else:
             self.app.application_stack.init_job_handling(self)
         self.handler_ready_window_size = JobConfiguration.DEFAULT_HANDLER_READY_WINDOW_SIZE
+        self.handler_ready_tracking = READY_TRACKING_QUERY
         # Set the destination
         self.default_destination_id = 'local'
         self.destinations['local'] = [JobDestination(id='local', runner='local')]
@@ -1336,6 +1347,7 @@ class JobWrapper(HasResourceParameters):
 
             self.sa_session.add(job)
             self.sa_session.flush()
+            self._job_state_changed(job)
         else:
             for dataset_assoc in job.output_datasets:
                 dataset = dataset_assoc.dataset
@@ -1393,6 +1405,7 @@ class JobWrapper(HasResourceParameters):
         job.set_state(model.Job.states.RESUBMITTED)
         self.sa_session.add(job)
         self.sa_session.flush()
+        self._job_state_changed(job)
 
     def change_state(self, state, info=False, flush=True, job=None):
         job_supplied = job is not None
@@ -1414,6 +1427,13 @@ class JobWrapper(HasResourceParameters):
         job.update_output_states(self.app.application_stack.supports_skip_locked())
         if flush:
             self.sa_session.flush()
+        self._job_state_changed(job)
+
+    def _job_state_changed(self, job):
+        # Keep the handler's dispatched job counts (if maintained) up to date
+        job_counts = getattr(self.queue, 'job_counts', None)
+        if job_counts is not None:
+            job_counts.job_state_changed(job)
 
     def get_state(self):
         job = self.get_job()
@@ -1441,6 +1461,7 @@ class JobWrapper(HasResourceParameters):
         self.sa_session.add(job)
         if flush:
             self.sa_session.flush()
+        self._job_state_changed(job)
 
     def set_external_id(self, external_id, job=None, flush=True):
         if job is None:
@@ -1468,7 +1489,7 @@ class JobWrapper(HasResourceParameters):
             dest_params, self.app.config, key, default
         )
 
-    def enqueue(self):
+    def enqueue(self, flush=True):
         job = self.get_job()
         # Change to queued state before handing to worker thread so the runner won't pick it up again
         self.change_state(model.Job.states.QUEUED, flush=False, job=job)
@@ -1476,7 +1497,8 @@ class JobWrapper(HasResourceParameters):
         self.set_job_destination(self.job_destination, None, flush=False, job=job)
         # Set object store after job destination so can leverage parameters...
         self._set_object_store_ids(job)
-        self.sa_session.flush()
+        if flush:
+            self.sa_session.flush()
 
     def _set_object_store_ids(self, job):
         if job.object_store_id:
@@ -1756,14 +1778,15 @@ class JobWrapper(HasResourceParameters):
                             out_data=out_data, param_dict=param_dict,
                             tool=self.tool, stdout=job.stdout, stderr=job.stderr)
 
-        collected_bytes = 0
+        collected_bytes_by_object_store = defaultdict(int)
         # Once datasets are collected, set the total dataset size (includes extra files)
         for dataset_assoc in job.output_datasets:
             if not dataset_assoc.dataset.dataset.purged:
-                collected_bytes += dataset_assoc.dataset.set_total_size()
+                collected_bytes_by_object_store[dataset_assoc.dataset.dataset.object_store_id] += dataset_assoc.dataset.set_total_size()
 
         if job.user:
-            job.user.adjust_total_disk_usage(collected_bytes)
+            for object_store_id, collected_bytes in collected_bytes_by_object_store.items():
+                job.user.adjust_total_disk_usage(collected_bytes, object_store_id)
 
         # Empirically, we need to update job.user and
         # job.workflow_invocation_step.workflow_invocation in separate
@@ -1784,6 +1807,7 @@ class JobWrapper(HasResourceParameters):
             # If job was composed of tasks, don't attempt to recollect statistics
             self._collect_metrics(job, job_metrics_directory)
         self.sa_session.flush()
+        self._job_state_changed(job)
         if job.state == job.states.ERROR:
             self._report_error()
         cleanup_job = self.cleanup_job
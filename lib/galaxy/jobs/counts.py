@@ -0,0 +1,146 @@
+"""
+Incrementally maintained counts of dispatched jobs used for job concurrency limits.
+
+By default the job handler recomputes the number of queued and running jobs
+per user and per destination from the database, either once for every job
+waiting to run or (with ``cache_user_job_count``) once per iteration of the
+handler queue. :class:`JobCounts` instead seeds these counts once and keeps
+them up to date as the job wrappers of this process change job states, so that
+limit checks are dictionary lookups. Changes made by other processes are picked
+up by periodically reconciling the counts with the database, the difference
+found at that point is reported as drift.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy.sql.expression import select
+
+from galaxy import model
+
+log = logging.getLogger(__name__)
+
+# States counted against the user's overall concurrency limit
+USER_COUNTED_STATES = (model.Job.states.QUEUED, model.Job.states.RUNNING, model.Job.states.RESUBMITTED)
+# States counted against per-destination concurrency limits
+DESTINATION_COUNTED_STATES = (model.Job.states.QUEUED, model.Job.states.RUNNING)
+
+
+class JobCounts:
+    """Track the number of dispatched jobs per user, per user and destination,
+    and per destination.
+
+    The state of every counted job is recorded by job id so that a transition
+    can be applied without knowing the previous state of the job, and so that
+    recording the same state twice has no effect.
+    """
+
+    def __init__(self, sa_session, reconcile_interval, galaxy_statsd_client=None):
+        self.sa_session = sa_session
+        self.reconcile_interval = reconcile_interval
+        self.galaxy_statsd_client = galaxy_statsd_client
+        self.last_reconcile = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # job id -> (user id, destination id, state) for every counted job
+        self._jobs = {}
+        self._user = defaultdict(int)
+        self._user_destination = defaultdict(lambda: defaultdict(int))
+        self._destination = defaultdict(int)
+
+    @property
+    def seeded(self):
+        return self.last_reconcile is not None
+
+    def user_job_count(self, user_id):
+        return self._user.get(user_id, 0)
+
+    def user_job_count_per_destination(self, user_id):
+        with self._lock:
+            return dict(self._user_destination.get(user_id, {}))
+
+    def total_job_count_per_destination(self):
+        with self._lock:
+            return dict(self._destination)
+
+    def job_state_changed(self, job):
+        """Record the current state (and destination) of ``job``."""
+        if not self.seeded:
+            # Everything will be picked up when the counts are seeded
+            return
+        with self._lock:
+            self._remove(job.id)
+            self._add(job.id, job.user_id, job.destination_id, job.state)
+
+    def job_resubmitted(self, job, destination_id):
+        """Count the resubmitted ``job`` as queued at ``destination_id``, where it
+        is being dispatched again, instead of how it was counted before.
+        """
+        if not self.seeded:
+            return
+        with self._lock:
+            self._remove(job.id)
+            self._add(job.id, job.user_id, destination_id, model.Job.states.QUEUED)
+
+    def reconcile_if_due(self):
+        if self.last_reconcile is None or time.time() - self.last_reconcile > self.reconcile_interval:
+            self.reconcile()
+
+    def reconcile(self):
+        """Replace the counts with those computed from the database, logging
+        (and sending to statsd, if configured) the number of jobs that were
+        counted differently.
+        """
+        job_table = model.Job.table
+        rows = self.sa_session.execute(
+            select([job_table.c.id, job_table.c.user_id, job_table.c.destination_id, job_table.c.state])
+            .where(job_table.c.state.in_(USER_COUNTED_STATES)))
+        jobs = {row[0]: (row[1], row[2], row[3]) for row in rows}
+        with self._lock:
+            seeded = self.seeded
+            drift = 0
+            if seeded:
+                drift = sum(1 for job_id in set(jobs) | set(self._jobs) if jobs.get(job_id) != self._jobs.get(job_id))
+            self._reset()
+            for job_id, (user_id, destination_id, state) in jobs.items():
+                self._add(job_id, user_id, destination_id, state)
+            self.last_reconcile = time.time()
+        if not seeded:
+            log.debug("Job counts seeded with %d dispatched job(s)", len(jobs))
+            return
+        if drift:
+            log.debug("Job counts reconciled with %d dispatched job(s), %d counted differently", len(jobs), drift)
+        if self.galaxy_statsd_client:
+            self.galaxy_statsd_client.incr('galaxy.jobs.handler.job_counts.drift', drift)
+
+    def _add(self, job_id, user_id, destination_id, state):
+        if state not in USER_COUNTED_STATES:
+            return
+        self._jobs[job_id] = (user_id, destination_id, state)
+        if user_id is not None:
+            self._user[user_id] += 1
+        if state in DESTINATION_COUNTED_STATES:
+            self._user_destination[user_id][destination_id] += 1
+            self._destination[destination_id] += 1
+
+    def _remove(self, job_id):
+        counted = self._jobs.pop(job_id, None)
+        if counted is None:
+            return
+        user_id, destination_id, state = counted
+        if user_id is not None:
+            self._decrement(self._user, user_id)
+        if state in DESTINATION_COUNTED_STATES:
+            self._decrement(self._user_destination[user_id], destination_id)
+            if not self._user_destination[user_id]:
+                del self._user_destination[user_id]
+            self._decrement(self._destination, destination_id)
+
+    @staticmethod
+    def _decrement(counts, key):
+        counts[key] -= 1
+        if counts[key] <= 0:
+            del counts[key]
@@ -11,6 +11,10 @@ from queue import (
 )
 
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import (
+    joinedload,
+    selectinload,
+)
 from sqlalchemy.sql.expression import (
     and_,
     func,
@@ -26,7 +30,13 @@ from galaxy.jobs import (
     JobWrapper,
     TaskWrapper
 )
+from galaxy.jobs.counts import JobCounts
 from galaxy.jobs.mapper import JobNotReadyException
+from galaxy.jobs.readiness import (
+    JobReadinessTracker,
+    query_ready_jobs,
+    READY_TRACKING_INCREMENTAL,
+)
 from galaxy.util import unicodify
 from galaxy.util.custom_logging import get_logger
 from galaxy.util.monitors import Monitors
@@ -37,6 +47,7 @@ log = get_logger(__name__)
 
 # States for running a job. These are NOT the same as data states
 JOB_WAIT, JOB_ERROR, JOB_INPUT_ERROR, JOB_INPUT_DELETED, JOB_READY, JOB_DELETED, JOB_ADMIN_DELETED, JOB_USER_OVER_QUOTA, JOB_USER_OVER_TOTAL_WALLTIME = 'wait', 'error', 'input_error', 'input_deleted', 'ready', 'deleted', 'admin_deleted', 'user_over_quota', 'user_over_total_walltime'
+JOB_ASSOCIATIONS_LOAD_CHUNK_SIZE = 1000
 DEFAULT_JOB_PUT_FAILURE_MESSAGE = 'Unable to run job due to a misconfiguration of the Galaxy job running system.  Please contact a site administrator.'
 
 
@@ -60,7 +71,7 @@ class JobHandler(JobHandlerI):
         self.dispatcher = DefaultJobDispatcher(app)
         # Queues for starting and stopping jobs
         self.job_queue = JobHandlerQueue(app, self.dispatcher)
-        self.job_stop_queue = JobHandlerStopQueue(app, self.dispatcher)
+        self.job_stop_queue = JobHandlerStopQueue(app, self.dispatcher, job_counts=self.job_queue.job_counts)
 
     def start(self):
         self.job_queue.start()
@@ -169,6 +180,14 @@ class JobHandlerQueue(Monitors):
 
         # Initialize structures for handling job limits
         self.__clear_job_count()
+        # Maintains dispatched job counts between iterations if enabled
+        self.job_counts = None
+        if self.track_jobs_in_database and self.app.config.job_count_reconcile_interval:
+            self.job_counts = JobCounts(
+                self.sa_session,
+                self.app.config.job_count_reconcile_interval,
+                galaxy_statsd_client=self.app.execution_timer_factory.galaxy_statsd_client,
+            )
 
         # Keep track of the pid that started the job manager, only it
         # has valid threads
@@ -179,6 +198,15 @@ class JobHandlerQueue(Monitors):
         self.waiting_jobs = []
         # Contains wrappers of jobs that are limited or ready (so they aren't created unnecessarily/multiple times)
         self.job_wrappers = {}
+        # Tracks inputs of new jobs if incremental ready tracking is enabled
+        self.readiness_tracker = None
+        if self.track_jobs_in_database and self.app.job_config.handler_ready_tracking == READY_TRACKING_INCREMENTAL:
+            self.readiness_tracker = JobReadinessTracker(
+                self.sa_session,
+                self.app.config.server_name,
+                self.app.job_config.handler_ready_window_size,
+                user_activation_on=self.app.config.user_activation_on,
+            )
         name = "JobHandlerQueue.monitor_thread"
         self._init_monitor_thread(name, target=self.__monitor, config=app.config)
         self.job_grabber = None
@@ -214,6 +242,43 @@ class JobHandlerQueue(Monitors):
         job = self.sa_session.query(model.Job).get(id)
         return job, self.job_wrapper(job, use_persisted_destination=True)
 
+    def job_pairs_for_ids(self, ids):
+        """Like :meth:`job_pair_for_id` but loads the jobs (and their
+        associations) for all ``ids`` at once.
+        """
+        jobs = self.__load_job_associations(ids)
+        return [(job, self.job_wrapper(job, use_persisted_destination=True)) for job in jobs]
+
+    def __load_job_associations(self, job_ids):
+        """Load jobs with the associations needed to check, wrap and dispatch
+        them in a fixed number of queries, rather than lazily loading them job
+        by job. Jobs already present in the session get their unloaded
+        associations populated.
+        """
+        jobs = []
+        job_ids = list(job_ids)
+        for i in range(0, len(job_ids), JOB_ASSOCIATIONS_LOAD_CHUNK_SIZE):
+            chunk = job_ids[i:i + JOB_ASSOCIATIONS_LOAD_CHUNK_SIZE]
+            jobs.extend(self.sa_session.query(model.Job).filter(model.Job.table.c.id.in_(chunk)).options(
+                joinedload(model.Job.user),
+                joinedload(model.Job.galaxy_session),
+                selectinload(model.Job.parameters),
+                selectinload(model.Job.tasks),
+                selectinload(model.Job.input_datasets)
+                .joinedload(model.JobToInputDatasetAssociation.dataset)
+                .joinedload(model.HistoryDatasetAssociation.dataset),
+                selectinload(model.Job.input_library_datasets)
+                .joinedload(model.JobToInputLibraryDatasetAssociation.dataset)
+                .joinedload(model.LibraryDatasetDatasetAssociation.dataset),
+                selectinload(model.Job.output_datasets)
+                .joinedload(model.JobToOutputDatasetAssociation.dataset)
+                .joinedload(model.HistoryDatasetAssociation.dataset),
+                selectinload(model.Job.output_library_datasets)
+                .joinedload(model.JobToOutputLibraryDatasetAssociation.dataset)
+                .joinedload(model.LibraryDatasetDatasetAssociation.dataset),
+            ).all())
+        return sorted(jobs, key=lambda job: job.id)
+
     def __check_jobs_at_startup(self):
         """
         Checks all jobs that are in the 'new', 'queued', 'running', or 'stopped' state in
@@ -337,45 +402,23 @@ class JobHandlerQueue(Monitors):
             # Clear the session so we get fresh states for job and all datasets
             self.sa_session.expunge_all()
             # Fetch all new jobs
-            hda_not_ready = self.sa_session.query(model.Job.id).enable_eagerloads(False) \
-                .join(model.JobToInputDatasetAssociation) \
-                .join(model.HistoryDatasetAssociation) \
-                .join(model.Dataset) \
-                .filter(and_(model.Job.state == model.Job.states.NEW,
-                             model.Dataset.state.in_(model.Dataset.non_ready_states))).subquery()
-            ldda_not_ready = self.sa_session.query(model.Job.id).enable_eagerloads(False) \
-                .join(model.JobToInputLibraryDatasetAssociation) \
-                .join(model.LibraryDatasetDatasetAssociation) \
-                .join(model.Dataset) \
-                .filter(and_(model.Job.state == model.Job.states.NEW,
-                             model.Dataset.state.in_(model.Dataset.non_ready_states))).subquery()
-            rank = func.rank().over(partition_by=model.Job.table.c.user_id,
-                                    order_by=model.Job.table.c.id).label('rank')
-            job_filter_conditions = (
-                (model.Job.state == model.Job.states.NEW),
-                (model.Job.handler == self.app.config.server_name),
-                ~model.Job.table.c.id.in_(hda_not_ready),
-                ~model.Job.table.c.id.in_(ldda_not_ready))
-            if self.app.config.user_activation_on:
-                job_filter_conditions = job_filter_conditions + (
-                    or_((model.Job.user_id == null()), (model.User.active == true())),)
-            if self.sa_session.bind.name == 'sqlite':
-                query_objects = (model.Job,)
+            if self.readiness_tracker is not None:
+                self.readiness_tracker.update()
+                jobs_to_check = self.readiness_tracker.ready_jobs()
             else:
-                query_objects = (model.Job, rank)
-            ready_query = self.sa_session.query(*query_objects).enable_eagerloads(False) \
-                .outerjoin(model.User) \
-                .filter(and_(*job_filter_conditions)) \
-                .order_by(model.Job.id)
-            if self.sa_session.bind.name == 'sqlite':
-                jobs_to_check = ready_query.all()
-            else:
-                ranked = ready_query.subquery()
-                jobs_to_check = self.sa_session.query(model.Job) \
-                    .join(ranked, model.Job.id == ranked.c.id) \
-                    .filter(ranked.c.rank <= self.app.job_config.handler_ready_window_size).all()
+                jobs_to_check = query_ready_jobs(
+                    self.sa_session,
+                    self.app.config.server_name,
+                    self.app.job_config.handler_ready_window_size,
+                    user_activation_on=self.app.config.user_activation_on,
+                )
             # Filter jobs with invalid input states
+            ready_jobs = jobs_to_check
             jobs_to_check = self.__filter_jobs_with_invalid_input_states(jobs_to_check)
+            if self.readiness_tracker is not None:
+                # Inputs of the filtered jobs are not (or no longer) ready, determine them again
+                checked_job_ids = {job.id for job in jobs_to_check}
+                self.readiness_tracker.recheck(job.id for job in ready_jobs if job.id not in checked_job_ids)
             # Fetch all "resubmit" jobs
             resubmit_jobs = self.sa_session.query(model.Job).enable_eagerloads(False) \
                 .filter(and_((model.Job.state == model.Job.states.RESUBMITTED),
@@ -399,17 +442,27 @@ class JobHandlerQueue(Monitors):
                 pass
         # Ensure that we get new job counts on each iteration
         self.__clear_job_count()
+        if self.job_counts is not None:
+            self.job_counts.reconcile_if_due()
         # Check resubmit jobs first so that limits of new jobs will still be enforced
         for job in resubmit_jobs:
             log.debug('(%s) Job was resubmitted and is being dispatched immediately', job.id)
             # Reassemble resubmit job destination from persisted value
             jw = self.__recover_job_wrapper(job)
             if jw.is_ready_for_resubmission(job):
-                self.increase_running_job_count(job.user_id, jw.job_destination.id)
+                if self.job_counts is not None:
+                    # The job is counted already, as resubmitted or at its previous destination
+                    self.job_counts.job_resubmitted(job, jw.job_destination.id)
+                else:
+                    self.increase_running_job_count(job.user_id, jw.job_destination.id)
                 self.dispatcher.put(jw)
+        # Load everything needed to check and dispatch the jobs in bulk
+        if jobs_to_check:
+            self.__load_job_associations(job.id for job in jobs_to_check)
         # Iterate over new and waiting jobs and look for any that are
         # ready to run
         new_waiting_jobs = []
+        ready_job_wrappers = []
         for job in jobs_to_check:
             try:
                 # Check the job's dependencies, requeue if they're not done.
@@ -439,8 +492,8 @@ class JobHandlerQueue(Monitors):
                 elif job_state == JOB_INPUT_DELETED:
                     log.info("(%d) Job unable to run: one or more inputs deleted" % job.id)
                 elif job_state == JOB_READY:
-                    self.dispatcher.put(self.job_wrappers.pop(job.id))
-                    log.info("(%d) Job dispatched" % job.id)
+                    # Dispatched in bulk below
+                    ready_job_wrappers.append(self.job_wrappers.pop(job.id))
                 elif job_state == JOB_DELETED:
                     log.info("(%d) Job deleted by user while still queued" % job.id)
                 elif job_state == JOB_ADMIN_DELETED:
@@ -467,6 +520,8 @@ class JobHandlerQueue(Monitors):
                     new_waiting_jobs.append(job.id)
             except Exception:
                 log.exception("failure running job %d", job.id)
+        if ready_job_wrappers:
+            self.dispatcher.put_many(ready_job_wrappers)
         # Update the waiting list
         if not self.track_jobs_in_database:
             self.waiting_jobs = new_waiting_jobs
@@ -475,6 +530,9 @@ class JobHandlerQueue(Monitors):
             del self.job_wrappers[id]
         # Flush, if we updated the state
         self.sa_session.flush()
+        if self.readiness_tracker is not None:
+            # Dispatched, paused, failed and deleted jobs are no longer new, anything else is checked again
+            self.readiness_tracker.recheck(set(job.id for job in jobs_to_check) - set(new_waiting_jobs))
         # Done with the session
         self.sa_session.remove()
 
@@ -523,17 +581,17 @@ class JobHandlerQueue(Monitors):
                 jobs_to_pause[job_id].append(f"Input dataset '{hda_name}' is in error state")
             elif dataset_state != model.Dataset.states.OK:
                 jobs_to_ignore[job_id].append(f"Input dataset '{hda_name}' is in {dataset_state} state")
-        for job_id in sorted(jobs_to_pause):
+        for job, job_wrapper in self.job_pairs_for_ids(jobs_to_pause):
+            job_id = job.id
             pause_message = ", ".join(jobs_to_pause[job_id])
             pause_message = f"{pause_message}. To resume this job fix the input dataset(s)."
-            job, job_wrapper = self.job_pair_for_id(job_id)
             try:
                 job_wrapper.pause(job=job, message=pause_message)
             except Exception:
                 log.exception("(%s) Caught exception while attempting to pause job.", job_id)
-        for job_id in sorted(jobs_to_fail):
+        for job, job_wrapper in self.job_pairs_for_ids(jobs_to_fail):
+            job_id = job.id
             fail_message = ", ".join(jobs_to_fail[job_id])
-            job, job_wrapper = self.job_pair_for_id(job_id)
             try:
                 job_wrapper.fail(fail_message)
             except Exception:
@@ -688,7 +746,9 @@ class JobHandlerQueue(Monitors):
         self.__cache_user_job_count()
         # This could have been incremented by a previous job dispatched on this iteration, even if we're not caching
         rval = self.user_job_count.get(user_id, 0)
-        if not self.app.config.cache_user_job_count:
+        if self.job_counts is not None:
+            rval += self.job_counts.user_job_count(user_id)
+        elif not self.app.config.cache_user_job_count:
             result = self.sa_session.execute(select([func.count(model.Job.table.c.id)])
                                              .where(and_(model.Job.table.c.state.in_((model.Job.states.QUEUED,
                                                          model.Job.states.RUNNING,
@@ -701,7 +761,7 @@ class JobHandlerQueue(Monitors):
 
     def __cache_user_job_count(self):
         # Cache the job count if necessary
-        if self.user_job_count is None and self.app.config.cache_user_job_count:
+        if self.user_job_count is None and self.app.config.cache_user_job_count and self.job_counts is None:
             self.user_job_count = {}
             query = self.sa_session.execute(select([model.Job.table.c.user_id, func.count(model.Job.table.c.user_id)])
                                             .where(and_(model.Job.table.c.state.in_((model.Job.states.QUEUED,
@@ -717,7 +777,12 @@ class JobHandlerQueue(Monitors):
     def get_user_job_count_per_destination(self, user_id):
         self.__cache_user_job_count_per_destination()
         cached = self.user_job_count_per_destination.get(user_id, {})
-        if self.app.config.cache_user_job_count:
+        if self.job_counts is not None:
+            # Add the jobs dispatched on this iteration to the maintained count
+            rval = self.job_counts.user_job_count_per_destination(user_id)
+            for destination_id, count in cached.items():
+                rval[destination_id] = rval.get(destination_id, 0) + count
+        elif self.app.config.cache_user_job_count:
             rval = cached
         else:
             # The cached count is still used even when we're not caching, it is
@@ -736,7 +801,7 @@ class JobHandlerQueue(Monitors):
 
     def __cache_user_job_count_per_destination(self):
         # Cache the job count if necessary
-        if self.user_job_count_per_destination is None and self.app.config.cache_user_job_count:
+        if self.user_job_count_per_destination is None and self.app.config.cache_user_job_count and self.job_counts is None:
             self.user_job_count_per_destination = {}
             result = self.sa_session.execute(select([model.Job.table.c.user_id, model.Job.table.c.destination_id, func.count(model.Job.table.c.user_id).label('job_count')])
                                              .where(and_(model.Job.table.c.state.in_((model.Job.states.QUEUED, model.Job.states.RUNNING))))
@@ -811,7 +876,9 @@ class JobHandlerQueue(Monitors):
 
     def __cache_total_job_count_per_destination(self):
         # Cache the job count if necessary
-        if self.total_job_count_per_destination is None:
+        if self.total_job_count_per_destination is None and self.job_counts is not None:
+            self.total_job_count_per_destination = self.job_counts.total_job_count_per_destination()
+        elif self.total_job_count_per_destination is None:
             self.total_job_count_per_destination = {}
             result = self.sa_session.execute(select([model.Job.table.c.destination_id, func.count(model.Job.table.c.destination_id).label('job_count')])
                                              .where(and_(model.Job.table.c.state.in_((model.Job.states.QUEUED, model.Job.states.RUNNING))))
@@ -890,9 +957,11 @@ class JobHandlerStopQueue(Monitors):
     """
     STOP_SIGNAL = object()
 
-    def __init__(self, app, dispatcher):
+    def __init__(self, app, dispatcher, job_counts=None):
         self.app = app
         self.dispatcher = dispatcher
+        # Dispatched job counts maintained by the handler queue, if any
+        self.job_counts = job_counts
 
         self.sa_session = app.model.context
 
@@ -936,11 +1005,17 @@ class JobHandlerStopQueue(Monitors):
         job.set_final_state(final_state, supports_skip_locked=self.app.application_stack.supports_skip_locked())
         self.sa_session.add(job)
         self.sa_session.flush()
+        self.__job_state_changed(job)
 
     def __stop(self, job):
         job.set_state(job.states.STOPPED)
         self.sa_session.add(job)
         self.sa_session.flush()
+        self.__job_state_changed(job)
+
+    def __job_state_changed(self, job):
+        if self.job_counts is not None:
+            self.job_counts.job_state_changed(job)
 
     def monitor_step(self):
         """
@@ -1057,6 +1132,25 @@ class DefaultJobDispatcher:
             log.error(f'put(): ({job_wrapper.job_id}) Invalid job runner: {runner_name}')
             job_wrapper.fail(DEFAULT_JOB_PUT_FAILURE_MESSAGE)
 
+    def put_many(self, job_wrappers):
+        """Dispatch several job wrappers at once, runners that support it
+        enqueue all of their jobs in a single database flush.
+        """
+        wrappers_by_runner = defaultdict(list)
+        for job_wrapper in job_wrappers:
+            wrappers_by_runner[self.__get_runner_name(job_wrapper)].append(job_wrapper)
+        for runner_name, runner_job_wrappers in wrappers_by_runner.items():
+            runner = self.job_runners.get(runner_name)
+            if runner is None:
+                for job_wrapper in runner_job_wrappers:
+                    log.error(f'put_many(): ({job_wrapper.job_id}) Invalid job runner: {runner_name}')
+                    job_wrapper.fail(DEFAULT_JOB_PUT_FAILURE_MESSAGE)
+                continue
+            log.debug(f"Dispatching {len(runner_job_wrappers)} job(s) to {runner_name} runner")
+            runner.put_many(runner_job_wrappers)
+            for job_wrapper in runner_job_wrappers:
+                log.info("(%d) Job dispatched", job_wrapper.job_id)
+
     def stop(self, job, job_wrapper):
         """
         Stop the given job. The input variable job may be either a Job or a Task.
@@ -0,0 +1,257 @@
+"""
+Incremental tracking of new jobs whose inputs are ready to be consumed.
+
+The default job handler loop finds jobs that are ready to run by querying every
+``new`` job assigned to the handler and anti-joining them against all of their
+non-ready input datasets. With large numbers of queued jobs this query dominates
+handler CPU time and database load. :class:`JobReadinessTracker` instead keeps
+the set of pending (non-ready) inputs for each ``new`` job in memory and only
+looks at the jobs and datasets that have been updated since the previous pass,
+decrementing the pending input count of dependent jobs as datasets become
+ready.
+"""
+import datetime
+import logging
+import time
+from collections import defaultdict
+
+from sqlalchemy.sql.expression import (
+    and_,
+    func,
+    null,
+    or_,
+    true,
+)
+
+from galaxy import model
+
+log = logging.getLogger(__name__)
+
+READY_TRACKING_QUERY = 'query'
+READY_TRACKING_INCREMENTAL = 'incremental'
+READY_TRACKING_METHODS = (READY_TRACKING_QUERY, READY_TRACKING_INCREMENTAL)
+
+# Rows updated in transactions that commit later than this many seconds after
+# the update_time was set may be missed by the incremental check, they will be
+# picked up by the next full synchronization.
+DEFAULT_LOOKBACK = 30
+DEFAULT_FULL_SYNC_INTERVAL = 300
+IN_CLAUSE_CHUNK_SIZE = 1000
+
+
+def _chunks(items, size=IN_CLAUSE_CHUNK_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def query_ready_jobs(sa_session, handler, window_size, user_activation_on=False):
+    """Fetch ``new`` jobs assigned to ``handler`` with all inputs ready by
+    querying the full set of new jobs and their input datasets.
+
+    At most ``window_size`` jobs per user are returned (except on SQLite, which
+    lacks support for the required window function).
+    """
+    hda_not_ready = sa_session.query(model.Job.id).enable_eagerloads(False) \
+        .join(model.JobToInputDatasetAssociation) \
+        .join(model.HistoryDatasetAssociation) \
+        .join(model.Dataset) \
+        .filter(and_(model.Job.state == model.Job.states.NEW,
+                     model.Dataset.state.in_(model.Dataset.non_ready_states))).subquery()
+    ldda_not_ready = sa_session.query(model.Job.id).enable_eagerloads(False) \
+        .join(model.JobToInputLibraryDatasetAssociation) \
+        .join(model.LibraryDatasetDatasetAssociation) \
+        .join(model.Dataset) \
+        .filter(and_(model.Job.state == model.Job.states.NEW,
+                     model.Dataset.state.in_(model.Dataset.non_ready_states))).subquery()
+    rank = func.rank().over(partition_by=model.Job.table.c.user_id,
+                            order_by=model.Job.table.c.id).label('rank')
+    job_filter_conditions = (
+        (model.Job.state == model.Job.states.NEW),
+        (model.Job.handler == handler),
+        ~model.Job.table.c.id.in_(hda_not_ready),
+        ~model.Job.table.c.id.in_(ldda_not_ready))
+    if user_activation_on:
+        job_filter_conditions = job_filter_conditions + (
+            or_((model.Job.user_id == null()), (model.User.active == true())),)
+    if sa_session.bind.name == 'sqlite':
+        query_objects = (model.Job,)
+    else:
+        query_objects = (model.Job, rank)
+    ready_query = sa_session.query(*query_objects).enable_eagerloads(False) \
+        .outerjoin(model.User) \
+        .filter(and_(*job_filter_conditions)) \
+        .order_by(model.Job.id)
+    if sa_session.bind.name == 'sqlite':
+        return ready_query.all()
+    ranked = ready_query.subquery()
+    return sa_session.query(model.Job) \
+        .join(ranked, model.Job.id == ranked.c.id) \
+        .filter(ranked.c.rank <= window_size).all()
+
+
+class JobReadinessTracker:
+    """Track the non-ready inputs of ``new`` jobs assigned to a handler.
+
+    Each call to :meth:`update` registers jobs that have entered the ``new``
+    state, forgets jobs that have left it and checks the tracked non-ready
+    datasets that have been updated since the previous call. Jobs without any
+    pending inputs are returned by :meth:`ready_jobs`.
+    """
+
+    def __init__(self, sa_session, handler, window_size, user_activation_on=False,
+                 lookback=DEFAULT_LOOKBACK, full_sync_interval=DEFAULT_FULL_SYNC_INTERVAL):
+        self.sa_session = sa_session
+        self.handler = handler
+        self.window_size = window_size
+        self.user_activation_on = user_activation_on
+        self.lookback = datetime.timedelta(seconds=lookback)
+        self.full_sync_interval = full_sync_interval
+        self._reset()
+
+    def _reset(self):
+        # job id -> user id for every tracked job
+        self.job_users = {}
+        # job id -> ids of the datasets the job is waiting on
+        self.pending_inputs = {}
+        # dataset id -> ids of the jobs waiting on it
+        self.dependent_jobs = defaultdict(set)
+        self.ready = set()
+        self.last_update = None
+        self.last_full_sync = None
+
+    @property
+    def tracked_job_count(self):
+        return len(self.job_users)
+
+    def pending_input_count(self, job_id):
+        return len(self.pending_inputs.get(job_id, ()))
+
+    def update(self):
+        """Bring the tracked state up to date with the database."""
+        now = datetime.datetime.utcnow()
+        if self.last_full_sync is None or time.time() - self.last_full_sync > self.full_sync_interval:
+            self._full_sync()
+        else:
+            since = self.last_update - self.lookback
+            self._sync_jobs(since)
+            self._sync_datasets(since)
+        self.last_update = now
+
+    def forget(self, job_ids):
+        """Stop tracking ``job_ids``."""
+        for job_id in job_ids:
+            self.job_users.pop(job_id, None)
+            self.ready.discard(job_id)
+            for dataset_id in self.pending_inputs.pop(job_id, ()):
+                dependents = self.dependent_jobs.get(dataset_id)
+                if dependents is not None:
+                    dependents.discard(job_id)
+                    if not dependents:
+                        del self.dependent_jobs[dataset_id]
+
+    def recheck(self, job_ids):
+        """Forget ``job_ids`` and register those that are still ``new`` again,
+        determining their pending inputs from scratch.
+        """
+        job_ids = list(job_ids)
+        self.forget(job_ids)
+        for chunk in _chunks(job_ids):
+            self._register_jobs(self._new_jobs_query().filter(model.Job.table.c.id.in_(chunk)).all())
+
+    def ready_job_ids(self):
+        """Return ids of the jobs with no pending inputs, limited to
+        ``window_size`` jobs per user, in ascending order.
+        """
+        per_user = defaultdict(int)
+        rval = []
+        for job_id in sorted(self.ready):
+            user_id = self.job_users[job_id]
+            if per_user[user_id] < self.window_size:
+                per_user[user_id] += 1
+                rval.append(job_id)
+        return rval
+
+    def ready_jobs(self):
+        """Load the :class:`galaxy.model.Job` objects of :meth:`ready_job_ids`
+        that are still ``new``.
+        """
+        jobs = []
+        for chunk in _chunks(self.ready_job_ids()):
+            jobs.extend(self.sa_session.query(model.Job).enable_eagerloads(False)
+                        .filter(and_(model.Job.table.c.id.in_(chunk),
+                                     model.Job.state == model.Job.states.NEW)).all())
+        return sorted(jobs, key=lambda job: job.id)
+
+    def _full_sync(self):
+        self._reset()
+        query = self._new_jobs_query()
+        self._register_jobs(query.all(), job_filter=and_(model.Job.state == model.Job.states.NEW,
+                                                         model.Job.handler == self.handler))
+        self.last_full_sync = time.time()
+        log.debug("Readiness tracker synchronized %d new job(s), %d ready", len(self.job_users), len(self.ready))
+
+    def _new_jobs_query(self):
+        query = self.sa_session.query(model.Job.id, model.Job.user_id).enable_eagerloads(False) \
+            .filter(and_(model.Job.state == model.Job.states.NEW,
+                         model.Job.handler == self.handler))
+        if self.user_activation_on:
+            query = query.outerjoin(model.User) \
+                .filter(or_((model.Job.user_id == null()), (model.User.active == true())))
+        return query
+
+    def _sync_jobs(self, since):
+        # Any change of state or handler assignment updates the job's update_time
+        updated = self.sa_session.query(model.Job.id, model.Job.state).enable_eagerloads(False) \
+            .filter(and_(model.Job.handler == self.handler,
+                         model.Job.update_time >= since)).all()
+        self.forget(job_id for job_id, state in updated if state != model.Job.states.NEW and job_id in self.job_users)
+        self.recheck(job_id for job_id, state in updated if state == model.Job.states.NEW and job_id not in self.job_users)
+
+    def _register_jobs(self, job_rows, job_filter=None):
+        job_rows = list(job_rows)
+        for job_id, user_id in job_rows:
+            self.job_users[job_id] = user_id
+            self.pending_inputs[job_id] = set()
+        if job_filter is not None:
+            self._add_pending_inputs(job_filter)
+        else:
+            for chunk in _chunks(job_id for job_id, _ in job_rows):
+                self._add_pending_inputs(model.Job.table.c.id.in_(chunk))
+        for job_id, _ in job_rows:
+            if not self.pending_inputs[job_id]:
+                self.ready.add(job_id)
+
+    def _add_pending_inputs(self, job_filter):
+        for job_to_input, input_association in ((model.JobToInputDatasetAssociation, model.HistoryDatasetAssociation),
+                                                (model.JobToInputLibraryDatasetAssociation, model.LibraryDatasetDatasetAssociation)):
+            not_ready = self.sa_session.query(model.Job.id, model.Dataset.id).enable_eagerloads(False) \
+                .select_from(job_to_input) \
+                .join(job_to_input.job) \
+                .join(job_to_input.dataset) \
+                .join(input_association.dataset) \
+                .filter(and_(job_filter,
+                             model.Dataset.state.in_(model.Dataset.non_ready_states)))
+            for job_id, dataset_id in not_ready:
+                pending = self.pending_inputs.get(job_id)
+                if pending is not None:
+                    pending.add(dataset_id)
+                    self.dependent_jobs[dataset_id].add(job_id)
+
+    def _sync_datasets(self, since):
+        if not self.dependent_jobs:
+            return
+        # Only datasets updated since the last pass can have become ready, this
+        # uses the update_time index and is independent of the number of tracked
+        # datasets.
+        updated = self.sa_session.query(model.Dataset.id).enable_eagerloads(False) \
+            .filter(and_(model.Dataset.update_time >= since,
+                         ~model.Dataset.state.in_(model.Dataset.non_ready_states)))
+        for (dataset_id,) in updated:
+            for job_id in self.dependent_jobs.pop(dataset_id, ()):
+                pending = self.pending_inputs.get(job_id)
+                if pending is None:
+                    continue
+                pending.discard(dataset_id)
+                if not pending:
+                    self.ready.add(job_id)
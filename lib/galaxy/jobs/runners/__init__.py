@@ -50,6 +50,9 @@ JOB_RUNNER_PARAMETER_UNKNOWN_MESSAGE = "Invalid job runner parameter for this pl
 JOB_RUNNER_PARAMETER_MAP_PROBLEM_MESSAGE = "Job runner parameter '%s' value '%s' could not be converted to the correct type"
 JOB_RUNNER_PARAMETER_VALIDATION_FAILED_MESSAGE = "Job runner parameter %s failed validation"
 
+# Additional (autoscaled) workers exit after this many seconds without work
+DEFAULT_WORKER_IDLE_TIMEOUT = 60
+
 GALAXY_LIB_ADJUST_TEMPLATE = """GALAXY_LIB="%s"; if [ "$GALAXY_LIB" != "None" ]; then if [ -n "$PYTHONPATH" ]; then PYTHONPATH="$GALAXY_LIB:$PYTHONPATH"; else PYTHONPATH="$GALAXY_LIB"; fi; export PYTHONPATH; fi;"""
 GALAXY_VENV_TEMPLATE = """GALAXY_VIRTUAL_ENV="%s"; if [ "$GALAXY_VIRTUAL_ENV" != "None" -a -z "$VIRTUAL_ENV" -a -f "$GALAXY_VIRTUAL_ENV/bin/activate" ]; then . "$GALAXY_VIRTUAL_ENV/bin/activate"; fi;"""
 
@@ -66,8 +69,128 @@ class RunnerParams(ParamsWithSpecs):
         raise Exception(JOB_RUNNER_PARAMETER_VALIDATION_FAILED_MESSAGE % name)
 
 
+class RunnerWorkerPool:
+    """A queue of ``(method, arg)`` work items of a job runner and the worker
+    threads running them.
+
+    ``nworkers`` threads are started after forking. If ``max_workers`` is
+    larger, an additional worker is started whenever an item is queued while
+    no worker is idle, additional workers exit once they have been idle for
+    ``idle_timeout`` seconds.
+    """
+
+    def __init__(self, runner, name, nworkers, max_workers=0, idle_timeout=DEFAULT_WORKER_IDLE_TIMEOUT):
+        self.runner = runner
+        self.name = name
+        self.nworkers = nworkers
+        self.max_workers = max(max_workers, nworkers)
+        self.idle_timeout = idle_timeout
+        self.queue = Queue()
+        self.threads = []
+        self.idle_workers = 0
+        self._additional_threads = set()
+        self._started_threads = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        for _ in range(self.nworkers):
+            worker = self.__new_worker()
+            self.runner.app.application_stack.register_postfork_function(worker.start)
+
+    def __new_worker(self):
+        worker = threading.Thread(name="%s.%s_thread-%d" % (self.runner.runner_name, self.name, self._started_threads),
+                                  target=self.runner.run_next, args=(self,))
+        worker.daemon = True
+        self._started_threads += 1
+        self.threads.append(worker)
+        return worker
+
+    def put(self, item):
+        self.queue.put((item, time.time()))
+        if self.max_workers > self.nworkers:
+            worker = None
+            with self._lock:
+                if self.queue.qsize() > self.idle_workers and len(self.threads) < self.max_workers:
+                    worker = self.__new_worker()
+                    self._additional_threads.add(worker)
+            if worker is not None:
+                log.debug("%s: Starting additional %s worker, %d queued work item(s)", self.runner.runner_name, self.name, self.queue.qsize())
+                worker.start()
+
+    def get(self):
+        """Return the next work item, or None if the calling worker is an
+        additional worker that has been idle for ``idle_timeout`` seconds.
+        """
+        current_thread = threading.current_thread()
+        timeout = self.idle_timeout if current_thread in self._additional_threads else None
+        with self._lock:
+            self.idle_workers += 1
+        try:
+            item, put_time = self.queue.get(timeout=timeout)
+        except Empty:
+            with self._lock:
+                self.threads.remove(current_thread)
+                self._additional_threads.discard(current_thread)
+            log.debug("%s: Stopping idle additional %s worker", self.runner.runner_name, self.name)
+            return None
+        finally:
+            with self._lock:
+                self.idle_workers -= 1
+        galaxy_statsd_client = self.runner.app.execution_timer_factory.galaxy_statsd_client
+        if galaxy_statsd_client:
+            metric_prefix = f'galaxy.jobs.runners.{self.runner.__class__.__name__.lower()}.{self.name}'
+            galaxy_statsd_client.timing(f'{metric_prefix}.wait_time', (time.time() - put_time) * 1000.)
+            galaxy_statsd_client.gauge(f'{metric_prefix}.queue_depth', self.queue.qsize())
+        return item
+
+    def qsize(self):
+        return self.queue.qsize()
+
+    def stop(self):
+        for _ in range(len(self.threads)):
+            self.queue.put(((STOP_SIGNAL, None), time.time()))
+
+
+class RunnerWorkQueue:
+    """The work queue of a job runner, sending work items that finish or fail
+    jobs to a separate worker pool if one is configured.
+    """
+
+    def __init__(self, work_pool, finish_pool=None, finish_methods=()):
+        self.work_pool = work_pool
+        self.finish_pool = finish_pool
+        self.finish_methods = finish_methods
+
+    def put(self, item):
+        method = item[0]
+        if self.finish_pool is not None and getattr(method, '__name__', None) in self.finish_methods:
+            self.finish_pool.put(item)
+        else:
+            self.work_pool.put(item)
+
+    def qsize(self):
+        return sum(work_pool.qsize() for work_pool in (self.work_pool, self.finish_pool) if work_pool is not None)
+
+
 class BaseJobRunner:
-    DEFAULT_SPECS = dict(recheck_missing_job_retries=dict(map=int, valid=lambda x: int(x) >= 0, default=0))
+    DEFAULT_SPECS = dict(
+        recheck_missing_job_retries=dict(map=int, valid=lambda x: int(x) >= 0, default=0),
+        # Watched jobs of asynchronous runners are checked every monitor_min_poll_interval
+        # seconds after submission or a change of state, the interval is multiplied by
+        # monitor_poll_backoff for every check that finds the job unchanged, up to
+        # monitor_max_poll_interval seconds.
+        monitor_min_poll_interval=dict(map=float, valid=lambda x: float(x) > 0, default=1),
+        monitor_max_poll_interval=dict(map=float, valid=lambda x: float(x) > 0, default=1),
+        monitor_poll_backoff=dict(map=float, valid=lambda x: float(x) >= 1, default=2),
+        # If finish_workers is set, finishing and failing jobs is done by a
+        # separate pool of threads so that it cannot delay job submission. Pools
+        # grow up to max_workers/max_finish_workers threads while work is waiting.
+        finish_workers=dict(map=int, valid=lambda x: int(x) >= 0, default=0),
+        max_workers=dict(map=int, valid=lambda x: int(x) >= 0, default=0),
+        max_finish_workers=dict(map=int, valid=lambda x: int(x) >= 0, default=0),
+    )
+    # Work items calling these methods are run by the finish worker pool, if any
+    FINISH_METHODS = ('finish_job', 'fail_job', 'mark_as_failed', 'handle_metadata_externally')
 
     def __init__(self, app, nworkers, **kwargs):
         """Start the job runner
@@ -85,16 +208,24 @@ class BaseJobRunner:
         self.runner_state_handlers = build_state_handlers()
 
     def _init_worker_threads(self):
-        """Start ``nworkers`` worker threads.
+        """Start ``nworkers`` worker threads (and ``finish_workers`` threads
+        for finishing jobs, if configured).
         """
-        self.work_queue = Queue()
-        self.work_threads = []
-        log.debug(f'Starting {self.nworkers} {self.runner_name} workers')
-        for i in range(self.nworkers):
-            worker = threading.Thread(name="%s.work_thread-%d" % (self.runner_name, i), target=self.run_next)
-            worker.daemon = True
-            self.app.application_stack.register_postfork_function(worker.start)
-            self.work_threads.append(worker)
+        self.work_pools = [RunnerWorkerPool(self, 'work', self.nworkers, max_workers=self.runner_params.max_workers)]
+        finish_pool = None
+        if self.runner_params.finish_workers:
+            finish_pool = RunnerWorkerPool(self, 'finish', self.runner_params.finish_workers,
+                                           max_workers=self.runner_params.max_finish_workers)
+            self.work_pools.append(finish_pool)
+        self.work_queue = RunnerWorkQueue(self.work_pools[0], finish_pool, finish_methods=self.FINISH_METHODS)
+        log.debug(f'Starting {self.nworkers} {self.runner_name} workers'
+                  + (f' and {self.runner_params.finish_workers} finish workers' if finish_pool else ''))
+        for work_pool in self.work_pools:
+            work_pool.start()
+
+    @property
+    def work_threads(self):
+        return [thread for work_pool in self.work_pools for thread in work_pool.threads]
 
     def _alive_worker_threads(self, cycle=False):
         # yield endlessly as long as there are alive threads if cycle is True
@@ -107,11 +238,17 @@ class BaseJobRunner:
                         alive = True
                     yield thread
 
-    def run_next(self):
+    def run_next(self, work_pool=None):
         """Run the next item in the work queue (a job waiting to run)
         """
+        if work_pool is None:
+            work_pool = self.work_pools[0]
         while True:
-            (method, arg) = self.work_queue.get()
+            item = work_pool.get()
+            if item is None:
+                # Idle additional worker
+                return
+            (method, arg) = item
             if method is STOP_SIGNAL:
                 return
             # id and name are collected first so that the call of method() is the last exception.
@@ -154,6 +291,46 @@ class BaseJobRunner:
         self.mark_as_queued(job_wrapper)
         log.debug(f"Job [{job_wrapper.job_id}] queued {put_timer}")
 
+    def put_many(self, job_wrappers):
+        """Like :meth:`put` for several jobs, flushing their state changes to
+        the database once.
+
+        If a job fails to enqueue or the flush fails, the changes are rolled
+        back and the other jobs are enqueued one by one instead.
+        """
+        put_timer = ExecutionTimer()
+        enqueued = []
+        failed = False
+        for job_wrapper in job_wrappers:
+            try:
+                job_wrapper.enqueue(flush=False)
+                enqueued.append(job_wrapper)
+            except Exception:
+                log.exception("(%s) Failed to enqueue job", job_wrapper.job_id)
+                failed = True
+        if enqueued and not failed:
+            try:
+                self.sa_session.flush()
+            except Exception:
+                log.exception("Failed to flush the state of %d enqueued job(s), enqueueing them one by one", len(enqueued))
+                failed = True
+        if failed:
+            # don't flush the state left by jobs that failed to enqueue
+            self.sa_session.rollback()
+            enqueued = [job_wrapper for job_wrapper in enqueued if self.__enqueue(job_wrapper)]
+        for job_wrapper in enqueued:
+            self.mark_as_queued(job_wrapper)
+        log.debug(f"{len(enqueued)} job(s) queued {put_timer}")
+
+    def __enqueue(self, job_wrapper):
+        try:
+            job_wrapper.enqueue()
+            return True
+        except Exception:
+            log.exception("(%s) Failed to enqueue job", job_wrapper.job_id)
+            self.sa_session.rollback()
+            return False
+
     def mark_as_queued(self, job_wrapper):
         self.work_queue.put((self.queue_job, job_wrapper))
 
@@ -161,8 +338,8 @@ class BaseJobRunner:
         """Attempts to gracefully shut down the worker threads
         """
         log.info("%s: Sending stop signal to %s job worker threads", self.runner_name, len(self.work_threads))
-        for _ in range(len(self.work_threads)):
-            self.work_queue.put((STOP_SIGNAL, None))
+        for work_pool in self.work_pools:
+            work_pool.stop()
 
         join_timeout = self.app.config.monitor_thread_join_timeout
         if join_timeout > 0:
@@ -610,6 +787,9 @@ class AsynchronousJobState(JobState):
         self._running = False
         self.check_count = 0
         self.start_time = None
+        # When and how often the runner's monitor thread checks this job
+        self.next_check_time = None
+        self.check_interval = None
 
         # job_id is the DRM's job id, not the Galaxy job id
         self.job_id = job_id
@@ -684,25 +864,87 @@ class AsynchronousJobRunner(BaseJobRunner, Monitors):
         Watches jobs currently in the monitor queue and deals with state
         changes (queued to running) and job completion.
         """
+        timeout = 0
         while True:
-            # Take any new watched jobs and put them on the monitor list
+            # Take any new watched jobs and put them on the monitor list, waiting
+            # for up to `timeout` seconds for the first one (or the stop signal)
             try:
                 while True:
-                    async_job_state = self.monitor_queue.get_nowait()
+                    if timeout > 0:
+                        async_job_state = self.monitor_queue.get(timeout=timeout)
+                        timeout = 0
+                    else:
+                        async_job_state = self.monitor_queue.get_nowait()
                     if async_job_state is STOP_SIGNAL:
                         # TODO: This is where any cleanup would occur
                         self.handle_stop()
                         return
+                    self.__schedule_check(async_job_state, reset=True)
                     self.watched.append(async_job_state)
             except Empty:
                 pass
-            # Iterate over the list of watched jobs and check state
+            # Check the state of the watched jobs that are due to be checked
             try:
-                self.check_watched_items()
+                self.check_due_watched_items()
             except Exception:
                 log.exception('Unhandled exception checking active jobs')
-            # Sleep a bit before the next state check
-            time.sleep(1)
+            # Sleep until the next state check is due
+            timeout = self.__next_check_delay()
+
+    def check_due_watched_items(self):
+        """
+        Call :meth:`check_watched_items` with ``self.watched`` restricted to
+        the jobs that are due to be checked, so that runners checking the
+        state of all watched jobs with a single call only include those, and
+        schedule the next check of each job.
+        """
+        now = time.time()
+        due = []
+        not_due = []
+        for async_job_state in self.watched:
+            if async_job_state.next_check_time is None or async_job_state.next_check_time <= now:
+                due.append(async_job_state)
+            else:
+                not_due.append(async_job_state)
+        if not due:
+            return
+        previous_states = {id(ajs): (ajs.old_state, ajs.running) for ajs in due}
+        check_timer = self.app.execution_timer_factory.get_timer(
+            f'internals.galaxy.jobs.runners.{self.__class__.__name__.lower()}.check_watched_items',
+            'job runner %s checked ${count} of ${total} watched jobs' % self.runner_name
+        )
+        self.watched = due
+        try:
+            self.check_watched_items()
+        finally:
+            checked = self.watched
+            self.watched = checked + not_due
+        log.trace(check_timer.to_str(count=len(due), total=len(due) + len(not_due)))
+        galaxy_statsd_client = self.app.execution_timer_factory.galaxy_statsd_client
+        if galaxy_statsd_client:
+            galaxy_statsd_client.incr(f'galaxy.jobs.runners.{self.__class__.__name__.lower()}.watched_items_checked', len(due))
+        for async_job_state in checked:
+            changed = previous_states.get(id(async_job_state)) != (async_job_state.old_state, async_job_state.running)
+            self.__schedule_check(async_job_state, reset=changed)
+
+    def __schedule_check(self, async_job_state, reset=False):
+        min_interval = self.runner_params.monitor_min_poll_interval
+        if reset or async_job_state.check_interval is None:
+            interval = min_interval
+        else:
+            interval = min(async_job_state.check_interval * self.runner_params.monitor_poll_backoff,
+                           max(self.runner_params.monitor_max_poll_interval, min_interval))
+        async_job_state.check_interval = interval
+        async_job_state.next_check_time = time.time() + interval
+
+    def __next_check_delay(self):
+        # Checks are never more frequent than the minimum interval so that jobs
+        # becoming due at about the same time are checked together.
+        delay = self.runner_params.monitor_min_poll_interval
+        if self.watched:
+            next_check_time = min(ajs.next_check_time or 0 for ajs in self.watched)
+            delay = max(next_check_time - time.time(), delay)
+        return delay
 
     def monitor_job(self, job_state):
         self.monitor_queue.put(job_state)
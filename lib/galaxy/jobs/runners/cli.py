@@ -28,9 +28,9 @@ class ShellJobRunner(AsynchronousJobRunner):
     """
     runner_name = "ShellRunner"
 
-    def __init__(self, app, nworkers):
+    def __init__(self, app, nworkers, **kwargs):
         """Start the job runner """
-        super().__init__(app, nworkers)
+        super().__init__(app, nworkers, **kwargs)
 
         self.cli_interface = CliInterface()
         self._init_monitor_thread()
@@ -151,6 +151,15 @@ class ShellJobRunner(AsynchronousJobRunner):
         new_watched = []
 
         job_states = self.__get_job_states()
+        missing = []
+        deleted = set()
+        for ajs in self.watched:
+            if ajs.job_id not in job_states:
+                if ajs.job_wrapper.get_state() == model.Job.states.DELETED:
+                    deleted.add(ajs.job_id)
+                else:
+                    missing.append(ajs)
+        missing_job_states = self.__get_missing_job_states(missing)
 
         for ajs in self.watched:
             external_job_id = ajs.job_id
@@ -158,14 +167,11 @@ class ShellJobRunner(AsynchronousJobRunner):
             old_state = ajs.old_state
             state = job_states.get(external_job_id, None)
             if state is None:
-                if ajs.job_wrapper.get_state() == model.Job.states.DELETED:
+                if external_job_id in deleted:
                     continue
 
                 log.debug(f"({id_tag}/{external_job_id}) job not found in batch state check")
-                shell_params, job_params = self.parse_destination_params(ajs.job_destination.params)
-                shell, job_interface = self.get_cli_plugins(shell_params, job_params)
-                cmd_out = shell.execute(job_interface.get_single_status(external_job_id))
-                state = job_interface.parse_single_status(cmd_out.stdout, external_job_id)
+                state = missing_job_states[external_job_id]
                 if not state == model.Job.states.OK:
                     log.warning(f'({id_tag}/{external_job_id}) job not found in batch state check, but found in individual state check')
             job_state = ajs.job_wrapper.get_state()
@@ -228,6 +234,30 @@ class ShellJobRunner(AsynchronousJobRunner):
             job_states.update(job_interface.parse_status(cmd_out.stdout, job_ids))
         return job_states
 
+    def __get_missing_job_states(self, missing):
+        """
+        Check the state of jobs that were not found in the batch state check
+        individually, with a single command per destination if the job plugin
+        supports it.
+        """
+        job_destinations = {}
+        job_states = {}
+        for ajs in missing:
+            job_destinations.setdefault(ajs.job_destination.id, (ajs.job_destination, []))[1].append(ajs.job_id)
+        for job_destination, job_ids in job_destinations.values():
+            shell_params, job_params = self.parse_destination_params(job_destination.params)
+            shell, job_interface = self.get_cli_plugins(shell_params, job_params)
+            multiple_status_cmd = job_interface.get_multiple_status(job_ids)
+            if multiple_status_cmd is not None:
+                # The command may fail for jobs that have left the queue, parse what was returned
+                cmd_out = shell.execute(multiple_status_cmd)
+                job_states.update(job_interface.parse_multiple_status(cmd_out.stdout, job_ids))
+            else:
+                for external_job_id in job_ids:
+                    cmd_out = shell.execute(job_interface.get_single_status(external_job_id))
+                    job_states[external_job_id] = job_interface.parse_single_status(cmd_out.stdout, external_job_id)
+        return job_states
+
     def stop_job(self, job_wrapper):
         """Attempts to delete a dispatched job"""
         job = job_wrapper.get_job()
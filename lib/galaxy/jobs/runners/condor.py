@@ -51,9 +51,9 @@ class CondorJobRunner(AsynchronousJobRunner):
     """
     runner_name = "CondorRunner"
 
-    def __init__(self, app, nworkers):
+    def __init__(self, app, nworkers, **kwargs):
         """Initialize this job runner and start the monitor thread"""
-        super().__init__(app, nworkers)
+        super().__init__(app, nworkers, **kwargs)
         self._init_monitor_thread()
         self._init_worker_threads()
 
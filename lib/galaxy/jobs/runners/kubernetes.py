@@ -6,6 +6,7 @@ import logging
 import math
 import os
 import re
+from collections import defaultdict
 from datetime import datetime
 
 import yaml
@@ -24,6 +25,7 @@ from galaxy.jobs.runners.util.pykube_util import (
     ensure_pykube,
     find_ingress_object_by_name,
     find_job_object_by_name,
+    find_job_objects,
     find_pod_object_by_name,
     find_service_object_by_name,
     galaxy_instance_id,
@@ -95,6 +97,7 @@ class KubernetesJobRunner(AsynchronousJobRunner):
         super().__init__(app, nworkers, **kwargs)
 
         self._pykube_api = pykube_client_from_dict(self.runner_params)
+        self._watched_k8s_jobs = None
         self._galaxy_instance_id = self.__get_galaxy_instance_id()
 
         self._run_as_user_id = self.__get_run_as_user_id()
@@ -575,12 +578,35 @@ class KubernetesJobRunner(AsynchronousJobRunner):
                 new_params[each_param] = job_destination.params[each_param]
         return new_params
 
+    def check_watched_items(self):
+        """Fetch the k8s jobs of the namespace with a single call, then check
+        each watched job against that listing."""
+        self._watched_k8s_jobs = None
+        if len(self.watched) > 1:
+            try:
+                self._watched_k8s_jobs = defaultdict(list)
+                for k8s_job in find_job_objects(self._pykube_api, self.runner_params['k8s_namespace']).response['items']:
+                    self._watched_k8s_jobs[k8s_job['metadata']['name']].append(k8s_job)
+            except Exception:
+                log.exception("Failed to list Kubernetes jobs, checking watched jobs individually")
+                self._watched_k8s_jobs = None
+        try:
+            super().check_watched_items()
+        finally:
+            self._watched_k8s_jobs = None
+
+    def __find_watched_k8s_jobs(self, job_state):
+        if self._watched_k8s_jobs is not None and job_state.job_id in self._watched_k8s_jobs:
+            return self._watched_k8s_jobs[job_state.job_id]
+        # Not listed (or listing failed), make sure before giving up on the job
+        return find_job_object_by_name(self._pykube_api, job_state.job_id, self.runner_params['k8s_namespace']).response['items']
+
     def check_watched_item(self, job_state):
         """Checks the state of a job already submitted on k8s. Job state is an AsynchronousJobState"""
-        jobs = find_job_object_by_name(self._pykube_api, job_state.job_id, self.runner_params['k8s_namespace'])
+        k8s_jobs = self.__find_watched_k8s_jobs(job_state)
 
-        if len(jobs.response['items']) == 1:
-            job = Job(self._pykube_api, jobs.response['items'][0])
+        if len(k8s_jobs) == 1:
+            job = Job(self._pykube_api, k8s_jobs[0])
             job_destination = job_state.job_wrapper.job_destination
             succeeded = 0
             active = 0
@@ -655,7 +681,7 @@ class KubernetesJobRunner(AsynchronousJobRunner):
             else:
                 return self._handle_job_failure(job, job_state)
 
-        elif len(jobs.response['items']) == 0:
+        elif len(k8s_jobs) == 0:
             if job_state.job_wrapper.get_job().state == model.Job.states.DELETED:
                 # Job has been deleted via stop_job and job has been deleted,
                 # cleanup and remove from watched_jobs by returning `None`
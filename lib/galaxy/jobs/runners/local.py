@@ -39,7 +39,7 @@ class LocalJobRunner(BaseJobRunner):
     """
     runner_name = "LocalRunner"
 
-    def __init__(self, app, nworkers):
+    def __init__(self, app, nworkers, **kwargs):
         """Start the job runner """
 
         # create a local copy of os.environ to use as env for subprocess.Popen
@@ -51,7 +51,7 @@ class LocalJobRunner(BaseJobRunner):
         if not ('TMPDIR' in self._environ or 'TEMP' in self._environ or 'TMP' in self._environ):
             self._environ['TEMP'] = os.path.abspath(tempfile.gettempdir())
 
-        super().__init__(app, nworkers)
+        super().__init__(app, nworkers, **kwargs)
         self._init_worker_threads()
 
     def __command_line(self, job_wrapper):
@@ -89,7 +89,7 @@ class PBSJobRunner(AsynchronousJobRunner):
     """
     runner_name = "PBSRunner"
 
-    def __init__(self, app, nworkers):
+    def __init__(self, app, nworkers, **kwargs):
         """Start the job runner """
         # Check if PBS was importable, fail if not
         assert pbs is not None, PBS_IMPORT_MESSAGE
@@ -101,7 +101,7 @@ class PBSJobRunner(AsynchronousJobRunner):
         self.default_pbs_server     # this is a method with a property decorator, so this causes the default server to be set
 
         # Proceed with general initialization
-        super().__init__(app, nworkers)
+        super().__init__(app, nworkers, **kwargs)
         self._init_monitor_thread()
         self._init_worker_threads()
 
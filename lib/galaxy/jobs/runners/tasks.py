@@ -18,9 +18,9 @@ class TaskedJobRunner(BaseJobRunner):
     """
     runner_name = "TaskRunner"
 
-    def __init__(self, app, nworkers):
+    def __init__(self, app, nworkers, **kwargs):
         """Start the job runner with 'nworkers' worker threads"""
-        super().__init__(app, nworkers)
+        super().__init__(app, nworkers, **kwargs)
         self._init_worker_threads()
 
     def queue_job(self, job_wrapper):
@@ -72,6 +72,21 @@ class BaseJobExec(metaclass=ABCMeta):
         Parse the status of output from get_single_status command.
         """
 
+    def get_multiple_status(self, job_ids):
+        """
+        Return command to get the status of each of the specified jobs
+        (including jobs that have left the queue), or None if the plugin
+        only supports checking them one at a time with get_single_status.
+        """
+        return None
+
+    def parse_multiple_status(self, status, job_ids):
+        """
+        Parse the output of the get_multiple_status command into a dict
+        of job id to state, containing every job in job_ids.
+        """
+        raise NotImplementedError()
+
     def get_failure_reason(self, job_id):
         """
         Return the failure reason for the given job_id.
@@ -90,6 +90,19 @@ class LSF(BaseJobExec):
             return job_states.OK
         return self._get_job_state(status)
 
+    def get_multiple_status(self, job_ids):
+        return f"bjobs -a -o \"id stat\" -noheader {' '.join(job_ids)}"
+
+    def parse_multiple_status(self, status, job_ids):
+        # Jobs not found in LSF have most probably finished and been forgotten,
+        # see parse_single_status
+        rval = dict.fromkeys(job_ids, job_states.OK)
+        for line in status.splitlines():
+            line_parts = line.split()
+            if len(line_parts) == 2 and line_parts[0] in rval:
+                rval[line_parts[0]] = self._get_job_state(line_parts[1])
+        return rval
+
     def get_failure_reason(self, job_id):
         return f"bjobs -l {job_id}"
 
@@ -73,6 +73,18 @@ class Slurm(BaseJobExec):
         # else line like "slurm_load_jobs error: Invalid job id specified"
         return job_states.OK
 
+    def get_multiple_status(self, job_ids):
+        return f"squeue -a -o '%A %t' -j {','.join(job_ids)}"
+
+    def parse_multiple_status(self, status, job_ids):
+        # Jobs that are no longer listed have finished
+        rval = dict.fromkeys(job_ids, job_states.OK)
+        for line in status.splitlines()[1:]:
+            line_parts = line.split()
+            if len(line_parts) == 2 and line_parts[0] in rval:
+                rval[line_parts[0]] = self._get_job_state(line_parts[1])
+        return rval
+
     def _get_job_state(self, state):
         try:
             return {
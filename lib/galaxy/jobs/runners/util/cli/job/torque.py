@@ -97,6 +97,21 @@ class Torque(BaseJobExec):
         # no state found, job has exited
         return job_states.OK
 
+    def get_multiple_status(self, job_ids):
+        return f"qstat -f {' '.join(job_ids)}"
+
+    def parse_multiple_status(self, status, job_ids):
+        # Jobs without a state (unknown to qstat) have exited
+        rval = dict.fromkeys(job_ids, job_states.OK)
+        job_id = None
+        for line in status.splitlines():
+            line = line.split(':', 1) if line.startswith('Job Id:') else line.split(' = ')
+            if line[0] == 'Job Id':
+                job_id = line[1].strip()
+            elif line[0].strip() == 'job_state' and job_id in rval:
+                rval[job_id] = self._get_job_state(line[1].strip())
+        return rval
+
     def _get_job_state(self, state):
         try:
             return {
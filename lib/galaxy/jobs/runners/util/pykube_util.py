@@ -84,6 +84,10 @@ def find_job_object_by_name(pykube_api, job_name, namespace=None):
     return Job.objects(pykube_api).filter(field_selector={"metadata.name": job_name}, namespace=namespace)
 
 
+def find_job_objects(pykube_api, namespace=None):
+    return Job.objects(pykube_api).filter(namespace=namespace)
+
+
 def find_pod_object_by_name(pykube_api, job_name, namespace=None):
     return Pod.objects(pykube_api).filter(selector=f"job-name={job_name}", namespace=namespace)
 
@@ -213,6 +217,7 @@ __all__ = (
     "find_service_object_by_name",
     "find_ingress_object_by_name",
     "find_job_object_by_name",
+    "find_job_objects",
     "find_pod_object_by_name",
     "galaxy_instance_id",
     "HTTPError",
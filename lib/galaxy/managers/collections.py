@@ -1,6 +1,7 @@
 import logging
 
-from sqlalchemy.orm import joinedload, Query
+from sqlalchemy.orm import joinedload, Query, selectinload
+from sqlalchemy.orm.util import identity_key
 
 from galaxy import model
 from galaxy.exceptions import (
@@ -28,6 +29,8 @@ log = logging.getLogger(__name__)
 
 ERROR_INVALID_ELEMENTS_SPECIFICATION = "Create called with invalid parameters, must specify element identifiers."
 ERROR_NO_COLLECTION_TYPE = "Create called without specifying a collection type."
+# Maximum number of ids in the IN clause of a query loading the objects of elements.
+LOAD_ELEMENTS_CHUNK_SIZE = 900
 
 
 class DatasetCollectionManager:
@@ -185,6 +188,29 @@ class DatasetCollectionManager:
 
     def create_dataset_collection(self, trans, collection_type, element_identifiers=None, elements=None,
                                   hide_source_items=None, copy_elements=False, history=None):
+        # Load the objects of all elements, including those of nested collections, at once. They
+        # are kept referenced, and so in the session, while the elements are created.
+        loaded_objects = self.__load_element_objects(trans, element_identifiers or [])
+        dataset_collection = self._create_dataset_collection(
+            trans,
+            collection_type,
+            element_identifiers=element_identifiers,
+            elements=elements,
+            hide_source_items=hide_source_items,
+            copy_elements=copy_elements,
+            history=history,
+            # avoids a query per tag name and a flush per tag of the elements
+            tag_handler=self.tag_handler.create_tag_handler_session(),
+        )
+        history = history or getattr(trans, 'history', None)
+        if copy_elements and history:
+            # give all copies of the elements their hids at once
+            history.add_pending_items(quota=True)
+        del loaded_objects
+        return dataset_collection
+
+    def _create_dataset_collection(self, trans, collection_type, element_identifiers=None, elements=None,
+                                   hide_source_items=None, copy_elements=False, history=None, tag_handler=None):
         # Make sure at least one of these is None.
         assert element_identifiers is None or elements is None
 
@@ -203,7 +229,8 @@ class DatasetCollectionManager:
                                                              element_identifiers=element_identifiers,
                                                              hide_source_items=hide_source_items,
                                                              copy_elements=copy_elements,
-                                                             history=history)
+                                                             history=history,
+                                                             tag_handler=tag_handler)
         else:
             if has_subcollections:
                 # Nested collection - recursively create collections as needed.
@@ -224,10 +251,11 @@ class DatasetCollectionManager:
                                          element_identifiers,
                                          hide_source_items=False,
                                          copy_elements=False,
-                                         history=None):
+                                         history=None,
+                                         tag_handler=None):
         if collection_type_description.has_subcollections():
             # Nested collection - recursively create collections and update identifiers.
-            self.__recursively_create_collections_for_identifiers(trans, element_identifiers, hide_source_items, copy_elements, history=history)
+            self.__recursively_create_collections_for_identifiers(trans, element_identifiers, hide_source_items, copy_elements, history=history, tag_handler=tag_handler)
         new_collection = False
         for element_identifier in element_identifiers:
             if element_identifier.get("src") == "new_collection" and element_identifier.get('collection_type') == '':
@@ -236,13 +264,15 @@ class DatasetCollectionManager:
                                                 element_identifiers=element_identifier['element_identifiers'],
                                                 hide_source_items=hide_source_items,
                                                 copy_elements=copy_elements,
-                                                history=history)
+                                                history=history,
+                                                tag_handler=tag_handler)
         if not new_collection:
             elements = self.__load_elements(trans=trans,
                                             element_identifiers=element_identifiers,
                                             hide_source_items=hide_source_items,
                                             copy_elements=copy_elements,
-                                            history=history)
+                                            history=history,
+                                            tag_handler=tag_handler)
         return elements
 
     def _append_tags(self, dataset_collection_instance, implicit_inputs=None, tags=None):
@@ -348,7 +378,7 @@ class DatasetCollectionManager:
             context.flush()
         return dataset_collection_instance
 
-    def __recursively_create_collections_for_identifiers(self, trans, element_identifiers, hide_source_items, copy_elements, history=None):
+    def __recursively_create_collections_for_identifiers(self, trans, element_identifiers, hide_source_items, copy_elements, history=None, tag_handler=None):
         for element_identifier in element_identifiers:
             try:
                 if element_identifier.get("src") != "new_collection":
@@ -360,13 +390,14 @@ class DatasetCollectionManager:
 
             # element identifier is a dict with src new_collection...
             collection_type = element_identifier.get("collection_type")
-            collection = self.create_dataset_collection(
+            collection = self._create_dataset_collection(
                 trans=trans,
                 collection_type=collection_type,
                 element_identifiers=element_identifier["element_identifiers"],
                 hide_source_items=hide_source_items,
                 copy_elements=copy_elements,
                 history=history,
+                tag_handler=tag_handler,
             )
             element_identifier["__object__"] = collection
 
@@ -388,7 +419,7 @@ class DatasetCollectionManager:
             # and dict of named elements
             collection_type = element.get("collection_type")
             sub_elements = element["elements"]
-            collection = self.create_dataset_collection(
+            collection = self._create_dataset_collection(
                 trans=trans,
                 collection_type=collection_type,
                 elements=sub_elements,
@@ -399,17 +430,74 @@ class DatasetCollectionManager:
             new_elements[key] = collection
         elements.update(new_elements)
 
-    def __load_elements(self, trans, element_identifiers, hide_source_items=False, copy_elements=False, history=None):
+    def __load_elements(self, trans, element_identifiers, hide_source_items=False, copy_elements=False, history=None, tag_handler=None):
+        tag_handler = tag_handler or self.tag_handler.create_tag_handler_session()
         elements = {}
         for element_identifier in element_identifiers:
             elements[element_identifier["name"]] = self.__load_element(trans,
                                                                        element_identifier=element_identifier,
                                                                        hide_source_items=hide_source_items,
                                                                        copy_elements=copy_elements,
-                                                                       history=history)
+                                                                       history=history,
+                                                                       tag_handler=tag_handler)
         return elements
 
-    def __load_element(self, trans, element_identifier, hide_source_items, copy_elements, history=None):
+    def __load_element_objects(self, trans, element_identifiers):
+        """
+        Load the HDAs, LDDAs and HDCAs referenced by `element_identifiers` and
+        by the element identifiers of the new collections among them, with
+        what is needed to check access to them and to copy them, using a query
+        per type of element (and chunk of ids) instead of queries per element.
+        Return the loaded objects, which elements then find in the session.
+        """
+        ids_by_src = {'hda': set(), 'ldda': set(), 'hdca': set()}
+        identifiers_to_load = list(element_identifiers)
+        while identifiers_to_load:
+            element_identifier = identifiers_to_load.pop()
+            if not isinstance(element_identifier, dict) or "__object__" in element_identifier:
+                continue
+            src_type = element_identifier.get('src', 'hda')
+            if src_type == 'new_collection':
+                identifiers_to_load.extend(element_identifier.get('element_identifiers') or [])
+                continue
+            encoded_id = element_identifier.get('id')
+            if src_type not in ids_by_src or not encoded_id:
+                # reported when loading the element
+                continue
+            try:
+                ids_by_src[src_type].add(int(trans.app.security.decode_id(encoded_id)))
+            except Exception:
+                continue
+        HDA = model.HistoryDatasetAssociation
+        LDDA = model.LibraryDatasetDatasetAssociation
+        HDCA = model.HistoryDatasetCollectionAssociation
+        context = self.model.context
+        queries = {
+            'hda': (HDA, context.query(HDA).options(
+                joinedload(HDA.history),
+                joinedload(HDA.dataset).selectinload(model.Dataset.actions),
+                selectinload(HDA.tags),
+                selectinload(HDA.annotations),
+            )),
+            'ldda': (LDDA, context.query(LDDA).options(
+                joinedload(LDDA.library_dataset).joinedload(model.LibraryDataset.folder),
+                joinedload(LDDA.dataset).selectinload(model.Dataset.actions),
+                selectinload(LDDA.tags),
+            )),
+            'hdca': (HDCA, context.query(HDCA).options(
+                joinedload(HDCA.history),
+                joinedload(HDCA.collection),
+            )),
+        }
+        loaded_objects = []
+        for src_type, ids in ids_by_src.items():
+            model_class, query = queries[src_type]
+            ids = sorted(ids)
+            for i in range(0, len(ids), LOAD_ELEMENTS_CHUNK_SIZE):
+                loaded_objects.extend(query.filter(model_class.id.in_(ids[i:i + LOAD_ELEMENTS_CHUNK_SIZE])))
+        return loaded_objects
+
+    def __load_element(self, trans, element_identifier, hide_source_items, copy_elements, history, tag_handler):
         # if not isinstance( element_identifier, dict ):
         #    # Is allowing this to just be the id of an hda too clever? Somewhat
         #    # consistent with other API methods though.
@@ -442,18 +530,24 @@ class DatasetCollectionManager:
             tag_str = ",".join(str(_) for _ in tags)
         if src_type == 'hda':
             decoded_id = int(trans.app.security.decode_id(encoded_id))
-            hda = self.hda_manager.get_accessible(decoded_id, trans.user)
+            # loaded by __load_element_objects
+            hda = self.model.context.identity_map.get(identity_key(model.HistoryDatasetAssociation, decoded_id))
+            if hda is None:
+                hda = self.hda_manager.get_accessible(decoded_id, trans.user)
+            else:
+                self.hda_manager.error_unless_accessible(hda, trans.user)
             if copy_elements:
-                element = self.hda_manager.copy(hda, history=history or trans.history, hide_copy=True)
+                # the copies are added to the history by create_dataset_collection
+                element = self.hda_manager.copy(hda, history=history or trans.history, hide_copy=True, flush=False)
             else:
                 element = hda
-            if hide_source_items and self.hda_manager.get_owned(hda.id, user=trans.user, current_history=history or trans.history):
+            if hide_source_items and self.hda_manager.error_unless_owner(hda, trans.user, current_history=history or trans.history):
                 hda.visible = False
-            self.tag_handler.apply_item_tags(user=trans.user, item=element, tags_str=tag_str)
+            tag_handler.apply_item_tags(user=trans.user, item=element, tags_str=tag_str, flush=False)
         elif src_type == 'ldda':
             element = self.ldda_manager.get(trans, encoded_id, check_accessible=True)
             element = element.to_history_dataset_association(history or trans.history, add_to_history=True, visible=not hide_source_items)
-            self.tag_handler.apply_item_tags(user=trans.user, item=element, tags_str=tag_str)
+            tag_handler.apply_item_tags(user=trans.user, item=element, tags_str=tag_str, flush=False)
         elif src_type == 'hdca':
             # TODO: Option to copy? Force copy? Copy or allow if not owned?
             element = self.__get_history_collection_instance(trans, encoded_id).collection
@@ -104,26 +104,40 @@ class HDAManager(datasets.DatasetAssociationManager,
             self.session().flush()
         return hda
 
-    def copy(self, hda, history=None, hide_copy=False, **kwargs):
+    def copy(self, hda, history=None, hide_copy=False, flush=True, **kwargs):
         """
         Copy hda, including annotation and tags, add to history and return the given HDA.
+
+        Unless `flush`, the copy is only staged for addition to history (see
+        `History.add_pending_items`) and nothing is flushed, so that many
+        copies can be added to history at once.
         """
-        copy = hda.copy(parent_id=kwargs.get('parent_id'), copy_hid=False)
+        copy = hda.copy(parent_id=kwargs.get('parent_id'), copy_hid=False, flush=flush)
         if hide_copy:
             copy.visible = False
         # add_dataset will update the hid to the next avail. in history
         if history:
-            history.add_dataset(copy)
+            if flush:
+                history.add_dataset(copy)
+            else:
+                history.stage_addition(copy)
 
         copy.copied_from_history_dataset_association = hda
         copy.set_size()
 
         original_annotation = self.annotation(hda)
-        self.annotate(copy, original_annotation, user=hda.history.user)
+        self.annotate(copy, original_annotation, user=hda.history.user, flush=flush)
 
-        # these use a session flush
-        original_tags = self.get_tags(hda)
-        self.set_tags(copy, original_tags, user=hda.history.user)
+        if flush:
+            # these use a session flush
+            original_tags = self.get_tags(hda)
+            self.set_tags(copy, original_tags, user=hda.history.user)
+        elif hda.history.user:
+            # copy the tag associations instead, avoiding queries for the tags by name
+            for tag in hda.tags:
+                copied_tag = tag.copy(cls=model.HistoryDatasetAssociationTagAssociation)
+                copied_tag.user = hda.history.user
+                copy.tags.append(copied_tag)
 
         return copy
 
@@ -152,7 +166,7 @@ class HDAManager(datasets.DatasetAssociationManager,
         super().purge(hda, flush=flush)
         # decrease the user's space used
         if quota_amount_reduction:
-            user.adjust_total_disk_usage(-quota_amount_reduction)
+            user.adjust_total_disk_usage(-quota_amount_reduction, hda.dataset.object_store_id)
 
     # .... states
     def error_if_uploading(self, hda):
@@ -3,13 +3,17 @@ Heterogenous lists/contents are difficult to query properly since unions are
 not easily made.
 """
 import logging
+from itertools import islice
 
 from sqlalchemy import (
+    and_,
     asc,
     desc,
+    exists,
     false,
     func,
     literal,
+    or_,
     sql,
     true
 )
@@ -17,6 +21,7 @@ from sqlalchemy.orm import (
     eagerload,
     undefer
 )
+from sqlalchemy.sql import operators
 
 from galaxy import (
     exceptions as glx_exceptions,
@@ -72,6 +77,8 @@ class HistoryContentsManager(containers.ContainerManagerMixin):
         "update_time",
     )
     default_order_by = 'hid'
+    #: the columns contents can be paged through with `after`, by keyset pagination
+    keyset_columns = ('hid', 'create_time', 'update_time')
 
     def __init__(self, app: MinimalManagerApp):
         self.app = app
@@ -219,6 +226,11 @@ class HistoryContentsManager(containers.ContainerManagerMixin):
         Returns a limited and offset list of both types of contents, filtered
         and in some order.
         """
+        filters = kwargs.get('filters') or []
+        fn_filtered = expand_models and any(filter_fn.filter_type == 'function' for filter_fn in filters)
+        if fn_filtered:
+            # function filters are applied to the models, limit and offset the filtered models so pages are not short
+            limit, offset = kwargs.pop('limit', None), kwargs.pop('offset', None) or 0
         contents_results = self._union_of_contents_query(container, **kwargs).all()
         if not expand_models:
             return contents_results
@@ -242,7 +254,6 @@ class HistoryContentsManager(containers.ContainerManagerMixin):
 
         # cycle back over the union query to create an ordered list of the objects returned in queries 2 & 3 above
         contents = []
-        filters = kwargs.get('filters') or []
         # TODO: or as generator?
         for result in contents_results:
             result_type = self._get_union_type(result)
@@ -250,6 +261,8 @@ class HistoryContentsManager(containers.ContainerManagerMixin):
             content = id_map[result_type][contents_id]
             if self.passes_filters(content, filters):
                 contents.append(content)
+        if fn_filtered:
+            contents = list(islice(contents, offset, None if limit is None else offset + limit))
         return contents
 
     @staticmethod
@@ -267,13 +280,26 @@ class HistoryContentsManager(containers.ContainerManagerMixin):
                                  offset=None,
                                  order_by=None,
                                  user_id=None,
+                                 after=None,
                                  **kwargs):
         """
         Returns a query for a limited and offset list of both types of contents,
         filtered and in some order.
+
+        If `after` is the type id (e.g. 'dataset-12') of a content, only the
+        contents following it in the order are returned, which requires
+        ordering by one of `keyset_columns`.
         """
         order_by = order_by if order_by is not None else self.default_order_by
         order_by = order_by if isinstance(order_by, (tuple, list)) else (order_by, )
+        keyset_order = self._keyset_order(order_by)
+        if keyset_order:
+            # break ties by type id so pages following one another with `after` neither skip nor repeat contents
+            order_column, descending = keyset_order
+            order_by = tuple(order_by) + ((desc if descending else asc)('type_id'), )
+        elif after is not None:
+            raise glx_exceptions.RequestParameterInvalidException('Paging with after requires ordering by one of the columns',
+                available=self.keyset_columns)
 
         # TODO: 3 queries and 3 iterations over results - this is undoubtedly better solved in the actual SQL layer
         # via one common table for contents, Some Yonder Resplendent and Fanciful Join, or ORM functionality
@@ -299,6 +325,10 @@ class HistoryContentsManager(containers.ContainerManagerMixin):
             elif orm_filter.filter_type == "orm":
                 contained_query = self._apply_orm_filter(contained_query, orm_filter.filter)
                 subcontainer_query = self._apply_orm_filter(subcontainer_query, orm_filter.filter)
+        if after is not None:
+            after_value = self._content_value(container, after, order_column)
+            contained_query = self._apply_keyset_filter(contained_query, order_column, descending, after_value, after)
+            subcontainer_query = self._apply_keyset_filter(subcontainer_query, order_column, descending, after_value, after)
 
         contents_query = contained_query.union_all(subcontainer_query)
         contents_query = contents_query.order_by(*order_by)
@@ -318,6 +348,51 @@ class HistoryContentsManager(containers.ContainerManagerMixin):
                 qry = qry.filter(new_filter)
         return qry
 
+    def _keyset_order(self, order_by):
+        """
+        Return the name of the column and whether the order is descending if
+        `order_by` orders by one of `keyset_columns` only, None otherwise.
+        """
+        if len(order_by) != 1:
+            return None
+        order_clause = order_by[0]
+        if isinstance(order_clause, str):
+            column_name, descending = order_clause, False
+        elif getattr(order_clause, 'modifier', None) in (operators.asc_op, operators.desc_op):
+            # asc/desc of a column or, as in parse_order_by, of a column name
+            element = order_clause.element
+            column_name = element.name if isinstance(element, sql.expression.ColumnClause) else getattr(element, 'element', None)
+            descending = order_clause.modifier is operators.desc_op
+        else:
+            return None
+        if column_name not in self.keyset_columns:
+            return None
+        return column_name, descending
+
+    def _content_value(self, container, type_id, column_name):
+        """Return the value of the column named `column_name` of the content with type id `type_id`."""
+        content_type, _, content_id = type_id.partition('-')
+        component_class = {
+            self.contained_class_type_name: self.contained_class,
+            self.subcontainer_class_type_name: self.subcontainer_class,
+        }.get(content_type)
+        value = None
+        if component_class is not None and content_id.isdigit():
+            query = self._session().query(getattr(component_class, column_name)).filter(component_class.id == int(content_id))
+            if container:
+                query = query.filter(component_class.history_id == container.id)
+            value = query.scalar()
+        if value is None:
+            raise glx_exceptions.RequestParameterInvalidException('Unknown content to page after', after=type_id)
+        return value
+
+    def _apply_keyset_filter(self, qry, column_name, descending, value, type_id):
+        columns = {col['name']: col['expr'] for col in qry.column_descriptions}
+        column, type_id_column = columns[column_name], columns['type_id']
+        if descending:
+            return qry.filter(or_(column < value, and_(column == value, type_id_column < type_id)))
+        return qry.filter(or_(column > value, and_(column == value, type_id_column > type_id)))
+
     def _contents_common_columns(self, component_class, **kwargs):
         columns = []
         # pull column from class by name or override with kwargs if listed there, then label
@@ -444,6 +519,36 @@ class HistoryContentsSerializer(base.ModelSerializer, deletable.PurgableSerializ
             "create_time",
             "update_time",
         ])
+        # summary keys that serialize from the rows of the contents query as
+        # they do from HDA and HDCA models, by history_content_type (HDCAs
+        # serialize their times and collection_id from the collection)
+        self.row_keys = {
+            'dataset': set(self.views['summary']) - {'collection_id'},
+            'dataset_collection': {
+                "id", "type_id", "history_id", "hid", "history_content_type", "visible", "name", "deleted",
+            },
+        }
+        # summary keys the HDA and HDCA serializers do not serialize at all
+        self.row_skipped_keys = {
+            'dataset': {'collection_id'},
+            'dataset_collection': {'dataset_id', 'state', 'purged'},
+        }
+
+    def can_serialize_rows(self, keys):
+        """
+        Return whether serializing `keys` from rows of the contents query gives
+        the same as serializing them from the HDA and HDCA models.
+        """
+        return all(key in self.row_keys[content_type] or key in self.row_skipped_keys[content_type]
+                   for content_type in self.row_keys for key in keys)
+
+    def serialize_row(self, row, keys, **context):
+        """
+        Serialize `keys` from a row of the contents query, leaving out the keys
+        the serializer of its content type would not return.
+        """
+        keys = [key for key in keys if key in self.row_keys[row.history_content_type]]
+        return self.serialize_to_view(row, keys=keys, **context)
 
     # assumes: outgoing to json.dumps and sanitized
     def add_serializers(self):
@@ -522,6 +627,32 @@ class HistoryContentsFilters(base.ModelFilterParser,
             return self.parsed_filter(filter_type='orm', filter=column_filter)
         return super()._parse_orm_filter(attr, op, val)
 
+    def create_annotation_filter(self, attr, op, val):
+        """
+        Filter contents by their owner's annotation in the query, rather than
+        on the models as the function filter of `AnnotatableFilterMixin` does.
+        """
+        if op not in ('has', 'contains'):
+            self.raise_filter_err(attr, op, val, 'bad op in filter')
+
+        def _create_annotation_filter(model_class=None):
+            if model_class is model.HistoryDatasetAssociation:
+                annotation_table = model.HistoryDatasetAssociationAnnotationAssociation.table
+                content_id_column = annotation_table.c.history_dataset_association_id
+            elif model_class is model.HistoryDatasetCollectionAssociation:
+                annotation_table = model.HistoryDatasetCollectionAssociationAnnotationAssociation.table
+                content_id_column = annotation_table.c.history_dataset_collection_id
+            else:
+                return True
+            history_table = model.History.table
+            return exists().where(and_(
+                content_id_column == model_class.table.c.id,
+                history_table.c.id == model_class.table.c.history_id,
+                annotation_table.c.user_id == history_table.c.user_id,
+                annotation_table.c.annotation.contains(val, autoescape=True),
+            ))
+        return _create_annotation_filter
+
     def decode_type_id(self, type_id):
         TYPE_ID_SEP = '-'
         split = type_id.split(TYPE_ID_SEP, 1)
@@ -539,7 +670,9 @@ class HistoryContentsFilters(base.ModelFilterParser,
         deletable.PurgableFiltersMixin._add_parsers(self)
         taggable.TaggableFilterMixin._add_parsers(self)
         tools.ToolFilterMixin._add_parsers(self)
+        self.fn_filter_parsers.pop('annotation', None)
         self.orm_filter_parsers.update({
+            'annotation': self.create_annotation_filter,
             'history_content_type': {'op': ('eq')},
             'type_id': {'op': ('eq', 'in'), 'val': self.parse_type_id_list},
             'hid': {'op': ('eq', 'ge', 'le', 'gt', 'lt'), 'val': int},
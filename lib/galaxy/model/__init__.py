@@ -41,6 +41,7 @@ from sqlalchemy import (
     inspect,
     Integer,
     join,
+    literal,
     not_,
     or_,
     select,
@@ -64,7 +65,9 @@ from sqlalchemy.orm import (
     reconstructor,
     registry,
 )
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.orm.decl_api import DeclarativeMeta
+from sqlalchemy.sql.expression import ClauseElement
 
 import galaxy.exceptions
 import galaxy.model.metadata
@@ -77,6 +80,7 @@ from galaxy.model.orm.now import now
 from galaxy.security import get_permitted_actions
 from galaxy.security.validate_user_input import validate_password_str
 from galaxy.util import (
+    chunk_iterable,
     directory_hash_id,
     listify,
     ready_name_for_url,
@@ -552,9 +556,38 @@ class User(Dictifiable, RepresentById):
 
     total_disk_usage = property(get_disk_usage, set_disk_usage)
 
-    def adjust_total_disk_usage(self, amount):
+    def adjust_total_disk_usage(self, amount, object_store_id=None):
+        """
+        Adjust the disk space used by user by `amount` bytes and post the
+        change to the disk usage ledger of object store `object_store_id`.
+        """
         if amount != 0:
-            self.disk_usage = func.coalesce(self.table.c.disk_usage, 0) + amount
+            disk_usage = inspect(self).attrs.disk_usage.loaded_value
+            if not isinstance(disk_usage, ClauseElement):
+                disk_usage = func.coalesce(self.table.c.disk_usage, 0)
+            # else add to the adjustments not flushed yet
+            self.disk_usage = disk_usage + amount
+            sa_session = object_session(self)
+            if sa_session:
+                sa_session.add(UserDiskUsageDelta(user=self, object_store_id=object_store_id, amount=amount))
+
+    def get_object_store_disk_usage(self):
+        """
+        Return byte count of disk space used by user in each object store,
+        as a dict keyed by object store id, according to the disk usage
+        ledger.
+        """
+        sa_session = object_session(self)
+        usage = defaultdict(int)
+        for table, amount_column in [(UserObjectStoreUsage.table, UserObjectStoreUsage.table.c.total_disk_usage),
+                                     (UserDiskUsageDelta.table, UserDiskUsageDelta.table.c.amount)]:
+            rows = sa_session.execute(
+                select(table.c.object_store_id, func.sum(amount_column))
+                .where(table.c.user_id == self.id)
+                .group_by(table.c.object_store_id))
+            for object_store_id, amount in rows:
+                usage[object_store_id] += int(amount or 0)
+        return dict(usage)
 
     @property
     def nice_total_disk_usage(self):
@@ -580,7 +613,8 @@ class User(Dictifiable, RepresentById):
     def _calculate_or_set_disk_usage(self, dryrun=True):
         """
         Utility to calculate and return the disk usage.  If dryrun is False,
-        the new value is set immediately.
+        the new value is set immediately and the user's disk usage ledger is
+        reset to the usage in each object store.
         """
         sql_calc = """
             WITH per_user_histories AS
@@ -596,15 +630,18 @@ class User(Dictifiable, RepresentById):
                 WHERE NOT purged
                     AND history_id IN (SELECT id FROM per_user_histories)
             )
-            SELECT SUM(COALESCE(dataset.total_size, dataset.file_size, 0))
+            SELECT dataset.object_store_id, SUM(COALESCE(dataset.total_size, dataset.file_size, 0))
             FROM dataset
             LEFT OUTER JOIN library_dataset_dataset_association ON dataset.id = library_dataset_dataset_association.dataset_id
             WHERE dataset.id IN (SELECT dataset_id FROM per_hist_hdas)
                 AND library_dataset_dataset_association.id IS NULL
+            GROUP BY dataset.object_store_id
         """
         sa_session = object_session(self)
-        usage = sa_session.scalar(sql_calc, {'id': self.id})
+        usage_by_object_store = {object_store_id: int(amount or 0) for object_store_id, amount in sa_session.execute(sql_calc, {'id': self.id})}
+        usage = sum(usage_by_object_store.values()) if usage_by_object_store else None
         if not dryrun:
+            UserObjectStoreUsage.reset(sa_session, self, usage_by_object_store)
             self.set_disk_usage(usage)
             sa_session.flush()
         return usage
@@ -673,6 +710,108 @@ class User(Dictifiable, RepresentById):
         session.flush()
 
 
+class UserDiskUsageDelta(RepresentById):
+    """
+    A change of the disk space used by a user in an object store, posted to
+    the disk usage ledger along with the adjustment of the user's total disk
+    usage. Deltas are folded into the user's `UserObjectStoreUsage` balances
+    by `compact`.
+    """
+
+    def __init__(self, user=None, object_store_id=None, amount=0):
+        self.user = user
+        self.object_store_id = object_store_id
+        self.amount = amount
+
+    @classmethod
+    def compact(cls, sa_session, supports_skip_locked=True):
+        """
+        Fold the posted deltas into the object store balances of their users
+        and return the users whose balances no longer add up to their total
+        disk usage, as a dict mapping user id to the total disk usage and the
+        sum of the balances.
+        """
+        delta_table = cls.table
+        usage_table = UserObjectStoreUsage.table
+        user_table = User.table
+        with sa_session.get_bind().begin() as conn:
+            stmt = select(delta_table.c.id, delta_table.c.user_id, delta_table.c.object_store_id, delta_table.c.amount)
+            if supports_skip_locked:
+                # Deltas locked by another compaction running concurrently are left to it
+                stmt = stmt.with_for_update(skip_locked=True)
+            else:
+                stmt = stmt.with_for_update()
+            deltas = conn.execute(stmt).fetchall()
+            if not deltas:
+                return {}
+            amounts = defaultdict(int)
+            for _, user_id, object_store_id, amount in deltas:
+                amounts[(user_id, object_store_id)] += int(amount)
+            for (user_id, object_store_id), amount in amounts.items():
+                result = conn.execute(
+                    usage_table.update()
+                    .where(and_(usage_table.c.user_id == user_id, usage_table.c.object_store_id == object_store_id))
+                    .values(total_disk_usage=func.coalesce(usage_table.c.total_disk_usage, 0) + amount))
+                if not result.rowcount:
+                    conn.execute(usage_table.insert().values(user_id=user_id, object_store_id=object_store_id, total_disk_usage=amount))
+            delta_ids = [delta[0] for delta in deltas]
+            for i in range(0, len(delta_ids), 1000):
+                conn.execute(delta_table.delete().where(delta_table.c.id.in_(delta_ids[i:i + 1000])))
+            user_ids = sorted({user_id for user_id, _ in amounts})
+            # The disk usage, the balances and the deltas that are not folded
+            # yet (posted since, or left to a concurrent compaction) are read
+            # in a single statement, so they are consistent with each other.
+            balances = (
+                select(usage_table.c.user_id, func.sum(usage_table.c.total_disk_usage).label('total_disk_usage'))
+                .where(usage_table.c.user_id.in_(user_ids))
+                .group_by(usage_table.c.user_id)
+                .subquery())
+            pending = (
+                select(delta_table.c.user_id, func.sum(delta_table.c.amount).label('amount'))
+                .where(delta_table.c.user_id.in_(user_ids))
+                .group_by(delta_table.c.user_id)
+                .subquery())
+            totals = conn.execute(
+                select(user_table.c.id, user_table.c.disk_usage, balances.c.total_disk_usage, pending.c.amount)
+                .select_from(user_table
+                             .outerjoin(balances, user_table.c.id == balances.c.user_id)
+                             .outerjoin(pending, user_table.c.id == pending.c.user_id))
+                .where(user_table.c.id.in_(user_ids)))
+            drifted = {}
+            for user_id, disk_usage, balance, pending_amount in totals:
+                if int(disk_usage or 0) != int(balance or 0) + int(pending_amount or 0):
+                    drifted[user_id] = (int(disk_usage or 0), int(balance or 0))
+        log.debug("Compacted %d disk usage ledger entries of %d users", len(deltas), len(user_ids))
+        for user_id, (disk_usage, balance) in drifted.items():
+            log.warning("Disk usage of user %s is %s bytes but the disk usage ledger adds up to %s bytes, recalculate the user's disk usage to reconcile them", user_id, disk_usage, balance)
+        return drifted
+
+
+class UserObjectStoreUsage(RepresentById):
+    """
+    The disk space used by a user in an object store, as of the last
+    compaction of the disk usage ledger.
+    """
+
+    def __init__(self, user=None, object_store_id=None, total_disk_usage=0):
+        self.user = user
+        self.object_store_id = object_store_id
+        self.total_disk_usage = total_disk_usage
+
+    @classmethod
+    def reset(cls, sa_session, user, usage_by_object_store):
+        """
+        Replace the disk usage ledger of `user` with balances of
+        `usage_by_object_store`, discarding the deltas posted so far.
+        """
+        sa_session.execute(UserDiskUsageDelta.table.delete().where(UserDiskUsageDelta.table.c.user_id == user.id))
+        sa_session.execute(cls.table.delete().where(cls.table.c.user_id == user.id))
+        if usage_by_object_store:
+            sa_session.execute(cls.table.insert(), [
+                dict(user_id=user.id, object_store_id=object_store_id, total_disk_usage=amount)
+                for object_store_id, amount in usage_by_object_store.items()])
+
+
 class PasswordResetToken(_HasTable):
     def __init__(self, user, token=None):
         if token:
@@ -1957,9 +2096,18 @@ class History(HasTags, Dictifiable, UsesAnnotations, HasName, RepresentById):
     def empty(self):
         return self.hid_counter == 1
 
-    def add_pending_items(self, set_output_hid=True):
-        # These are assumed to be either copies of existing datasets or new, empty datasets,
+    def add_pending_items(self, set_output_hid=True, quota=False):
+        # These are usually either copies of existing datasets or new, empty datasets,
         # so we don't need to set the quota.
+        if quota and self.user:
+            # Copies only count if the user doesn't own the dataset already, as in add_dataset
+            disk_usage_by_object_store = defaultdict(int)
+            for item in self._pending_additions:
+                if is_hda(item):
+                    disk_usage_by_object_store[item.dataset.object_store_id] += item.quota_amount(self.user)
+            for object_store_id, disk_usage in disk_usage_by_object_store.items():
+                if disk_usage:
+                    self.user.adjust_total_disk_usage(disk_usage, object_store_id)
         self.add_datasets(object_session(self), self._pending_additions, set_hid=set_output_hid, quota=False, flush=False)
         self._pending_additions = []
 
@@ -2001,7 +2149,7 @@ class History(HasTags, Dictifiable, UsesAnnotations, HasName, RepresentById):
             if set_hid:
                 dataset.hid = self._next_hid()
         if quota and is_dataset and self.user:
-            self.user.adjust_total_disk_usage(dataset.quota_amount(self.user))
+            self.user.adjust_total_disk_usage(dataset.quota_amount(self.user), dataset.dataset.object_store_id)
         dataset.history = self
         if is_dataset and genome_build not in [None, '?']:
             self.genome_build = genome_build
@@ -2014,10 +2162,15 @@ class History(HasTags, Dictifiable, UsesAnnotations, HasName, RepresentById):
         """
         optimize = len(datasets) > 1 and parent_id is None and set_hid
         if optimize:
-            self.__add_datasets_optimized(datasets, genome_build=genome_build)
+            # Sum the disk usage first, generating the hids commits and expires the datasets.
+            disk_usage_by_object_store = defaultdict(int)
             if quota and self.user:
-                disk_usage = sum([d.get_total_size() for d in datasets if is_hda(d)])
-                self.user.adjust_total_disk_usage(disk_usage)
+                for d in datasets:
+                    if is_hda(d):
+                        disk_usage_by_object_store[d.dataset.object_store_id] += d.get_total_size()
+            self.__add_datasets_optimized(datasets, genome_build=genome_build)
+            for object_store_id, disk_usage in disk_usage_by_object_store.items():
+                self.user.adjust_total_disk_usage(disk_usage, object_store_id)
             sa_session.add_all(datasets)
             if flush:
                 sa_session.flush()
@@ -2043,8 +2196,22 @@ class History(HasTags, Dictifiable, UsesAnnotations, HasName, RepresentById):
             dataset.history_id = cached_id(self)
             if set_genome and is_hda(dataset):
                 self.genome_build = genome_build
+        self.__load_expired_hdas(datasets)
         return datasets
 
+    def __load_expired_hdas(self, datasets):
+        # Generating the hids commits and so expires the datasets, reload them at once instead
+        # of one by one when they are next used (at the latest when flushing their hids).
+        sa_session = object_session(self)
+        if sa_session is None:
+            return
+        hda_ids = [
+            inspect(d).identity[0] for d in datasets
+            if is_hda(d) and inspect(d).has_identity and inspect(d).expired_attributes
+        ]
+        for chunk in chunk_iterable(hda_ids, size=900):
+            sa_session.query(HistoryDatasetAssociation).filter(HistoryDatasetAssociation.id.in_(chunk)).all()
+
     def add_dataset_collection(self, history_dataset_collection, set_hid=True):
         if set_hid:
             history_dataset_collection.hid = self._next_hid()
@@ -3367,6 +3534,9 @@ class HistoryDatasetAssociation(DatasetInstance, HasTags, Dictifiable, UsesAnnot
 
     def __create_version__(self, session):
         state = inspect(self)
+        if not state.persistent:
+            # New HDAs have no earlier version to record
+            return
         changes = {}
 
         for attr in state.mapper.columns:
@@ -3475,6 +3645,12 @@ class HistoryDatasetAssociation(DatasetInstance, HasTags, Dictifiable, UsesAnnot
             #   applied to the new LibraryDataset, and the current user's DefaultUserPermissions will be applied
             #   to the associated Dataset.
             library_dataset = LibraryDataset(folder=target_folder, name=self.name, info=self.info)
+        if self.dataset and not self.dataset.library_associations and not self.dataset.purged:
+            # Datasets in a library no longer count towards the disk usage of the users having them in histories
+            history_users = {hda.history.user for hda in self.dataset.history_associations
+                             if not hda.purged and hda.history and not hda.history.purged and hda.history.user}
+            for history_user in history_users:
+                history_user.adjust_total_disk_usage(-self.get_total_size(), self.dataset.object_store_id)
         user = trans.user or self.history.user
         ldda = LibraryDatasetDatasetAssociation(name=element_identifier or self.name,
                                                 info=self.info,
@@ -3539,7 +3715,7 @@ class HistoryDatasetAssociation(DatasetInstance, HasTags, Dictifiable, UsesAnnot
         """Remove this HDA's quota_amount from user's quota.
         """
         if user:
-            user.adjust_total_disk_usage(-self.quota_amount(user))
+            user.adjust_total_disk_usage(-self.quota_amount(user), self.dataset.object_store_id)
 
     def quota_amount(self, user):
         """
@@ -4320,10 +4496,60 @@ class DatasetCollection(Dictifiable, UsesAnnotations, RepresentById):
 
         return self._populated_optimized
 
+    def _load_element_tree(self, load_datasets=False):
+        """
+        Load the elements of this collection and of all of its nested
+        collections in one query and attach them to their collections, so
+        that walking the tree does not lazy load the elements of every
+        nested collection. With `load_datasets` the HDAs of the elements and
+        their datasets and tags are loaded too.
+        """
+        if getattr(self, '_element_tree_loaded', False) and not load_datasets:
+            return
+        db_session = object_session(self)
+        if not db_session or not self.id:
+            # Sessionless context, elements are in memory
+            return
+        DCE = DatasetCollectionElement
+        q = db_session.query(DCE).options(joinedload(DCE.child_collection))
+        if self.has_subcollections:
+            # recursive cte of the ids of the nested collections (as in contains_collection)
+            children_cte = Query(DCE.child_collection_id.label('collection_id')) \
+                .filter(DCE.dataset_collection_id == self.id) \
+                .filter(DCE.child_collection_id.isnot(None)) \
+                .cte(name="element_children", recursive=True)
+            ec = aliased(children_cte, name="ec")
+            dce = aliased(DCE, name="dce")
+            rec = Query(dce.child_collection_id.label('collection_id')) \
+                .filter(dce.dataset_collection_id == ec.c.collection_id) \
+                .filter(dce.child_collection_id.isnot(None))
+            children_cte = children_cte.union_all(rec)
+            q = q.filter(or_(DCE.dataset_collection_id == self.id,
+                             DCE.dataset_collection_id.in_(select([children_cte.c.collection_id]))))
+        else:
+            q = q.filter(DCE.dataset_collection_id == self.id)
+        if load_datasets:
+            q = q.options(
+                joinedload(DCE.hda).joinedload(HistoryDatasetAssociation.dataset),
+                joinedload(DCE.hda).selectinload(HistoryDatasetAssociation.tags),
+            )
+        elements_by_collection = defaultdict(list)
+        collections = [self]
+        for element in q.order_by(DCE.dataset_collection_id, DCE.element_index):
+            elements_by_collection[element.dataset_collection_id].append(element)
+            if element.child_collection:
+                collections.append(element.child_collection)
+        for collection in collections:
+            # do not replace elements loaded (and maybe modified) before
+            if 'elements' not in collection.__dict__:
+                set_committed_value(collection, 'elements', elements_by_collection[collection.id])
+            collection._element_tree_loaded = True
+
     @property
     def populated(self):
         top_level_populated = self.populated_state == DatasetCollection.populated_states.OK
         if top_level_populated and self.has_subcollections:
+            self._load_element_tree()
             return all(e.child_collection and e.child_collection.populated for e in self.elements)
         return top_level_populated
 
@@ -4347,6 +4573,7 @@ class DatasetCollection(Dictifiable, UsesAnnotations, RepresentById):
     def waiting_for_elements(self):
         top_level_waiting = self.populated_state == DatasetCollection.populated_states.NEW
         if not top_level_waiting and self.has_subcollections:
+            self._load_element_tree()
             return any(e.child_collection.waiting_for_elements for e in self.elements)
         return top_level_waiting
 
@@ -4362,6 +4589,7 @@ class DatasetCollection(Dictifiable, UsesAnnotations, RepresentById):
         # but might not be - check that second case! (TODO)
         self.mark_as_populated()
         if self.has_subcollections and collection_type_description.has_subcollections():
+            self._load_element_tree()
             for element in self.elements:
                 element.child_collection.finalize(collection_type_description.child_collection_type_description())
 
@@ -4416,13 +4644,34 @@ class DatasetCollection(Dictifiable, UsesAnnotations, RepresentById):
 
     def __getitem__(self, key):
         get_by_attribute = "element_index" if isinstance(key, int) else "element_identifier"
-        for element in self.elements:
-            if getattr(element, get_by_attribute) == key:
-                return element
-        error_message = f"Dataset collection has no {get_by_attribute} with key {key}."
-        raise KeyError(error_message)
+        element = self._elements_by(get_by_attribute).get(key)
+        if element is None:
+            error_message = f"Dataset collection has no {get_by_attribute} with key {key}."
+            raise KeyError(error_message)
+        return element
+
+    def _elements_by(self, attribute):
+        """Return a dict of the elements of this collection by `attribute`, rebuilt if elements were added or replaced."""
+        elements = self.elements
+        elements_by = getattr(self, '_elements_by_attribute', None)
+        if elements_by is None:
+            elements_by = self._elements_by_attribute = {}
+        indexed_elements, count, elements_by_value = elements_by.get(attribute, (None, None, None))
+        # assigning, loading or refreshing elements installs a new list
+        if indexed_elements is not elements or count != len(elements):
+            elements_by_value = {}
+            for element in elements:
+                # the first of elements with the same key, as found by scanning the elements
+                elements_by_value.setdefault(getattr(element, attribute), element)
+            elements_by[attribute] = (elements, len(elements), elements_by_value)
+        return elements_by_value
 
     def copy(self, destination=None, element_destination=None, dataset_instance_attributes=None, flush=True):
+        # the elements are copied in the database only if the caller lets us
+        # flush, the elements that are only in the session are flushed first
+        if element_destination is None and flush and self._can_copy_in_database():
+            return self._copy_in_database()
+        self._load_element_tree(load_datasets=element_destination is not None)
         new_collection = DatasetCollection(
             collection_type=self.collection_type,
             element_count=self.element_count
@@ -4440,6 +4689,38 @@ class DatasetCollection(Dictifiable, UsesAnnotations, RepresentById):
             object_session(self).flush()
         return new_collection
 
+    def _can_copy_in_database(self):
+        db_session = object_session(self)
+        if not db_session:
+            return False
+        # elements added to this collection (also through the backref of the
+        # element) that are not flushed yet would be missing from the copy
+        db_session.flush()
+        if not self.id:
+            return False
+        return 'elements' not in self.__dict__ or all(element.id is not None for element in self.elements)
+
+    def _copy_in_database(self):
+        """
+        Copy this collection with an INSERT ... SELECT of its elements, which
+        reference the same datasets and nested collections as the elements of
+        this collection.
+        """
+        db_session = object_session(self)
+        collection_table = DatasetCollection.table
+        element_table = DatasetCollectionElement.table
+        result = db_session.execute(collection_table.insert().values(
+            collection_type=self.collection_type,
+            element_count=self.element_count,
+        ))
+        new_collection_id = result.inserted_primary_key[0]
+        element_columns = ['hda_id', 'ldda_id', 'child_collection_id', 'element_index', 'element_identifier']
+        copied_elements = select(
+            [literal(new_collection_id, type_=Integer)] + [element_table.c[column] for column in element_columns]
+        ).where(element_table.c.dataset_collection_id == self.id)
+        db_session.execute(element_table.insert().from_select(['dataset_collection_id'] + element_columns, copied_elements))
+        return db_session.query(DatasetCollection).get(new_collection_id)
+
     def replace_failed_elements(self, replacements):
         for element in self.elements:
             if element.element_object in replacements:
@@ -5564,6 +5845,32 @@ class WorkflowInvocation(UsesCreateAndUpdateTime, Dictifiable, RepresentById):
         scheduler=None,
         handler=None
     ):
+        query = sa_session.query(
+            WorkflowInvocation.id
+        ).filter(WorkflowInvocation._active_conditions(scheduler, handler)).order_by(WorkflowInvocation.table.c.id.asc())
+        # Immediately just load all ids into memory so time slicing logic
+        # is relatively intutitive.
+        return [wid for wid in query.all()]
+
+    @staticmethod
+    def poll_active_workflow_invocations(
+        sa_session,
+        scheduler=None,
+        handler=None
+    ):
+        """Like ``poll_active_workflow_ids``, but return ``(id, history_id, user_id)``
+        rows of the active invocations."""
+        query = sa_session.query(
+            WorkflowInvocation.id,
+            WorkflowInvocation.table.c.history_id,
+            History.table.c.user_id,
+        ).join(
+            History, WorkflowInvocation.table.c.history_id == History.table.c.id
+        ).filter(WorkflowInvocation._active_conditions(scheduler, handler)).order_by(WorkflowInvocation.table.c.id.asc())
+        return query.all()
+
+    @staticmethod
+    def _active_conditions(scheduler, handler):
         and_conditions = [
             or_(
                 WorkflowInvocation.state == WorkflowInvocation.states.NEW,
@@ -5574,13 +5881,7 @@ class WorkflowInvocation(UsesCreateAndUpdateTime, Dictifiable, RepresentById):
             and_conditions.append(WorkflowInvocation.scheduler == scheduler)
         if handler is not None:
             and_conditions.append(WorkflowInvocation.handler == handler)
-
-        query = sa_session.query(
-            WorkflowInvocation.id
-        ).filter(and_(*and_conditions)).order_by(WorkflowInvocation.table.c.id.asc())
-        # Immediately just load all ids into memory so time slicing logic
-        # is relatively intutitive.
-        return [wid for wid in query.all()]
+        return and_(*and_conditions)
 
     def add_output(self, workflow_output, step, output_object):
         if not hasattr(output_object, "history_content_type"):
@@ -132,6 +132,21 @@ model.CloudAuthz.table = Table(
     Column('description', TEXT),
     Column('create_time', DateTime, default=now))
 
+model.UserDiskUsageDelta.table = Table(
+    "user_disk_usage_delta", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("create_time", DateTime, default=now),
+    Column("user_id", Integer, ForeignKey("galaxy_user.id"), index=True),
+    Column("object_store_id", TrimmedString(255)),
+    Column("amount", Numeric(15, 0)))
+
+model.UserObjectStoreUsage.table = Table(
+    "user_object_store_usage", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("galaxy_user.id"), index=True),
+    Column("object_store_id", TrimmedString(255)),
+    Column("total_disk_usage", Numeric(15, 0)))
+
 model.PasswordResetToken.table = Table(
     "password_reset_token", metadata,
     Column("token", String(32), primary_key=True, unique=True, index=True),
@@ -1854,6 +1869,12 @@ mapper_registry.map_imperatively(model.User, model.User.table, properties=dict(
         order_by=desc(model.APIKeys.table.c.create_time)),
 ))
 
+mapper_registry.map_imperatively(model.UserDiskUsageDelta, model.UserDiskUsageDelta.table,
+       properties=dict(user=relation(model.User)))
+
+mapper_registry.map_imperatively(model.UserObjectStoreUsage, model.UserObjectStoreUsage.table,
+       properties=dict(user=relation(model.User)))
+
 mapper_registry.map_imperatively(model.PasswordResetToken, model.PasswordResetToken.table,
        properties=dict(user=relation(model.User, backref="reset_tokens")))
 
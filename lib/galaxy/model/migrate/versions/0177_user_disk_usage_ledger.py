@@ -0,0 +1,69 @@
+"""
+Add the user_disk_usage_delta and user_object_store_usage tables of the disk
+usage ledger and start the ledger of every user with the user's current disk
+usage in an unknown object store.
+"""
+
+import datetime
+import logging
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    MetaData,
+    Numeric,
+    Table
+)
+
+from galaxy.model.custom_types import TrimmedString
+from galaxy.model.migrate.versions.util import (
+    create_table,
+    drop_table
+)
+
+log = logging.getLogger(__name__)
+now = datetime.datetime.utcnow
+metadata = MetaData()
+
+UserDiskUsageDelta_table = Table(
+    "user_disk_usage_delta", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("create_time", DateTime, default=now),
+    Column("user_id", Integer, ForeignKey("galaxy_user.id"), index=True),
+    Column("object_store_id", TrimmedString(255)),
+    Column("amount", Numeric(15, 0)),
+)
+
+UserObjectStoreUsage_table = Table(
+    "user_object_store_usage", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("galaxy_user.id"), index=True),
+    Column("object_store_id", TrimmedString(255)),
+    Column("total_disk_usage", Numeric(15, 0)),
+)
+
+
+def upgrade(migrate_engine):
+    print(__doc__)
+    metadata.bind = migrate_engine
+    metadata.reflect()
+
+    create_table(UserDiskUsageDelta_table)
+    create_table(UserObjectStoreUsage_table)
+
+    start_ledgers = """
+        INSERT INTO user_object_store_usage (user_id, total_disk_usage)
+        SELECT id, disk_usage FROM galaxy_user
+        WHERE disk_usage IS NOT NULL
+    """
+    migrate_engine.execute(start_ledgers)
+
+
+def downgrade(migrate_engine):
+    metadata.bind = migrate_engine
+    metadata.reflect()
+
+    drop_table(UserObjectStoreUsage_table)
+    drop_table(UserDiskUsageDelta_table)
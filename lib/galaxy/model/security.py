@@ -811,6 +811,31 @@ class GalaxyRBACAgent(RBACAgent):
         Set new full permissions on a dataset, eliminating all current permissions.
         Permission looks like: { Action : [ Role, Role ] }
         """
+        permission_rows = self.dataset_permission_rows(permissions)
+        if permission_rows is None:
+            return "At least 1 role must be associated with manage permissions on this dataset."
+        flush_needed = False
+        # Delete all of the current permissions on the dataset
+        if not new:
+            for dp in dataset.actions:
+                self.sa_session.delete(dp)
+                flush_needed = True
+        # Add the new permissions on the dataset
+        for action, role_id in permission_rows:
+            dp = self.model.DatasetPermissions(action, dataset, role_id=role_id)
+            self.sa_session.add(dp)
+            flush_needed = True
+        if flush_needed and flush:
+            self.sa_session.flush()
+        return ""
+
+    def dataset_permission_rows(self, permissions=None):
+        """
+        Return the (action, role_id) pairs of the dataset_permissions rows
+        granting ``permissions`` on a dataset, or None if DATASET_MANAGE_PERMISSIONS
+        is not associated with at least 1 role.
+        Permission looks like: { Action : [ Role, Role ] }
+        """
         # Make sure that DATASET_MANAGE_PERMISSIONS is associated with at least 1 role
         has_dataset_manage_permissions = False
         permissions = permissions or {}
@@ -823,14 +848,8 @@ class GalaxyRBACAgent(RBACAgent):
                 has_dataset_manage_permissions = True
                 break
         if not has_dataset_manage_permissions:
-            return "At least 1 role must be associated with manage permissions on this dataset."
-        flush_needed = False
-        # Delete all of the current permissions on the dataset
-        if not new:
-            for dp in dataset.actions:
-                self.sa_session.delete(dp)
-                flush_needed = True
-        # Add the new permissions on the dataset
+            return None
+        permission_rows = []
         for action, roles in permissions.items():
             if isinstance(action, Action):
                 action = action.action
@@ -839,12 +858,8 @@ class GalaxyRBACAgent(RBACAgent):
                     role_id = role.id
                 else:
                     role_id = role
-                dp = self.model.DatasetPermissions(action, dataset, role_id=role_id)
-                self.sa_session.add(dp)
-                flush_needed = True
-        if flush_needed and flush:
-            self.sa_session.flush()
-        return ""
+                permission_rows.append((action, role_id))
+        return permission_rows
 
     def set_dataset_permission(self, dataset, permission=None):
         """
@@ -11,6 +11,8 @@ import os
 from collections import (
     namedtuple,
 )
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Any, NamedTuple, Optional
 
 import galaxy.model
@@ -19,6 +21,7 @@ from galaxy.exceptions import (
     RequestParameterInvalidException
 )
 from galaxy.model.dataset_collections import builder
+from galaxy.model.metadata import FileParameter
 from galaxy.util import (
     chunk_iterable,
     ExecutionTimer
@@ -37,6 +40,10 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
     This class implement the create_dataset method that takes care of populating metadata
     required for datasets and other potential model objects.
     """
+    # Number of threads copying discovered collection elements into the object store and
+    # setting their metadata, 1 does all the work on the calling thread.
+    discovered_datasets_workers = 1
+
     def create_dataset(
         self,
         ext,
@@ -296,7 +303,13 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
             association_name = f'__new_primary_file_{name}|{element_identifier_str}__'
             self.add_output_dataset_association(association_name, dataset)
 
-        self.update_object_store_with_datasets(datasets=element_datasets['datasets'], paths=element_datasets['paths'], extra_files=element_datasets['extra_files'])
+        threaded = self.discovered_datasets_workers > 1
+        if threaded:
+            # Assigning hids commits and expires the datasets, copy the files and set
+            # metadata before.
+            self.persist_datasets_in_threads(datasets=element_datasets['datasets'], paths=element_datasets['paths'], extra_files=element_datasets['extra_files'])
+        else:
+            self.update_object_store_with_datasets(datasets=element_datasets['datasets'], paths=element_datasets['paths'], extra_files=element_datasets['extra_files'])
         add_datasets_timer = ExecutionTimer()
         self.add_datasets_to_history(element_datasets['datasets'])
         log.debug(
@@ -305,7 +318,8 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
             name,
             add_datasets_timer,
         )
-        self.set_datasets_metadata(datasets=element_datasets['datasets'])
+        if not threaded:
+            self.set_datasets_metadata(datasets=element_datasets['datasets'])
 
     def add_tags_to_datasets(self, datasets, tag_lists):
         if any(tag_lists):
@@ -321,11 +335,39 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
         for dataset, path, extra_file in zip(datasets, paths, extra_files):
             self.object_store.update_from_file(dataset.dataset, file_name=path, create=True)
             if extra_file:
-                persist_extra_files(self.object_store, extra_files, dataset)
+                persist_extra_files(self.object_store, extra_file, dataset)
                 dataset.set_size()
             else:
                 dataset.set_size(no_extra_files=True)
 
+    def persist_datasets_in_threads(self, datasets, paths, extra_files):
+        """Copy the files of ``datasets`` into the object store and set their metadata and peek
+        on ``discovered_datasets_workers`` threads.
+
+        The threads work on detached copies of the datasets and their results are set on the
+        datasets on this thread. Datasets whose datatypes have metadata files are handled on
+        this thread, setting these adds objects to the session.
+        """
+        detached, threaded = [], []
+        for dataset, path, extra_file in zip(datasets, paths, extra_files):
+            if _has_metadata_files(dataset):
+                self.update_object_store_with_datasets([dataset], [path], [extra_file])
+                self.set_datasets_metadata([dataset])
+            else:
+                # Creating the object may choose an object store for it
+                self.object_store.create(dataset.dataset)
+                detached.append((_detached_copy(dataset), path, extra_file))
+                threaded.append(dataset)
+        results = _map_in_threads(partial(_persist_detached, self.object_store), detached, self.discovered_datasets_workers)
+        for dataset, (detached_dataset, metadata_failed) in zip(threaded, results):
+            dataset.dataset.file_size = detached_dataset.dataset.file_size
+            dataset.dataset.total_size = detached_dataset.dataset.total_size
+            dataset.metadata = detached_dataset.metadata
+            dataset.peek = detached_dataset.peek
+            dataset.blurb = detached_dataset.blurb
+            if metadata_failed and dataset.state == galaxy.model.HistoryDatasetAssociation.states.OK:
+                dataset.state = galaxy.model.HistoryDatasetAssociation.states.FAILED_METADATA
+
     @abc.abstractproperty
     def tag_handler(self):
         """Return a galaxy.model.tags.TagHandler-like object for persisting tags."""
@@ -470,6 +512,62 @@ class SessionlessModelPersistenceContext(ModelPersistenceContext):
         """No-op, no job context to persist this association for."""
 
 
+def _map_in_threads(function, items, max_workers):
+    if max_workers > 1 and len(items) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(function, items))
+    return [function(item) for item in items]
+
+
+def _has_metadata_files(primary_data):
+    return any(isinstance(spec.param, FileParameter) for spec in primary_data.metadata.spec.values())
+
+
+def _detached_copy(primary_data):
+    # A copy of the HDA and its dataset that is in no session, threads can neither load
+    # nor flush anything through it.
+    dataset = primary_data.dataset
+    detached_dataset = galaxy.model.Dataset(
+        id=dataset.id,
+        state=dataset.state,
+        external_filename=dataset.external_filename,
+        extra_files_path=dataset._extra_files_path,
+        uuid=dataset.uuid,
+    )
+    detached_dataset.object_store_id = dataset.object_store_id
+    return galaxy.model.HistoryDatasetAssociation(
+        id=primary_data.id,
+        name=primary_data.name,
+        info=primary_data.info,
+        extension=primary_data.extension,
+        metadata=primary_data._metadata,
+        dataset=detached_dataset,
+    )
+
+
+def _persist_detached(object_store, args):
+    primary_data, path, extra_file = args
+    object_store.update_from_file(primary_data.dataset, file_name=path)
+    if extra_file:
+        persist_extra_files(object_store, extra_file, primary_data)
+        primary_data.set_size()
+    else:
+        primary_data.set_size(no_extra_files=True)
+
+    metadata_failed = False
+    try:
+        primary_data.set_meta()
+    except Exception:
+        metadata_failed = True
+        log.exception("Exception occured while setting metdata")
+
+    try:
+        primary_data.set_peek()
+    except Exception:
+        log.exception("Exception occured while setting dataset peek")
+    return primary_data, metadata_failed
+
+
 def persist_extra_files(object_store, src_extra_files_path, primary_data):
     if src_extra_files_path and os.path.exists(src_extra_files_path):
         primary_data.dataset.create_extra_files_path()
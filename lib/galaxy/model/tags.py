@@ -383,11 +383,24 @@ class GalaxyTagHandler(TagHandler):
 
 
 class GalaxyTagHandlerSession(GalaxyTagHandler):
-    """Like GalaxyTagHandler, but avoids one flush per created tag."""
+    """Like GalaxyTagHandler, but avoids one flush per created tag and one query per tag name."""
 
     def __init__(self, sa_session):
         super().__init__(sa_session)
         self.created_tags = {}
+        self.found_tags = {}
+
+    def get_tag_by_name(self, tag_name):
+        """Get tag from cache or database."""
+        if not tag_name:
+            return None
+        tag_name = tag_name.lower()
+        tag = self.created_tags.get(tag_name) or self.found_tags.get(tag_name)
+        if tag is None:
+            tag = super().get_tag_by_name(tag_name)
+            if tag is not None:
+                self.found_tags[tag_name] = tag
+        return tag
 
     def _get_tag(self, tag_name):
         """Get tag from cache or database."""
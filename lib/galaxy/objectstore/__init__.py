@@ -12,6 +12,7 @@ import random
 import shutil
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import yaml
 
@@ -27,9 +28,10 @@ from galaxy.util.path import (
     safe_makedirs,
     safe_relpath,
 )
-from galaxy.util.sleeper import Sleeper
 
 NO_SESSION_ERROR_MESSAGE = "Attempted to 'create' object store entity in configuration with no database session present."
+# Size of the chunks object data is streamed in
+CHUNK_SIZE = 2**20
 
 log = logging.getLogger(__name__)
 
@@ -139,6 +141,18 @@ class ObjectStore(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError()
 
+    @abc.abstractmethod
+    def iter_data(self, obj, start=0, count=-1, base_dir=None, extra_dir=None, extra_dir_at_root=False, alt_name=None, obj_dir=False):
+        """
+        Iterate over chunks of `count` bytes of data offset by `start` bytes
+        using `obj.id`.
+
+        Unlike `get_filename`, remote object stores may serve the data directly
+        from the backend, without first pulling the whole object into their
+        cache. If the object does not exist raises `ObjectNotFound`.
+        """
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def get_filename(self, obj, base_dir=None, dir_only=False, extra_dir=None, extra_dir_at_root=False, alt_name=None, obj_dir=False):
         """
@@ -287,6 +301,19 @@ class BaseObjectStore(ObjectStore):
             # job working directories.
             return obj.id
 
+    def _iter_data(self, obj, start=0, count=-1, **kwargs):
+        # stores that can't stream their data serve it in chunks read with get_data
+        remaining = count
+        while remaining != 0:
+            chunk_size = CHUNK_SIZE if remaining < 0 else min(CHUNK_SIZE, remaining)
+            chunk = self._get_data(obj, start=start, count=chunk_size, **kwargs)
+            if not chunk:
+                break
+            start += len(chunk)
+            if remaining > 0:
+                remaining -= len(chunk)
+            yield chunk
+
     def _invoke(self, delegate, obj=None, **kwargs):
         return self.__getattribute__(f"_{delegate}")(obj=obj, **kwargs)
 
@@ -308,6 +335,9 @@ class BaseObjectStore(ObjectStore):
     def get_data(self, obj, **kwargs):
         return self._invoke('get_data', obj, **kwargs)
 
+    def iter_data(self, obj, **kwargs):
+        return self._invoke('iter_data', obj, **kwargs)
+
     def get_filename(self, obj, **kwargs):
         return self._invoke('get_filename', obj, **kwargs)
 
@@ -373,6 +403,9 @@ class ConcreteObjectStore(BaseObjectStore):
     def _get_store_by(self, obj):
         return self.store_by
 
+    def _iter_data(self, obj, start=0, count=-1, **kwargs):
+        return iter_file_range(self._get_filename(obj, **kwargs), start, count)
+
 
 class DiskObjectStore(ConcreteObjectStore):
     """
@@ -690,6 +723,10 @@ class NestedObjectStore(BaseObjectStore):
         """For the first backend that has this `obj`, get data from it."""
         return self._call_method('_get_data', obj, ObjectNotFound, True, **kwargs)
 
+    def _iter_data(self, obj, **kwargs):
+        """For the first backend that has this `obj`, iterate over its data."""
+        return self._call_method('_iter_data', obj, ObjectNotFound, True, **kwargs)
+
     def _get_filename(self, obj, **kwargs):
         """For the first backend that has this `obj`, get its filename."""
         return self._call_method('_get_filename', obj, ObjectNotFound, True, **kwargs)
@@ -742,7 +779,7 @@ class DistributedObjectStore(NestedObjectStore):
 
     When getting objects the first store where the object exists is used.
     When creating objects they are created in a store selected randomly, but
-    with weighting.
+    with weighting (see :mod:`galaxy.objectstore.placement`).
     """
     store_type = 'distributed'
 
@@ -759,13 +796,18 @@ class DistributedObjectStore(NestedObjectStore):
 
         :type fsmon: bool
         :param fsmon: If True, monitor the file system for free space,
-            removing backends when they get too full.
+            reducing the weight of backends as they fill up and removing
+            them when they get too full.
         """
+        from .placement import (
+            LOCATION_CACHE_FILENAME,
+            LocationCache,
+            PlacementEngine,
+        )
         super().__init__(config, config_dict)
 
         self.backends = {}
-        self.weighted_backend_ids = []
-        self.original_weighted_backend_ids = []
+        self.weights = {}
         self.max_percent_full = {}
         self.global_max_percent_full = config_dict.get("global_max_percent_full", 0)
         random.seed()
@@ -779,22 +821,26 @@ class DistributedObjectStore(NestedObjectStore):
 
             self.backends[backened_id] = backend
             self.max_percent_full[backened_id] = maxpctfull
-
-            for _ in range(0, weight):
-                # The simplest way to do weighting: add backend ids to a
-                # sequence the number of times equalling weight, then randomly
-                # choose a backend from that sequence at creation
-                self.weighted_backend_ids.append(backened_id)
-
-        self.original_weighted_backend_ids = self.weighted_backend_ids
-
-        self.sleeper = None
-        if fsmon and (self.global_max_percent_full or [_ for _ in self.max_percent_full.values() if _ != 0.0]):
-            self.sleeper = Sleeper()
-            self.filesystem_monitor_thread = threading.Thread(target=self.__filesystem_monitor)
-            self.filesystem_monitor_thread.setDaemon(True)
-            self.filesystem_monitor_thread.start()
-            log.info("Filesystem space monitor started")
+            self.weights[backened_id] = weight
+
+        self.placement = PlacementEngine(
+            self.weights,
+            {id: self.max_percent_full[id] or self.global_max_percent_full for id in self.backends},
+            get_usage_percent=self.__get_backend_usage_percent if fsmon else None,
+        )
+        if self.placement.monitored:
+            log.info("Filesystem space monitoring enabled")
+
+        location_cache_path = config_dict.get("location_cache_path")
+        cache_path = getattr(config, "object_store_cache_path", None)
+        if location_cache_path is None and cache_path:
+            location_cache_path = os.path.join(cache_path, LOCATION_CACHE_FILENAME)
+        self.location_cache = LocationCache(location_cache_path)
+        self.probes = 0
+        self.location_cache_hits = 0
+        self.location_cache_misses = 0
+        self._probe_executor = None
+        self._probe_lock = threading.Lock()
 
     @classmethod
     def parse_xml(clazz, config_xml, legacy=False):
@@ -808,6 +854,9 @@ class DistributedObjectStore(NestedObjectStore):
             'global_max_percent_full': float(backends_root.get('maxpctfull', 0)),
             'backends': backends,
         }
+        location_cache_path = backends_root.get('location_cache_path')
+        if location_cache_path is not None:
+            config_dict['location_cache_path'] = location_cache_path
 
         for b in [e for e in backends_root if e.tag == 'backend']:
             store_id = b.get("id")
@@ -850,40 +899,46 @@ class DistributedObjectStore(NestedObjectStore):
     def to_dict(self):
         as_dict = super().to_dict()
         as_dict["global_max_percent_full"] = self.global_max_percent_full
+        if self.location_cache.path is not None:
+            as_dict["location_cache_path"] = self.location_cache.path
         backends = []
         for backend_id, backend in self.backends.items():
             backend_as_dict = backend.to_dict()
             backend_as_dict["id"] = backend_id
             backend_as_dict["max_percent_full"] = self.max_percent_full[backend_id]
-            backend_as_dict["weight"] = len([i for i in self.original_weighted_backend_ids if i == backend_id])
+            backend_as_dict["weight"] = self.weights[backend_id]
             backends.append(backend_as_dict)
         as_dict["backends"] = backends
         return as_dict
 
     def shutdown(self):
-        """Shut down. Kill the free space monitor if there is one."""
+        """Shut down. Stop the threads locating objects if there are any."""
         super().shutdown()
-        if self.sleeper is not None:
-            self.sleeper.wake()
-
-    def __filesystem_monitor(self):
-        while self.running:
-            new_weighted_backend_ids = self.original_weighted_backend_ids
-            for id, backend in self.backends.items():
-                maxpct = self.max_percent_full[id] or self.global_max_percent_full
-                pct = backend.get_store_usage_percent()
-                if pct > maxpct:
-                    new_weighted_backend_ids = [_ for _ in new_weighted_backend_ids if _ != id]
-            self.weighted_backend_ids = new_weighted_backend_ids
-            self.sleeper.sleep(120)  # Test free space every 2 minutes
+        if self._probe_executor is not None:
+            self._probe_executor.shutdown(wait=False)
+
+    def placement_stats(self):
+        """Return the number of objects placed on each backend since startup,
+        the current backend weights and usage, and how objects with an unknown
+        backend were located."""
+        return {
+            "placements": dict(self.placement.placements),
+            "weights": dict(self.placement.effective_weights()),
+            "usage_percent": dict(self.placement.usage),
+            "probes": self.probes,
+            "location_cache_hits": self.location_cache_hits,
+            "location_cache_misses": self.location_cache_misses,
+        }
+
+    def __get_backend_usage_percent(self, backend_id):
+        return self.backends[backend_id].get_store_usage_percent()
 
     def _create(self, obj, **kwargs):
         """The only method in which obj.object_store_id may be None."""
         if obj.object_store_id is None or not self._exists(obj, **kwargs):
             if obj.object_store_id is None or obj.object_store_id not in self.backends:
-                try:
-                    obj.object_store_id = random.choice(self.weighted_backend_ids)
-                except IndexError:
+                obj.object_store_id = self.placement.choose()
+                if obj.object_store_id is None:
                     raise ObjectInvalid('objectstore.create, could not generate '
                                         'obj.object_store_id: %s, kwargs: %s'
                                         % (str(obj), str(kwargs)))
@@ -913,15 +968,50 @@ class DistributedObjectStore(NestedObjectStore):
                             % (obj.object_store_id, obj.__class__.__name__, obj.id))
         # if this instance has been switched from a non-distributed to a
         # distributed object store, or if the object's store id is invalid,
-        # try to locate the object
-        for id, store in self.backends.items():
-            if store.exists(obj, **kwargs):
-                log.warning('%s object with ID %s found in backend object store with ID %s'
-                            % (obj.__class__.__name__, obj.id, id))
-                obj.object_store_id = id
-                return id
+        # try to locate the object, starting with where it was last found
+        cached_id = self.location_cache.get(obj)
+        if cached_id in self.backends:
+            self.probes += 1
+            if self.backends[cached_id].exists(obj, **kwargs):
+                self.location_cache_hits += 1
+                obj.object_store_id = cached_id
+                return cached_id
+        self.location_cache_misses += 1
+        for id in self.__probe_backends(obj, **kwargs):
+            log.warning('%s object with ID %s found in backend object store with ID %s'
+                        % (obj.__class__.__name__, obj.id, id))
+            self.location_cache.set(obj, id)
+            obj.object_store_id = id
+            return id
+        if cached_id is not None:
+            self.location_cache.remove(obj)
         return None
 
+    def __probe_backends(self, obj, **kwargs):
+        """Yield the ids of the backends ``obj`` exists in, in configuration order.
+
+        The backends are checked concurrently.
+        """
+        backend_ids = list(self.backends)
+        self.probes += len(backend_ids)
+        if len(backend_ids) == 1 or obj.id is None:
+            for id in backend_ids:
+                if self.backends[id].exists(obj, **kwargs):
+                    yield id
+            return
+        with self._probe_lock:
+            if self._probe_executor is None:
+                self._probe_executor = ThreadPoolExecutor(max_workers=len(backend_ids), thread_name_prefix="objectstore-probe")
+        # The probing threads only get the values locating the object, the
+        # (mapped) object itself and its session stay on this thread.
+        located = Bunch(id=obj.id, object_store_id=obj.object_store_id)
+        if hasattr(obj, "uuid"):
+            located.uuid = obj.uuid
+        futures = [self._probe_executor.submit(self.backends[id].exists, located, **kwargs) for id in backend_ids]
+        for id, future in zip(backend_ids, futures):
+            if future.result():
+                yield id
+
 
 class HierarchicalObjectStore(NestedObjectStore):
 
@@ -1080,6 +1170,21 @@ def local_extra_dirs(func):
     return wraps
 
 
+def iter_file_range(path, start=0, count=-1, chunk_size=CHUNK_SIZE):
+    """Iterate over chunks of `count` bytes (or the rest of the file, if
+    negative) of the file at `path`, starting at `start`."""
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        remaining = count
+        while remaining != 0:
+            chunk = fh.read(chunk_size if remaining < 0 else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining > 0:
+                remaining -= len(chunk)
+            yield chunk
+
+
 def convert_bytes(bytes):
     """A helper function used for pretty printing disk usage."""
     if bytes is None:
@@ -7,13 +7,18 @@ import os
 import shutil
 import threading
 import time
+import uuid
 from datetime import datetime
+from functools import partial
 
 try:
     from azure.common import AzureHttpError
     from azure.storage import CloudStorageAccount
     from azure.storage.blob import BlockBlobService
-    from azure.storage.blob.models import Blob
+    from azure.storage.blob.models import (
+        Blob,
+        BlobBlock,
+    )
 except ImportError:
     BlockBlobService = None
 
@@ -27,6 +32,15 @@ from galaxy.util import (
 )
 from galaxy.util.path import safe_relpath
 from galaxy.util.sleeper import Sleeper
+from .caching import RangedReadMixin
+from .transfer import (
+    DEFAULT_MAX_CHUNK_SIZE,
+    parse_max_chunk_size,
+    parse_transfer_config_xml,
+    TRANSFER_STATE_DIRECTORY,
+    TransferConfig,
+    TransferManager,
+)
 from ..objectstore import (
     ConcreteObjectStore,
     convert_bytes,
@@ -47,7 +61,7 @@ def parse_config_xml(config_xml):
 
         container_xml = config_xml.find('container')
         container_name = container_xml.get('name')
-        max_chunk_size = int(container_xml.get('max_chunk_size', 250))  # currently unused
+        max_chunk_size = parse_max_chunk_size(container_xml)
 
         c_xml = config_xml.findall('cache')[0]
         cache_size = float(c_xml.get('size', -1))
@@ -73,6 +87,7 @@ def parse_config_xml(config_xml):
                 'size': cache_size,
                 'path': staging_path,
             },
+            'transfer': parse_transfer_config_xml(config_xml),
             'extra_dirs': extra_dirs,
         }
     except Exception:
@@ -81,7 +96,7 @@ def parse_config_xml(config_xml):
         raise
 
 
-class AzureBlobObjectStore(ConcreteObjectStore):
+class AzureBlobObjectStore(RangedReadMixin, ConcreteObjectStore):
     """
     Object store that stores objects as blobs in an Azure Blob Container. A local
     cache exists that is used as an intermediate location for files between
@@ -102,10 +117,11 @@ class AzureBlobObjectStore(ConcreteObjectStore):
         self.account_key = auth_dict.get('account_key')
 
         self.container_name = container_dict.get('name')
-        self.max_chunk_size = container_dict.get('max_chunk_size', 250)  # currently unused
+        self.max_chunk_size = container_dict.get('max_chunk_size', DEFAULT_MAX_CHUNK_SIZE)
 
         self.cache_size = cache_dict.get('size', -1)
         self.staging_path = cache_dict.get('path') or self.config.object_store_cache_path
+        self.transfer_config = TransferConfig.from_dict(config_dict.get('transfer'), self.max_chunk_size)
 
         self._initialize()
 
@@ -113,6 +129,7 @@ class AzureBlobObjectStore(ConcreteObjectStore):
         if BlockBlobService is None:
             raise Exception(NO_BLOBSERVICE_ERROR_MESSAGE)
 
+        self.transfer_manager = TransferManager(self.transfer_config, os.path.join(self.staging_path, TRANSFER_STATE_DIRECTORY))
         self._configure_connection()
 
         # Clean cache only if value is set in galaxy.ini
@@ -139,7 +156,8 @@ class AzureBlobObjectStore(ConcreteObjectStore):
             'cache': {
                 'size': self.cache_size,
                 'path': self.staging_path,
-            }
+            },
+            'transfer': self.transfer_config.to_dict(),
         })
         return as_dict
 
@@ -228,6 +246,24 @@ class AzureBlobObjectStore(ConcreteObjectStore):
             log.exception("Could not get size of blob '%s' from Azure", rel_path)
             return -1
 
+    def _get_remote_size(self, rel_path):
+        return self._get_size_in_azure(rel_path)
+
+    def _read_remote_range(self, rel_path, start, end):
+        return self.service.get_blob_to_bytes(self.container_name, rel_path, start_range=start, end_range=end - 1).content
+
+    def _initiate_block_upload(self):
+        # Blocks are only identified by their ids until they are committed
+        return uuid.uuid4().hex
+
+    def _upload_block(self, rel_path, upload_id, part_number, data):
+        block_id = f"{upload_id}-{part_number:05d}"
+        self.service.put_block(self.container_name, rel_path, data, block_id)
+        return block_id
+
+    def _commit_blocks(self, rel_path, upload_id, block_ids):
+        self.service.put_block_list(self.container_name, rel_path, [BlobBlock(id=block_id) for block_id in block_ids])
+
     def _in_azure(self, rel_path):
         try:
             exists = self.service.exists(self.container_name, rel_path)
@@ -258,10 +294,14 @@ class AzureBlobObjectStore(ConcreteObjectStore):
         local_destination = self._get_cache_path(rel_path)
         try:
             log.debug("Pulling '%s' into cache to %s", rel_path, local_destination)
-            if self.cache_size > 0 and self._get_size_in_azure(rel_path) > self.cache_size:
+            size = self._get_size_in_azure(rel_path)
+            if self.cache_size > 0 and size > self.cache_size:
                 log.critical("File %s is larger (%s) than the cache size (%s). Cannot download.",
-                             rel_path, self._get_size_in_azure(rel_path), self.cache_size)
+                             rel_path, size, self.cache_size)
                 return False
+            elif self.transfer_manager.use_parts(size):
+                self.transfer_manager.download(rel_path, size, partial(self._read_remote_range, rel_path), local_destination)
+                return True
             else:
                 self.transfer_progress = 0  # Reset transfer progress counter
                 self.service.get_blob_to_path(self.container_name, rel_path, local_destination, progress_callback=self._transfer_cb)
@@ -296,10 +336,16 @@ class AzureBlobObjectStore(ConcreteObjectStore):
                 start_time = datetime.now()
                 log.debug("Pushing cache file '%s' of size %s bytes to '%s'", source_file, os.path.getsize(source_file), rel_path)
                 self.transfer_progress = 0  # Reset transfer progress counter
-                self.service.create_blob_from_path(self.container_name, rel_path, source_file, progress_callback=self._transfer_cb)
+                if self.transfer_manager.use_parts(os.path.getsize(source_file)):
+                    self.transfer_manager.upload(rel_path, source_file, self._initiate_block_upload,
+                                                 partial(self._upload_block, rel_path),
+                                                 partial(self._commit_blocks, rel_path))
+                else:
+                    self.service.create_blob_from_path(self.container_name, rel_path, source_file, progress_callback=self._transfer_cb)
                 end_time = datetime.now()
                 log.debug("Pushed cache file '%s' to blob '%s' (%s bytes transfered in %s sec)",
                           source_file, rel_path, os.path.getsize(source_file), end_time - start_time)
+            self._invalidate_blocks(rel_path)
             return True
 
         except AzureHttpError:
@@ -437,6 +483,7 @@ class AzureBlobObjectStore(ConcreteObjectStore):
             else:
                 # Delete from cache first
                 os.unlink(self._get_cache_path(rel_path))
+                self._invalidate_blocks(rel_path)
                 # Delete from S3 as well
                 if self._in_azure(rel_path):
                     log.debug("Deleting from Azure: %s", rel_path)
@@ -448,18 +495,6 @@ class AzureBlobObjectStore(ConcreteObjectStore):
             log.exception('%s delete error', self._get_filename(obj, **kwargs))
         return False
 
-    def _get_data(self, obj, start=0, count=-1, **kwargs):
-        rel_path = self._construct_path(obj, **kwargs)
-        # Check cache first and get file if not there
-        if not self._in_cache(rel_path):
-            self._pull_into_cache(rel_path)
-        # Read the file content from cache
-        data_file = open(self._get_cache_path(rel_path))
-        data_file.seek(start)
-        content = data_file.read(count)
-        data_file.close()
-        return content
-
     def _get_filename(self, obj, **kwargs):
         rel_path = self._construct_path(obj, **kwargs)
         base_dir = kwargs.get('base_dir', None)
@@ -0,0 +1,474 @@
+"""
+Index of the local cache used by the S3 and cloud object stores.
+
+Files in the cache are tracked in a small SQLite database stored alongside
+them, keyed by their path relative to the cache directory and recording their
+size and time of last access. The object stores update the index as files are
+pulled into, pushed from, accessed in and deleted from the cache, so that
+finding the least recently used files to evict does not require walking and
+stat'ing the whole cache directory. The total size of the indexed files is
+maintained by triggers, so it can be read without a full table scan.
+
+The index is shared by all Galaxy processes using the same cache directory.
+
+Objects that are not in the cache can also be read without pulling them into
+it, byte range by byte range, through a small in-memory cache of blocks of
+these objects (see :class:`RangedReadMixin`).
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from galaxy.exceptions import ObjectNotFound
+from galaxy.util.sleeper import Sleeper
+from ..objectstore import (
+    CHUNK_SIZE,
+    convert_bytes,
+    iter_file_range,
+)
+
+log = logging.getLogger(__name__)
+
+CACHE_INDEX_FILENAME = ".galaxy_cache_index.sqlite"
+
+# Start cleaning the cache once it is within 10% of the defined size, and clean
+# until 10% of the cache is free.
+CACHE_CLEAN_THRESHOLD = 0.9
+CACHE_MONITOR_INTERVAL = 30
+
+# Remote objects are read (and cached in memory) in blocks of this size
+DEFAULT_BLOCK_SIZE = CHUNK_SIZE
+DEFAULT_BLOCK_COUNT = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entry (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_cache_entry_last_access ON cache_entry (last_access);
+CREATE TABLE IF NOT EXISTS cache_total (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER NOT NULL,
+    populated INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_total (id, size, populated) VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS cache_entry_insert AFTER INSERT ON cache_entry BEGIN
+    UPDATE cache_total SET size = size + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_entry_delete AFTER DELETE ON cache_entry BEGIN
+    UPDATE cache_total SET size = size - OLD.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_entry_update AFTER UPDATE OF size ON cache_entry BEGIN
+    UPDATE cache_total SET size = size + NEW.size - OLD.size WHERE id = 0;
+END;
+"""
+
+
+class CacheIndex:
+    """Persistent least-recently-used index of the files in a cache directory.
+
+    Accesses are buffered in memory and written to the database in a single
+    transaction every ``flush_interval`` seconds (or every ``flush_size``
+    accesses), so that reading a cached file does not cost a database write.
+    """
+
+    def __init__(self, staging_path, index_path=None, flush_interval=5, flush_size=1000):
+        self.staging_path = staging_path
+        self.index_path = index_path or os.path.join(staging_path, CACHE_INDEX_FILENAME)
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self._lock = threading.Lock()
+        # relative path -> (size, last access) of accesses not yet written
+        self._pending = {}
+        self._last_flush = time.time()
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self):
+        # A new connection is used for every transaction so that the index can
+        # be used from any thread.
+        return _ClosingConnection(sqlite3.connect(self.index_path, timeout=60))
+
+    def hit(self, rel_path, size):
+        """Record an access to the cached file ``rel_path``."""
+        self.hits += 1
+        self.touch(rel_path, size)
+
+    def miss(self):
+        self.misses += 1
+
+    def touch(self, rel_path, size):
+        """Record that ``rel_path`` (of ``size`` bytes) was added to or used in the cache."""
+        with self._lock:
+            self._pending[rel_path] = (size, time.time())
+            due = len(self._pending) >= self.flush_size or time.time() - self._last_flush > self.flush_interval
+        if due:
+            self.flush()
+
+    def remove(self, rel_path, prefix=False):
+        """Remove ``rel_path`` (or, if ``prefix`` is set, everything below it) from the index."""
+        with self._lock:
+            self._pending.pop(rel_path, None)
+            if prefix:
+                for pending_path in [p for p in self._pending if _is_below(p, rel_path)]:
+                    del self._pending[pending_path]
+        with self._connect() as connection:
+            connection.execute("DELETE FROM cache_entry WHERE path = ?", (rel_path,))
+            if prefix:
+                connection.execute("DELETE FROM cache_entry WHERE path >= ? AND path < ?",
+                                   (rel_path + os.sep, rel_path + chr(ord(os.sep) + 1)))
+
+    def flush(self):
+        """Write the buffered accesses to the database."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.time()
+        if not pending:
+            return
+        with self._connect() as connection:
+            for rel_path, (size, last_access) in pending.items():
+                updated = connection.execute("UPDATE cache_entry SET size = ?, last_access = MAX(last_access, ?) WHERE path = ?",
+                                             (size, last_access, rel_path)).rowcount
+                if not updated:
+                    connection.execute("INSERT INTO cache_entry (path, size, last_access) VALUES (?, ?, ?)",
+                                       (rel_path, size, last_access))
+
+    @property
+    def total_size(self):
+        with self._connect() as connection:
+            return connection.execute("SELECT size FROM cache_total WHERE id = 0").fetchone()[0]
+
+    @property
+    def populated(self):
+        with self._connect() as connection:
+            return bool(connection.execute("SELECT populated FROM cache_total WHERE id = 0").fetchone()[0])
+
+    def populate(self):
+        """Index the files already in the cache directory.
+
+        This walks the whole cache and is only needed once, when the index is
+        created for an existing cache.
+        """
+        entries = []
+        for dirpath, dirnames, filenames in os.walk(self.staging_path):
+            # Skip bookkeeping directories (e.g. of transfers in progress)
+            dirnames[:] = [dirname for dirname in dirnames if not dirname.startswith('.')]
+            for filename in filenames:
+                filepath = os.path.join(dirpath, filename)
+                if filepath.startswith(self.index_path):
+                    continue
+                try:
+                    stat = os.stat(filepath)
+                except OSError:
+                    continue
+                entries.append((os.path.relpath(filepath, self.staging_path), stat.st_size, stat.st_atime))
+        with self._connect() as connection:
+            connection.executemany("INSERT OR IGNORE INTO cache_entry (path, size, last_access) VALUES (?, ?, ?)", entries)
+            connection.execute("UPDATE cache_total SET populated = 1 WHERE id = 0")
+        log.info("Indexed %d file(s) in object store cache %s", len(entries), self.staging_path)
+
+    def evict(self, delete_this_much, batch_size=100):
+        """Delete the least recently used files until at least ``delete_this_much``
+        bytes have been freed, returning the number of bytes freed.
+
+        Only the entries that are deleted are read from the index.
+        """
+        self.flush()
+        deleted_amount = 0
+        while deleted_amount < delete_this_much:
+            with self._connect() as connection:
+                entries = connection.execute("SELECT path, size FROM cache_entry ORDER BY last_access LIMIT ?",
+                                             (batch_size,)).fetchall()
+                if not entries:
+                    break
+                deleted = []
+                for rel_path, size in entries:
+                    if deleted_amount >= delete_this_much:
+                        break
+                    try:
+                        os.remove(os.path.join(self.staging_path, rel_path))
+                        deleted_amount += size
+                        self.evictions += 1
+                        self.evicted_bytes += size
+                    except FileNotFoundError:
+                        # Deleted without going through the object store
+                        pass
+                    except OSError:
+                        log.exception("Failed to evict %s from object store cache", rel_path)
+                    deleted.append((rel_path,))
+                connection.executemany("DELETE FROM cache_entry WHERE path = ?", deleted)
+        return deleted_amount
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+        }
+
+
+class CacheMonitor:
+    """Thread evicting the least recently used files from a cache once its
+    indexed size is within 10% of ``cache_size`` bytes.
+
+    The monitor checks the cache every ``interval`` seconds and whenever it is
+    woken up, which the object stores do after pulling a file into the cache.
+    """
+
+    def __init__(self, cache_index, cache_size, interval=CACHE_MONITOR_INTERVAL):
+        self.cache_index = cache_index
+        self.cache_size = cache_size
+        self.interval = interval
+        self.running = False
+        self.sleeper = Sleeper()
+        self.thread = None
+
+    @property
+    def cache_limit(self):
+        return self.cache_size * CACHE_CLEAN_THRESHOLD
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._monitor, name="ObjectStoreCacheMonitor")
+        self.thread.daemon = True
+        self.thread.start()
+        log.info("Cache cleaner manager started")
+
+    def wake(self):
+        self.sleeper.wake()
+
+    def shutdown(self):
+        self.running = False
+        if self.thread:
+            log.debug("Shutting down thread")
+            self.sleeper.wake()
+            self.thread.join(5)
+
+    def _monitor(self):
+        time.sleep(2)  # Wait for things to load before starting the monitor
+        if self.running and not self.cache_index.populated:
+            self.cache_index.populate()
+        while self.running:
+            try:
+                self.check()
+            except Exception:
+                log.exception("Failed to clean object store cache")
+            self.sleeper.sleep(self.interval)
+
+    def check(self):
+        self.cache_index.flush()
+        total_size = self.cache_index.total_size
+        cache_limit = self.cache_limit
+        if total_size > cache_limit:
+            log.info("Initiating cache cleaning: current cache size: %s; clean until smaller than: %s",
+                     convert_bytes(total_size), convert_bytes(cache_limit))
+            deleted_amount = self.cache_index.evict(total_size - cache_limit)
+            log.debug("Cache cleaning done. Total space freed: %s", convert_bytes(deleted_amount))
+
+
+class CacheIndexMixin:
+    """Keep the :class:`CacheIndex` of an object store's cache (in
+    ``staging_path``, limited to ``cache_size`` bytes) up to date.
+    """
+    cache_index = None
+    cache_monitor = None
+
+    def _start_cache_index(self, enable_cache_monitor=True):
+        # Only track and clean the cache if its size is limited
+        if self.cache_size == -1:
+            return
+        self.cache_index = CacheIndex(self.staging_path)
+        if enable_cache_monitor:
+            self.cache_monitor = CacheMonitor(self.cache_index, self.cache_size)
+            self.cache_monitor.start()
+
+    def _cache_accessed(self, rel_path, cache_path):
+        """Return whether ``cache_path`` exists, counting a cache hit or miss."""
+        try:
+            stat = os.stat(cache_path)
+        except OSError:
+            if self.cache_index:
+                self.cache_index.miss()
+            return False
+        # Directories (e.g. of extra files) are not indexed themselves
+        if self.cache_index and not os.path.isdir(cache_path):
+            self.cache_index.hit(rel_path, stat.st_size)
+        return True
+
+    def _cache_updated(self, rel_path):
+        """Index ``rel_path`` after it was pulled into or written to the cache."""
+        if not self.cache_index:
+            return
+        try:
+            size = os.path.getsize(self._get_cache_path(rel_path))
+        except OSError:
+            return
+        self.cache_index.touch(rel_path, size)
+        if self.cache_monitor:
+            # Check the cache size now rather than waiting for the next interval
+            self.cache_monitor.wake()
+
+    def _cache_removed(self, rel_path, entire_dir=False):
+        if self.cache_index:
+            self.cache_index.remove(rel_path, prefix=entire_dir)
+
+    def cache_stats(self):
+        """Return the number of cache hits, misses and evictions of this process."""
+        if not self.cache_index:
+            return {}
+        return self.cache_index.stats()
+
+    def _shutdown_cache_monitor(self):
+        if self.cache_monitor:
+            self.cache_monitor.shutdown()
+        if self.cache_index:
+            self.cache_index.flush()
+
+
+class BlockCache:
+    """In-memory least-recently-used cache of fixed size blocks of remote objects.
+
+    Holds at most ``block_count`` blocks of ``block_size`` bytes, plus the size
+    of the objects they belong to.
+    """
+
+    def __init__(self, block_size=DEFAULT_BLOCK_SIZE, block_count=DEFAULT_BLOCK_COUNT):
+        self.block_size = block_size
+        self.block_count = block_count
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # (key, block index) -> bytes
+        self._blocks = OrderedDict()
+        # key -> size in bytes
+        self._sizes = OrderedDict()
+
+    def get_size(self, key, get_size):
+        """Return the size of object ``key``, calling ``get_size(key)`` if it
+        is not known. Returns ``None`` if the object does not exist.
+        """
+        with self._lock:
+            if key in self._sizes:
+                self._sizes.move_to_end(key)
+                return self._sizes[key]
+        size = get_size(key)
+        if size is None or size < 0:
+            return None
+        with self._lock:
+            self._sizes[key] = size
+            while len(self._sizes) > self.block_count:
+                self._sizes.popitem(last=False)
+        return size
+
+    def iter_range(self, key, size, start, count, read_range):
+        """Iterate over ``count`` bytes (or the rest of the object, if negative)
+        of object ``key`` of ``size`` bytes, starting at ``start``.
+
+        Missing blocks are read with ``read_range(key, block_start, block_end)``,
+        which must return the bytes from ``block_start`` up to (excluding)
+        ``block_end``.
+        """
+        end = size if count < 0 else min(size, start + count)
+        position = start
+        while position < end:
+            index = position // self.block_size
+            block = self._get_block(key, size, index, read_range)
+            offset = position - index * self.block_size
+            chunk = block[offset:offset + end - position]
+            if not chunk:
+                break
+            yield chunk
+            position += len(chunk)
+
+    def invalidate(self, key):
+        """Drop everything cached about object ``key``."""
+        with self._lock:
+            self._sizes.pop(key, None)
+            for block_key in [block_key for block_key in self._blocks if block_key[0] == key]:
+                del self._blocks[block_key]
+
+    def _get_block(self, key, size, index, read_range):
+        block_key = (key, index)
+        with self._lock:
+            block = self._blocks.get(block_key)
+            if block is not None:
+                self.hits += 1
+                self._blocks.move_to_end(block_key)
+                return block
+            self.misses += 1
+        block_start = index * self.block_size
+        block = read_range(key, block_start, min(size, block_start + self.block_size))
+        with self._lock:
+            self._blocks[block_key] = block
+            while len(self._blocks) > self.block_count:
+                self._blocks.popitem(last=False)
+        return block
+
+
+class RangedReadMixin:
+    """Serve data of objects that are not in the local cache of a remote
+    object store directly from the backend, in blocks.
+
+    Object stores using this implement ``_get_remote_size(rel_path)``,
+    returning ``None`` or a negative value if the object does not exist, and
+    ``_read_remote_range(rel_path, start, end)``, as well as the ``_in_cache``,
+    ``_get_cache_path`` and ``_construct_path`` methods remote object stores
+    have. Objects already in the cache are read from there.
+    """
+    block_cache = None
+
+    def _get_block_cache(self):
+        if self.block_cache is None:
+            self.block_cache = BlockCache()
+        return self.block_cache
+
+    def _invalidate_blocks(self, rel_path):
+        if self.block_cache is not None:
+            self.block_cache.invalidate(rel_path)
+
+    def _get_data(self, obj, start=0, count=-1, **kwargs):
+        data = b"".join(self._iter_data(obj, start=start, count=count, **kwargs))
+        return data.decode("utf-8", errors="replace")
+
+    def _iter_data(self, obj, start=0, count=-1, **kwargs):
+        rel_path = self._construct_path(obj, **kwargs)
+        if self._in_cache(rel_path):
+            return iter_file_range(self._get_cache_path(rel_path), start, count)
+        block_cache = self._get_block_cache()
+        size = block_cache.get_size(rel_path, self._get_remote_size)
+        if size is None:
+            raise ObjectNotFound(f'objectstore.iter_data, no object: {rel_path}, kwargs: {kwargs}')
+        return block_cache.iter_range(rel_path, size, start, count, self._read_remote_range)
+
+
+class _ClosingConnection:
+    """Commit (or roll back) and close an SQLite connection on exit."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self.connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.connection.commit()
+            else:
+                self.connection.rollback()
+        finally:
+            self.connection.close()
+
+
+def _is_below(path, directory):
+    return path.startswith(directory + os.sep)
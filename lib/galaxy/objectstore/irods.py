@@ -21,6 +21,7 @@ except ImportError:
 from galaxy.exceptions import ObjectInvalid, ObjectNotFound
 from galaxy.util import directory_hash_id, ExecutionTimer, umask_fix_perms
 from galaxy.util.path import safe_relpath
+from .caching import RangedReadMixin
 from ..objectstore import DiskObjectStore
 
 IRODS_IMPORT_MESSAGE = ('The Python irods package is required to use this feature, please install it')
@@ -136,7 +137,7 @@ class CloudConfigMixin:
         }
 
 
-class IRODSObjectStore(DiskObjectStore, CloudConfigMixin):
+class IRODSObjectStore(RangedReadMixin, DiskObjectStore, CloudConfigMixin):
     """
     Object store that stores files as data objects in an iRODS Zone. A local cache
     exists that is used as an intermediate location for files between Galaxy and iRODS.
@@ -311,6 +312,27 @@ class IRODSObjectStore(DiskObjectStore, CloudConfigMixin):
         finally:
             log.debug("irods_pt _get_size_in_irods: %s", ipt_timer)
 
+    def _get_remote_size(self, rel_path):
+        p = Path(rel_path)
+        data_object_path = f"{self.home}/{str(p.parent)}/{p.stem + p.suffix}"
+        try:
+            return self.session.data_objects.get(data_object_path).size
+        except (DataObjectDoesNotExist, CollectionDoesNotExist):
+            log.warning("Collection or data object (%s) does not exist", data_object_path)
+        except NetworkException as e:
+            log.exception(e)
+        return None
+
+    def _read_remote_range(self, rel_path, start, end):
+        ipt_timer = ExecutionTimer()
+        p = Path(rel_path)
+        data_object_path = f"{self.home}/{str(p.parent)}/{p.stem + p.suffix}"
+        with self.session.data_objects.get(data_object_path).open('r') as data_obj_fp:
+            data_obj_fp.seek(start)
+            data = data_obj_fp.read(end - start)
+        log.debug("irods_pt _read_remote_range: %s", ipt_timer)
+        return data
+
     # rel_path is file or folder?
     def _data_object_exists(self, rel_path):
         ipt_timer = ExecutionTimer()
@@ -445,6 +467,7 @@ class IRODSObjectStore(DiskObjectStore, CloudConfigMixin):
                 end_time = datetime.now()
                 log.debug("Pushed cache file '%s' to collection '%s' (%s bytes transfered in %s sec)",
                         source_file, rel_path, os.path.getsize(source_file), (end_time - start_time).total_seconds())
+            self._invalidate_blocks(rel_path)
             return True
         except NetworkException as e:
             log.exception(e)
@@ -595,6 +618,7 @@ class IRODSObjectStore(DiskObjectStore, CloudConfigMixin):
                 except FileNotFoundError:
                     # File was not in cache. Ok to ignore the exception and move on
                     pass
+                self._invalidate_blocks(rel_path)
                 # Delete from irods as well
                 p = Path(rel_path)
                 data_object_name = p.stem + p.suffix
@@ -622,20 +646,6 @@ class IRODSObjectStore(DiskObjectStore, CloudConfigMixin):
             log.debug("irods_pt _delete: %s", ipt_timer)
         return False
 
-    def _get_data(self, obj, start=0, count=-1, **kwargs):
-        ipt_timer = ExecutionTimer()
-        rel_path = self._construct_path(obj, **kwargs)
-        # Check cache first and get file if not there
-        if not self._in_cache(rel_path):
-            self._pull_into_cache(rel_path)
-        # Read the file content from cache
-        data_file = open(self._get_cache_path(rel_path))
-        data_file.seek(start)
-        content = data_file.read(count)
-        data_file.close()
-        log.debug("irods_pt _get_data: %s", ipt_timer)
-        return content
-
     def _get_filename(self, obj, **kwargs):
         ipt_timer = ExecutionTimer()
         base_dir = kwargs.get('base_dir', None)
@@ -0,0 +1,162 @@
+"""
+Backend selection and object location tracking for the distributed object store.
+
+New objects are placed on a backend chosen at random, in proportion to the
+backend's configured weight scaled by its remaining headroom: a backend with a
+``max_percent_full`` limit loses weight as it fills up and receives no new
+objects once it is over the limit. Backend usage is checked at most every
+``USAGE_REFRESH_INTERVAL`` seconds, when objects are being placed.
+
+Objects whose backend is not known (because their ``object_store_id`` is
+missing or invalid) are located by checking all backends at once, and the
+backend they are found in is remembered in a :class:`LocationCache`, so they
+don't have to be located again.
+"""
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .caching import _ClosingConnection
+
+log = logging.getLogger(__name__)
+
+LOCATION_CACHE_FILENAME = ".galaxy_object_locations.sqlite"
+USAGE_REFRESH_INTERVAL = 10
+# Number of locations kept in memory when no location cache path is configured
+MEMORY_LOCATION_CACHE_SIZE = 100000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS object_location (
+    object_type TEXT NOT NULL,
+    object_id TEXT NOT NULL,
+    backend_id TEXT NOT NULL,
+    PRIMARY KEY (object_type, object_id)
+);
+"""
+
+
+class PlacementEngine:
+    """Choose backends for new objects by weight and free capacity.
+
+    ``weights`` maps backend ids to their configured weights, and
+    ``max_percent_full`` maps them to their usage limits (0 meaning no limit).
+    ``get_usage_percent(backend_id)`` returns the current usage of a backend;
+    if it is None usage is not monitored and only the weights are used.
+    """
+
+    def __init__(self, weights, max_percent_full, get_usage_percent=None, refresh_interval=USAGE_REFRESH_INTERVAL):
+        self.weights = weights
+        self.max_percent_full = max_percent_full
+        self.get_usage_percent = get_usage_percent
+        self.refresh_interval = refresh_interval
+        self.placements = {backend_id: 0 for backend_id in weights}
+        self.usage = {}
+        self._effective_weights = dict(weights)
+        self._last_refresh = None
+        self._lock = threading.Lock()
+
+    @property
+    def monitored(self):
+        return self.get_usage_percent is not None and any(self.max_percent_full.values())
+
+    def effective_weights(self):
+        """Return the current weight of every backend."""
+        if self.monitored and (self._last_refresh is None or time.time() - self._last_refresh > self.refresh_interval):
+            self.refresh()
+        return self._effective_weights
+
+    def refresh(self):
+        """Check the usage of the backends with a limit and recompute their weights."""
+        with self._lock:
+            self._last_refresh = time.time()
+        effective_weights = {}
+        for backend_id, weight in self.weights.items():
+            limit = self.max_percent_full[backend_id]
+            if limit:
+                try:
+                    pct = self.get_usage_percent(backend_id)
+                except Exception:
+                    log.exception("Failed to check the usage of backend '%s'", backend_id)
+                    pct = self.usage.get(backend_id, 0)
+                self.usage[backend_id] = pct
+                weight *= max(limit - pct, 0) / limit
+                if not weight:
+                    log.debug("Backend '%s' is %.1f%% full, not placing new objects on it", backend_id, pct)
+            effective_weights[backend_id] = weight
+        self._effective_weights = effective_weights
+
+    def choose(self):
+        """Return the id of the backend to create a new object in, or None if
+        all backends are full."""
+        weights = self.effective_weights()
+        backend_ids = [backend_id for backend_id, weight in weights.items() if weight > 0]
+        if not backend_ids:
+            return None
+        backend_id = random.choices(backend_ids, weights=[weights[backend_id] for backend_id in backend_ids])[0]
+        with self._lock:
+            self.placements[backend_id] += 1
+        return backend_id
+
+
+class LocationCache:
+    """Remember which backend objects were found in.
+
+    Locations are stored in an SQLite database at ``path`` (shared by all
+    Galaxy processes using it), or in memory if ``path`` is None.
+    """
+
+    def __init__(self, path=None, max_size=MEMORY_LOCATION_CACHE_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._locations = OrderedDict()
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with self._connect() as connection:
+                connection.executescript(SCHEMA)
+
+    def _connect(self):
+        return _ClosingConnection(sqlite3.connect(self.path, timeout=60))
+
+    @staticmethod
+    def _key(obj):
+        return obj.__class__.__name__, str(obj.id)
+
+    def get(self, obj):
+        """Return the id of the backend ``obj`` was last found in, if any."""
+        key = self._key(obj)
+        if self.path is None:
+            with self._lock:
+                backend_id = self._locations.get(key)
+                if backend_id is not None:
+                    self._locations.move_to_end(key)
+                return backend_id
+        with self._connect() as connection:
+            row = connection.execute("SELECT backend_id FROM object_location WHERE object_type = ? AND object_id = ?", key).fetchone()
+        return row[0] if row else None
+
+    def set(self, obj, backend_id):
+        key = self._key(obj)
+        if self.path is None:
+            with self._lock:
+                self._locations[key] = backend_id
+                self._locations.move_to_end(key)
+                while len(self._locations) > self.max_size:
+                    self._locations.popitem(last=False)
+            return
+        with self._connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO object_location (object_type, object_id, backend_id) VALUES (?, ?, ?)",
+                               key + (backend_id,))
+
+    def remove(self, obj):
+        key = self._key(obj)
+        if self.path is None:
+            with self._lock:
+                self._locations.pop(key, None)
+            return
+        with self._connect() as connection:
+            connection.execute("DELETE FROM object_location WHERE object_type = ? AND object_id = ?", key)
@@ -1,6 +1,7 @@
 """
 Object Store plugin for the Amazon Simple Storage Service (S3)
 """
+import io
 import logging
 import multiprocessing
 import os
@@ -9,6 +10,7 @@ import subprocess
 import threading
 import time
 from datetime import datetime
+from functools import partial
 
 try:
     # Imports are done this way to allow objectstore code to be used outside of Galaxy.
@@ -16,6 +18,7 @@ try:
     from boto.exception import S3ResponseError
     from boto.s3.connection import S3Connection
     from boto.s3.key import Key
+    from boto.s3.multipart import MultiPartUpload
 except ImportError:
     boto = None  # type: ignore
 
@@ -27,9 +30,19 @@ from galaxy.util import (
     which,
 )
 from galaxy.util.path import safe_relpath
-from galaxy.util.sleeper import Sleeper
-from .s3_multipart_upload import multipart_upload
-from ..objectstore import ConcreteObjectStore, convert_bytes
+from .caching import (
+    CacheIndexMixin,
+    RangedReadMixin,
+)
+from .transfer import (
+    DEFAULT_MAX_CHUNK_SIZE,
+    parse_max_chunk_size,
+    parse_transfer_config_xml,
+    TRANSFER_STATE_DIRECTORY,
+    TransferConfig,
+    TransferManager,
+)
+from ..objectstore import ConcreteObjectStore
 
 NO_BOTO_ERROR_MESSAGE = ("S3/Swift object store configured, but no boto dependency available."
                          "Please install and properly configure boto or modify object store configuration.")
@@ -47,7 +60,7 @@ def parse_config_xml(config_xml):
         b_xml = config_xml.findall('bucket')[0]
         bucket_name = b_xml.get('name')
         use_rr = string_as_bool(b_xml.get('use_reduced_redundancy', "False"))
-        max_chunk_size = int(b_xml.get('max_chunk_size', 250))
+        max_chunk_size = parse_max_chunk_size(b_xml)
 
         cn_xml = config_xml.findall('connection')
         if not cn_xml:
@@ -95,6 +108,7 @@ def parse_config_xml(config_xml):
                 'size': cache_size,
                 'path': staging_path,
             },
+            'transfer': parse_transfer_config_xml(config_xml),
             'extra_dirs': extra_dirs,
         }
     except Exception:
@@ -126,11 +140,12 @@ class CloudConfigMixin:
                 'size': self.cache_size,
                 'path': self.staging_path,
             },
+            'transfer': self.transfer_config.to_dict(),
             'enable_cache_monitor': False,
         }
 
 
-class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
+class S3ObjectStore(RangedReadMixin, ConcreteObjectStore, CloudConfigMixin, CacheIndexMixin):
     """
     Object store that stores objects as items in an AWS S3 bucket. A local
     cache exists that is used as an intermediate location for files between
@@ -154,7 +169,7 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
 
         self.bucket = bucket_dict.get('name')
         self.use_rr = bucket_dict.get('use_reduced_redundancy', False)
-        self.max_chunk_size = bucket_dict.get('max_chunk_size', 250)
+        self.max_chunk_size = bucket_dict.get('max_chunk_size', DEFAULT_MAX_CHUNK_SIZE)
 
         self.host = connection_dict.get('host', None)
         self.port = connection_dict.get('port', 6000)
@@ -164,6 +179,8 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
 
         self.cache_size = cache_dict.get('size', -1)
         self.staging_path = cache_dict.get('path') or self.config.object_store_cache_path
+        self.transfer_config = TransferConfig.from_dict(config_dict.get('transfer'), self.max_chunk_size)
+        self._thread_local = threading.local()
 
         extra_dirs = {
             e['type']: e['path'] for e in config_dict.get('extra_dirs', [])}
@@ -175,16 +192,7 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
         if boto is None:
             raise Exception(NO_BOTO_ERROR_MESSAGE)
 
-        # for multipart upload
-        self.s3server = {'access_key': self.access_key,
-                         'secret_key': self.secret_key,
-                         'is_secure': self.is_secure,
-                         'max_chunk_size': self.max_chunk_size,
-                         'host': self.host,
-                         'port': self.port,
-                         'use_rr': self.use_rr,
-                         'conn_path': self.conn_path}
-
+        self.transfer_manager = TransferManager(self.transfer_config, os.path.join(self.staging_path, TRANSFER_STATE_DIRECTORY))
         self._configure_connection()
         self._bucket = self._get_bucket(self.bucket)
         self.start_cache_monitor()
@@ -196,22 +204,31 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
 
     def start_cache_monitor(self):
         # Clean cache only if value is set in galaxy.ini
-        if self.cache_size != -1 and self.enable_cache_monitor:
+        if self.cache_size != -1:
             # Convert GBs to bytes for comparison
             self.cache_size = self.cache_size * 1073741824
-            # Helper for interruptable sleep
-            self.sleeper = Sleeper()
-            self.cache_monitor_thread = threading.Thread(target=self.__cache_monitor)
-            self.cache_monitor_thread.start()
-            log.info("Cache cleaner manager started")
+        self._start_cache_index(self.enable_cache_monitor)
 
     def _configure_connection(self):
         log.debug("Configuring S3 Connection")
+        self.conn = self._get_connection()
+
+    def _get_connection(self):
         # If access_key is empty use default credential chain
         if self.access_key:
-            self.conn = S3Connection(self.access_key, self.secret_key)
+            return S3Connection(self.access_key, self.secret_key)
         else:
-            self.conn = S3Connection()
+            return S3Connection()
+
+    def _get_thread_bucket(self):
+        """Return a handle to the bucket for use in this thread only, for
+        transferring parts of objects concurrently (boto connections are not
+        thread-safe)."""
+        bucket = getattr(self._thread_local, 'bucket', None)
+        if bucket is None:
+            bucket = self._get_connection().get_bucket(self.bucket, validate=False)
+            self._thread_local.bucket = bucket
+        return bucket
 
     @classmethod
     def parse_xml(clazz, config_xml):
@@ -222,70 +239,6 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
         as_dict.update(self._config_to_dict())
         return as_dict
 
-    def __cache_monitor(self):
-        time.sleep(2)  # Wait for things to load before starting the monitor
-        while self.running:
-            total_size = 0
-            # Is this going to be too expensive of an operation to be done frequently?
-            file_list = []
-            for dirpath, _, filenames in os.walk(self.staging_path):
-                for filename in filenames:
-                    filepath = os.path.join(dirpath, filename)
-                    file_size = os.path.getsize(filepath)
-                    total_size += file_size
-                    # Get the time given file was last accessed
-                    last_access_time = time.localtime(os.stat(filepath)[7])
-                    # Compose a tuple of the access time and the file path
-                    file_tuple = last_access_time, filepath, file_size
-                    file_list.append(file_tuple)
-            # Sort the file list (based on access time)
-            file_list.sort()
-            # Initiate cleaning once within 10% of the defined cache size?
-            cache_limit = self.cache_size * 0.9
-            if total_size > cache_limit:
-                log.info("Initiating cache cleaning: current cache size: %s; clean until smaller than: %s",
-                         convert_bytes(total_size), convert_bytes(cache_limit))
-                # How much to delete? If simply deleting up to the cache-10% limit,
-                # is likely to be deleting frequently and may run the risk of hitting
-                # the limit - maybe delete additional #%?
-                # For now, delete enough to leave at least 10% of the total cache free
-                delete_this_much = total_size - cache_limit
-                self.__clean_cache(file_list, delete_this_much)
-            self.sleeper.sleep(30)  # Test cache size every 30 seconds?
-
-    def __clean_cache(self, file_list, delete_this_much):
-        """ Keep deleting files from the file_list until the size of the deleted
-        files is greater than the value in delete_this_much parameter.
-
-        :type file_list: list
-        :param file_list: List of candidate files that can be deleted. This method
-            will start deleting files from the beginning of the list so the list
-            should be sorted accordingly. The list must contains 3-element tuples,
-            positioned as follows: position 0 holds file last accessed timestamp
-            (as time.struct_time), position 1 holds file path, and position 2 has
-            file size (e.g., (<access time>, /mnt/data/dataset_1.dat), 472394)
-
-        :type delete_this_much: int
-        :param delete_this_much: Total size of files, in bytes, that should be deleted.
-        """
-        # Keep deleting datasets from file_list until deleted_amount does not
-        # exceed delete_this_much; start deleting from the front of the file list,
-        # which assumes the oldest files come first on the list.
-        deleted_amount = 0
-        for entry in file_list:
-            if deleted_amount < delete_this_much:
-                deleted_amount += entry[2]
-                os.remove(entry[1])
-                # Debugging code for printing deleted files' stats
-                # folder, file_name = os.path.split(f[1])
-                # file_date = time.strftime("%m/%d/%y %H:%M:%S", f[0])
-                # log.debug("%s. %-25s %s, size %s (deleted %s/%s)" \
-                #     % (i, file_name, convert_bytes(f[2]), file_date, \
-                #     convert_bytes(deleted_amount), convert_bytes(delete_this_much)))
-            else:
-                log.debug("Cache cleaning done. Total space freed: %s", convert_bytes(deleted_amount))
-                return
-
     def _get_bucket(self, bucket_name):
         """ Sometimes a handle to a bucket is not established right away so try
         it a few times. Raise error is connection is not established. """
@@ -367,6 +320,30 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
             log.exception("Could not get size of key '%s' from S3", rel_path)
             return -1
 
+    def _get_remote_size(self, rel_path):
+        return self._get_size_in_s3(rel_path)
+
+    def _read_remote_range(self, rel_path, start, end):
+        key = Key(self._get_thread_bucket(), rel_path)
+        return key.get_contents_as_string(headers={'Range': f'bytes={start}-{end - 1}'})
+
+    def _initiate_multipart_upload(self, rel_path):
+        return self._bucket.initiate_multipart_upload(rel_path, reduced_redundancy=self.use_rr).id
+
+    def _get_multipart_upload(self, bucket, rel_path, upload_id):
+        mp = MultiPartUpload(bucket)
+        mp.key_name = rel_path
+        mp.id = upload_id
+        return mp
+
+    def _upload_part(self, rel_path, upload_id, part_number, data):
+        mp = self._get_multipart_upload(self._get_thread_bucket(), rel_path, upload_id)
+        return mp.upload_part_from_file(io.BytesIO(data), part_number).etag
+
+    def _complete_multipart_upload(self, rel_path, upload_id, etags):
+        # S3 knows the parts of the upload
+        self._get_multipart_upload(self._bucket, rel_path, upload_id).complete_upload()
+
     def _key_exists(self, rel_path):
         exists = False
         try:
@@ -390,7 +367,7 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
         """ Check if the given dataset is in the local cache and return True if so. """
         # log.debug("------ Checking cache for rel_path %s" % rel_path)
         cache_path = self._get_cache_path(rel_path)
-        return os.path.exists(cache_path)
+        return self._cache_accessed(rel_path, cache_path)
         # TODO: Part of checking if a file is in cache should be to ensure the
         # size of the cached file matches that on S3. Once the upload tool explicitly
         # creates, this check sould be implemented- in the mean time, it's not
@@ -423,6 +400,8 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
         # Now pull in the file
         file_ok = self._download(rel_path)
         self._fix_permissions(self._get_cache_path(rel_path_dir))
+        if file_ok:
+            self._cache_updated(rel_path)
         return file_ok
 
     def _transfer_cb(self, complete, total):
@@ -437,7 +416,12 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
                 log.critical("File %s is larger (%s) than the cache size (%s). Cannot download.",
                              rel_path, key.size, self.cache_size)
                 return False
-            if self.use_axel:
+            if self.multipart and self.transfer_manager.use_parts(key.size):
+                log.debug("Parallel pulled key '%s' into cache to %s", rel_path, self._get_cache_path(rel_path))
+                self.transfer_manager.download(rel_path, key.size, partial(self._read_remote_range, rel_path),
+                                               self._get_cache_path(rel_path))
+                return True
+            elif self.use_axel:
                 log.debug("Parallel pulled key '%s' into cache to %s", rel_path, self._get_cache_path(rel_path))
                 ncores = multiprocessing.cpu_count()
                 url = key.generate_url(7200)
@@ -474,18 +458,22 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
                 else:
                     start_time = datetime.now()
                     log.debug("Pushing cache file '%s' of size %s bytes to key '%s'", source_file, os.path.getsize(source_file), rel_path)
-                    mb_size = os.path.getsize(source_file) / 1e6
-                    if mb_size < 10 or (not self.multipart):
+                    if not self.multipart or not self.transfer_manager.use_parts(os.path.getsize(source_file)):
                         self.transfer_progress = 0  # Reset transfer progress counter
                         key.set_contents_from_filename(source_file,
                                                        reduced_redundancy=self.use_rr,
                                                        cb=self._transfer_cb,
                                                        num_cb=10)
                     else:
-                        multipart_upload(self.s3server, self._bucket, key.name, source_file, mb_size)
+                        self.transfer_manager.upload(rel_path, source_file,
+                                                     partial(self._initiate_multipart_upload, rel_path),
+                                                     partial(self._upload_part, rel_path),
+                                                     partial(self._complete_multipart_upload, rel_path))
                     end_time = datetime.now()
                     log.debug("Pushed cache file '%s' to key '%s' (%s bytes transfered in %s sec)",
                               source_file, rel_path, os.path.getsize(source_file), end_time - start_time)
+                self._cache_updated(rel_path)
+                self._invalidate_blocks(rel_path)
                 return True
             else:
                 log.error("Tried updating key '%s' from source file '%s', but source file does not exist.",
@@ -613,6 +601,7 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
             # but requires iterating through each individual key in S3 and deleing it.
             if entire_dir and extra_dir:
                 shutil.rmtree(self._get_cache_path(rel_path))
+                self._cache_removed(rel_path, entire_dir=True)
                 results = self._bucket.get_all_keys(prefix=rel_path)
                 for key in results:
                     log.debug("Deleting key %s", key.name)
@@ -621,6 +610,8 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
             else:
                 # Delete from cache first
                 os.unlink(self._get_cache_path(rel_path))
+                self._cache_removed(rel_path)
+                self._invalidate_blocks(rel_path)
                 # Delete from S3 as well
                 if self._key_exists(rel_path):
                     key = Key(self._bucket, rel_path)
@@ -633,18 +624,6 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
             log.exception('%s delete error', self._get_filename(obj, **kwargs))
         return False
 
-    def _get_data(self, obj, start=0, count=-1, **kwargs):
-        rel_path = self._construct_path(obj, **kwargs)
-        # Check cache first and get file if not there
-        if not self._in_cache(rel_path):
-            self._pull_into_cache(rel_path)
-        # Read the file content from cache
-        data_file = open(self._get_cache_path(rel_path))
-        data_file.seek(start)
-        content = data_file.read(count)
-        data_file.close()
-        return content
-
     def _get_filename(self, obj, **kwargs):
         base_dir = kwargs.get('base_dir', None)
         dir_only = kwargs.get('dir_only', False)
@@ -722,11 +701,7 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
 
     def shutdown(self):
         self.running = False
-        thread = getattr(self, 'cache_monitor_thread', None)
-        if thread:
-            log.debug("Shutting down thread")
-            self.sleeper.wake()
-            thread.join(5)
+        self._shutdown_cache_monitor()
 
 
 class SwiftObjectStore(S3ObjectStore):
@@ -739,10 +714,13 @@ class SwiftObjectStore(S3ObjectStore):
 
     def _configure_connection(self):
         log.debug("Configuring Swift Connection")
-        self.conn = boto.connect_s3(aws_access_key_id=self.access_key,
-                                    aws_secret_access_key=self.secret_key,
-                                    is_secure=self.is_secure,
-                                    host=self.host,
-                                    port=self.port,
-                                    calling_format=boto.s3.connection.OrdinaryCallingFormat(),
-                                    path=self.conn_path)
+        self.conn = self._get_connection()
+
+    def _get_connection(self):
+        return boto.connect_s3(aws_access_key_id=self.access_key,
+                               aws_secret_access_key=self.secret_key,
+                               is_secure=self.is_secure,
+                               host=self.host,
+                               port=self.port,
+                               calling_format=boto.s3.connection.OrdinaryCallingFormat(),
+                               path=self.conn_path)
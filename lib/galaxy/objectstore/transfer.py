@@ -0,0 +1,299 @@
+"""
+Parallel transfers of objects between the cache of a remote object store and
+its backend.
+
+Objects larger than the configured part size are downloaded with concurrent
+ranged reads and uploaded with concurrent multipart (or block) uploads. The
+progress of every transfer is recorded in a small state file in the cache
+directory, so that a transfer that failed (or was interrupted by a restart)
+resumes with the parts that were not transferred yet the next time it is
+attempted.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PART_SIZE = 16  # MB
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RETRIES = 3
+# Multipart upload parts (except the last one) must be at least 5 MB, and
+# there can be at most 10000 of them
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+TRANSFER_STATE_DIRECTORY = ".transfers"
+DEFAULT_MAX_CHUNK_SIZE = 250  # MB
+
+
+def parse_transfer_config_xml(config_xml):
+    """Parse the optional ``<transfer>`` element of an object store configuration."""
+    t_xml = config_xml.find('transfer')
+    if t_xml is None:
+        return {}
+    return {
+        'part_size': float(t_xml.get('part_size', DEFAULT_PART_SIZE)),
+        'concurrency': int(t_xml.get('concurrency', DEFAULT_CONCURRENCY)),
+        'max_bandwidth': float(t_xml.get('max_bandwidth', 0)),
+        'retries': int(t_xml.get('retries', DEFAULT_RETRIES)),
+    }
+
+
+def parse_max_chunk_size(element):
+    """Parse the deprecated ``max_chunk_size`` attribute (in MB) of the bucket
+    or container element, it limits the ``part_size`` of the transfers."""
+    max_chunk_size = element.get('max_chunk_size')
+    if max_chunk_size is None:
+        return DEFAULT_MAX_CHUNK_SIZE
+    log.warning("The max_chunk_size attribute of <%s> is deprecated, set part_size on the <transfer> element instead", element.tag)
+    return int(max_chunk_size)
+
+
+class TransferConfig:
+    """Transfer settings, in MB (``part_size``) and MB/s (``max_bandwidth``,
+    where 0 means unlimited)."""
+
+    def __init__(self, part_size=DEFAULT_PART_SIZE, concurrency=DEFAULT_CONCURRENCY, max_bandwidth=0, retries=DEFAULT_RETRIES):
+        self.part_size = part_size
+        self.concurrency = concurrency
+        self.max_bandwidth = max_bandwidth
+        self.retries = retries
+
+    @classmethod
+    def from_dict(cls, transfer_dict, max_chunk_size=None):
+        """Create the settings from ``transfer_dict``, with ``part_size``
+        limited to the deprecated ``max_chunk_size`` (in MB) if given."""
+        config = cls(**(transfer_dict or {}))
+        if max_chunk_size is not None and max_chunk_size < config.part_size:
+            log.warning("Limiting the transfer part size to the max_chunk_size of %s MB", max_chunk_size)
+            config.part_size = max_chunk_size
+        return config
+
+    def to_dict(self):
+        return {
+            'part_size': self.part_size,
+            'concurrency': self.concurrency,
+            'max_bandwidth': self.max_bandwidth,
+            'retries': self.retries,
+        }
+
+
+class BandwidthLimiter:
+    """Limit the combined rate of the transfers sharing this limiter to
+    ``max_bandwidth`` bytes per second (unlimited if 0)."""
+
+    def __init__(self, max_bandwidth):
+        self.max_bandwidth = max_bandwidth
+        self._lock = threading.Lock()
+        self._next_slot = 0
+
+    def consume(self, nbytes):
+        """Account for ``nbytes`` transferred, sleeping as needed to stay within the limit."""
+        if not self.max_bandwidth:
+            return
+        with self._lock:
+            now = time.time()
+            self._next_slot = max(self._next_slot, now) + nbytes / self.max_bandwidth
+            delay = self._next_slot - now
+        time.sleep(delay)
+
+
+class TransferManager:
+    """Transfer objects in parts, concurrently, within a bandwidth limit and
+    retrying failed parts.
+
+    Transfer state is kept in ``state_dir``.
+    """
+
+    def __init__(self, config, state_dir):
+        self.config = config
+        self.state_dir = state_dir
+        self.limiter = BandwidthLimiter(config.max_bandwidth * 1024 * 1024)
+        self._state_lock = threading.Lock()
+
+    @property
+    def part_size(self):
+        return max(int(self.config.part_size * 1024 * 1024), MIN_PART_SIZE)
+
+    def use_parts(self, size):
+        """Whether an object of ``size`` bytes should be transferred in parts."""
+        return size > self.part_size
+
+    def download(self, key, size, read_range, destination):
+        """Download object ``key`` of ``size`` bytes to ``destination``.
+
+        ``read_range(start, end)`` returns the bytes of the object from
+        ``start`` up to (excluding) ``end``. The parts are written to a
+        temporary file next to ``destination``, which is only moved into place
+        once complete. Concurrent downloads of the same object (from other
+        threads or processes) wait for each other.
+        """
+        with self._locked("download", key):
+            if os.path.exists(destination) and os.path.getsize(destination) == size:
+                # Another process downloaded the object while we were waiting
+                return
+            partial_path = f"{destination}.part"
+            part_size = self._part_size_for(size)
+            state = self._load_state("download", key, {"size": size, "part_size": part_size})
+            if not os.path.exists(partial_path):
+                state["parts"] = {}
+            with open(partial_path, "ab") as fh:
+                fh.truncate(size)
+
+            fd = os.open(partial_path, os.O_WRONLY)
+            try:
+                def transfer(part_number, start, end):
+                    data = read_range(start, end)
+                    self.limiter.consume(len(data))
+                    os.pwrite(fd, data, start)
+                    return True
+
+                self._transfer_parts("download", key, state, size, part_size, transfer)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.rename(partial_path, destination)
+            self._remove_state("download", key)
+
+    def upload(self, key, source_file, initiate, upload_part, complete):
+        """Upload ``source_file`` as object ``key``.
+
+        ``initiate()`` starts a multipart upload and returns its id,
+        ``upload_part(upload_id, part_number, data)`` uploads the part with
+        (1-based) ``part_number`` and returns a JSON serializable result, and
+        ``complete(upload_id, results)`` completes the upload from the results
+        of all parts, in order.
+        """
+        stat = os.stat(source_file)
+        size = stat.st_size
+        part_size = self._part_size_for(size)
+        state = self._load_state("upload", key, {"size": size, "part_size": part_size, "mtime": stat.st_mtime})
+        if "upload_id" not in state:
+            state["upload_id"] = initiate()
+            state["parts"] = {}
+            self._save_state("upload", key, state)
+        upload_id = state["upload_id"]
+
+        fd = os.open(source_file, os.O_RDONLY)
+        try:
+            def transfer(part_number, start, end):
+                data = os.pread(fd, end - start, start)
+                result = upload_part(upload_id, part_number, data)
+                self.limiter.consume(len(data))
+                return result
+
+            self._transfer_parts("upload", key, state, size, part_size, transfer)
+        finally:
+            os.close(fd)
+        complete(upload_id, [state["parts"][str(part_number)] for part_number in range(1, self._part_count(size, part_size) + 1)])
+        self._remove_state("upload", key)
+
+    def _transfer_parts(self, direction, key, state, size, part_size, transfer):
+        parts = state.setdefault("parts", {})
+        resumed = bool(parts)
+        pending = [(part_number, start, end) for part_number, start, end in self._part_ranges(size, part_size)
+                   if str(part_number) not in parts]
+        if resumed:
+            log.debug("Resuming %s of '%s' with %d of %d parts left", direction, key, len(pending), len(pending) + len(parts))
+        progressed = []
+
+        def transfer_part(part_number, start, end):
+            result = self._with_retries(lambda: transfer(part_number, start, end), direction, key, part_number)
+            with self._state_lock:
+                parts[str(part_number)] = result
+                progressed.append(part_number)
+                self._save_state(direction, key, state)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(self.config.concurrency, 1)) as pool:
+                for future in [pool.submit(transfer_part, *part) for part in pending]:
+                    future.result()
+        except Exception:
+            if resumed and not progressed:
+                # The previous attempt can't be resumed (e.g. the multipart
+                # upload has been aborted), start over next time
+                self._remove_state(direction, key)
+            raise
+
+    def _with_retries(self, func, direction, key, part_number):
+        for attempt in range(self.config.retries + 1):
+            try:
+                return func()
+            except Exception:
+                if attempt == self.config.retries:
+                    raise
+                log.warning("Failed to %s part %d of '%s', retrying", direction, part_number, key, exc_info=True)
+                time.sleep(2 ** attempt)
+
+    def _part_size_for(self, size):
+        return max(self.part_size, -(-size // MAX_PARTS))
+
+    @staticmethod
+    def _part_count(size, part_size):
+        return max(-(-size // part_size), 1)
+
+    def _part_ranges(self, size, part_size):
+        for index in range(self._part_count(size, part_size)):
+            start = index * part_size
+            yield index + 1, start, min(start + part_size, size)
+
+    def _state_path(self, direction, key):
+        digest = hashlib.sha1(f"{direction}:{key}".encode()).hexdigest()
+        return os.path.join(self.state_dir, f"{digest}.json")
+
+    @contextmanager
+    def _locked(self, direction, key):
+        """Hold an exclusive lock on the transfer of ``key``.
+
+        The lock is released by the OS if the process dies, and the lock file
+        is removed again by the last holder.
+        """
+        os.makedirs(self.state_dir, exist_ok=True)
+        lock_path = f"{self._state_path(direction, key)}.lock"
+        while True:
+            fh = open(lock_path, "a")
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                if os.path.samestat(os.fstat(fh.fileno()), os.stat(lock_path)):
+                    break
+            except FileNotFoundError:
+                pass
+            # The previous holder removed the lock file while we were waiting
+            fh.close()
+        try:
+            yield
+        finally:
+            os.remove(lock_path)
+            fh.close()
+
+    def _load_state(self, direction, key, expected):
+        """Return the saved state of a previous attempt at the same transfer,
+        or a new state if there is none."""
+        state = dict(expected)
+        try:
+            with open(self._state_path(direction, key)) as fh:
+                saved = json.load(fh)
+        except (OSError, ValueError):
+            return state
+        if all(saved.get(name) == value for name, value in expected.items()):
+            return saved
+        return state
+
+    def _save_state(self, direction, key, state):
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = self._state_path(direction, key)
+        with open(f"{path}.tmp", "w") as fh:
+            json.dump(state, fh)
+        os.replace(f"{path}.tmp", path)
+
+    def _remove_state(self, direction, key):
+        try:
+            os.remove(self._state_path(direction, key))
+        except FileNotFoundError:
+            pass
@@ -4,11 +4,13 @@ Classes encapsulating galaxy tools and tool configuration.
 import itertools
 import json
 import logging
+import multiprocessing
 import os
 import re
 import tarfile
 import tempfile
 import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import List, NamedTuple, Type, Union
@@ -51,7 +53,10 @@ from galaxy.tools.actions import DefaultToolAction
 from galaxy.tools.actions.data_manager import DataManagerToolAction
 from galaxy.tools.actions.data_source import DataSourceToolAction
 from galaxy.tools.actions.model_operations import ModelOperationToolAction
-from galaxy.tools.cache import ToolDocumentCache
+from galaxy.tools.cache import (
+    expand_tool_document,
+    ToolDocumentCache,
+)
 from galaxy.tools.imp_exp import JobImportHistoryArchiveWrapper
 from galaxy.tools.parameters import (
     check_param,
@@ -82,6 +87,7 @@ from galaxy.tools.parameters.wrapped_json import json_wrap
 from galaxy.tools.test import parse_tests
 from galaxy.tools.toolbox import BaseGalaxyToolBox
 from galaxy.util import (
+    ExecutionTimer,
     in_directory,
     listify,
     Params,
@@ -258,6 +264,8 @@ class ToolBox(BaseGalaxyToolBox):
         self._reload_count = 0
         self.tool_location_fetcher = ToolLocationFetcher()
         self.cache_regions = {}
+        self._preloaded_tool_documents = {}
+        self._tool_document_modtimes = None
         # This is here to deal with the old default value, which doesn't make
         # sense in an "installed Galaxy" world.
         # FIXME: ./
@@ -317,21 +325,75 @@ class ToolBox(BaseGalaxyToolBox):
                 self.cache_regions[tool_cache_data_dir] = ToolDocumentCache(cache_dir=tool_cache_data_dir)
             return self.cache_regions[tool_cache_data_dir]
 
-    def create_tool(self, config_file, tool_cache_data_dir=None, **kwds):
+    def _init_tools_from_configs(self, config_filenames):
+        # tools and their macros are not expected to change while the toolbox is loaded,
+        # so the modification times of the (shared) macro files are checked only once.
+        self._tool_document_modtimes = {}
+        try:
+            super()._init_tools_from_configs(config_filenames)
+        finally:
+            self._tool_document_modtimes = None
+            self._preloaded_tool_documents = {}
+
+    def _preload_tools(self, tool_paths, tool_cache_data_dir=None):
+        """
+        Parse and expand the XML tools that are neither loaded nor in the tool document
+        cache in ``tool_parsing_processes`` processes, for ``create_tool`` to use.
+        """
+        processes = getattr(self.app.config, "tool_parsing_processes", 1)
+        if processes <= 1:
+            return
         cache = self.get_cache_region(tool_cache_data_dir or self.app.config.tool_cache_data_dir)
-        if config_file.endswith('.xml') and cache and not cache.disabled:
-            tool_document = cache.get(config_file)
-            if tool_document:
-                tool_source = self.get_expanded_tool_source(
-                    config_file=config_file,
-                    xml_tree=etree.ElementTree(etree.fromstring(tool_document['document'].encode('utf-8'))),
-                    macro_paths=tool_document['macro_paths']
+        if cache and cache.disabled:
+            cache = None
+        config_files = [
+            config_file for config_file in dict.fromkeys(tool_paths)
+            if config_file.endswith('.xml') and config_file not in self._preloaded_tool_documents
+            and os.path.exists(config_file) and not self.load_tool_from_cache(config_file)
+            and not (cache and cache.get(config_file, modtimes=self._tool_document_modtimes))
+        ]
+        if len(config_files) < 2:
+            return
+        processes = min(processes, len(config_files))
+        enable_beta_formats = getattr(self.app.config, "enable_beta_tool_formats", False)
+        log.debug("Parsing %d tools in %d processes", len(config_files), processes)
+        execution_timer = ExecutionTimer()
+        try:
+            # Forked workers would inherit the engine's connections and the
+            # locks of running threads, start fresh interpreters instead.
+            with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as executor:
+                tool_documents = executor.map(
+                    expand_tool_document,
+                    config_files,
+                    itertools.repeat(enable_beta_formats),
+                    chunksize=max(1, len(config_files) // (processes * 4)),
                 )
-            else:
-                tool_source = self.get_expanded_tool_source(config_file)
-                cache.set(config_file, tool_source)
+                for config_file, tool_document in zip(config_files, tool_documents):
+                    if tool_document:
+                        self._preloaded_tool_documents[config_file] = tool_document
+        except Exception:
+            log.exception("Parsing tools in parallel failed, tools are parsed one by one instead")
+        log.debug("Parsing tools finished %s", execution_timer)
+
+    def create_tool(self, config_file, tool_cache_data_dir=None, **kwds):
+        cache = self.get_cache_region(tool_cache_data_dir or self.app.config.tool_cache_data_dir)
+        if not config_file.endswith('.xml') or (cache and cache.disabled):
+            cache = None
+        tool_document = self._preloaded_tool_documents.pop(config_file, None)
+        if tool_document and cache:
+            cache.set_document(config_file, tool_document)
+        elif cache:
+            tool_document = cache.get(config_file, modtimes=self._tool_document_modtimes)
+        if tool_document:
+            tool_source = self.get_expanded_tool_source(
+                config_file=config_file,
+                xml_tree=etree.ElementTree(etree.fromstring(tool_document['document'].encode('utf-8'))),
+                macro_paths=tool_document['macro_paths']
+            )
         else:
             tool_source = self.get_expanded_tool_source(config_file)
+            if cache:
+                cache.set(config_file, tool_source)
         tool = self._create_tool_from_source(tool_source, config_file=config_file, **kwds)
         if not self.app.config.delay_tool_initialization:
             tool.assert_finalized(raise_if_invalid=True)
@@ -1945,6 +2007,7 @@ class Tool(Dictifiable):
             object_store=tool.app.object_store,
             final_job_state=final_job_state,
             flush_per_n_datasets=tool.app.config.flush_per_n_datasets,
+            discovered_datasets_workers=tool.app.config.discovered_datasets_workers,
         )
         collected = output_collect.collect_primary_datasets(
             job_context,
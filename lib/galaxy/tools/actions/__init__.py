@@ -26,11 +26,75 @@ class ToolExecutionCache:
     the same tool by the same user with slightly different parameters.
     """
 
-    def __init__(self, trans):
+    def __init__(self, trans, bulk=False):
         self.trans = trans
         self.current_user_roles = trans.get_current_user_roles()
         self.chrom_info = {}
         self.cached_collection_elements = {}
+        self.output_permissions = {}
+        # When executing jobs in bulk (i.e. mapping a tool over a collection),
+        # dataset permissions and job parameters are not created as ORM objects
+        # but collected and inserted at once by insert_deferred_rows().
+        self.bulk = bulk
+        self.deferred_dataset_permissions = []
+        self.deferred_job_parameters = []
+
+    def get_output_permissions(self, all_permissions, history):
+        """Return the permissions of new output datasets, derived from the
+        permissions of the input datasets or the history defaults."""
+        security_agent = self.trans.app.security_agent
+        if all_permissions:
+            key = tuple(sorted((action, tuple(sorted(role_ids))) for action, role_ids in all_permissions.items()))
+            if key not in self.output_permissions:
+                self.output_permissions[key] = security_agent.guess_derived_permissions(all_permissions)
+        else:
+            # No valid inputs, we will use history defaults
+            key = ("history", id(history))
+            if key not in self.output_permissions:
+                self.output_permissions[key] = security_agent.history_get_default_permissions(history)
+        return self.output_permissions[key]
+
+    def set_dataset_permissions(self, dataset, permissions):
+        """Set permissions on a new dataset, or defer that when executing jobs in bulk."""
+        security_agent = self.trans.app.security_agent
+        if not self.bulk:
+            security_agent.set_all_dataset_permissions(dataset, permissions, new=True, flush=False)
+            return
+        permission_rows = security_agent.dataset_permission_rows(permissions)
+        if permission_rows:
+            self.deferred_dataset_permissions.append((dataset, permission_rows))
+
+    def add_job_parameters(self, job, parameters):
+        """Add parameters to a job, or defer that when executing jobs in bulk."""
+        if not self.bulk:
+            for name, value in parameters.items():
+                job.add_parameter(name, value)
+            return
+        self.deferred_job_parameters.append((job, parameters))
+
+    def insert_deferred_rows(self):
+        """Insert the dataset permissions and job parameters deferred while
+        executing jobs in bulk, with one statement per table."""
+        if not (self.deferred_dataset_permissions or self.deferred_job_parameters):
+            return
+        sa_session = self.trans.sa_session
+        # Datasets and jobs need ids.
+        sa_session.flush()
+        if self.deferred_dataset_permissions:
+            rows = []
+            for dataset, permission_rows in self.deferred_dataset_permissions:
+                rows.extend(dict(action=action, dataset_id=model.cached_id(dataset), role_id=role_id) for action, role_id in permission_rows)
+                sa_session.expire(dataset, ["actions"])
+            sa_session.execute(model.DatasetPermissions.table.insert(), rows)
+            self.deferred_dataset_permissions = []
+        if self.deferred_job_parameters:
+            rows = []
+            for job, parameters in self.deferred_job_parameters:
+                rows.extend(dict(job_id=model.cached_id(job), name=name, value=value) for name, value in parameters.items())
+                sa_session.expire(job, ["parameters"])
+            if rows:
+                sa_session.execute(model.JobParameter.table.insert(), rows)
+            self.deferred_job_parameters = []
 
     def get_chrom_info(self, tool_id, input_dbkey):
         genome_builds = self.trans.app.genome_builds
@@ -344,11 +408,7 @@ class DefaultToolAction:
 
         if not completed_job:
             # Determine output dataset permission/roles list
-            if all_permissions:
-                output_permissions = app.security_agent.guess_derived_permissions(all_permissions)
-            else:
-                # No valid inputs, we will use history defaults
-                output_permissions = app.security_agent.history_get_default_permissions(history)
+            output_permissions = execution_cache.get_output_permissions(all_permissions, history)
 
         # Add the dbkey to the incoming parameters
         incoming["dbkey"] = input_dbkey
@@ -424,7 +484,7 @@ class DefaultToolAction:
                     dataset_collection_elements[name].hda = data
                 trans.sa_session.add(data)
                 if not completed_job:
-                    trans.app.security_agent.set_all_dataset_permissions(data.dataset, output_permissions, new=True, flush=False)
+                    execution_cache.set_dataset_permissions(data.dataset, output_permissions)
             data.copy_tags_to(preserved_tags.values())
 
             # This may not be neccesary with the new parent/child associations
@@ -548,7 +608,7 @@ class DefaultToolAction:
         job_setup_timer = ExecutionTimer()
         # Create the job object
         job, galaxy_session = self._new_job_for_session(trans, tool, history)
-        self._record_inputs(trans, tool, job, incoming, inp_data, inp_dataset_collections)
+        self._record_inputs(trans, tool, job, incoming, inp_data, inp_dataset_collections, execution_cache=execution_cache)
         self._record_outputs(job, out_data, output_collections)
         # execute immediate post job actions and associate post job actions that are to be executed after the job is complete
         if job_callback:
@@ -715,7 +775,7 @@ class DefaultToolAction:
         job.dynamic_tool = tool.dynamic_tool
         return job, galaxy_session
 
-    def _record_inputs(self, trans, tool, job, incoming, inp_data, inp_dataset_collections):
+    def _record_inputs(self, trans, tool, job, incoming, inp_data, inp_dataset_collections, execution_cache=None):
         # FIXME: Don't need all of incoming here, just the defined parameters
         #        from the tool. We need to deal with tools that pass all post
         #        parameters to the command as a special case.
@@ -752,8 +812,12 @@ class DefaultToolAction:
         if reductions:
             tool.visit_inputs(incoming, restore_reduction_visitor)
 
-        for name, value in tool.params_to_strings(incoming, trans.app).items():
-            job.add_parameter(name, value)
+        parameters = tool.params_to_strings(incoming, trans.app)
+        if execution_cache is not None:
+            execution_cache.add_job_parameters(job, parameters)
+        else:
+            for name, value in parameters.items():
+                job.add_parameter(name, value)
         self._record_input_datasets(trans, job, inp_data)
 
     def _record_outputs(self, job, out_data, output_collections):
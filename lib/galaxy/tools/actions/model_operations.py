@@ -58,7 +58,7 @@ class ModelOperationToolAction(DefaultToolAction):
         #
         job, galaxy_session = self._new_job_for_session(trans, tool, history)
         self._produce_outputs(trans, tool, out_data, output_collections, incoming=incoming, history=history, tags=preserved_tags)
-        self._record_inputs(trans, tool, job, incoming, inp_data, inp_dataset_collections)
+        self._record_inputs(trans, tool, job, incoming, inp_data, inp_dataset_collections, execution_cache=execution_cache)
         self._record_outputs(job, out_data, output_collections)
         if job_callback:
             job_callback(job)
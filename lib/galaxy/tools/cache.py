@@ -17,6 +17,7 @@ from sqlitedict import SqliteDict
 
 from galaxy.model.tool_shed_install import ToolShedRepository
 from galaxy.structured_app import MinimalManagerApp
+from galaxy.tool_util.parser import get_tool_source
 from galaxy.tools.toolbox.base import ToolConfRepository
 from galaxy.util import unicodify
 from galaxy.util.hash_util import md5_hash_file
@@ -35,6 +36,29 @@ def decoder(obj):
     return json.loads(zlib.decompress(bytes(obj)).decode('utf-8'))
 
 
+def tool_document(tool_source):
+    """Return what the tool document cache stores for the expanded (XML) tool source."""
+    return {
+        'document': tool_source.to_string(),
+        'macro_paths': tool_source.macro_paths,
+        'paths_and_modtimes': tool_source.paths_and_modtimes(),
+        'tool_cache_version': CURRENT_TOOL_CACHE_VERSION,
+    }
+
+
+def expand_tool_document(config_file, enable_beta_formats=False):
+    """
+    Parse and expand the XML tool in ``config_file`` into its tool document.
+
+    Run in worker processes while loading the toolbox, so parsing errors are not
+    raised but left for loading the tool to record, ``None`` is returned instead.
+    """
+    try:
+        return tool_document(get_tool_source(config_file, enable_beta_formats=enable_beta_formats))
+    except Exception:
+        return None
+
+
 class ToolDocumentCache:
 
     def __init__(self, cache_dir):
@@ -70,10 +94,16 @@ class ToolDocumentCache:
         return os.access(self.cache_file, os.W_OK)
 
     def reopen_ro(self):
-        self._get_cache(flag='r')
         self.writeable_cache_file = None
+        self._get_cache(flag='r')
 
-    def get(self, config_file):
+    def get(self, config_file, modtimes=None):
+        """
+        Return the tool document of ``config_file`` unless it or its macros changed since.
+
+        Pass a ``modtimes`` dictionary to remember the modification times of the files
+        across calls, e.g. of the macro files shared by the tools loaded together.
+        """
         try:
             tool_document = self._cache.get(config_file)
         except sqlite3.OperationalError:
@@ -84,8 +114,15 @@ class ToolDocumentCache:
         if tool_document.get('tool_cache_version') != CURRENT_TOOL_CACHE_VERSION:
             return None
         if self.cache_file_is_writeable:
+            if modtimes is None:
+                modtimes = {}
             for path, modtime in tool_document['paths_and_modtimes'].items():
-                if os.path.getmtime(path) != modtime:
+                if path not in modtimes:
+                    try:
+                        modtimes[path] = os.path.getmtime(path)
+                    except OSError:
+                        modtimes[path] = None
+                if modtimes[path] != modtime:
                     return None
         return tool_document
 
@@ -103,15 +140,12 @@ class ToolDocumentCache:
             self.reopen_ro()
 
     def set(self, config_file, tool_source):
+        self.set_document(config_file, tool_document(tool_source))
+
+    def set_document(self, config_file, to_persist):
         try:
             if self.cache_file_is_writeable:
                 self._make_writable()
-                to_persist = {
-                    'document': tool_source.to_string(),
-                    'macro_paths': tool_source.macro_paths,
-                    'paths_and_modtimes': tool_source.paths_and_modtimes(),
-                    'tool_cache_version': CURRENT_TOOL_CACHE_VERSION,
-                }
                 try:
                     self._cache[config_file] = to_persist
                 except RuntimeError:
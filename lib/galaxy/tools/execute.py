@@ -47,7 +47,9 @@ def execute(trans, tool, mapping_params, history, rerun_remap_job_id=None, colle
         execution_tracker = ToolExecutionTracker(trans, tool, mapping_params, collection_info, completed_jobs=completed_jobs)
     else:
         execution_tracker = WorkflowStepExecutionTracker(trans, tool, mapping_params, collection_info, invocation_step, completed_jobs=completed_jobs)
-    execution_cache = ToolExecutionCache(trans)
+    # When mapping over a collection, dataset permissions and job parameters
+    # of all jobs are inserted at once after the jobs have been created.
+    execution_cache = ToolExecutionCache(trans, bulk=collection_info is not None and not rerun_remap_job_id)
 
     def execute_single_job(execution_slice, completed_job):
         job_timer = tool.app.execution_timer_factory.get_timer(
@@ -117,6 +119,7 @@ def execute(trans, tool, mapping_params, history, rerun_remap_job_id=None, colle
     else:
         # Make sure collections, implicit jobs etc are flushed even if there are no precreated output datasets
         trans.sa_session.flush()
+    execution_cache.insert_deferred_rows()
 
     if job_datasets:
         for job, datasets in job_datasets.items():
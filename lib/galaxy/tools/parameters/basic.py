@@ -1718,10 +1718,17 @@ class BaseDataToolParameter(ToolParameter):
             dataset_matcher_factory = get_dataset_matcher_factory(trans)
             dataset_matcher = dataset_matcher_factory.dataset_matcher(self, other_values)
             if isinstance(self, DataToolParameter):
-                for hda in reversed(history.active_visible_datasets_and_roles):
-                    match = dataset_matcher.hda_match(hda)
-                    if match:
+                if dataset_matcher_factory.existing_history_dataset_index(history) is not None:
+                    matches = dataset_matcher.history_hda_matches(history)
+                    if matches:
+                        hda, match = matches[-1]
                         return match.hda
+                else:
+                    # Only the most recent match is needed, don't index the whole history for it
+                    for hda in reversed(history.active_visible_datasets_and_roles):
+                        match = dataset_matcher.hda_match(hda)
+                        if match:
+                            return match.hda
             else:
                 dataset_collection_matcher = dataset_matcher_factory.dataset_collection_matcher(dataset_matcher)
                 for hdca in reversed(history.active_visible_dataset_collections):
@@ -2065,13 +2072,11 @@ class DataToolParameter(BaseDataToolParameter):
         # add datasets
         hda_list = util.listify(other_values.get(self.name))
         # Prefetch all at once, big list of visible, non-deleted datasets.
-        for hda in history.active_visible_datasets_and_roles:
-            match = dataset_matcher.hda_match(hda)
-            if match:
-                m = match.hda
-                hda_list = [h for h in hda_list if h != m and h != hda]
-                m_name = f'{match.original_hda.name} (as {match.target_ext})' if match.implicit_conversion else m.name
-                append(d['options']['hda'], m, m_name, 'hda')
+        for hda, match in dataset_matcher.history_hda_matches(history):
+            m = match.hda
+            hda_list = [h for h in hda_list if h != m and h != hda]
+            m_name = f'{match.original_hda.name} (as {match.target_ext})' if match.implicit_conversion else m.name
+            append(d['options']['hda'], m, m_name, 'hda')
         for hda in hda_list:
             if hasattr(hda, 'hid'):
                 if hda.deleted:
@@ -1,5 +1,12 @@
 from logging import getLogger
 
+from sqlalchemy import inspect
+from sqlalchemy.orm import (
+    joinedload,
+    object_session,
+)
+from sqlalchemy.orm.attributes import set_committed_value
+
 import galaxy.model
 
 log = getLogger(__name__)
@@ -26,6 +33,7 @@ class DatasetMatcherFactory:
         self._tool = tool
         self._data_inputs = []
         self._matches_format_cache = {}
+        self._history_dataset_index = None
         if tool:
             valid_input_states = tool.valid_input_states
         else:
@@ -63,6 +71,24 @@ class DatasetMatcherFactory:
 
         return formats[format]
 
+    def history_dataset_index(self, history):
+        """ Return the index of the datasets of the history that could be
+        matched, shared by the data parameters until the history is updated.
+        """
+        index = self.existing_history_dataset_index(history)
+        if index is None:
+            index = self._history_dataset_index = HistoryDatasetIndex(self, history, (history.id, history.update_time))
+        return index
+
+    def existing_history_dataset_index(self, history):
+        """ Return the index of the datasets of the history if it was built
+        already and is still current, None otherwise.
+        """
+        index = self._history_dataset_index
+        if index is not None and index.key == (history.id, history.update_time):
+            return index
+        return None
+
     def _collect_data_inputs(self, input):
         type_name = input.type
         if type_name == "repeat" or type_name == "upload_dataset" or type_name == "section":
@@ -108,13 +134,29 @@ class DatasetMatcher:
                 pass  # no valid options
         self.filter_values = filter_values
 
+    def history_hda_matches(self, history):
+        """ Return the visible HDAs of the history that match this parameter,
+        in history order, as (hda, match) pairs. See hda_match for more
+        information.
+        """
+        return [(hda, match) for hda, match in self.dataset_matcher_factory.history_dataset_index(history).matches(self)
+                if not self.filter(match.hda)]
+
     def valid_hda_match(self, hda, check_implicit_conversions=True):
         """ Return False if this parameter can not be matched to the supplied
         HDA, otherwise return a description of the match (either a
         HdaDirectMatch describing a direct match or a HdaImplicitMatch
         describing an implicit conversion.)
         """
-        rval = False
+        rval = self.unfiltered_hda_match(hda, check_implicit_conversions=check_implicit_conversions)
+        if rval and self.filter(rval.hda):
+            return False
+        return rval
+
+    def unfiltered_hda_match(self, hda, check_implicit_conversions=True):
+        """ Like valid_hda_match, but without filtering by other values for
+        the job.
+        """
         formats = self.param.formats
         direct_match, target_ext, converted_dataset = hda.find_conversion_destination(formats)
         if direct_match:
@@ -129,8 +171,6 @@ class DatasetMatcher:
                 rval = HdaImplicitMatch(hda, target_ext, original_hda)
             else:
                 return False
-        if self.filter(hda):
-            return False
         return rval
 
     def hda_match(self, hda, check_implicit_conversions=True, ensure_visible=True):
@@ -141,13 +181,19 @@ class DatasetMatcher:
         dataset = hda.dataset
         valid_state = dataset.state in self.dataset_matcher_factory.valid_input_states
         if valid_state and (not ensure_visible or hda.visible):
-            # If we are sending data to an external application, then we need to make sure there are no roles
-            # associated with the dataset that restrict its access from "public".
-            require_public = self.tool and self.tool.tool_type == 'data_destination'
-            if require_public and not self.trans.app.security_agent.dataset_is_public(dataset):
+            if not self.accessible(hda):
                 return False
             return self.valid_hda_match(hda, check_implicit_conversions=check_implicit_conversions)
 
+    @property
+    def require_public(self):
+        return bool(self.tool and self.tool.tool_type == 'data_destination')
+
+    def accessible(self, hda):
+        # If we are sending data to an external application, then we need to make sure there are no roles
+        # associated with the dataset that restrict its access from "public".
+        return not self.require_public or self.trans.app.security_agent.dataset_is_public(hda.dataset)
+
     def filter(self, hda):
         """ Filter out this value based on other values for job (if
         applicable).
@@ -156,6 +202,56 @@ class DatasetMatcher:
         return param.options and param.get_options_filter_attribute(hda) not in self.filter_values
 
 
+class HistoryDatasetIndex:
+    """ Index of the visible HDAs of a history in a state valid as tool input,
+    with the matches found for data parameters accepting the same formats.
+    """
+
+    def __init__(self, dataset_matcher_factory, history, key):
+        self.key = key
+        valid_input_states = dataset_matcher_factory.valid_input_states
+        self.hdas = [hda for hda in history.active_visible_datasets_and_roles
+                     if hda.dataset.state in valid_input_states and hda.visible]
+        self._matches = {}
+        self._load_implicit_conversions(history)
+
+    def matches(self, dataset_matcher):
+        """ Return the (hda, match) pairs of the HDAs the parameter of the
+        dataset matcher could match, before filtering by other values.
+        """
+        key = (tuple(dataset_matcher.param.formats), dataset_matcher.require_public)
+        if key not in self._matches:
+            matches = []
+            for hda in self.hdas:
+                if dataset_matcher.accessible(hda):
+                    match = dataset_matcher.unfiltered_hda_match(hda)
+                    if match:
+                        matches.append((hda, match))
+            self._matches[key] = matches
+        return self._matches[key]
+
+    def _load_implicit_conversions(self, history):
+        # Load the implicit conversions of all HDAs at once, instead of one query per HDA finding a conversion destination
+        hdas = {hda.id: hda for hda in self.hdas if isinstance(hda, galaxy.model.HistoryDatasetAssociation)
+                and 'implicitly_converted_datasets' in inspect(hda).unloaded}
+        sa_session = object_session(history)
+        if not hdas or sa_session is None:
+            return
+        ImplicitlyConvertedDatasetAssociation = galaxy.model.ImplicitlyConvertedDatasetAssociation
+        HistoryDatasetAssociation = galaxy.model.HistoryDatasetAssociation
+        implicit_conversions = {hda_id: [] for hda_id in hdas}
+        query = (sa_session.query(ImplicitlyConvertedDatasetAssociation)
+                 .join(HistoryDatasetAssociation, ImplicitlyConvertedDatasetAssociation.hda_parent_id == HistoryDatasetAssociation.id)
+                 .filter(HistoryDatasetAssociation.history_id == history.id)
+                 .options(joinedload('dataset').joinedload('dataset'),
+                          joinedload('dataset').joinedload('tags')))
+        for implicit_conversion in query:
+            if implicit_conversion.hda_parent_id in implicit_conversions:
+                implicit_conversions[implicit_conversion.hda_parent_id].append(implicit_conversion)
+        for hda_id, hda in hdas.items():
+            set_committed_value(hda, 'implicitly_converted_datasets', implicit_conversions[hda_id])
+
+
 class HdaDirectMatch:
     """ Supplied HDA was a valid option directly (did not need to find implicit
     conversion).
@@ -4,9 +4,14 @@ installed within this Galaxy. Before changing index-building
 or searching related parts it is deeply recommended to read
 through the library docs at https://whoosh.readthedocs.io.
 """
+import heapq
 import logging
+import math
 import os
 import re
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
 
 from whoosh import (
     analysis,
@@ -35,6 +40,24 @@ from galaxy.web.framework.helpers import to_unicode
 log = logging.getLogger(__name__)
 
 
+def _indexable_tool(tool_cache, tool):
+    """
+    Return the version of `tool` to index, the tool itself or, if it is
+    hidden, the latest older version that is not, or None if there is none.
+    """
+    if not tool or not tool.is_latest_version:
+        return None
+    if not tool.hidden:
+        return tool
+    # we check if there is an older tool we can return
+    if tool.lineage:
+        for tool_version in reversed(tool.lineage.get_versions()):
+            tool = tool_cache.get_tool_by_id(tool_version.id)
+            if tool and not tool.hidden:
+                return tool
+    return None
+
+
 def get_or_create_index(index_dir, schema):
     if not os.path.exists(index_dir):
         os.makedirs(index_dir)
@@ -101,21 +124,9 @@ class ToolBoxSearch:
             for tool_id in tool_ids_to_remove:
                 writer.delete_by_term('id', tool_id)
             for tool_id in tool_cache._new_tool_ids - indexed_tool_ids:
-                tool = tool_cache.get_tool_by_id(tool_id)
-                if tool and tool.is_latest_version:
-                    if tool.hidden:
-                        # we check if there is an older tool we can return
-                        if tool.lineage:
-                            for tool_version in reversed(tool.lineage.get_versions()):
-                                tool = tool_cache.get_tool_by_id(tool_version.id)
-                                if tool and not tool.hidden:
-                                    tool_id = tool.id
-                                    break
-                            else:
-                                continue
-                        else:
-                            continue
-                    add_doc_kwds = self._create_doc(tool_id=tool_id, tool=tool, index_help=index_help)
+                tool = _indexable_tool(tool_cache, tool_cache.get_tool_by_id(tool_id))
+                if tool:
+                    add_doc_kwds = self._create_doc(tool_id=tool.id, tool=tool, index_help=index_help)
                     writer.update_document(**add_doc_kwds)
         log.debug("Toolbox index finished %s", execution_timer)
 
@@ -222,3 +233,227 @@ class ToolBoxSearch:
         hits_with_score = sorted(hits_with_score.items(), key=lambda x: x[1], reverse=True)
         # Return the tool ids
         return [item[0] for item in hits_with_score[0:int(tool_search_limit)]]
+
+
+SEARCH_FIELDS = ('name', 'old_id', 'description', 'section', 'help', 'labels', 'stub')
+# Length of the n-grams of indexed terms used to find terms containing a query term.
+TERM_GRAM_SIZE = 3
+RESULT_CACHE_SIZE = 1000
+# BM25F parameters, these are Whoosh's defaults.
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Scale of the coordination bonus for documents matching several query terms, see `OrGroup.factory` above.
+COORDINATION_SCALE = 0.9
+
+
+@lru_cache(maxsize=32)
+def _field_boosts(tool_name_boost, tool_id_boost, tool_section_boost, tool_description_boost,
+                  tool_label_boost, tool_stub_boost, tool_help_boost):
+    boosts = {
+        'name': tool_name_boost,
+        'old_id': tool_id_boost,
+        'description': tool_description_boost,
+        'section': tool_section_boost,
+        'help': tool_help_boost,
+        'labels': tool_label_boost,
+        'stub': tool_stub_boost,
+    }
+    return tuple((field, float(boosts[field])) for field in SEARCH_FIELDS)
+
+
+@lru_cache(maxsize=32)
+def _ngram_analyzer(tool_ngram_minsize, tool_ngram_maxsize):
+    return StandardAnalyzer() | analysis.NgramFilter(minsize=int(tool_ngram_minsize), maxsize=int(tool_ngram_maxsize))
+
+
+class _FieldIndex:
+    """
+    Postings of the terms of one field of the tool documents.
+
+    Terms are numbered in sorted order, so the terms starting with a prefix
+    have consecutive numbers. The postings of term ``i`` are
+    ``docs[starts[i]:starts[i + 1]]`` with their term frequencies in
+    ``freqs``.
+    """
+
+    def __init__(self, field_terms):
+        # field_terms holds the list of terms of the field for every document
+        term_freqs = {}
+        self.lengths = array('I')
+        for doc_num, terms in enumerate(field_terms):
+            self.lengths.append(len(terms))
+            for term in terms:
+                doc_freqs = term_freqs.setdefault(term, {})
+                doc_freqs[doc_num] = doc_freqs.get(doc_num, 0) + 1
+        self.average_length = (sum(self.lengths) / len(self.lengths) if self.lengths else 0) or 1
+        self.terms = sorted(term_freqs)
+        self.term_nums = {term: term_num for term_num, term in enumerate(self.terms)}
+        self.starts = array('I', [0])
+        self.docs = array('I')
+        self.freqs = array('I')
+        self.idfs = array('d')
+        doc_count = len(self.lengths)
+        for term in self.terms:
+            doc_freqs = term_freqs[term]
+            self.docs.extend(doc_freqs.keys())
+            self.freqs.extend(doc_freqs.values())
+            self.starts.append(len(self.docs))
+            self.idfs.append(math.log(1 + (doc_count - len(doc_freqs) + 0.5) / (len(doc_freqs) + 0.5)))
+        reversed_terms = sorted((term[::-1], term_num) for term_num, term in enumerate(self.terms))
+        self.reversed_terms = [reversed_term for reversed_term, _ in reversed_terms]
+        self.reversed_term_nums = array('I', (term_num for _, term_num in reversed_terms))
+        grams = {}
+        for term_num, term in enumerate(self.terms):
+            term_grams = set()
+            for size in range(1, TERM_GRAM_SIZE + 1):
+                term_grams.update(term[i:i + size] for i in range(len(term) - size + 1))
+            for gram in term_grams:
+                grams.setdefault(gram, array('I')).append(term_num)
+        self.grams = grams
+
+    def exact(self, text):
+        term_num = self.term_nums.get(text)
+        return () if term_num is None else (term_num,)
+
+    def prefix(self, text):
+        return range(bisect_left(self.terms, text), bisect_left(self.terms, text + '\uffff'))
+
+    def suffix(self, text):
+        text = text[::-1]
+        start, end = bisect_left(self.reversed_terms, text), bisect_left(self.reversed_terms, text + '\uffff')
+        return self.reversed_term_nums[start:end]
+
+    def contains(self, text):
+        if len(text) <= TERM_GRAM_SIZE:
+            return self.grams.get(text, ())
+        postings = []
+        for i in range(len(text) - TERM_GRAM_SIZE + 1):
+            gram_postings = self.grams.get(text[i:i + TERM_GRAM_SIZE])
+            if gram_postings is None:
+                return ()
+            postings.append(gram_postings)
+        candidates = set(min(postings, key=len))
+        return [term_num for term_num in candidates if text in self.terms[term_num]]
+
+    def scores(self, term_nums, boost):
+        """
+        Return the BM25 score of the best of the terms numbered `term_nums`
+        in every document containing any of them.
+        """
+        doc_scores = {}
+        lengths = self.lengths
+        normalization = BM25_K1 / self.average_length
+        for term_num in term_nums:
+            weight = boost * self.idfs[term_num] * (BM25_K1 + 1)
+            for i in range(self.starts[term_num], self.starts[term_num + 1]):
+                doc_num = self.docs[i]
+                freq = self.freqs[i]
+                score = weight * freq / (freq + BM25_K1 * (1 - BM25_B) + normalization * BM25_B * lengths[doc_num])
+                if score > doc_scores.get(doc_num, 0):
+                    doc_scores[doc_num] = score
+        return doc_scores
+
+
+class _InMemoryIndex:
+
+    def __init__(self, docs, schema):
+        self.tool_ids = [doc['id'] for doc in docs]
+        self.fields = {}
+        for field in SEARCH_FIELDS:
+            field_terms = [list(schema[field].process_text(doc[field])) if doc.get(field) else [] for doc in docs]
+            self.fields[field] = _FieldIndex(field_terms)
+
+
+class InMemoryToolBoxSearch(ToolBoxSearch):
+    """
+    Support searching tools in a toolbox using postings held in memory,
+    selected with the ``tool_search_backend`` option.
+
+    The index is rebuilt from the tool cache every time the toolbox is
+    indexed. Query terms match indexed terms like the wildcard query of
+    the Whoosh implementation does (a single term matches the indexed
+    terms containing it; of several terms the first matches as a suffix,
+    the last as a prefix and the others exactly) and are looked up in
+    precomputed prefix, suffix and n-gram postings. Matches are scored
+    with BM25 weighted by the field boosts. Results are cached per query
+    until the index is rebuilt.
+    """
+
+    def __init__(self, toolbox, index_dir=None, index_help=True, result_cache_size=RESULT_CACHE_SIZE):
+        super().__init__(toolbox, index_dir=index_dir, index_help=index_help)
+        self.index = _InMemoryIndex([], self.schema)
+        self._cached_search = lru_cache(maxsize=result_cache_size)(self._search)
+
+    def _index_setup(self):
+        return None
+
+    def build_index(self, tool_cache, index_help=True):
+        log.debug('Starting to build in-memory toolbox index.')
+        self.index_count += 1
+        execution_timer = ExecutionTimer()
+        docs = {}
+        for tool_id in list(tool_cache._tool_paths_by_id.keys()):
+            tool = _indexable_tool(tool_cache, tool_cache.get_tool_by_id(tool_id))
+            if tool and tool.id not in docs:
+                doc = self._create_doc(tool_id=tool.id, tool=tool, index_help=index_help)
+                if doc:
+                    docs[tool.id] = doc
+        self.index = _InMemoryIndex(list(docs.values()), self.schema)
+        self._cached_search.cache_clear()
+        log.debug("In-memory toolbox index of %d tools finished %s", len(docs), execution_timer)
+
+    def search(self, q, tool_name_boost, tool_id_boost, tool_section_boost,
+            tool_description_boost, tool_label_boost, tool_stub_boost,
+            tool_help_boost, tool_search_limit, tool_enable_ngram_search,
+            tool_ngram_minsize, tool_ngram_maxsize):
+        """
+        Perform search on the in-memory index. Weight in the given boosts.
+        """
+        boosts = _field_boosts(tool_name_boost, tool_id_boost, tool_section_boost, tool_description_boost,
+                               tool_label_boost, tool_stub_boost, tool_help_boost)
+        if tool_enable_ngram_search is True:
+            ngram_sizes = (int(tool_ngram_minsize), int(tool_ngram_maxsize))
+        else:
+            ngram_sizes = None
+        # The index is part of the key, so results of a search running while the index is rebuilt are not reused.
+        return list(self._cached_search(self.index, q.lower(), boosts, int(tool_search_limit), ngram_sizes))
+
+    def _search(self, index, cleaned_query, boosts, tool_search_limit, ngram_sizes):
+        if ngram_sizes:
+            # Like _search_ngrams, score every ngram as a query of its own and add up the scores.
+            doc_scores = {}
+            for ngram in {token.text for token in _ngram_analyzer(*ngram_sizes)(cleaned_query)}:
+                for doc_num, score in self._score(index, [('contains', ngram)], boosts).items():
+                    doc_scores[doc_num] = doc_scores.get(doc_num, 0) + score
+        else:
+            tokens = [token.text for token in self.rex(cleaned_query)]
+            if len(tokens) > 1:
+                clauses = [('suffix', tokens[0])] + [('exact', token) for token in tokens[1:-1]] + [('prefix', tokens[-1])]
+            else:
+                clauses = [('contains', token) for token in tokens]
+            doc_scores = self._score(index, clauses, boosts)
+        hits = heapq.nlargest(tool_search_limit, doc_scores.items(), key=lambda item: (item[1], -item[0]))
+        return tuple(index.tool_ids[doc_num] for doc_num, _ in hits)
+
+    def _score(self, index, clauses, boosts):
+        """
+        Add up the field scores of the documents matching any clause, with
+        the coordination bonus Whoosh's `OrGroup.factory` gives to documents
+        matching several clauses and fields.
+        """
+        doc_scores = {}
+        doc_matches = {}
+        for match, text in clauses:
+            for field, boost in boosts:
+                field_index = index.fields[field]
+                term_nums = getattr(field_index, match)(text)
+                if not term_nums or not boost:
+                    continue
+                for doc_num, score in field_index.scores(term_nums, boost).items():
+                    doc_scores[doc_num] = doc_scores.get(doc_num, 0) + score
+                    doc_matches[doc_num] = doc_matches.get(doc_num, 0) + 1
+        term_count = len(clauses) * len(boosts)
+        for doc_num, matches in doc_matches.items():
+            doc_scores[doc_num] = ((doc_scores[doc_num] + (matches - 1) / (term_count - COORDINATION_SCALE) ** 2)
+                                   * ((term_count - 1) / term_count))
+        return doc_scores
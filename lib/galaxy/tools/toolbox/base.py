@@ -256,7 +256,9 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
         tool_path = self.__resolve_tool_path(tool_path, config_filename)
         # Only load the panel_dict under certain conditions.
         load_panel_dict = not self._integrated_tool_panel_config_has_contents
-        for item in tool_conf_source.parse_items():
+        items = tool_conf_source.parse_items()
+        self._preload_tools(self._item_tool_paths(items, tool_path), tool_cache_data_dir=tool_cache_data_dir)
+        for item in items:
             index = self._index
             self._index += 1
             if parsing_shed_tool_conf:
@@ -830,11 +832,28 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
     def _path_template_kwds(self):
         return {}
 
+    def _tool_item_path(self, item):
+        path_template = item.get("file")
+        template_kwds = self._path_template_kwds()
+        return string.Template(path_template).safe_substitute(**template_kwds)
+
+    def _item_tool_paths(self, items, tool_path):
+        """Return the paths of the tools of (sections of) tool conf items, in order."""
+        tool_paths = []
+        for item in items:
+            item = ensure_tool_conf_item(item)
+            if item.type == 'tool' and item.get("file"):
+                tool_paths.append(os.path.join(tool_path, self._tool_item_path(item)))
+            elif item.type == 'section':
+                tool_paths.extend(self._item_tool_paths(item.items, tool_path))
+        return tool_paths
+
+    def _preload_tools(self, tool_paths, tool_cache_data_dir=None):
+        """Prepare loading the tools in ``tool_paths`` together, before these are loaded one by one."""
+
     def _load_tool_tag_set(self, item, panel_dict, integrated_panel_dict, tool_path, load_panel_dict, guid=None, index=None, tool_cache_data_dir=None):
         try:
-            path_template = item.get("file")
-            template_kwds = self._path_template_kwds()
-            path = string.Template(path_template).safe_substitute(**template_kwds)
+            path = self._tool_item_path(item)
             concrete_path = os.path.join(tool_path, path)
             if not os.path.exists(concrete_path):
                 # This is a lot faster than attempting to load a non-existing tool
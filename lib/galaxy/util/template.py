@@ -1,9 +1,18 @@
 """Entry point for the usage of Cheetah templating within Galaxy."""
 
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+import threading
 import traceback
+import types
+from collections import OrderedDict
 from lib2to3.refactor import RefactoringTool
 
 import packaging.version
+from Cheetah import Version as CHEETAH_VERSION
 from Cheetah.Compiler import Compiler
 from Cheetah.NameMapper import NotFound
 from Cheetah.Parser import ParseError
@@ -12,6 +21,8 @@ from past.translation import myfixes
 
 from . import unicodify
 
+log = logging.getLogger(__name__)
+
 # Skip libpasteurize fixers, which make sure code is py2 and py3 compatible.
 # This is not needed, we only translate code on py3.
 myfixes = [f for f in myfixes if not f.startswith('libpasteurize')]
@@ -36,6 +47,123 @@ def create_compiler_class(module_code):
     return CustomCompilerClass
 
 
+# Name of the class in the module code generated by Cheetah
+TEMPLATE_CLASS_NAME = "DynamicallyCompiledCheetahTemplate"
+MEMORY_TEMPLATE_CACHE_SIZE = 5000
+
+
+class CompiledTemplateCache:
+    """Cache of compiled Cheetah template classes.
+
+    Template classes are keyed by a hash of the template text and Python
+    template version, so the same command, configfile or environment template
+    is compiled once per process whichever tool uses it - including the
+    fixed-up classes of Python 2 templates, which take several compilations to
+    obtain. If ``cache_dir`` is set, the generated module code of the classes
+    is also written there, to be reused by other Galaxy processes and after
+    restarts without compiling the template again.
+    """
+
+    def __init__(self, cache_dir=None, max_size=MEMORY_TEMPLATE_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._classes = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(template_text, python_template_version):
+        key = f"{CHEETAH_VERSION}\0{python_template_version.release[0]}\0{template_text}"
+        return hashlib.sha1(key.encode("utf-8", "surrogateescape")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.py")
+
+    def get(self, key):
+        """Return the compiled template class for ``key``, or None."""
+        with self._lock:
+            klass = self._classes.get(key)
+            if klass is not None:
+                self._classes.move_to_end(key)
+                self.hits += 1
+                return klass
+        if self.cache_dir is not None:
+            klass = self._load(key)
+            if klass is not None:
+                self._remember(key, klass)
+                self.hits += 1
+                return klass
+        self.misses += 1
+        return None
+
+    def set(self, key, klass):
+        """Cache the compiled template class ``klass`` for ``key``."""
+        self._remember(key, klass)
+        if self.cache_dir is not None:
+            self._store(key, klass)
+
+    def clear(self):
+        with self._lock:
+            self._classes.clear()
+
+    def _remember(self, key, klass):
+        with self._lock:
+            self._classes[key] = klass
+            self._classes.move_to_end(key)
+            while len(self._classes) > self.max_size:
+                self._classes.popitem(last=False)
+
+    def _load(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as fh:
+                module_code = fh.read()
+        except OSError:
+            return None
+        try:
+            return template_class_from_module_code(module_code, f"galaxy_cheetah_{key}", path)
+        except Exception:
+            log.warning("Failed to load compiled template from '%s'", path, exc_info=True)
+            return None
+
+    def _store(self, key, klass):
+        module_code = getattr(klass, "_CHEETAH_generatedModuleCode", None)
+        if not module_code:
+            return
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first, so other processes never read a partial module.
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(module_code)
+            os.replace(tmp_path, path)
+        except OSError:
+            log.warning("Failed to write compiled template to '%s'", path, exc_info=True)
+
+
+def template_class_from_module_code(module_code, module_name, filename="<template>"):
+    """Create a template class from module code generated by Cheetah."""
+    module = types.ModuleType(module_name)
+    module.__file__ = filename
+    exec(compile(module_code, filename, "exec"), module.__dict__)
+    sys.modules[module_name] = module
+    klass = getattr(module, TEMPLATE_CLASS_NAME)
+    klass._CHEETAH_generatedModuleCode = module_code
+    return klass
+
+
+template_cache = CompiledTemplateCache()
+
+
+def configure_template_cache(cache_dir):
+    """Persist compiled templates to ``cache_dir``."""
+    template_cache.cache_dir = cache_dir
+
+
 def fill_template(template_text,
                   context=None,
                   retry=10,
@@ -56,6 +184,36 @@ def fill_template(template_text,
         context = kwargs
     if isinstance(python_template_version, str):
         python_template_version = packaging.version.parse(python_template_version)
+    cache_key = template_cache.key(template_text, python_template_version)
+    klass = template_cache.get(cache_key)
+    if klass is not None:
+        try:
+            return unicodify(klass(searchList=[context]), log_exception=False)
+        except Exception:
+            # The cached class may be a Python 2 template fixed up for another
+            # context, retry compiling the template for this one.
+            pass
+    rval, klass = _fill_template(
+        template_text=template_text,
+        context=context,
+        retry=retry,
+        compiler_class=compiler_class,
+        first_exception=first_exception,
+        futurized=futurized,
+        python_template_version=python_template_version,
+    )
+    template_cache.set(cache_key, klass)
+    return rval
+
+
+def _fill_template(template_text,
+                   context,
+                   retry=10,
+                   compiler_class=Compiler,
+                   first_exception=None,
+                   futurized=False,
+                   python_template_version=None):
+    """Fill a template and return the result with the template class that produced it."""
     try:
         klass = Template.compile(source=template_text, compilerClass=compiler_class)
     except ParseError as e:
@@ -66,7 +224,7 @@ def fill_template(template_text,
             module_code = Template.compile(source=template_text, compilerClass=compiler_class, returnAClass=False).decode('utf-8')
             module_code = futurize_preprocessor(module_code)
             compiler_class = create_compiler_class(module_code)
-            return fill_template(
+            return _fill_template(
                 template_text=template_text,
                 context=context,
                 retry=retry - 1,
@@ -77,7 +235,7 @@ def fill_template(template_text,
         raise first_exception or e
     t = klass(searchList=[context])
     try:
-        return unicodify(t, log_exception=False)
+        return unicodify(t, log_exception=False), klass
     except NotFound as e:
         if first_exception is None:
             first_exception = e
@@ -97,13 +255,13 @@ def fill_template(template_text,
                 module_code[lineno] = module_code[lineno].replace(replace_str, var_not_found)
                 module_code = "\n".join(module_code)
                 compiler_class = create_compiler_class(module_code)
-                return fill_template(template_text=template_text,
-                                     context=context,
-                                     retry=retry - 1,
-                                     compiler_class=compiler_class,
-                                     first_exception=first_exception,
-                                     python_template_version=python_template_version,
-                                     )
+                return _fill_template(template_text=template_text,
+                                      context=context,
+                                      retry=retry - 1,
+                                      compiler_class=compiler_class,
+                                      first_exception=first_exception,
+                                      python_template_version=python_template_version,
+                                      )
         raise first_exception or e
     except Exception as e:
         if first_exception is None:
@@ -115,14 +273,14 @@ def fill_template(template_text,
             module_code = t._CHEETAH_generatedModuleCode
             module_code = futurize_preprocessor(module_code)
             compiler_class = create_compiler_class(module_code)
-            return fill_template(template_text=template_text,
-                                 context=context,
-                                 retry=retry,
-                                 compiler_class=compiler_class,
-                                 first_exception=first_exception,
-                                 futurized=True,
-                                 python_template_version=python_template_version,
-                                 )
+            return _fill_template(template_text=template_text,
+                                  context=context,
+                                  retry=retry,
+                                  compiler_class=compiler_class,
+                                  first_exception=first_exception,
+                                  futurized=True,
+                                  python_template_version=python_template_version,
+                                  )
         raise first_exception or e
 
 
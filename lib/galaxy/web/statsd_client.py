@@ -39,6 +39,10 @@ class VanillaGalaxyStatsdClient:
         infix = self._effective_infix(path, tags)
         self.statsd_client.incr(infix + path, n)
 
+    def gauge(self, path, value, tags=None):
+        infix = self._effective_infix(path, tags)
+        self.statsd_client.gauge(infix + path, value)
+
     def _effective_infix(self, path, tags):
         tags = tags or {}
         if self.statsd_influxdb and tags:
@@ -89,6 +93,9 @@ class MockStatsClient:
     def incr(self, path, n=1, tags=None):
         pass
 
+    def gauge(self, path, value, tags=None):
+        pass
+
 
 GalaxyStatsdClient: Type[VanillaGalaxyStatsdClient]
 # Replace stats collector if in pytest environment
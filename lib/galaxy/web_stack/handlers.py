@@ -89,6 +89,9 @@ class ConfiguresHandlers:
             ready_window_size_str = config_element.attrib.get("ready_window_size", None)
             if ready_window_size_str:
                 handling_config_dict["ready_window_size"] = int(ready_window_size_str)
+            ready_tracking = config_element.attrib.get("ready_tracking", None)
+            if ready_tracking:
+                handling_config_dict["ready_tracking"] = ready_tracking.strip().lower()
 
         return handling_config_dict
 
@@ -51,6 +51,7 @@ class HistoryContentsController(BaseGalaxyAPIController, UsesLibraryMixinItems,
     hda_deserializer: hdas.HDADeserializer = depends(hdas.HDADeserializer)
     hdca_serializer: hdcas.HDCASerializer = depends(hdcas.HDCASerializer)
     history_contents_filters: history_contents.HistoryContentsFilters = depends(history_contents.HistoryContentsFilters)
+    history_contents_serializer: history_contents.HistoryContentsSerializer = depends(history_contents.HistoryContentsSerializer)
 
     @expose_api_anonymous
     def index(self, trans, history_id, ids=None, v=None, **kwd):
@@ -878,6 +879,22 @@ class HistoryContentsController(BaseGalaxyAPIController, UsesLibraryMixinItems,
             limit and offset can be combined. Skip the first two and return five:
                 '?limit=5&offset=3'
 
+        Large histories are better paged through with the optional parameter:
+            after:  string, the type_id of the last item of the previous page,
+                    return the items following it instead of skipping
+                    offset items. Requires ordering by one of hid,
+                    create_time or update_time.
+
+        ..example:
+            Return the five items after the item with type_id dataset-f2db41e1fa331b3e
+            in descending hid order:
+                '?order=hid-dsc&limit=5&after=dataset-f2db41e1fa331b3e'
+
+        If only keys common to datasets and collections are requested with keys
+        (id, type_id, history_id, hid, history_content_type, visible, dataset_id,
+        collection_id, name, state, deleted, purged, create_time and update_time)
+        the items are serialized straight from a single query.
+
         The list returned can be ordered using the optional parameter:
             order:  string containing one of the valid ordering attributes followed
                     (optionally) by '-asc' or '-dsc' for ascending and descending
@@ -905,6 +922,9 @@ class HistoryContentsController(BaseGalaxyAPIController, UsesLibraryMixinItems,
         filters = self.history_contents_filters.parse_filters(filter_params)
         limit, offset = self.parse_limit_offset(kwd)
         order_by = self._parse_order_by(manager=self.history_contents_manager, order_by_string=kwd.get('order', 'hid-asc'))
+        after = kwd.get('after')
+        if after:
+            after = self.history_contents_filters.decode_type_id(after)
         serialization_params = self._parse_serialization_params(kwd, 'summary')
         # TODO: > 16.04: remove these
         # TODO: remove 'dataset_details' and the following section when the UI doesn't need it
@@ -917,11 +937,25 @@ class HistoryContentsController(BaseGalaxyAPIController, UsesLibraryMixinItems,
             details = util.listify(details)
         view = serialization_params.pop('view')
 
+        keys = serialization_params['keys']
+        if (not view and not details and keys and self.history_contents_serializer.can_serialize_rows(keys)
+                and not any(filter_fn.filter_type == 'function' for filter_fn in filters)):
+            rows = self.history_contents_manager.contents(history,
+                filters=filters,
+                limit=limit,
+                offset=offset,
+                order_by=order_by,
+                after=after,
+                expand_models=False)
+            return [self.history_contents_serializer.serialize_row(row, keys, user=trans.user, trans=trans)
+                    for row in rows]
+
         contents = self.history_contents_manager.contents(history,
             filters=filters,
             limit=limit,
             offset=offset,
             order_by=order_by,
+            after=after,
             serialization_params=serialization_params)
 
         for content in contents:
@@ -1,4 +1,5 @@
 import logging
+import time
 import uuid
 
 from galaxy import model
@@ -150,6 +151,7 @@ class WorkflowInvoker:
                 module_injector,
                 param_map=workflow_run_config.param_map,
                 jobs_per_scheduling_iteration=getattr(trans.app.config, "maximum_workflow_jobs_per_scheduling_iteration", -1),
+                time_slice=getattr(trans.app.config, "workflow_scheduling_time_slice", -1),
             )
         self.progress = progress
 
@@ -179,9 +181,17 @@ class WorkflowInvoker:
             if max_jobs_to_schedule is not None and max_jobs_to_schedule <= 0:
                 max_jobs_per_iteration_reached = True
                 break
+            if self.progress.time_slice_exhausted:
+                log.debug(f"Workflow invocation [{workflow_invocation.id}] exhausted its scheduling time slice, continuing in next iteration")
+                max_jobs_per_iteration_reached = True
+                break
             step_delayed = False
             step_timer = ExecutionTimer()
             try:
+                # Steps depending on a delayed step are delayed without evaluating them
+                delayed_step_id = self.progress.delayed_dependency(step)
+                if delayed_step_id is not None:
+                    raise modules.DelayedWorkflowEvaluation(why=f"dependent step [{delayed_step_id}] delayed, so this step must be delayed")
                 self.__check_implicitly_dependent_steps(step)
 
                 if not workflow_invocation_step:
@@ -191,6 +201,7 @@ class WorkflowInvoker:
                     workflow_invocation_step.state = 'new'
 
                     workflow_invocation.steps.append(workflow_invocation_step)
+                    self.progress.step_invocations_by_step_id[step.id] = workflow_invocation_step
 
                 incomplete_or_none = self._invoke_step(workflow_invocation_step)
                 if incomplete_or_none is False:
@@ -237,7 +248,7 @@ class WorkflowInvoker:
                 self.__check_implicitly_dependent_step(output_id)
 
     def __check_implicitly_dependent_step(self, output_id):
-        step_invocation = self.workflow_invocation.step_invocation_for_step_id(output_id)
+        step_invocation = self.progress.step_invocations_by_step_id.get(output_id)
 
         # No steps created yet - have to delay evaluation.
         if not step_invocation:
@@ -277,7 +288,7 @@ STEP_OUTPUT_DELAYED = object()
 
 class WorkflowProgress:
 
-    def __init__(self, workflow_invocation, inputs_by_step_id, module_injector, param_map, jobs_per_scheduling_iteration=-1):
+    def __init__(self, workflow_invocation, inputs_by_step_id, module_injector, param_map, jobs_per_scheduling_iteration=-1, time_slice=-1):
         self.outputs = {}
         self.module_injector = module_injector
         self.workflow_invocation = workflow_invocation
@@ -285,6 +296,15 @@ class WorkflowProgress:
         self.param_map = param_map
         self.jobs_per_scheduling_iteration = jobs_per_scheduling_iteration
         self.jobs_scheduled_this_iteration = 0
+        self.time_slice = time_slice
+        self.iteration_started = time.time()
+        self.step_invocations_by_step_id = {}
+        # Scheduled steps whose outputs have not been recovered yet
+        self.unrecovered_step_invocations = {}
+
+    @property
+    def time_slice_exhausted(self):
+        return self.time_slice > 0 and time.time() - self.iteration_started > self.time_slice
 
     @property
     def maximum_jobs_to_schedule_or_none(self):
@@ -301,10 +321,10 @@ class WorkflowProgress:
         step_states = self.workflow_invocation.step_states_by_step_id()
         steps = self.workflow_invocation.workflow.steps
 
-        # TODO: Wouldn't a generator be much better here so we don't have to reason about
-        # steps we are no where near ready to schedule?
         remaining_steps = []
+        scheduled_step_invocations = {}
         step_invocations_by_id = self.workflow_invocation.step_invocations_by_step_id()
+        self.step_invocations_by_step_id = step_invocations_by_id
         for step in steps:
             step_id = step.id
             if not hasattr(step, 'module'):
@@ -318,11 +338,48 @@ class WorkflowProgress:
 
             invocation_step = step_invocations_by_id.get(step_id, None)
             if invocation_step and invocation_step.state == 'scheduled':
-                self._recover_mapping(invocation_step)
+                scheduled_step_invocations[step_id] = invocation_step
             else:
                 remaining_steps.append((step, invocation_step))
+
+        # Only the outputs of the scheduling frontier - the scheduled steps the
+        # remaining steps depend on - are needed for this scheduling iteration,
+        # the outputs of other scheduled steps are recovered when they are used.
+        frontier = self.scheduling_frontier(scheduled_step_invocations, remaining_steps)
+        for step_id, invocation_step in scheduled_step_invocations.items():
+            if step_id in frontier:
+                self._recover_mapping(invocation_step)
+            else:
+                self.unrecovered_step_invocations[step_id] = invocation_step
         return remaining_steps
 
+    def scheduling_frontier(self, scheduled_step_invocations, remaining_steps):
+        """Return the ids of the scheduled steps whose outputs need to be
+        recovered up front: those connected to remaining steps, and pause steps
+        (whose recovery may delay or cancel the invocation)."""
+        frontier = {step_id for step_id, invocation_step in scheduled_step_invocations.items() if invocation_step.workflow_step.type == "pause"}
+        for step, _ in remaining_steps:
+            for input_connection in step.input_connections:
+                frontier.add(input_connection.output_step.id)
+        return frontier
+
+    def delayed_dependency(self, step):
+        """Return the id of a step whose outputs ``step`` is connected to and
+        which has been delayed in this scheduling iteration, if any."""
+        for input_connection in step.input_connections:
+            if input_connection.non_data_connection:
+                continue
+            output_step_id = input_connection.output_step.id
+            if self.outputs.get(output_step_id) is STEP_OUTPUT_DELAYED:
+                return output_step_id
+        return None
+
+    def _step_outputs(self, step_id):
+        invocation_step = self.unrecovered_step_invocations.pop(step_id, None)
+        if invocation_step is not None:
+            self._recover_mapping(invocation_step)
+        return self.outputs.get(step_id)
+
     def replacement_for_input(self, step, input_dict):
         replacement = modules.NO_REPLACEMENT
         prefixed_name = input_dict["name"]
@@ -345,11 +402,11 @@ class WorkflowProgress:
 
     def replacement_for_connection(self, connection, is_data=True):
         output_step_id = connection.output_step.id
-        if output_step_id not in self.outputs:
+        step_outputs = self._step_outputs(output_step_id)
+        if step_outputs is None:
             template = "No outputs found for step id %s, outputs are %s"
             message = template % (output_step_id, self.outputs)
             raise Exception(message)
-        step_outputs = self.outputs[output_step_id]
         if step_outputs is STEP_OUTPUT_DELAYED:
             delayed_why = f"dependent step [{output_step_id}] delayed, so this step must be delayed"
             raise modules.DelayedWorkflowEvaluation(why=delayed_why)
@@ -397,7 +454,7 @@ class WorkflowProgress:
     def get_replacement_workflow_output(self, workflow_output):
         step = workflow_output.workflow_step
         output_name = workflow_output.output_name
-        step_outputs = self.outputs[step.id]
+        step_outputs = self._step_outputs(step.id)
         if step_outputs is STEP_OUTPUT_DELAYED:
             delayed_why = f"depends on workflow output [{output_name}] but that output has not been created yet"
             raise modules.DelayedWorkflowEvaluation(why=delayed_why)
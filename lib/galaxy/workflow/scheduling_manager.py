@@ -1,5 +1,10 @@
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
+from itertools import zip_longest
 
 import galaxy.workflow.schedulers
 from galaxy import model
@@ -269,6 +274,10 @@ class WorkflowRequestMonitor(Monitors):
         self.app = app
         self.workflow_scheduling_manager = workflow_scheduling_manager
         self._init_monitor_thread(name="WorkflowRequestMonitor.monitor_thread", target=self.__monitor, config=app.config)
+        self.scheduling_pool = None
+        workers = getattr(app.config, "workflow_scheduling_workers", 1)
+        if workers > 1:
+            self.scheduling_pool = WorkflowSchedulingPool(app, workers, self.__attempt_schedule)
         self.invocation_grabber = None
         self_handler_tags = set(self.app.job_config.self_handler_tags)
         self_handler_tags.add(self.workflow_scheduling_manager.default_handler_id)
@@ -305,6 +314,10 @@ class WorkflowRequestMonitor(Monitors):
             self._monitor_sleep(1)
 
     def __schedule(self, workflow_scheduler_id, workflow_scheduler):
+        if self.scheduling_pool:
+            invocations = self.__active_invocations(workflow_scheduler_id)
+            self.scheduling_pool.submit(fair_invocation_order(invocations), workflow_scheduler)
+            return
         invocation_ids = self.__active_invocation_ids(workflow_scheduler_id)
         for invocation_id in invocation_ids:
             log.debug("Attempting to schedule workflow invocation [%s]", invocation_id)
@@ -348,8 +361,96 @@ class WorkflowRequestMonitor(Monitors):
             handler=handler,
         )
 
+    def __active_invocations(self, scheduler_id):
+        sa_session = self.app.model.context
+        handler = self.app.config.server_name
+        try:
+            return model.WorkflowInvocation.poll_active_workflow_invocations(
+                sa_session,
+                scheduler=scheduler_id,
+                handler=handler,
+            )
+        finally:
+            sa_session.expunge_all()
+
     def start(self):
         self.monitor_thread.start()
 
     def shutdown(self):
         self.shutdown_monitor()
+        if self.scheduling_pool:
+            self.scheduling_pool.shutdown()
+
+
+def fair_invocation_order(invocations):
+    """Order ``(id, history_id, user_id)`` rows of active invocations so that the
+    invocations of different users alternate.
+
+    Users take turns in the order of their oldest invocation, and the
+    invocations of each user keep their order.
+    """
+    by_user = OrderedDict()
+    for invocation in invocations:
+        by_user.setdefault(invocation[2], []).append(invocation)
+    return [invocation for turn in zip_longest(*by_user.values()) for invocation in turn if invocation is not None]
+
+
+class WorkflowSchedulingPool:
+    """Schedule workflow invocations concurrently on ``nworkers`` threads.
+
+    Each thread uses its own database session. An invocation is only queued
+    again once its previous scheduling iteration has finished, and (unless
+    ``parallelize_workflow_scheduling_within_histories`` is set) only one
+    invocation per history is scheduled at a time. The time invocations spend
+    queued before being scheduled is reported as their scheduling lag.
+    """
+
+    def __init__(self, app, nworkers, attempt_schedule):
+        self.app = app
+        self.nworkers = nworkers
+        self.attempt_schedule = attempt_schedule
+        self.executor = ThreadPoolExecutor(max_workers=nworkers, thread_name_prefix="WorkflowRequestMonitor.scheduling_thread")
+        self.running = True
+        # invocation id -> history id of the invocations queued or being scheduled
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, invocations, workflow_scheduler):
+        """Queue the ``(id, history_id, user_id)`` rows of ``invocations`` that
+        are not queued or being scheduled already."""
+        parallelize_within_histories = self.app.config.parallelize_workflow_scheduling_within_histories
+        for invocation_id, history_id, _ in invocations:
+            with self._lock:
+                if invocation_id in self._in_flight:
+                    continue
+                if not parallelize_within_histories and history_id in self._in_flight.values():
+                    continue
+                self._in_flight[invocation_id] = history_id
+            self.executor.submit(self.__run, invocation_id, workflow_scheduler, time.time())
+        galaxy_statsd_client = self.app.execution_timer_factory.galaxy_statsd_client
+        if galaxy_statsd_client:
+            galaxy_statsd_client.gauge('galaxy.workflows.scheduling_manager.in_flight', len(self._in_flight))
+
+    def __run(self, invocation_id, workflow_scheduler, queued_time):
+        try:
+            if not self.running:
+                return
+            lag = time.time() - queued_time
+            log.debug("Attempting to schedule workflow invocation [%s], queued for %.3f seconds", invocation_id, lag)
+            galaxy_statsd_client = self.app.execution_timer_factory.galaxy_statsd_client
+            if galaxy_statsd_client:
+                galaxy_statsd_client.timing('galaxy.workflows.scheduling_manager.lag', lag * 1000.)
+            self.attempt_schedule(invocation_id, workflow_scheduler)
+        except Exception:
+            log.exception("Exception raised while attempting to schedule workflow invocation [%s]", invocation_id)
+        finally:
+            with self._lock:
+                del self._in_flight[invocation_id]
+
+    def in_flight(self):
+        with self._lock:
+            return list(self._in_flight)
+
+    def shutdown(self):
+        self.running = False
+        self.executor.shutdown(wait=False)
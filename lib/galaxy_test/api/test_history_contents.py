@@ -555,6 +555,20 @@ class HistoryContentsApiTestCase(ApiTestCase):
         assert input_hda["name"] == query_hda["name"]
         assert input_hda["id"] == query_hda["id"]
 
+    def test_index_keys_serialized_from_rows(self):
+        self.dataset_populator.new_dataset(self.history_id)
+        self.dataset_collection_populator.create_list_in_history(self.history_id, contents=["a", "b"])
+        self.dataset_populator.wait_for_history(self.history_id)
+        keys = ["id", "type_id", "history_id", "hid", "history_content_type", "visible", "name", "deleted",
+                "dataset_id", "state", "purged"]
+        rows_response = self._get(f"histories/{self.history_id}/contents?v=dev&keys={','.join(keys)}")
+        self._assert_status_code_is(rows_response, 200)
+        models_response = self._get(f"histories/{self.history_id}/contents?v=dev&view=summary&keys={','.join(keys)}")
+        self._assert_status_code_is(models_response, 200)
+        models = [{key: value for key, value in item.items() if key in keys} for item in models_response.json()]
+        assert rows_response.json() == models
+        assert {item["history_content_type"] for item in models} == {"dataset", "dataset_collection"}
+
     def test_job_state_summary_field(self):
         create_response = self.dataset_collection_populator.create_pair_in_history(self.history_id, contents=["123", "456"])
         self._assert_status_code_is(create_response, 200)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""Benchmark filling tool command templates with and without the compiled template cache.
+
+Collects the command and configfile templates of the tools in ``--tool_dir``
+(by default the tools shipped with Galaxy and the functional test tools),
+keeps those that can be filled with a placeholder value for every parameter,
+and reports the time to fill all of them, per job:
+
+* ``first job (compile)``: in a new process, compiling every template.
+* ``first job (persisted)``: in a new process, loading the templates compiled
+  by another process from the cache directory.
+* ``later jobs``: in a process that has filled the templates before, with the
+  cache and as templates were filled before it (relying on Cheetah's own
+  compilation cache).
+
+The same is reported for ``--legacy_templates`` templates using Python 2
+constructs, filled with ``python_template_version`` 2 - these are fixed up by
+recompiling them, which used to happen for every job.
+
+% python test/manual/cheetah_template_cache_benchmark.py
+% python test/manual/cheetah_template_cache_benchmark.py --tool_dir tools --jobs 200
+"""
+import glob
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib")]
+
+from galaxy.tool_util.parser import get_tool_source
+from galaxy.util import template
+from galaxy.util.template import (
+    CompiledTemplateCache,
+    fill_template,
+)
+
+DESCRIPTION = "Benchmark filling Cheetah tool templates with the compiled template cache."
+DEFAULT_TOOL_DIRS = [os.path.join(galaxy_root, "tools"), os.path.join(galaxy_root, "test", "functional", "tools")]
+LEGACY_TEMPLATE = """#set $a = [x for x in {'input_%(i)s': '1'}.iterkeys()][0]
+#set $b = [x for x in {'input_%(i)s': '1'}.iteritems()][0][0]
+#set $c = [x for x in {'input_%(i)s': '1'}.itervalues()][0]
+cat $a $b $c > '$output'
+"""
+
+
+class Placeholder(str):
+    """A value that can stand in for any tool parameter."""
+
+    def __new__(cls):
+        return super().__new__(cls, "placeholder")
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return Placeholder()
+
+    def __getitem__(self, key):
+        return Placeholder()
+
+    def __iter__(self):
+        return iter(())
+
+    def __call__(self, *args, **kwargs):
+        return Placeholder()
+
+
+class PlaceholderContext:
+
+    def __getattr__(self, name):
+        if name.startswith("__") and name.endswith("__") and name != "__tool_directory__":
+            raise AttributeError(name)
+        return Placeholder()
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--tool_dir", action="append", default=None)
+    arg_parser.add_argument("--jobs", type=int, default=50)
+    arg_parser.add_argument("--legacy_templates", type=int, default=20)
+    args = arg_parser.parse_args(argv)
+
+    templates = _fillable_templates(_templates(args.tool_dir or DEFAULT_TOOL_DIRS))
+    legacy_templates = [LEGACY_TEMPLATE % {"i": i} for i in range(args.legacy_templates)]
+    for label, python_template_version, job_templates in [
+        (f"{len(templates)} tool templates", "3", templates),
+        (f"{len(legacy_templates)} legacy templates", "2", legacy_templates),
+    ]:
+        cache_dir = tempfile.mkdtemp()
+        print(f"{label}:")
+        _new_process(None)
+        _report("first job (compile)", job_templates, python_template_version, 1)
+        _new_process(cache_dir)
+        _report("first job (compile and persist)", job_templates, python_template_version, 1)
+        _new_process(cache_dir)
+        _report("first job (persisted)", job_templates, python_template_version, 1)
+        _report("later jobs (cached)", job_templates, python_template_version, args.jobs)
+        _report("later jobs (uncached)", job_templates, python_template_version, args.jobs, uncached=True)
+
+
+def _templates(tool_dirs):
+    templates = []
+    for tool_dir in tool_dirs:
+        for path in sorted(glob.glob(os.path.join(tool_dir, "**", "*.xml"), recursive=True)):
+            try:
+                tool_source = get_tool_source(path)
+                command = tool_source.parse_command()
+                configfiles = tool_source.root.findall("configfiles/configfile")
+            except Exception:
+                continue
+            if command:
+                templates.append(command)
+            templates.extend(configfile.text for configfile in configfiles if configfile.text)
+    return templates
+
+
+def _fillable_templates(templates):
+    fillable = []
+    for template_text in templates:
+        if "#while" in template_text:
+            # Would loop forever with placeholder values
+            continue
+        try:
+            fill_template(template_text, context=PlaceholderContext())
+        except Exception:
+            continue
+        fillable.append(template_text)
+    return fillable
+
+
+def _new_process(cache_dir):
+    # Forget everything compiled so far, as in a freshly started Galaxy process.
+    template.Template._CHEETAH_compileCache.clear()
+    template.template_cache = CompiledTemplateCache(cache_dir)
+
+
+def _report(label, templates, python_template_version, jobs, uncached=False):
+    start = time.time()
+    for _ in range(jobs):
+        for template_text in templates:
+            if uncached:
+                # How templates were filled before the compiled template cache
+                template._fill_template(template_text, PlaceholderContext(), python_template_version=template.packaging.version.parse(python_template_version))
+            else:
+                fill_template(template_text, context=PlaceholderContext(), python_template_version=python_template_version)
+    elapsed = time.time() - start
+    print(f"  {label}: {elapsed / jobs * 1000:.2f}ms per job")
+
+
+if __name__ == "__main__":
+    main()
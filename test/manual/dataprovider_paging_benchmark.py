@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""Benchmark paging through a large tabular dataset with dataproviders.
+
+Writes a tabular file of ``--lines`` lines (or uses ``--file``) and reports
+the time the line, regex line, column and dict dataproviders take to provide
+``--limit`` lines at increasingly deep offsets - without seeking, when
+indexing the data line offsets up to the page and once these are indexed.
+The providers share the index, so only the first one builds it.
+
+% python test/manual/dataprovider_paging_benchmark.py
+% python test/manual/dataprovider_paging_benchmark.py --lines 10000000 --limit 1000
+"""
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib")]
+
+from galaxy.datatypes.dataproviders import (
+    column,
+    line,
+)
+
+DESCRIPTION = "Benchmark paging through a large tabular dataset with dataproviders."
+PROVIDERS = {
+    "line": (line.FilteredLineDataProvider, {}),
+    "regex-line": (line.RegexLineDataProvider, {}),
+    "column": (column.ColumnarDataProvider, {"column_types": ["str", "int", "int", "float"]}),
+    "dict": (column.DictDataProvider, {"column_names": ["chrom", "start", "end", "score"]}),
+}
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--file", help="tabular file to page through instead of a generated one")
+    arg_parser.add_argument("--lines", type=int, default=2000000)
+    arg_parser.add_argument("--limit", type=int, default=100)
+    arg_parser.add_argument("--pages", type=int, default=4, help="number of offsets to page at")
+    args = arg_parser.parse_args(argv)
+
+    path = args.file
+    if not path:
+        fd, path = tempfile.mkstemp(suffix=".tabular")
+        with os.fdopen(fd, "w") as out:
+            out.write("#chrom\tstart\tend\tscore\n")
+            for i in range(args.lines):
+                out.write(f"chr{i % 22 + 1}\t{i * 100}\t{i * 100 + 50}\t{i / 7:.3f}\n")
+    try:
+        num_lines = args.lines
+        if args.file:
+            with open(path) as fh:
+                num_lines = sum(1 for _ in fh)
+        offsets = [num_lines * (page + 1) // (args.pages + 1) for page in range(args.pages)]
+        print(f"paging {os.path.getsize(path) / 2 ** 20:.1f} MB, {args.limit} lines at offsets {offsets}")
+        for name, (provider_class, settings) in PROVIDERS.items():
+            _page(path, name, provider_class, settings, offsets, args.limit)
+    finally:
+        if not args.file:
+            os.remove(path)
+
+
+def _page(path, name, provider_class, settings, offsets, limit):
+    unindexed = _time(path, provider_class, settings, offsets, limit, line_offsets_step=0)
+    # paging deeper and deeper indexes the lines as far as each page
+    indexing = _time(path, provider_class, settings, offsets, limit)
+    indexed = _time(path, provider_class, settings, offsets, limit)
+    print(f"{name}: {_format(unindexed)} without seeking, {_format(indexing)} indexing, {_format(indexed)} indexed")
+
+
+def _time(path, provider_class, settings, offsets, limit, line_offsets_step=None):
+    times = []
+    for offset in offsets:
+        start = time.time()
+        provider = provider_class(open(path), offset=offset, limit=limit, **settings)
+        if line_offsets_step is not None:
+            provider.line_offsets_step = line_offsets_step
+        list(provider)
+        times.append(time.time() - start)
+    return times
+
+
+def _format(times):
+    return "/".join(f"{t * 1000:.0f}" for t in times) + " ms"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""Benchmark discovering the elements of an output collection.
+
+Writes ``--files`` fastqsanger files of ``--reads`` reads to a job working
+directory and reports the time to discover them as the elements of a list
+collection, as a job finishing does for a tool with a ``discover_datasets``
+output collection: creating the datasets, copying the files into the object
+store, setting metadata and peek, and adding the datasets to the history.
+
+Each number of ``--workers`` is timed, ``--latency`` adds a delay (in seconds)
+to every copy into the object store to emulate a remote object store.
+
+% python test/manual/discover_outputs_benchmark.py
+% python test/manual/discover_outputs_benchmark.py --files 500 --workers 1 8 --latency 0.05
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib"), os.path.join(galaxy_root, "test")]
+
+from unit.unittest_utils.galaxy_mock import MockApp
+from unit.unittest_utils.objectstore_helpers import Config as TestConfig
+
+from galaxy import model
+from galaxy.job_execution.output_collect import (
+    dataset_collector,
+    JobContext,
+)
+from galaxy.model.dataset_collections import builder
+from galaxy.tool_util.parser.output_collection_def import FilePatternDatasetCollectionDescription
+
+DESCRIPTION = "Benchmark discovering the elements of an output collection."
+READ = "@read\n{seq}\n+\n{qual}\n".format(seq="ACGT" * 25, qual="I" * 100)
+
+
+class Tool:
+
+    def __init__(self, app):
+        self.app = app
+        self.sa_session = app.model.context
+
+
+class PermissionProvider:
+
+    def set_default_hda_permissions(self, primary_data):
+        pass
+
+    def copy_dataset_permissions(self, init_from, primary_data):
+        pass
+
+
+class MetadataSourceProvider:
+
+    def get_metadata_source(self, input_name):
+        return None
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--files", type=int, default=2000)
+    arg_parser.add_argument("--reads", type=int, default=100)
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    arg_parser.add_argument("--latency", type=float, default=0.0)
+    arg_parser.add_argument("--flush_per_n_datasets", type=int, default=1000)
+    args = arg_parser.parse_args(argv)
+
+    working_directory = tempfile.mkdtemp()
+    try:
+        for i in range(args.files):
+            with open(os.path.join(working_directory, f"sample_{i}.fastqsanger"), "w") as out:
+                out.write(READ * args.reads)
+        for workers in args.workers:
+            elapsed = _discover(working_directory, args, workers)
+            print(f"{workers} worker(s): {elapsed:.2f}s, {args.files / elapsed:.1f} files/s")
+    finally:
+        shutil.rmtree(working_directory)
+
+
+def _discover(working_directory, args, workers):
+    app = MockApp()
+    app.object_store = TestConfig(store_by="uuid").object_store
+    app.model.Dataset.object_store = app.object_store
+    if args.latency:
+        update_from_file = app.object_store.update_from_file
+
+        def slow_update_from_file(obj, **kwargs):
+            time.sleep(args.latency)
+            return update_from_file(obj, **kwargs)
+
+        app.object_store.update_from_file = slow_update_from_file
+    sa_session = app.model.context
+    user = model.User(email="bench@example.org", password="password")
+    job = model.Job()
+    job.history = model.History(name="bench", user=user)
+    collection = model.DatasetCollection(collection_type="list", populated=False)
+    sa_session.add_all([job, collection])
+    sa_session.flush()
+
+    job_context = JobContext(
+        Tool(app),
+        None,
+        job,
+        working_directory,
+        PermissionProvider(),
+        MetadataSourceProvider(),
+        "?",
+        app.object_store,
+        "ok",
+        flush_per_n_datasets=args.flush_per_n_datasets,
+        discovered_datasets_workers=workers,
+    )
+    collection_description = FilePatternDatasetCollectionDescription(pattern=r"(?P<designation>.*)\.(?P<ext>[^\.]+)?")
+    filenames = job_context.find_files("output", collection, [dataset_collector(collection_description)])
+    collection_builder = builder.BoundCollectionBuilder(collection)
+    start = time.time()
+    job_context.populate_collection_elements(collection, collection_builder, filenames, name="output", final_job_state="ok")
+    collection_builder.populate()
+    sa_session.flush()
+    elapsed = time.time() - start
+    assert collection.element_count == args.files
+    return elapsed
+
+
+if __name__ == "__main__":
+    main()
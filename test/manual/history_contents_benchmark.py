@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""Benchmark listing the contents of a large history.
+
+Inserts a history with ``--contents`` datasets and reports the time to fetch
+pages of ``--limit`` contents near the end of the history, as the history
+panel does when scrolled down:
+
+* ``offset``: paging with ``offset``, the database skipping every content
+  before the page.
+* ``after``: paging with ``after``, the type id of the last content of the
+  previous page, only reading the page from the ``hid`` index.
+
+and the time to fetch (with ``after``) and serialize a page of summaries
+from the rows of the contents query (as the API does when only summary keys
+are requested) and from the HDA and HDCA models loaded for those rows.
+
+% python test/manual/history_contents_benchmark.py
+% python test/manual/history_contents_benchmark.py --contents 500000 --database_connection postgresql:///history_contents_bench
+"""
+import datetime
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib"), os.path.join(galaxy_root, "test")]
+
+from sqlalchemy import desc
+from unit.unittest_utils.galaxy_mock import MockApp
+
+from galaxy import model
+from galaxy.managers.history_contents import (
+    HistoryContentsManager,
+    HistoryContentsSerializer,
+)
+
+DESCRIPTION = "Benchmark paging and serializing the contents of a large history."
+BATCH_SIZE = 10000
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--contents", type=int, default=100000)
+    arg_parser.add_argument("--limit", type=int, default=100)
+    arg_parser.add_argument("--pages", type=int, default=10)
+    arg_parser.add_argument("--database_connection", default=None)
+    args = arg_parser.parse_args(argv)
+
+    database_connection = args.database_connection or "sqlite:///:memory:"
+    app = MockApp(database_connection=database_connection)
+    sa_session = app.model.context
+    user = model.User(email="bench@example.org", password="password")
+    history = model.History(user=user, name="bench")
+    sa_session.add_all([user, history])
+    sa_session.flush()
+
+    start = time.time()
+    _insert_contents(app, history, args.contents)
+    print(f"inserted {args.contents} contents in {time.time() - start:.2f}s")
+
+    manager = app[HistoryContentsManager]
+    serializer = app[HistoryContentsSerializer]
+    order_by = desc("hid")
+    # the last pages of the history, the oldest contents
+    first_offset = max(args.contents - args.pages * args.limit, 0)
+    start = time.time()
+    for page in range(args.pages):
+        contents = manager.contents(history, limit=args.limit, offset=first_offset + page * args.limit, order_by=order_by, expand_models=False)
+    print(f"offset: {(time.time() - start) / args.pages * 1000:.2f}ms per page")
+
+    first_after = manager.contents(history, limit=1, offset=first_offset - 1, order_by=order_by, expand_models=False)[0].type_id
+    after = first_after
+    start = time.time()
+    for page in range(args.pages):
+        contents = manager.contents(history, limit=args.limit, order_by=order_by, after=after, expand_models=False)
+        after = contents[-1].type_id
+    print(f"after: {(time.time() - start) / args.pages * 1000:.2f}ms per page")
+
+    for label, expand_models in [("rows", False), ("models", True)]:
+        start = time.time()
+        for _ in range(args.pages):
+            sa_session.expunge_all()
+            contents = manager.contents(history, limit=args.limit, order_by=order_by, after=first_after, expand_models=expand_models)
+            [serializer.serialize_to_view(content, view="summary") for content in contents]
+        print(f"serialize {label}: {(time.time() - start) / args.pages * 1000:.2f}ms per page")
+
+
+def _insert_contents(app, history, count):
+    engine = app.model.engine
+    now = datetime.datetime.utcnow()
+    dataset_table = model.Dataset.table
+    hda_table = model.HistoryDatasetAssociation.table
+    with engine.begin() as conn:
+        for batch_start in range(0, count, BATCH_SIZE):
+            batch = range(batch_start, min(batch_start + BATCH_SIZE, count))
+            conn.execute(dataset_table.insert(), [
+                dict(create_time=now, update_time=now, state=model.Dataset.states.OK, deleted=False, purged=False, purgable=True)
+                for _ in batch
+            ])
+            # the ids of the datasets just inserted
+            dataset_ids = [row.id for row in conn.execute(
+                dataset_table.select().with_only_columns([dataset_table.c.id]).order_by(desc(dataset_table.c.id)).limit(len(batch))
+            )][::-1]
+            conn.execute(hda_table.insert(), [
+                dict(history_id=history.id, dataset_id=dataset_id, hid=i + 1, name=f"dataset {i + 1}", extension="txt",
+                     create_time=now, update_time=now, deleted=False, purged=False, visible=True)
+                for i, dataset_id in zip(batch, dataset_ids)
+            ])
+    history.hid_counter = count + 1
+    app.model.context.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""Compare the job handler's ready job query with incremental ready tracking.
+
+Populates a database with ``--jobs`` new jobs (a fraction of which wait on a
+non-ready input), then times a handler loop iteration's worth of ready job
+detection using the full query and :class:`JobReadinessTracker`, reporting wall
+time, the number of SQL statements and the time spent executing them.
+
+% python test/manual/job_handler_ready_benchmark.py --jobs 10000
+% python test/manual/job_handler_ready_benchmark.py --jobs 100000 --database_connection postgresql:///ready_bench
+"""
+import datetime
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib")]
+
+from galaxy import model
+from galaxy.jobs.readiness import (
+    JobReadinessTracker,
+    query_ready_jobs,
+)
+from galaxy.model import mapping
+from galaxy.model.orm.engine_factory import (
+    QUERY_COUNT_LOCAL,
+    reset_request_query_counts,
+)
+
+DESCRIPTION = "Benchmark job handler ready job detection."
+HANDLER = "bench_handler"
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--jobs", type=int, default=10000)
+    arg_parser.add_argument("--users", type=int, default=10)
+    arg_parser.add_argument("--waiting_fraction", type=float, default=0.9)
+    arg_parser.add_argument("--window_size", type=int, default=100)
+    arg_parser.add_argument("--iterations", type=int, default=5)
+    arg_parser.add_argument("--database_connection", default=None)
+    args = arg_parser.parse_args(argv)
+
+    database_connection = args.database_connection
+    if database_connection is None:
+        database_connection = f"sqlite:///{tempfile.mkdtemp()}/ready_bench.sqlite"
+    model_mapping = mapping.init("/tmp", database_connection, create_tables=True, log_query_counts=True)
+    sa_session = model_mapping.context
+    pending_dataset_ids = _populate(sa_session, args)
+    print(f"Populated {args.jobs} new jobs, {len(pending_dataset_ids)} waiting on a non-ready input")
+
+    _report("query", lambda: query_ready_jobs(sa_session, HANDLER, args.window_size), args.iterations, sa_session)
+    tracker = JobReadinessTracker(sa_session, HANDLER, args.window_size)
+    _report("incremental (initial sync)", lambda: (tracker.update(), tracker.ready_jobs()), 1, sa_session)
+    _report("incremental (steady state)", lambda: (tracker.update(), tracker.ready_jobs()), args.iterations, sa_session)
+
+    # Let a batch of inputs become ready and time the detection of the dependent jobs.
+    batch = pending_dataset_ids[:args.window_size]
+    sa_session.execute(model.Dataset.table.update()
+                       .where(model.Dataset.table.c.id.in_(batch))
+                       .values(state=model.Dataset.states.OK, update_time=datetime.datetime.utcnow()))
+    _report("query (after inputs ready)", lambda: query_ready_jobs(sa_session, HANDLER, args.window_size), 1, sa_session)
+    _report("incremental (after inputs ready)", lambda: (tracker.update(), tracker.ready_jobs()), 1, sa_session)
+
+
+def _populate(sa_session, args):
+    # Jobs and inputs have been waiting for a while
+    now = datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+    conn = sa_session.connection()
+    conn.execute(model.User.table.insert(), [
+        dict(id=i + 1, email=f"user{i}@example.com", password="bench", create_time=now, update_time=now)
+        for i in range(args.users)
+    ])
+    waiting_count = int(args.jobs * args.waiting_fraction)
+    conn.execute(model.Dataset.table.insert(), [
+        dict(id=i + 1, state=model.Dataset.states.QUEUED if i < waiting_count else model.Dataset.states.OK,
+             create_time=now, update_time=now)
+        for i in range(args.jobs)
+    ])
+    conn.execute(model.HistoryDatasetAssociation.table.insert(), [
+        dict(id=i + 1, dataset_id=i + 1, create_time=now, update_time=now, deleted=False, visible=True)
+        for i in range(args.jobs)
+    ])
+    conn.execute(model.Job.table.insert(), [
+        dict(id=i + 1, user_id=i % args.users + 1, tool_id="cat1", state=model.Job.states.NEW,
+             handler=HANDLER, create_time=now, update_time=now)
+        for i in range(args.jobs)
+    ])
+    conn.execute(model.JobToInputDatasetAssociation.table.insert(), [
+        dict(job_id=i + 1, dataset_id=i + 1, name="input1")
+        for i in range(args.jobs)
+    ])
+    return list(range(1, waiting_count + 1))
+
+
+def _report(label, func, iterations, sa_session):
+    wall_times = []
+    query_counts = []
+    db_times = []
+    for _ in range(iterations):
+        sa_session.expunge_all()
+        reset_request_query_counts()
+        start = time.time()
+        func()
+        wall_times.append(time.time() - start)
+        query_counts.append(len(QUERY_COUNT_LOCAL.times))
+        db_times.append(sum(QUERY_COUNT_LOCAL.times))
+    print("{:<35} wall {:9.3f} ms  db {:9.3f} ms  queries {:6.1f}".format(
+        label,
+        1000 * sum(wall_times) / iterations,
+        1000 * sum(db_times) / iterations,
+        sum(query_counts) / iterations,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""Compare the time to first byte of reading a dataset from a remote object store
+by pulling it into the cache with reading it in ranges.
+
+The remote object store is stood in for by a local directory whose reads are
+throttled to ``--latency`` seconds per request and ``--bandwidth`` MB/s. The
+benchmark reports the time until the first chunk of a ``--size`` MB object is
+available and until a preview (``--preview_size`` bytes) has been read, first
+by pulling the whole object into the cache (as remote object stores did before
+serving ranged reads), then through ``iter_data``.
+
+% python test/manual/objectstore_range_read_benchmark.py --size 1000
+% python test/manual/objectstore_range_read_benchmark.py --size 4000 --bandwidth 200 --latency 0.02
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib")]
+
+from galaxy.objectstore import CHUNK_SIZE
+from galaxy.objectstore.caching import RangedReadMixin
+from galaxy.util.bunch import Bunch
+
+DESCRIPTION = "Benchmark time to first byte of remote object store reads."
+REL_PATH = "000/dataset_1.dat"
+
+
+class ThrottledRemoteStore(RangedReadMixin):
+    """Remote object store serving objects from ``remote_path``."""
+
+    def __init__(self, remote_path, staging_path, latency, bandwidth):
+        self.remote_path = remote_path
+        self.staging_path = staging_path
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    def _construct_path(self, obj, **kwargs):
+        return REL_PATH
+
+    def _get_cache_path(self, rel_path):
+        return os.path.join(self.staging_path, rel_path)
+
+    def _in_cache(self, rel_path):
+        return os.path.exists(self._get_cache_path(rel_path))
+
+    def _get_remote_size(self, rel_path):
+        time.sleep(self.latency)
+        return os.path.getsize(os.path.join(self.remote_path, rel_path))
+
+    def _read_remote_range(self, rel_path, start, end):
+        time.sleep(self.latency + (end - start) / self.bandwidth)
+        with open(os.path.join(self.remote_path, rel_path), "rb") as fh:
+            fh.seek(start)
+            return fh.read(end - start)
+
+    def _pull_into_cache(self, rel_path):
+        cache_path = self._get_cache_path(rel_path)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        time.sleep(self.latency)
+        with open(os.path.join(self.remote_path, rel_path), "rb") as remote, open(cache_path, "wb") as cache:
+            for chunk in iter(lambda: remote.read(CHUNK_SIZE), b""):
+                time.sleep(len(chunk) / self.bandwidth)
+                cache.write(chunk)
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--size", type=int, default=1000, help="object size in MB")
+    arg_parser.add_argument("--preview_size", type=int, default=1000000)
+    arg_parser.add_argument("--bandwidth", type=float, default=500, help="remote bandwidth in MB/s")
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="remote request latency in seconds")
+    args = arg_parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        remote_path = os.path.join(work_dir, "remote")
+        os.makedirs(os.path.join(remote_path, os.path.dirname(REL_PATH)))
+        with open(os.path.join(remote_path, REL_PATH), "wb") as fh:
+            fh.truncate(args.size * 1000000)
+        obj = Bunch(id=1)
+
+        store = ThrottledRemoteStore(remote_path, os.path.join(work_dir, "cache_pull"), args.latency, args.bandwidth * 1000000)
+        start = time.time()
+        store._pull_into_cache(REL_PATH)
+        _report("pull into cache", start, store._iter_data(obj, count=args.preview_size))
+
+        store = ThrottledRemoteStore(remote_path, os.path.join(work_dir, "cache_ranged"), args.latency, args.bandwidth * 1000000)
+        start = time.time()
+        _report("ranged read", start, store._iter_data(obj, count=args.preview_size))
+        start = time.time()
+        _report("ranged read (block cache)", start, store._iter_data(obj, count=args.preview_size))
+    finally:
+        shutil.rmtree(work_dir)
+
+
+def _report(label, start, chunks):
+    first_byte = None
+    size = 0
+    for chunk in chunks:
+        if first_byte is None:
+            first_byte = time.time() - start
+        size += len(chunk)
+    print(f"{label}: time to first byte {first_byte:.3f}s, {size} bytes read in {time.time() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Benchmark guessing the datatype of uploaded files.
+
+Sniffs the datatype test files (``lib/galaxy/datatypes/test``) and the tool
+test files (``test-data``), or the files and directories given, with the
+sniff order of the sample datatypes configuration and reports the throughput
+of :func:`galaxy.datatypes.sniff.guess_exts` and the datatypes whose sniffers
+took the most time.
+
+% python test/manual/sniff_benchmark.py
+% python test/manual/sniff_benchmark.py /data/uploads
+"""
+import collections
+import os
+import sys
+import time
+import warnings
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib")]
+
+from galaxy.datatypes import sniff
+from galaxy.datatypes.registry import example_datatype_registry_for_sample
+
+DESCRIPTION = "Benchmark guessing the datatype of files."
+DEFAULT_PATHS = [os.path.join(galaxy_root, "lib", "galaxy", "datatypes", "test"), os.path.join(galaxy_root, "test-data")]
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+    arg_parser.add_argument("--top", type=int, default=10, help="number of slowest sniffers to report")
+    args = arg_parser.parse_args(argv)
+
+    # sniffers failing on files of other datatypes may warn
+    warnings.simplefilter("ignore")
+    sniff_order = example_datatype_registry_for_sample().sniff_order
+    fnames = _files(args.paths)
+    size = sum(os.path.getsize(fname) for fname in fnames)
+    print(f"sniffing {len(fnames)} files ({size / 2 ** 20:.1f} MB) with {len(sniff_order)} sniffers")
+
+    start = time.time()
+    sniff.guess_exts(fnames, sniff_order)
+    elapsed = time.time() - start
+    print(f"guess_exts: {elapsed:.2f}s, {len(fnames) / elapsed:.1f} files/s")
+
+    sniffer_times = collections.Counter()
+    for fname in fnames:
+        file_prefix = sniff.FilePrefix(fname)
+        for datatype in sniff_order:
+            start = time.time()
+            try:
+                if sniff.sniffer_ruled_out(datatype, file_prefix):
+                    continue
+                if hasattr(datatype, "sniff_prefix"):
+                    matched = datatype.sniff_prefix(file_prefix)
+                else:
+                    matched = datatype.sniff(fname)
+            except Exception:
+                matched = False
+            finally:
+                sniffer_times[datatype.__class__.__name__] += time.time() - start
+            if matched:
+                break
+    print("slowest sniffers:")
+    for name, elapsed in sniffer_times.most_common(args.top):
+        print(f"  {name}: {elapsed:.3f}s")
+
+
+def _files(paths):
+    fnames = []
+    for path in paths:
+        if os.path.isdir(path):
+            fnames.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if os.path.isfile(os.path.join(path, name)))
+        else:
+            fnames.append(path)
+    return fnames
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""Benchmark setting tabular metadata and counting data lines.
+
+Writes a tabular file of ``--lines`` lines (or uses ``--file``) and reports
+the time ``Tabular.set_meta`` and ``Text.count_data_lines`` take scanning the
+file in blocks and reading it line by line. With ``--check`` the metadata of
+the datatype test files are compared instead, these must be the same either
+way.
+
+% python test/manual/tabular_metadata_benchmark.py
+% python test/manual/tabular_metadata_benchmark.py --lines 10000000 --max-data-lines 0
+% python test/manual/tabular_metadata_benchmark.py --check
+"""
+import glob
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from unittest import mock
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib")]
+
+from galaxy.datatypes.data import Text
+from galaxy.datatypes.tabular import Tabular
+from galaxy.datatypes.util import block_scan
+from galaxy.util.bunch import Bunch
+
+DESCRIPTION = "Benchmark setting tabular metadata and counting data lines."
+TEST_FILE_PATTERNS = ["lib/galaxy/datatypes/test/*", "test-data/*"]
+CHECK_KWDS = [{}, {"skip": 0}, {"skip": 2}, {"max_data_lines": 3}, {"max_guess_type_data_lines": 2}]
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--file", help="tabular file to set metadata of instead of a generated one")
+    arg_parser.add_argument("--lines", type=int, default=2000000)
+    arg_parser.add_argument("--max-data-lines", type=int, default=None,
+                            help="data lines to set metadata from, 0 for all (default: the Tabular default)")
+    arg_parser.add_argument("--check", action="store_true", help="compare the metadata of the datatype test files")
+    args = arg_parser.parse_args(argv)
+
+    if args.check:
+        _check()
+        return
+    path = args.file
+    if not path:
+        fd, path = tempfile.mkstemp(suffix=".tabular")
+        with os.fdopen(fd, "w") as out:
+            out.write("#chrom\tstart\tend\tname\tscore\tblocks\n")
+            for i in range(args.lines):
+                out.write(f"chr{i % 22 + 1}\t{i * 100}\t{i * 100 + 50}\tfeature_{i}\t{i / 7:.3f}\t{i % 5},{i % 3}\n")
+    try:
+        kwds = {}
+        if args.max_data_lines is not None:
+            kwds["max_data_lines"] = args.max_data_lines or None
+        print(f"setting metadata of {os.path.getsize(path) / 2 ** 20:.1f} MB")
+        scanned, scanned_time = _time(_set_meta, path, **kwds)
+        read, read_time = _time(_set_meta_lines, path, **kwds)
+        assert scanned == read, f"{scanned} != {read}"
+        print(f"set_meta: {scanned_time:.2f} s scanning, {read_time:.2f} s reading lines")
+        dataset = _dataset(path)
+        scanned, scanned_time = _time(Text().count_data_lines, dataset)
+        with mock.patch.object(block_scan, "count_data_lines", return_value=None):
+            read, read_time = _time(Text().count_data_lines, dataset)
+        assert scanned == read, f"{scanned} != {read}"
+        print(f"count_data_lines: {scanned_time:.2f} s scanning, {read_time:.2f} s reading lines")
+    finally:
+        if not args.file:
+            os.remove(path)
+
+
+def _check():
+    paths = sorted(path for pattern in TEST_FILE_PATTERNS for path in glob.glob(os.path.join(galaxy_root, pattern)))
+    scanned_files = differences = 0
+    for path in paths:
+        if not os.path.isfile(path) or block_scan.scan_tabular(path, lambda field: None) is None:
+            continue
+        scanned_files += 1
+        for kwds in CHECK_KWDS:
+            scanned = _set_meta(path, **kwds)
+            read = _set_meta_lines(path, **kwds)
+            if scanned != read:
+                differences += 1
+                print(f"{path} {kwds}: {scanned} != {read}")
+        if block_scan.count_data_lines(path) is not None:
+            with mock.patch.object(block_scan, "count_data_lines", return_value=None):
+                read = Text().count_data_lines(_dataset(path))
+            if block_scan.count_data_lines(path) != read:
+                differences += 1
+                print(f"{path}: {block_scan.count_data_lines(path)} != {read} data lines")
+    print(f"{differences} differences in the metadata of {scanned_files} scanned of {len(paths)} files")
+
+
+def _set_meta(path, **kwds):
+    dataset = _dataset(path)
+    Tabular().set_meta(dataset, **kwds)
+    return dict(dataset.metadata.__dict__)
+
+
+def _set_meta_lines(path, **kwds):
+    with mock.patch.object(block_scan, "scan_tabular", return_value=None):
+        return _set_meta(path, **kwds)
+
+
+def _dataset(path):
+    return Bunch(
+        file_name=path,
+        has_data=lambda: os.path.getsize(path) > 0,
+        get_size=lambda: os.path.getsize(path),
+        metadata=Bunch(),
+    )
+
+
+def _time(function, *args, **kwds):
+    start = time.time()
+    result = function(*args, **kwds)
+    return result, time.time() - start
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""Benchmark matching history datasets to the data parameters of a tool form.
+
+Creates a history of ``--datasets`` datasets of mixed extensions, some of them
+already implicitly converted, and reports the time and number of SQL
+statements it takes to find the initial value and the options of ``--params``
+data parameters - matching every dataset of the history to every parameter,
+and through the history dataset index shared by the parameters of a form.
+
+The datatypes and converters of the sample datatypes configuration are used,
+without loading the converter tools.
+
+% python test/manual/tool_form_history_benchmark.py
+% python test/manual/tool_form_history_benchmark.py --datasets 30000 --database_connection postgresql:///tool_form_bench
+"""
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib"), os.path.join(galaxy_root, "test")]
+
+from sqlalchemy import event
+from unit.unittest_utils.galaxy_mock import (
+    MockApp,
+    MockTrans,
+)
+
+from galaxy import model
+from galaxy.tools.parameters import basic
+from galaxy.tools.parameters.dataset_matcher import (
+    DatasetMatcherFactory,
+    set_dataset_matcher_factory,
+    unset_dataset_matcher_factory,
+)
+from galaxy.util import XML
+from galaxy.util.bunch import Bunch
+
+DESCRIPTION = "Benchmark matching history datasets to the data parameters of a tool form."
+EXTENSIONS = ["txt", "tabular", "bed", "interval", "fasta", "fastqsanger", "vcf", "gff3", "sam", "csv"]
+PARAM_FORMATS = ["tabular", "bed", "interval", "fasta", "txt", "vcf,gff3", "bam", "tabular"]
+CONVERSIONS = {"bed": "interval", "sam": "bam", "csv": "tabular"}
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--datasets", type=int, default=10000)
+    arg_parser.add_argument("--params", type=int, default=8)
+    arg_parser.add_argument("--database_connection", default=None)
+    args = arg_parser.parse_args(argv)
+
+    app = MockApp(database_connection=args.database_connection or "sqlite:///:memory:")
+    registry = app.datatypes_registry
+    registry.load_datatypes(root_dir=galaxy_root, config=os.path.join(galaxy_root, "lib", "galaxy", "config", "sample", "datatypes_conf.xml.sample"))
+    for _, source_ext, target_ext in registry.converters:
+        registry.datatype_converters.setdefault(source_ext, {})[target_ext] = None
+    history_id = _history(app, args.datasets).id
+    tool = Bunch(app=app, tool_type="default", valid_input_states=model.Dataset.valid_input_states, inputs={})
+    params = [basic.DataToolParameter(tool, XML(f'<param name="input{i}" type="data" format="{PARAM_FORMATS[i % len(PARAM_FORMATS)]}" />'))
+              for i in range(args.params)]
+    print(f"matching {args.datasets} datasets to {args.params} data parameters")
+    for label, indexed in [("per parameter", False), ("indexed", True)]:
+        app.model.context.expunge_all()
+        history = app.model.context.query(model.History).get(history_id)
+        trans = MockTrans(app=app, history=history)
+        statements = []
+
+        def count_statement(*args):
+            statements.append(1)
+
+        engine = app.model.context.get_bind()
+        event.listen(engine, "before_cursor_execute", count_statement)
+        start = time.time()
+        options = _build_form(trans, history, params, indexed)
+        elapsed = time.time() - start
+        event.remove(engine, "before_cursor_execute", count_statement)
+        print(f"{label}: {options} options in {elapsed:.2f}s with {len(statements)} statements")
+
+
+def _history(app, dataset_count):
+    sa_session = app.model.context
+    history = model.History(name="tool form bench")
+    sa_session.add(history)
+    sa_session.flush()
+    hdas = []
+    for i in range(dataset_count):
+        hda = model.HistoryDatasetAssociation(extension=EXTENSIONS[i % len(EXTENSIONS)], create_dataset=True, sa_session=sa_session, flush=False)
+        hda.dataset.state = model.Dataset.states.OK
+        hda.visible = True
+        history.stage_addition(hda)
+        hdas.append(hda)
+    history.add_pending_items()
+    sa_session.flush()
+    for i, hda in enumerate(hdas):
+        if i % 3 == 0 and hda.extension in CONVERSIONS:
+            converted = model.HistoryDatasetAssociation(extension=CONVERSIONS[hda.extension], create_dataset=True, sa_session=sa_session, flush=False)
+            converted.dataset.state = model.Dataset.states.OK
+            converted.visible = False
+            history.stage_addition(converted)
+            sa_session.add(model.ImplicitlyConvertedDatasetAssociation(parent=hda, dataset=converted, file_type=CONVERSIONS[hda.extension]))
+    history.add_pending_items()
+    sa_session.flush()
+    return history
+
+
+def _build_form(trans, history, params, indexed):
+    options = 0
+    if indexed:
+        set_dataset_matcher_factory(trans, None)
+        try:
+            for param in params:
+                param.get_initial_value(trans, {})
+                options += len(param.to_dict(trans)["options"]["hda"])
+        finally:
+            unset_dataset_matcher_factory(trans)
+    else:
+        for param in params:
+            for _ in range(2):  # for the initial value and the options
+                dataset_matcher = DatasetMatcherFactory(trans).dataset_matcher(param, {})
+                matches = [dataset_matcher.hda_match(hda) for hda in history.active_visible_datasets_and_roles]
+            options += len([match for match in matches if match])
+    return options
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+"""Benchmark creating the jobs of a tool mapped over a collection.
+
+Runs the default tool action for ``--elements`` parameter combinations of a
+tool with ``--params`` text parameters and two outputs, the way
+``galaxy.tools.execute.execute`` does when mapping a tool over a collection,
+once creating dataset permissions and job parameters as ORM objects for every
+job and once inserting them in bulk after the jobs have been created. Reports
+the time spent creating the jobs' objects, the time spent flushing them to the
+database and the number of SQL statements executed by the flush.
+
+% python test/manual/tool_map_over_benchmark.py --elements 1000
+% python test/manual/tool_map_over_benchmark.py --elements 5000 --database_connection postgresql:///map_over_bench
+"""
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib"), os.path.join(galaxy_root, "test")]
+
+from sqlalchemy import event
+from unit.unittest_utils.galaxy_mock import MockApp
+
+from galaxy import model
+from galaxy.tool_util.parser import get_tool_source
+from galaxy.tools import create_tool_from_source
+from galaxy.tools.actions import (
+    DefaultToolAction,
+    ToolExecutionCache,
+)
+from galaxy.util.bunch import Bunch
+
+DESCRIPTION = "Benchmark job creation for a tool mapped over a collection."
+
+TOOL_CONTENTS = """<tool id="map_over_bench" name="Map Over Bench" version="1.0">
+    <command>cat '$input1' > '$out1' &amp;&amp; cat '$input1' > '$out2'</command>
+    <inputs>
+        <param type="data" name="input1" format="txt" />
+        %s
+    </inputs>
+    <outputs>
+        <data name="out1" format="txt" />
+        <data name="out2" format="txt" />
+    </outputs>
+</tool>
+"""
+
+
+class BenchTrans:
+
+    def __init__(self, app, history, user):
+        self.app = app
+        self.history = history
+        self.user = user
+        self.sa_session = app.model.context
+        self.model = app.model
+
+    def check_user_activation(self):
+        pass
+
+    def db_dataset_for(self, dbkey):
+        return None
+
+    def get_galaxy_session(self):
+        return None
+
+    def get_current_user_roles(self):
+        return self.user.all_roles()
+
+    def log_event(self, *args, **kwargs):
+        pass
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--elements", type=int, default=1000)
+    arg_parser.add_argument("--params", type=int, default=20)
+    arg_parser.add_argument("--database_connection", default=None)
+    args = arg_parser.parse_args(argv)
+
+    database_connection = args.database_connection or "sqlite:///:memory:"
+    app = MockApp(database_connection=database_connection)
+    app.config.len_file_path = "len_files"
+    app.config.tool_secret = "benchsecret"
+    app.config.track_jobs_in_database = False
+    app.job_search = None
+    app.job_config["get_job_tool_configurations"] = lambda ids: [Bunch(handler=Bunch())]
+    tool = _tool(app, args.params)
+    sa_session = app.model.context
+
+    user = model.User(email="bench@example.org", password="password")
+    sa_session.add(user)
+    sa_session.flush()
+    app.security_agent.create_private_user_role(user)
+    for label, bulk in [("per job", False), ("bulk", True)]:
+        history = model.History(user=user, name=label)
+        sa_session.add(history)
+        sa_session.flush()
+        app.security_agent.history_set_default_permissions(history)
+        inputs = _inputs(app, history, args.elements)
+        create_time, flush_time, statements = _execute(app, tool, user, history, inputs, args.params, bulk)
+        job_count = sa_session.query(model.Job).filter(model.Job.history_id == history.id).count()
+        parameter_count = sa_session.query(model.JobParameter).join(model.Job).filter(model.Job.history_id == history.id).count()
+        print(f"{label}: created {job_count} jobs ({parameter_count} parameters) in {create_time:.3f}s, "
+              f"flushed in {flush_time:.3f}s with {statements} statements ({flush_time / job_count * 1000:.2f}ms per job)")
+
+
+def _tool(app, param_count):
+    params = "\n".join(f'<param type="text" name="param{i}" value="value {i}" />' for i in range(param_count))
+    tool_file = os.path.join(tempfile.mkdtemp(), "map_over_bench.xml")
+    with open(tool_file, "w") as out:
+        out.write(TOOL_CONTENTS % params)
+    tool = create_tool_from_source(app, get_tool_source(tool_file), config_file=tool_file)
+    tool.assert_finalized()
+    return tool
+
+
+def _inputs(app, history, element_count):
+    sa_session = app.model.context
+    hdas = []
+    for _ in range(element_count):
+        hda = model.HistoryDatasetAssociation(extension="txt", create_dataset=True, sa_session=sa_session, flush=False)
+        hda.dataset.state = model.Dataset.states.OK
+        hda.visible = False
+        history.stage_addition(hda)
+        hdas.append(hda)
+    history.add_pending_items()
+    sa_session.flush()
+    for hda in hdas:
+        app.security_agent.set_all_dataset_permissions(hda.dataset, app.security_agent.history_get_default_permissions(history), new=True, flush=False)
+    sa_session.flush()
+    return hdas
+
+
+def _execute(app, tool, user, history, inputs, param_count, bulk):
+    trans = BenchTrans(app, history, user)
+    execution_cache = ToolExecutionCache(trans, bulk=bulk)
+    action = DefaultToolAction()
+    start = time.time()
+    for hda in inputs:
+        incoming = {f"param{i}": f"value {i}" for i in range(param_count)}
+        incoming["input1"] = hda
+        action.execute(tool, trans, incoming=incoming, history=history, execution_cache=execution_cache, flush_job=False)
+    create_time = time.time() - start
+
+    statements = []
+
+    def count_statement(*args):
+        statements.append(1)
+
+    engine = trans.sa_session.get_bind()
+    event.listen(engine, "before_cursor_execute", count_statement)
+    start = time.time()
+    history.add_pending_items()
+    trans.sa_session.flush()
+    execution_cache.insert_deferred_rows()
+    trans.sa_session.flush()
+    flush_time = time.time() - start
+    event.remove(engine, "before_cursor_execute", count_statement)
+    return create_time, flush_time, len(statements)
+
+
+if __name__ == "__main__":
+    main()
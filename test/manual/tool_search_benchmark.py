@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""Benchmark toolbox search with the Whoosh and in-memory search backends.
+
+Indexes ``--tools`` generated tools (names, descriptions, sections and help
+made of random words) with both backends and reports the time to build the
+index and the mean latency of ``--queries`` searches, with and without
+n-gram search. For the in-memory backend the latency is reported for the
+first search of every query and for repeated searches answered from the
+result cache.
+
+% python test/manual/tool_search_benchmark.py
+% python test/manual/tool_search_benchmark.py --tools 10000 --queries 200
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib")]
+
+from galaxy.tools.search import (
+    InMemoryToolBoxSearch,
+    ToolBoxSearch,
+)
+from galaxy.util.bunch import Bunch
+
+DESCRIPTION = "Benchmark toolbox search latency of the Whoosh and in-memory backends."
+SEARCH_KWDS = dict(
+    tool_name_boost=9,
+    tool_id_boost=9,
+    tool_section_boost=3,
+    tool_description_boost=2,
+    tool_label_boost=1,
+    tool_stub_boost=5,
+    tool_help_boost=0.5,
+    tool_search_limit=20,
+    tool_ngram_minsize=3,
+    tool_ngram_maxsize=4,
+)
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+class BenchToolCache:
+
+    def __init__(self, tools):
+        self.tools = {tool.id: tool for tool in tools}
+        self._tool_paths_by_id = {tool.id: f"{tool.id}.xml" for tool in tools}
+        self._new_tool_ids = set(self.tools)
+        self._removed_tool_ids = set()
+
+    def get_tool_by_id(self, tool_id):
+        return self.tools.get(tool_id)
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--tools", type=int, default=10000)
+    arg_parser.add_argument("--queries", type=int, default=100)
+    arg_parser.add_argument("--words", type=int, default=20000)
+    arg_parser.add_argument("--help_words", type=int, default=200)
+    arg_parser.add_argument("--seed", type=int, default=1)
+    args = arg_parser.parse_args(argv)
+
+    rand = random.Random(args.seed)
+    words = ["".join(rand.choice(LETTERS) for _ in range(rand.randint(3, 10))) for _ in range(args.words)]
+    tool_cache = BenchToolCache([_tool(rand, words, i, args.help_words) for i in range(args.tools)])
+    queries = _queries(rand, words, args.queries)
+
+    for label, toolbox_search in [
+        ("whoosh", ToolBoxSearch(None, index_dir=tempfile.mkdtemp())),
+        ("memory", InMemoryToolBoxSearch(None)),
+    ]:
+        start = time.time()
+        toolbox_search.build_index(tool_cache)
+        print(f"{label}: indexed {args.tools} tools in {time.time() - start:.2f}s")
+        for ngram in [False, True]:
+            search_label = "ngram search" if ngram else "search"
+            _report(f"{search_label} (first)", toolbox_search, queries, ngram)
+            if isinstance(toolbox_search, InMemoryToolBoxSearch):
+                _report(f"{search_label} (repeated)", toolbox_search, queries, ngram)
+
+
+def _tool(rand, words, i, help_words):
+    return Bunch(
+        id=f"tool_{i}",
+        name=" ".join(rand.sample(words, rand.randint(1, 3))),
+        description=" ".join(rand.sample(words, rand.randint(2, 8))),
+        get_panel_section=lambda section=" ".join(rand.sample(words[:100], 2)): (None, section),
+        guid=None,
+        labels=[],
+        raw_help=" ".join(rand.choice(words) for _ in range(help_words)),
+        tool_type="default",
+        hidden=False,
+        is_latest_version=True,
+        lineage=None,
+    )
+
+
+def _queries(rand, words, count):
+    # Whole words, unfinished words and several words, as typed in the tool panel
+    queries = []
+    for i in range(count):
+        word = rand.choice(words)
+        if i % 3 == 0:
+            queries.append(word)
+        elif i % 3 == 1:
+            queries.append(word[:rand.randint(2, len(word))])
+        else:
+            queries.append(f"{word} {rand.choice(words)[:4]}")
+    return queries
+
+
+def _report(label, toolbox_search, queries, ngram):
+    start = time.time()
+    for q in queries:
+        toolbox_search.search(q=q, tool_enable_ngram_search=ngram, **SEARCH_KWDS)
+    elapsed = time.time() - start
+    print(f"  {label}: {elapsed / len(queries) * 1000:.3f}ms per query")
+
+
+if __name__ == "__main__":
+    main()
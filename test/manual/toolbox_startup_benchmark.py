@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""Benchmark loading the toolbox at startup.
+
+Writes a tool configuration of ``--tools`` tools sharing a macros file of
+``--macros`` macros (or uses ``--tool-conf``) and reports the time it takes to
+load the toolbox - parsing the tools one by one, parsing them in
+``--processes`` processes while filling an empty tool document cache (as the
+first start after installing the tools does) and from the filled tool document
+cache (as later starts do).
+
+% python test/manual/toolbox_startup_benchmark.py
+% python test/manual/toolbox_startup_benchmark.py --tools 8000 --processes 8 --delay-tool-initialization
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib"), os.path.join(galaxy_root, "test")]
+
+from unit.unittest_utils.galaxy_mock import MockApp
+
+from galaxy.model.tool_shed_install import mapping
+from galaxy.tools import ToolBox
+from galaxy.tools.cache import ToolCache
+from galaxy.util.bunch import Bunch
+
+DESCRIPTION = "Benchmark loading the toolbox at startup."
+TOOLS_PER_SECTION = 50
+MACROS_TEMPLATE = """<macros>
+    <token name="@VERSION@">1.0</token>
+    <xml name="requirements">
+        <requirements>
+            <requirement type="package" version="@VERSION@">bench</requirement>
+        </requirements>
+    </xml>
+    <xml name="input_param" tokens="name,format">
+        <param name="@NAME@" type="data" format="@FORMAT@" label="Input @NAME@"/>
+    </xml>
+    <xml name="options">
+        <conditional name="options">
+            <param name="mode" type="select" label="Mode">
+                <option value="simple" selected="true">Simple</option>
+                <option value="advanced">Advanced</option>
+            </param>
+            <when value="simple"/>
+            <when value="advanced">
+                <param name="threshold" type="float" value="0.5" min="0" max="1" label="Threshold"/>
+                <param name="iterations" type="integer" value="10" label="Iterations"/>
+            </when>
+        </conditional>
+    </xml>
+{unused}</macros>
+"""
+UNUSED_MACRO_TEMPLATE = """    <xml name="unused_{i}">
+        <param name="unused_{i}" type="text" value="{i}" label="Unused {i}"/>
+    </xml>
+"""
+TOOL_TEMPLATE = """<tool id="bench_tool_{i}" name="Benchmark tool {i}" version="@VERSION@">
+    <macros>
+        <import>macros.xml</import>
+    </macros>
+    <expand macro="requirements"/>
+    <command>bench_tool '$input1' '$input2' #if $options.mode == "advanced" then $options.threshold else "" # > '$output'</command>
+    <inputs>
+        <expand macro="input_param" name="input1" format="tabular"/>
+        <expand macro="input_param" name="input2" format="txt"/>
+        <expand macro="options"/>
+    </inputs>
+    <outputs>
+        <data name="output" format="tabular"/>
+    </outputs>
+    <tests>
+        <test>
+            <param name="input1" value="1.tabular"/>
+            <param name="input2" value="1.txt"/>
+            <output name="output" file="out_{i}.tabular"/>
+        </test>
+    </tests>
+    <help>Benchmark tool {i}.</help>
+</tool>
+"""
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--tool-conf", help="tool configuration to load instead of a generated one")
+    arg_parser.add_argument("--tools", type=int, default=2000)
+    arg_parser.add_argument("--macros", type=int, default=200, help="number of (unused) macros in the shared macros file")
+    arg_parser.add_argument("--processes", type=int, default=os.cpu_count())
+    arg_parser.add_argument("--delay-tool-initialization", action="store_true",
+                            help="parse the inputs and outputs of the tools on first use instead of when loading")
+    args = arg_parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp()
+    try:
+        tool_conf = args.tool_conf or _write_tools(directory, args.tools, args.macros)
+        cache_dir = os.path.join(directory, "tool_cache")
+        runs = [
+            ("one by one", 1, False),
+            (f"{args.processes} processes, empty cache", args.processes, True),
+            ("cached", args.processes, True),
+        ]
+        for label, processes, enable_tool_document_cache in runs:
+            app = _app(directory, cache_dir, processes, enable_tool_document_cache, args.delay_tool_initialization)
+            start = time.time()
+            toolbox = ToolBox([tool_conf], os.path.dirname(tool_conf), app, save_integrated_tool_panel=False)
+            toolbox.persist_cache()
+            elapsed = time.time() - start
+            print(f"{label}: {len(toolbox._tools_by_id)} tools loaded in {elapsed:.2f} s")
+    finally:
+        shutil.rmtree(directory)
+
+
+def _write_tools(directory, tools, macros):
+    tool_directory = os.path.join(directory, "tools")
+    os.makedirs(tool_directory)
+    with open(os.path.join(tool_directory, "macros.xml"), "w") as out:
+        out.write(MACROS_TEMPLATE.format(unused="".join(UNUSED_MACRO_TEMPLATE.format(i=i) for i in range(macros))))
+    items = []
+    for i in range(tools):
+        with open(os.path.join(tool_directory, f"bench_tool_{i}.xml"), "w") as out:
+            out.write(TOOL_TEMPLATE.format(i=i))
+        if i % TOOLS_PER_SECTION == 0:
+            items.append(f'<section id="section_{i}" name="Section {i}">' if i == 0 else f'</section><section id="section_{i}" name="Section {i}">')
+        items.append(f'<tool file="bench_tool_{i}.xml"/>')
+    tool_conf = os.path.join(directory, "tool_conf.xml")
+    with open(tool_conf, "w") as out:
+        out.write(f'<toolbox tool_path="{tool_directory}">{"".join(items)}{"</section>" if items else ""}</toolbox>')
+    return tool_conf
+
+
+def _app(directory, cache_dir, processes, enable_tool_document_cache, delay_tool_initialization):
+    app = MockApp()
+    app.config.tool_parsing_processes = processes
+    app.config.enable_tool_document_cache = enable_tool_document_cache
+    app.config.tool_cache_data_dir = cache_dir
+    app.config.delay_tool_initialization = delay_tool_initialization
+    app.config.integrated_tool_panel_config = os.path.join(directory, "integrated_tool_panel.xml")
+    app.config.update_integrated_tool_panel = False
+    app.config.schema.defaults = {"tool_dependency_dir": "dependencies"}
+    app.tool_cache = ToolCache()
+    app.install_model = mapping.init("sqlite:///:memory:", create_tables=True)
+    app.watchers = Bunch(tool_watcher=None, tool_config_watcher=None)
+    app.job_search = None
+    app.job_config["get_job_tool_configurations"] = lambda ids: [Bunch(handler=Bunch())]
+    app.job_config.get_tool_resource_parameters = lambda tool_id: None
+    return app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""Benchmark scheduling iterations of large workflow invocations.
+
+Workflow modules are simulated: recovering the outputs of a scheduled step
+(the database queries of ``recover_mapping``) takes ``--recover_cost`` seconds,
+evaluating a step (until it is found to be delayed or is executed) takes
+``--execute_cost`` seconds, and creating a job takes ``--job_cost`` seconds.
+
+Two invocations are scheduled, iteration by iteration, until they are
+complete:
+
+* ``steps``: a ``--steps`` step workflow whose steps run one after the other,
+  every job taking ``--job_iterations`` scheduling iterations to finish.
+* ``map_over``: a step mapped over a ``--elements`` element collection,
+  followed by ``--downstream_steps`` steps, with at most ``--jobs_per_iteration``
+  jobs created per scheduling iteration.
+
+Each is scheduled once evaluating only the scheduling frontier, and once
+recovering every scheduled step and evaluating every remaining step in each
+iteration, as before the frontier.
+
+% python test/manual/workflow_scheduling_benchmark.py
+% python test/manual/workflow_scheduling_benchmark.py --steps 100 --recover_cost 0.002
+"""
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib")]
+
+from galaxy import model
+from galaxy.util.bunch import Bunch
+from galaxy.workflow import modules
+from galaxy.workflow.run import (
+    WorkflowInvoker,
+    WorkflowProgress,
+)
+
+DESCRIPTION = "Benchmark workflow invocation scheduling iterations."
+
+
+class EagerWorkflowProgress(WorkflowProgress):
+    """Recover all scheduled steps and evaluate all remaining steps."""
+
+    def scheduling_frontier(self, scheduled_step_invocations, remaining_steps):
+        return set(scheduled_step_invocations)
+
+    def delayed_dependency(self, step):
+        return None
+
+
+class SimulatedModule:
+
+    def __init__(self, step, simulation, elements=1):
+        self.step = step
+        self.simulation = simulation
+        self.elements = elements
+        self.jobs_created = 0
+        self.created_in_iteration = None
+
+    def decode_runtime_state(self, runtime_state):
+        return None
+
+    def recover_mapping(self, invocation_step, progress):
+        self.simulation.recovered += 1
+        time.sleep(self.simulation.args.recover_cost)
+        progress.set_step_outputs(invocation_step, {"output": self.step.id}, already_persisted=True)
+
+    def execute(self, trans, progress, invocation_step, use_cached_job=False):
+        simulation = self.simulation
+        simulation.executed += 1
+        time.sleep(simulation.args.execute_cost)
+        for input_connection in self.step.input_connections:
+            progress.replacement_for_connection(input_connection)
+            upstream = input_connection.output_step.module
+            if simulation.iteration - upstream.created_in_iteration < simulation.args.job_iterations:
+                raise modules.DelayedWorkflowEvaluation(why="jobs of upstream step not finished")
+        if self.step.type == "data_collection_input":
+            progress.set_step_outputs(invocation_step, {"output": self.step.id}, already_persisted=True)
+            self.created_in_iteration = -simulation.args.job_iterations
+            return None
+        count = self.elements - self.jobs_created
+        max_jobs = progress.maximum_jobs_to_schedule_or_none
+        if max_jobs is not None:
+            count = min(count, max_jobs)
+        time.sleep(count * simulation.args.job_cost)
+        self.jobs_created += count
+        progress.record_executed_job_count(count)
+        if self.jobs_created < self.elements:
+            return False
+        self.created_in_iteration = simulation.iteration
+        progress.set_step_outputs(invocation_step, {"output": self.step.id}, already_persisted=True)
+        return None
+
+
+class Simulation:
+
+    def __init__(self, args, progress_class):
+        self.args = args
+        self.progress_class = progress_class
+        self.recovered = 0
+        self.executed = 0
+        self.iteration = 0
+
+    def workflow(self, step_count, elements=1, mapped_steps=1):
+        workflow = model.Workflow()
+        workflow.steps = []
+        for i in range(step_count):
+            step = model.WorkflowStep()
+            step.id = 100 + i
+            step.order_index = i
+            step.type = "data_collection_input" if i == 0 else "tool"
+            if i > 0:
+                step_input = model.WorkflowStepInput(step)
+                step_input.name = "input1"
+                connection = model.WorkflowStepConnection()
+                connection.output_step = workflow.steps[i - 1]
+                connection.output_name = "output"
+                step_input.connections = [connection]
+                step.inputs = [step_input]
+            step.module = SimulatedModule(step, self, elements if 0 < i <= mapped_steps else 1)
+            workflow.steps.append(step)
+        return workflow
+
+    def run(self, workflow):
+        invocation = model.WorkflowInvocation()
+        invocation.workflow = workflow
+        invocation.history = model.History()
+        invocation.state = model.WorkflowInvocation.states.NEW
+        trans = Bunch(
+            app=Bunch(config=Bunch()),
+            sa_session=Bunch(add=lambda obj: None),
+        )
+        run_config = Bunch(copy_inputs_to_history=False, use_cached_job=False, replacement_dict={})
+        start = time.time()
+        while invocation.state != model.WorkflowInvocation.states.SCHEDULED:
+            progress = self.progress_class(invocation, {}, None, {}, jobs_per_scheduling_iteration=self.args.jobs_per_iteration)
+            WorkflowInvoker(trans, workflow, run_config, progress=progress).invoke()
+            # As flushing and reloading the invocation would
+            invocation.steps = list({id(s): s for s in invocation.steps}.values())
+            for invocation_step in invocation.steps:
+                invocation_step.workflow_step_id = invocation_step.workflow_step.id
+            self.iteration += 1
+        return time.time() - start
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--steps", type=int, default=300)
+    arg_parser.add_argument("--job_iterations", type=int, default=1, help="scheduling iterations until a job finishes")
+    arg_parser.add_argument("--elements", type=int, default=10000)
+    arg_parser.add_argument("--downstream_steps", type=int, default=20)
+    arg_parser.add_argument("--jobs_per_iteration", type=int, default=1000)
+    arg_parser.add_argument("--recover_cost", type=float, default=0.0002, help="seconds to recover the outputs of a step")
+    arg_parser.add_argument("--execute_cost", type=float, default=0.0002, help="seconds to evaluate a step")
+    arg_parser.add_argument("--job_cost", type=float, default=0.00002, help="seconds to create a job")
+    args = arg_parser.parse_args(argv)
+
+    for label, progress_class in [("all steps", EagerWorkflowProgress), ("frontier", WorkflowProgress)]:
+        simulation = Simulation(args, progress_class)
+        elapsed = simulation.run(simulation.workflow(args.steps))
+        _report(f"steps ({label})", simulation, elapsed)
+
+        simulation = Simulation(args, progress_class)
+        elapsed = simulation.run(simulation.workflow(2 + args.downstream_steps, elements=args.elements))
+        _report(f"map_over ({label})", simulation, elapsed)
+
+
+def _report(label, simulation, elapsed):
+    print(f"{label}: {simulation.iteration} iterations in {elapsed:.3f}s ({elapsed / simulation.iteration * 1000:.1f}ms per iteration), "
+          f"{simulation.recovered} step recoveries, {simulation.executed} step evaluations")
+
+
+if __name__ == "__main__":
+    main()
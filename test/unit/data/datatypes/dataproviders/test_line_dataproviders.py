@@ -90,6 +90,31 @@ class Test_FilteredLineDataProvider(test_base_dataproviders.Test_FilteredDataPro
                                 '# as should blank lines', '# preceding/trailing whitespace too'])
         self.assertCounters(provider, 7, 4, 4)
 
+    def test_seek_offset(self):
+        """should seek to the data lines indexed before offset and provide the same data.
+        """
+        contents = ''.join(f'# comment {i}\n\n    Line {i}\n' for i in range(20))
+        filename = self.tmpfiles.create_tmpfile(contents)
+        lines = [f'Line {i}' for i in range(20)]
+
+        def provide(**kwargs):
+            provider = self.provider_class(open(filename), **kwargs)
+            provider.line_offsets_step = 3
+            return provider, list(provider)
+
+        for offset in (1, 3, 7, 18, 19, 25):
+            for limit in (None, 1, 4):
+                provider, data = provide(offset=offset, limit=limit)
+                self.assertEqual(data, lines[offset:][:limit])
+        # seeks past the 18 lines indexed before the last line
+        provider, data = provide(offset=19)
+        self.assertEqual(data, ['Line 19'])
+        self.assertCounters(provider, 6, 20, 1)
+        # not when filtering lines further
+        provider, data = provide(offset=19, filter_fn=lambda line: line)
+        self.assertEqual(data, ['Line 19'])
+        self.assertCounters(provider, 60, 20, 1)
+
 
 class Test_RegexLineDataProvider(Test_FilteredLineDataProvider):
     provider_class = line.RegexLineDataProvider
@@ -3,17 +3,23 @@ Unit tests for base DataTypes.
 .. seealso:: galaxy.datatypes.data
 """
 import os
+from unittest import mock
+
+import pytest
+import webob.exc
 
 from galaxy.datatypes.anvio import AnvioStructureDB
 from galaxy.datatypes.data import (
     Data,
     get_file_peek,
+    Text,
 )
 from galaxy.datatypes.interval import (
     Bed,
     BedStrict
 )
 from galaxy.util import galaxy_directory
+from galaxy.util.bunch import Bunch
 
 
 def test_get_file_peek():
@@ -29,3 +35,20 @@ def test_is_datatype_change_allowed():
     assert AnvioStructureDB.is_datatype_change_allowed() is False
     # BedStrict explictly disallows datatype change with `allow_datatype_change = False`
     assert BedStrict.is_datatype_change_allowed() is False
+
+
+@pytest.mark.parametrize("preview", [True, False])
+def test_display_data_not_found(preview):
+    object_store = mock.Mock()
+    object_store.exists.return_value = False
+    trans = mock.Mock()
+    trans.response.headers = {}
+    trans.app.object_store = object_store
+    trans.app.datatypes_registry.get_composite_extensions.return_value = []
+    dataset = Bunch(id=1, purged=False, external_filename=None, file_name="")
+    data = Bunch(id=1, dataset=dataset, datatype=Text(), extension="txt", file_name="",
+                 get_mime=lambda: "text/plain", get_size=lambda: 2 ** 30)
+    with pytest.raises(webob.exc.HTTPNotFound):
+        Data().display_data(trans, data, preview=preview)
+    object_store.exists.assert_called_once_with(dataset)
+    object_store.iter_data.assert_not_called()
@@ -83,6 +83,25 @@ def test_matches_any():
     assert not fasta_datatype.matches_any([fastq_datatype.__class__, h5_datatype.__class__])
 
 
+def test_conversion_destinations():
+    datatypes_registry = example_datatype_registry_for_sample()
+    # converters are loaded with the toolbox, only their targets matter here
+    datatypes_registry.datatype_converters = {'bed': {'gff': None, 'interval_index': None}}
+    tabular_datatype = datatypes_registry.get_datatype_by_extension('tabular')
+    gff_datatype = datatypes_registry.get_datatype_by_extension('gff')
+    fasta_datatype = datatypes_registry.get_datatype_by_extension('fasta')
+
+    assert datatypes_registry.get_conversion_destinations('bed', [tabular_datatype]) == (True, [])
+    assert datatypes_registry.get_conversion_destinations('bed', [gff_datatype.__class__, fasta_datatype]) == (False, ['gff'])
+    assert datatypes_registry.get_conversion_destinations('bed', [fasta_datatype]) == (False, [])
+    # the destinations of an extension are looked up once for the same classes of formats
+    datatypes_registry.datatype_converters = {}
+    assert datatypes_registry.get_conversion_destinations('bed', [gff_datatype, fasta_datatype.__class__]) == (False, ['gff'])
+    assert datatypes_registry.find_conversion_destination_for_dataset_by_extensions('bed', [gff_datatype]) == (False, 'gff', None)
+    assert datatypes_registry.find_conversion_destination_for_dataset_by_extensions('bed', [tabular_datatype]) == (True, None, None)
+    assert datatypes_registry.find_conversion_destination_for_dataset_by_extensions('bed', [gff_datatype], converter_safe=False) == (False, None, None)
+
+
 def test_sniff_compressed_dynamic_datatypes_default_on():
     # With auto sniffing on, verify the sniffers work and the files match what is expected
     # when coming from guess_ext.
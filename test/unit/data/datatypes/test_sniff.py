@@ -2,10 +2,15 @@ import tempfile
 
 import pytest
 
+from galaxy.datatypes.binary import ExcelXls
+from galaxy.datatypes.images import Mrc2014
+from galaxy.datatypes.interval import Bed
 from galaxy.datatypes.sniff import (
     convert_newlines,
     convert_newlines_sep2tabs,
+    FilePrefix,
     get_test_fname,
+    sniffer_ruled_out,
 )
 
 
@@ -76,3 +81,18 @@ def test_convert_sep2tabs(source, expected):
         assert_converts_to_1234_convert_sep2tabs(source, expected=expected)
     else:
         assert_converts_to_1234_convert_sep2tabs(source)
+
+
+def test_sniffer_ruled_out():
+    mrc_prefix = FilePrefix(get_test_fname("1.mrc"))
+    assert not sniffer_ruled_out(Mrc2014(), mrc_prefix)
+    # not an OLE2 document
+    assert sniffer_ruled_out(ExcelXls(), mrc_prefix)
+    # not UTF-8, so not sniffed by text datatypes
+    assert sniffer_ruled_out(Bed(), mrc_prefix)
+    bed_prefix = FilePrefix(get_test_fname("1.bed"))
+    assert not bed_prefix.binary
+    assert not sniffer_ruled_out(Bed(), bed_prefix)
+    assert sniffer_ruled_out(Mrc2014(), bed_prefix)
+    # the prefix is decoded on demand
+    assert bed_prefix.startswith(bed_prefix.contents_header[:10])
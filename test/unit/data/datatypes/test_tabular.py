@@ -0,0 +1,117 @@
+"""
+Unit tests for tabular metadata.
+.. seealso:: galaxy.datatypes.tabular, galaxy.datatypes.util.block_scan
+"""
+import tempfile
+from contextlib import contextmanager
+from unittest import mock
+
+import pytest
+
+from galaxy.datatypes.data import Text
+from galaxy.datatypes.tabular import Tabular
+from galaxy.datatypes.util import block_scan
+from galaxy.util.bunch import Bunch
+
+CONTENTS = [
+    "chr1\t100\t1.5\tgene\n",
+    "#chrom\tstart\tscore\tname\nchr1\t100\t1.5\tgene\nchr2\t-200\t+2\tg,h\n\n# comment\nchr3\t3\tNA\t\n",
+    "a\tb\r\n1\t2.\r\n\r\n+.5\t1e5\r\n",
+    "h1\th2\th3\n1\t\t1\n2\t\t \n3\n",
+    " 1\tinf\tnan\t١٢\t1_0\té\n-\t.\t1.2.3\t+-1\t1+\t00\n",
+    "   \n\t\n#\n1\t2\n" * 50,
+    "x\n" + "1\t2\n" * 10 + "# more\n",
+    "no newline\t1",
+]
+
+
+@pytest.mark.parametrize("contents", CONTENTS)
+@pytest.mark.parametrize("kwds", [
+    {},
+    {"skip": 0},
+    {"skip": 2},
+    {"max_data_lines": 2},
+    {"max_data_lines": 1, "skip": 1},
+    {"max_guess_type_data_lines": 1},
+])
+def test_set_meta_scan(contents, kwds):
+    with _get_dataset(contents) as dataset:
+        assert block_scan.scan_tabular(dataset.file_name, lambda field: "str") is not None
+        Tabular().set_meta(dataset, **kwds)
+        scanned = dict(dataset.metadata.__dict__)
+        assert scanned == _set_meta_lines(dataset, **kwds)
+
+
+def test_set_meta():
+    with _get_dataset(CONTENTS[1]) as dataset:
+        Tabular().set_meta(dataset)
+        assert dataset.metadata.data_lines == 3
+        assert dataset.metadata.comment_lines == 3
+        assert dataset.metadata.column_types == ["str", "int", "float", "str"]
+        Tabular().set_meta(dataset, max_data_lines=2)
+        assert dataset.metadata.data_lines is None
+        assert dataset.metadata.comment_lines is None
+        Tabular().set_meta(dataset, max_data_lines=3)
+        assert dataset.metadata.data_lines == 3
+
+
+@pytest.mark.parametrize("contents", [
+    "a\rb\n1\t2\n",
+    b"1\t2\n\xff\n",
+])
+def test_scan_unsupported(contents):
+    with _get_dataset(contents) as dataset:
+        assert block_scan.scan_tabular(dataset.file_name, lambda field: "str") is None
+        assert block_scan.count_data_lines(dataset.file_name) is None
+
+
+def test_set_meta_carriage_return():
+    # a lone carriage return ends a line in text mode
+    with _get_dataset("a\rb\n1\t2\n") as dataset:
+        Tabular().set_meta(dataset)
+        assert dataset.metadata.data_lines == 3
+        assert dataset.metadata.column_types == ["str", "int"]
+
+
+@pytest.mark.parametrize("contents", CONTENTS + ["　# ideographic space\né\n   \n"])
+def test_count_data_lines(contents):
+    with _get_dataset(contents) as dataset:
+        data_lines = block_scan.count_data_lines(dataset.file_name)
+        assert data_lines is not None
+        with mock.patch.object(block_scan, "count_data_lines", return_value=None):
+            assert data_lines == Text().count_data_lines(dataset)
+
+
+def test_scan_long_lines():
+    # lines spanning several blocks
+    contents = "a\t" + "1" * 3 * block_scan.MIN_BLOCK_SIZE + "\n1\t2\n" + "x" * 3 * block_scan.MIN_BLOCK_SIZE
+    with _get_dataset(contents) as dataset:
+        scan = block_scan.scan_tabular(dataset.file_name, lambda field: "str")
+        assert scan.data_lines == 3
+        assert scan.column_types == ["str", "int"]
+        Tabular().set_meta(dataset)
+        assert dict(dataset.metadata.__dict__) == _set_meta_lines(dataset)
+        # Text.count_data_lines counts longer lines several times, these are left to it
+        assert block_scan.count_data_lines(dataset.file_name) is None
+
+
+def _set_meta_lines(dataset, **kwds):
+    # set the metadata reading the dataset line by line
+    with mock.patch.object(block_scan, "scan_tabular", return_value=None):
+        Tabular().set_meta(dataset, **kwds)
+    return dict(dataset.metadata.__dict__)
+
+
+@contextmanager
+def _get_dataset(contents):
+    if isinstance(contents, str):
+        contents = contents.encode("utf-8")
+    with tempfile.NamedTemporaryFile() as temp:
+        temp.write(contents)
+        temp.flush()
+        yield Bunch(
+            file_name=temp.name,
+            has_data=lambda: len(contents) > 0,
+            get_size=lambda: len(contents),
+            metadata=Bunch(),
+        )
@@ -4,6 +4,7 @@ import unittest
 import uuid
 
 import pytest
+import sqlalchemy
 from sqlalchemy import inspect
 
 import galaxy.datatypes.registry
@@ -356,6 +357,92 @@ class MappingTests(BaseModelTestCase):
         assert q.all() == [('outer_list', 'inner_list', 'forward'), ('outer_list', 'inner_list', 'reverse')]
         assert c4.dataset_elements == [dce1, dce2]
 
+    def test_nested_collection_element_tree(self):
+        model = self.model
+        u = model.User(email="element_tree@example.com", password="password")
+        h1 = model.History(name="History 1", user=u)
+        outer = model.DatasetCollection(collection_type="list:paired")
+        objects = [u, h1, outer]
+        for i in range(3):
+            inner = model.DatasetCollection(collection_type="paired")
+            objects.append(model.DatasetCollectionElement(collection=outer, element=inner, element_identifier=f"sample{i}", element_index=i))
+            for j, identifier in enumerate(["forward", "reverse"]):
+                d = model.HistoryDatasetAssociation(extension="txt", history=h1, create_dataset=True, sa_session=model.session)
+                objects.extend([d, inner, model.DatasetCollectionElement(collection=inner, element=d, element_identifier=identifier, element_index=j)])
+        self.persist(*objects)
+        outer_id = outer.id
+        self.expunge()
+
+        statements = []
+
+        def count_statement(*args):
+            statements.append(1)
+
+        outer = model.session.query(model.DatasetCollection).get(outer_id)
+        sqlalchemy.event.listen(model.engine, "before_cursor_execute", count_statement)
+        try:
+            assert outer.populated
+            assert not outer.waiting_for_elements
+            assert outer["sample1"].child_collection["reverse"].element_identifier == "reverse"
+            assert outer[2].element_identifier == "sample2"
+            assert [e.element_identifier for e in outer["sample0"].child_collection.elements] == ["forward", "reverse"]
+        finally:
+            sqlalchemy.event.remove(model.engine, "before_cursor_execute", count_statement)
+        # the elements of the whole tree are loaded by one query
+        assert len(statements) == 1
+        with pytest.raises(KeyError):
+            outer["sample3"]
+        outer["sample1"].child_collection.populated_state = model.DatasetCollection.populated_states.NEW
+        assert not outer.populated
+        assert outer.waiting_for_elements
+
+        # elements of the copy are inserted in the database
+        outer_copy = outer.copy()
+        assert outer_copy.id != outer.id
+        assert outer_copy.collection_type == "list:paired"
+        assert [(e.element_identifier, e.element_index, e.child_collection) for e in outer_copy.elements] == [
+            (e.element_identifier, e.element_index, e.child_collection) for e in outer.elements]
+        # unflushed elements are copied in memory
+        new_element = model.DatasetCollectionElement(collection=outer, element=outer["sample0"].child_collection, element_identifier="sample3", element_index=3)
+        outer_copy = outer.copy(flush=False)
+        assert outer_copy.id is None
+        assert [e.element_identifier for e in outer_copy.elements] == ["sample0", "sample1", "sample2", "sample3"]
+        assert outer["sample3"] is new_element
+        model.session.flush()
+
+        # elements added through the backref of an element are flushed before copying them in the database
+        self.expunge()
+        outer = model.session.query(model.DatasetCollection).get(outer_id)
+        inner = model.session.query(model.DatasetCollection).filter(model.DatasetCollection.id != outer_id).first()
+        model.session.add(model.DatasetCollectionElement(collection=outer, element=inner, element_identifier="sample4", element_index=4))
+        assert 'elements' not in outer.__dict__
+        outer_copy = outer.copy()
+        assert outer_copy.id is not None
+        assert [e.element_identifier for e in outer_copy.elements] == ["sample0", "sample1", "sample2", "sample3", "sample4"]
+
+        # replacing the elements rebuilds the lookups
+        assert outer["sample0"].element_index == 0
+        first, second = outer.elements[:2]
+        first.element_identifier, second.element_identifier = second.element_identifier, first.element_identifier
+        outer.elements = [second, first] + outer.elements[2:]
+        assert outer["sample0"] is second
+        model.session.flush()
+
+    def test_hda_versions(self):
+        model = self.model
+        u = model.User(email="versions@example.com", password="password")
+        h = model.History(name="History for versions", user=u)
+        d = model.HistoryDatasetAssociation(name="first", extension="txt", history=h, create_dataset=True, sa_session=model.session)
+        d.state = model.HistoryDatasetAssociation.states.OK
+        self.persist(u, h, d)
+        version = d.version or 1
+
+        d.name = "second"
+        model.session.flush()
+        versions = model.session.query(model.HistoryDatasetAssociationHistory).filter_by(history_dataset_association_id=d.id).all()
+        assert (versions[-1].name, versions[-1].version) == ("first", version)
+        assert d.version == version + 1
+
     def test_default_disk_usage(self):
         model = self.model
 
@@ -729,6 +816,28 @@ class MappingTests(BaseModelTestCase):
         annotations = copied_workflow.steps[0].annotations
         assert len(annotations) == 1
 
+    def test_poll_active_workflow_invocations(self):
+        model = self.model
+        user = model.User(email="testpollinvocations@bx.psu.edu", password="password")
+        stored_workflow = model.StoredWorkflow()
+        stored_workflow.user = user
+        workflow = model.Workflow()
+        workflow.stored_workflow = stored_workflow
+        h1 = model.History(name="PollHistory1", user=user)
+        invocations = []
+        for state in [model.WorkflowInvocation.states.NEW, model.WorkflowInvocation.states.SCHEDULED, model.WorkflowInvocation.states.READY]:
+            workflow_invocation = model.WorkflowInvocation()
+            workflow_invocation.workflow = workflow
+            workflow_invocation.history = h1
+            workflow_invocation.state = state
+            workflow_invocation.handler = "poll_handler"
+            invocations.append(workflow_invocation)
+        self.persist(*invocations)
+
+        active = model.WorkflowInvocation.poll_active_workflow_invocations(self.session(), handler="poll_handler")
+        assert [tuple(row) for row in active] == [(invocations[0].id, h1.id, user.id), (invocations[2].id, h1.id, user.id)]
+        assert [row[0] for row in model.WorkflowInvocation.poll_active_workflow_ids(self.session(), handler="poll_handler")] == [invocations[0].id, invocations[2].id]
+
     def test_role_creation(self):
         security_agent = GalaxyRBACAgent(self.model)
 
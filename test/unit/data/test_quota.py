@@ -33,6 +33,53 @@ class CalculateUsageTestCase(BaseModelTestCase):
 
         assert u.calculate_disk_usage() == 10
 
+    def test_disk_usage_ledger(self):
+        model = self.model
+        u = model.User(email="ledger@example.com", password="password")
+        self.persist(u)
+
+        u.adjust_total_disk_usage(10, "files1")
+        u.adjust_total_disk_usage(5, "files2")
+        self.persist(u)
+        u.adjust_total_disk_usage(-3, "files1")
+        self.persist(u)
+        model.session.refresh(u)
+        assert u.disk_usage == 12
+        assert u.get_object_store_disk_usage() == {"files1": 7, "files2": 5}
+
+        assert model.UserDiskUsageDelta.compact(model.session) == {}
+        assert model.session.query(model.UserDiskUsageDelta).count() == 0
+        assert u.get_object_store_disk_usage() == {"files1": 7, "files2": 5}
+
+        u.adjust_total_disk_usage(1, "files2")
+        self.persist(u)
+        assert model.UserDiskUsageDelta.compact(model.session) == {}
+        assert u.get_object_store_disk_usage() == {"files1": 7, "files2": 6}
+
+        u.adjust_total_disk_usage(1, "files1")
+        self.persist(u)
+        assert model.UserDiskUsageDelta.compact(model.session, supports_skip_locked=False) == {}
+        assert u.get_object_store_disk_usage() == {"files1": 8, "files2": 6}
+
+        # Usage set outside of the ledger is reported as drift
+        u.total_disk_usage = 20
+        self.persist(u)
+        u.adjust_total_disk_usage(1, "files2")
+        self.persist(u)
+        assert model.UserDiskUsageDelta.compact(model.session) == {u.id: (21, 15)}
+
+        # Recalculating the disk usage resets the ledger
+        h = model.History(name="History for ledger", user=u)
+        d1 = model.HistoryDatasetAssociation(extension="txt", history=h, create_dataset=True, sa_session=model.session)
+        d1.dataset.total_size = 10
+        d1.dataset.object_store_id = "files1"
+        self.persist(h, d1)
+        u.adjust_total_disk_usage(2, "files2")
+        self.persist(u)
+        u.calculate_and_set_disk_usage()
+        assert u.get_object_store_disk_usage() == {"files1": 10}
+        assert model.UserDiskUsageDelta.compact(model.session) == {}
+
 
 class QuotaTestCase(BaseModelTestCase):
 
@@ -0,0 +1,123 @@
+from galaxy import model
+from galaxy.jobs.counts import JobCounts
+from galaxy.model import mapping
+from galaxy.web.statsd_client import MockStatsClient
+
+
+def test_seed_counts():
+    sa_session = __sa_session()
+    user1 = model.User(email="u1@example.com", password="pass1")
+    user2 = model.User(email="u2@example.com", password="pass2")
+    __job(sa_session, user1, model.Job.states.QUEUED, "local")
+    __job(sa_session, user1, model.Job.states.RUNNING, "cluster")
+    __job(sa_session, user1, model.Job.states.RESUBMITTED, "cluster")
+    __job(sa_session, user1, model.Job.states.OK, "cluster")
+    __job(sa_session, user2, model.Job.states.RUNNING, "cluster")
+    __job(sa_session, user2, model.Job.states.NEW, None)
+    job_counts = JobCounts(sa_session, 60)
+    job_counts.reconcile_if_due()
+
+    assert job_counts.user_job_count(user1.id) == 3
+    assert job_counts.user_job_count(user2.id) == 1
+    assert job_counts.user_job_count_per_destination(user1.id) == {"local": 1, "cluster": 1}
+    assert job_counts.total_job_count_per_destination() == {"local": 1, "cluster": 2}
+
+
+def test_job_state_changed():
+    sa_session = __sa_session()
+    user = model.User(email="u1@example.com", password="pass1")
+    job = __job(sa_session, user, model.Job.states.NEW, None)
+    job_counts = JobCounts(sa_session, 60)
+    job_counts.reconcile_if_due()
+    assert job_counts.user_job_count(user.id) == 0
+
+    # Jobs are queued before their destination is persisted
+    job.state = model.Job.states.QUEUED
+    job_counts.job_state_changed(job)
+    job.destination_id = "local"
+    job_counts.job_state_changed(job)
+    assert job_counts.user_job_count(user.id) == 1
+    assert job_counts.user_job_count_per_destination(user.id) == {"local": 1}
+
+    job.state = model.Job.states.RUNNING
+    job_counts.job_state_changed(job)
+    job_counts.job_state_changed(job)
+    assert job_counts.user_job_count(user.id) == 1
+    assert job_counts.total_job_count_per_destination() == {"local": 1}
+
+    job.state = model.Job.states.OK
+    job_counts.job_state_changed(job)
+    assert job_counts.user_job_count(user.id) == 0
+    assert job_counts.user_job_count_per_destination(user.id) == {}
+    assert job_counts.total_job_count_per_destination() == {}
+
+
+def test_job_resubmitted():
+    sa_session = __sa_session()
+    user = model.User(email="u1@example.com", password="pass1")
+    job = __job(sa_session, user, model.Job.states.RUNNING, "cluster")
+    job_counts = JobCounts(sa_session, 60)
+    job_counts.reconcile_if_due()
+
+    for _ in range(3):
+        job.state = model.Job.states.RESUBMITTED
+        job_counts.job_state_changed(job)
+        assert job_counts.user_job_count(user.id) == 1
+        assert job_counts.total_job_count_per_destination() == {}
+
+        # Dispatched again, to another destination
+        job_counts.job_resubmitted(job, "local")
+        assert job_counts.user_job_count(user.id) == 1
+        assert job_counts.user_job_count_per_destination(user.id) == {"local": 1}
+        job.state = model.Job.states.QUEUED
+        job.destination_id = "local"
+        job_counts.job_state_changed(job)
+        job.state = model.Job.states.RUNNING
+        job_counts.job_state_changed(job)
+        assert job_counts.user_job_count(user.id) == 1
+        assert job_counts.total_job_count_per_destination() == {"local": 1}
+        sa_session.flush()
+
+    job_counts.reconcile()
+    assert job_counts.user_job_count(user.id) == 1
+    assert job_counts.total_job_count_per_destination() == {"local": 1}
+
+
+def test_reconcile_drift():
+    sa_session = __sa_session()
+    user = model.User(email="u1@example.com", password="pass1")
+    __job(sa_session, user, model.Job.states.QUEUED, "local")
+    statsd_client = MockStatsClient()
+    increments = []
+    statsd_client.incr = lambda path, n=1, tags=None: increments.append((path, n))
+    job_counts = JobCounts(sa_session, 60, galaxy_statsd_client=statsd_client)
+    job_counts.reconcile_if_due()
+    assert increments == []
+
+    # A job dispatched by another handler
+    __job(sa_session, user, model.Job.states.RUNNING, "local")
+    job_counts.reconcile_if_due()
+    assert job_counts.user_job_count(user.id) == 1
+    job_counts.reconcile()
+    assert job_counts.user_job_count(user.id) == 2
+    assert job_counts.total_job_count_per_destination() == {"local": 2}
+    assert increments == [("galaxy.jobs.handler.job_counts.drift", 1)]
+
+
+def __job(sa_session, user, state, destination_id):
+    job = model.Job()
+    job.user = user
+    job.tool_id = "cat1"
+    job.state = state
+    job.destination_id = destination_id
+    sa_session.add(job)
+    sa_session.flush()
+    return job
+
+
+def __sa_session():
+    return mapping.init(
+        "/tmp",
+        "sqlite:///:memory:",
+        create_tables=True
+    ).context
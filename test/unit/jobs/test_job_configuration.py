@@ -241,6 +241,9 @@ class SimpleJobConfXmlParserTestCase(BaseJobConfXmlParserTestCase):
         assert local_dest.id == "local"
         assert local_dest.runner == "local"
 
+    def test_default_ready_tracking(self):
+        assert self.job_config.handler_ready_tracking == "query"
+
     def test_default_limits(self):
         limits = self.job_config.limits
         assert limits.registered_user_concurrent_jobs is None
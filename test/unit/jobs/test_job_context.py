@@ -85,3 +85,44 @@ def test_job_context_discover_outputs_flushes_once(mocker):
     sa_session.flush()
     assert len(collection.dataset_instances) == 10
     assert collection.dataset_instances[0].dataset.file_size == 1
+
+
+def test_job_context_discover_outputs_in_threads():
+    app = _mock_app()
+    sa_session = app.model.context
+
+    u = model.User(email="collection@example.com", password="password")
+    h = model.History(name="Test History", user=u)
+
+    tool = Tool(app)
+    job = model.Job()
+    job.history = h
+    sa_session.add(job)
+    job_working_directory = tempfile.mkdtemp()
+    setup_data(job_working_directory)
+    collection_description = FilePatternDatasetCollectionDescription(pattern=r"(?P<designation>.*)\.(?P<ext>[^\.]+)?")
+    collection = model.DatasetCollection(collection_type='list', populated=False)
+    sa_session.add(collection)
+    job_context = JobContext(tool, None, job, job_working_directory, PermissionProvider(), MetadataSourceProvider(), '?', app.object_store, 'ok', flush_per_n_datasets=3, discovered_datasets_workers=4)
+    collection_builder = builder.BoundCollectionBuilder(collection)
+    filenames = job_context.find_files('output', collection, [dataset_collector(collection_description)])
+    job_context.populate_collection_elements(
+        collection,
+        collection_builder,
+        filenames,
+        name='output',
+        metadata_source_name='',
+        final_job_state=job_context.final_job_state,
+    )
+    collection_builder.populate()
+    sa_session.flush()
+    datasets = collection.dataset_instances
+    assert [d.name for d in datasets] == [f'datasets_{i}' for i in range(10)]
+    assert sorted(d.hid for d in datasets) == list(range(1, 11))
+    for i, dataset in enumerate(datasets):
+        assert dataset.dataset.file_size == 1
+        assert open(dataset.file_name).read() == str(i)
+        assert dataset.metadata.data_lines == 1
+        assert dataset.peek
+    # the threads work on detached copies of the datasets, none of them ends up in the session
+    assert sa_session.query(model.HistoryDatasetAssociation).count() == 10
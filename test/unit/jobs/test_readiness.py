@@ -0,0 +1,135 @@
+from galaxy import model
+from galaxy.datatypes.registry import example_datatype_registry_for_sample
+from galaxy.jobs.readiness import (
+    JobReadinessTracker,
+    query_ready_jobs,
+)
+from galaxy.model import mapping
+
+HANDLER = "handler0"
+
+model.set_datatypes_registry(example_datatype_registry_for_sample())
+
+
+def test_tracker_matches_query():
+    sa_session = __sa_session()
+    user = model.User(email="u1@example.com", password="pass1")
+    ready_hda = __hda(sa_session, model.Dataset.states.OK)
+    queued_hda = __hda(sa_session, model.Dataset.states.QUEUED)
+    ready_job = __job(sa_session, user, ready_hda)
+    waiting_job = __job(sa_session, user, ready_hda, queued_hda)
+    other_handler_job = __job(sa_session, user, ready_hda, handler="handler1")
+    tracker = __tracker(sa_session)
+    tracker.update()
+
+    assert tracker.ready_job_ids() == [ready_job.id]
+    assert [j.id for j in query_ready_jobs(sa_session, HANDLER, 100)] == [ready_job.id]
+    assert tracker.pending_input_count(waiting_job.id) == 1
+    assert other_handler_job.id not in tracker.job_users
+
+
+def test_tracker_input_becomes_ready():
+    sa_session = __sa_session()
+    user = model.User(email="u1@example.com", password="pass1")
+    queued_hda = __hda(sa_session, model.Dataset.states.QUEUED)
+    running_hda = __hda(sa_session, model.Dataset.states.RUNNING)
+    job = __job(sa_session, user, queued_hda, running_hda)
+    tracker = __tracker(sa_session)
+    tracker.update()
+    assert tracker.pending_input_count(job.id) == 2
+    assert tracker.ready_job_ids() == []
+
+    queued_hda.dataset.state = model.Dataset.states.OK
+    sa_session.flush()
+    tracker.update()
+    assert tracker.pending_input_count(job.id) == 1
+    assert tracker.ready_job_ids() == []
+
+    running_hda.dataset.state = model.Dataset.states.OK
+    sa_session.flush()
+    tracker.update()
+    assert tracker.pending_input_count(job.id) == 0
+    assert tracker.ready_job_ids() == [job.id]
+
+
+def test_tracker_new_and_finished_jobs():
+    sa_session = __sa_session()
+    user = model.User(email="u1@example.com", password="pass1")
+    hda = __hda(sa_session, model.Dataset.states.OK)
+    tracker = __tracker(sa_session)
+    tracker.update()
+    assert tracker.tracked_job_count == 0
+
+    job = __job(sa_session, user, hda)
+    tracker.update()
+    assert tracker.ready_job_ids() == [job.id]
+
+    job.state = model.Job.states.QUEUED
+    sa_session.flush()
+    tracker.update()
+    assert tracker.tracked_job_count == 0
+    assert tracker.ready_jobs() == []
+
+
+def test_tracker_recheck():
+    sa_session = __sa_session()
+    user = model.User(email="u1@example.com", password="pass1")
+    hda = __hda(sa_session, model.Dataset.states.OK)
+    job = __job(sa_session, user, hda)
+    tracker = __tracker(sa_session)
+    tracker.update()
+    assert tracker.ready_job_ids() == [job.id]
+
+    # Inputs can go back to a non-ready state (e.g. when a job is rerun and remapped)
+    hda.dataset.state = model.Dataset.states.QUEUED
+    sa_session.flush()
+    tracker.recheck([job.id])
+    assert tracker.pending_input_count(job.id) == 1
+    assert tracker.ready_job_ids() == []
+
+
+def test_tracker_window_size():
+    sa_session = __sa_session()
+    user1 = model.User(email="u1@example.com", password="pass1")
+    user2 = model.User(email="u2@example.com", password="pass2")
+    hda = __hda(sa_session, model.Dataset.states.OK)
+    user1_jobs = [__job(sa_session, user1, hda) for _ in range(3)]
+    user2_jobs = [__job(sa_session, user2, hda) for _ in range(3)]
+    tracker = __tracker(sa_session, window_size=2)
+    tracker.update()
+    expected = sorted([j.id for j in user1_jobs[:2]] + [j.id for j in user2_jobs[:2]])
+    assert tracker.ready_job_ids() == expected
+    assert [j.id for j in tracker.ready_jobs()] == expected
+
+
+def __tracker(sa_session, window_size=100):
+    return JobReadinessTracker(sa_session, HANDLER, window_size)
+
+
+def __hda(sa_session, state):
+    hda = model.HistoryDatasetAssociation(create_dataset=True, sa_session=sa_session)
+    hda.dataset.state = state
+    sa_session.add(hda)
+    sa_session.flush()
+    return hda
+
+
+def __job(sa_session, user, *input_hdas, handler=HANDLER):
+    job = model.Job()
+    job.user = user
+    job.tool_id = "cat1"
+    job.state = model.Job.states.NEW
+    job.handler = handler
+    for i, hda in enumerate(input_hdas):
+        job.add_input_dataset(f"input{i}", hda)
+    sa_session.add(job)
+    sa_session.flush()
+    return job
+
+
+def __sa_session():
+    return mapping.init(
+        "/tmp",
+        "sqlite:///:memory:",
+        create_tables=True
+    ).context
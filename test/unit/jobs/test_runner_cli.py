@@ -0,0 +1,101 @@
+import os
+import sys
+from queue import Queue
+
+import pytest
+
+from galaxy import model
+from galaxy.jobs import JobDestination
+from galaxy.jobs.runners import (
+    AsynchronousJobRunner,
+    AsynchronousJobState,
+)
+from galaxy.jobs.runners.cli import ShellJobRunner
+from galaxy.jobs.runners.util.cli import CliInterface
+from galaxy.util.bunch import Bunch
+
+# Stands in for squeue on a (remote) Slurm head node: records every invocation
+# and lists the queued and running jobs from a file.
+FAKE_SQUEUE = """#!%s
+import os
+import sys
+
+with open(os.environ["FAKE_SCHEDULER_LOG"], "a") as log:
+    log.write(" ".join(sys.argv[1:]) + "\\n")
+with open(os.environ["FAKE_SCHEDULER_JOBS"]) as jobs_file:
+    jobs = dict(line.split() for line in jobs_file)
+job_ids = sys.argv[sys.argv.index("-j") + 1].split(",") if "-j" in sys.argv else list(jobs)
+print("JOBID ST")
+for job_id in job_ids:
+    if job_id in jobs:
+        print(job_id, jobs[job_id])
+""" % sys.executable
+
+DESTINATION = JobDestination(id="slurm", runner="cli", params={"shell_plugin": "LocalShell", "job_plugin": "Slurm"})
+
+
+@pytest.fixture
+def fake_scheduler(tmp_path, monkeypatch):
+    squeue = tmp_path / "squeue"
+    squeue.write_text(FAKE_SQUEUE)
+    squeue.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_SCHEDULER_LOG", str(tmp_path / "log"))
+    monkeypatch.setenv("FAKE_SCHEDULER_JOBS", str(tmp_path / "jobs"))
+    (tmp_path / "log").write_text("")
+    return tmp_path
+
+
+@pytest.mark.parametrize("watched_count", [1, 10, 100])
+def test_status_invocations_independent_of_watched_jobs(fake_scheduler, watched_count):
+    runner = _runner()
+    # Every other job has left the queue and needs to be checked individually
+    running = [str(i) for i in range(0, watched_count, 2)]
+    (fake_scheduler / "jobs").write_text("".join(f"{job_id} R\n" for job_id in running))
+    for i in range(watched_count):
+        runner.watched.append(_job_state(str(i)))
+
+    runner.check_watched_items()
+
+    invocations = (fake_scheduler / "log").read_text().splitlines()
+    assert len(invocations) == (1 if watched_count == 1 else 2)
+    assert sorted(ajs.job_id for ajs in runner.watched) == sorted(running)
+    assert all(ajs.running for ajs in runner.watched)
+    assert runner.work_queue.qsize() == watched_count - len(running)
+
+
+def test_parse_multiple_status():
+    interface = CliInterface()
+    slurm = interface.get_job_interface({"plugin": "Slurm"})
+    assert slurm.parse_multiple_status("JOBID ST\n1 R\n", ["1", "2"]) == {"1": model.Job.states.RUNNING, "2": model.Job.states.OK}
+    torque = interface.get_job_interface({"plugin": "Torque"})
+    status = "Job Id: 1.server\n    job_state = Q\n\nJob Id: 3.server\n    job_state = R\n"
+    assert torque.parse_multiple_status(status, ["1.server", "2.server"]) == {"1.server": model.Job.states.QUEUED, "2.server": model.Job.states.OK}
+
+
+def _runner():
+    app = Bunch(
+        config=Bunch(redact_email_in_job_name=True),
+        model=Bunch(context=None),
+    )
+    runner = ShellJobRunner.__new__(ShellJobRunner)
+    # Don't start the monitor and worker threads
+    AsynchronousJobRunner.__init__(runner, app, 1)
+    runner.cli_interface = CliInterface()
+    runner.work_queue = Queue()
+    return runner
+
+
+def _job_state(job_id):
+    job_wrapper = Bunch(
+        app=Bunch(config=Bunch(redact_email_in_job_name=True)),
+        tool=Bunch(old_id="cat1"),
+        user=None,
+        job_destination=DESTINATION,
+        get_id_tag=lambda: job_id,
+        get_state=lambda: model.Job.states.QUEUED,
+        change_state=lambda state: None,
+    )
+    ajs = AsynchronousJobState(job_wrapper=job_wrapper, job_id=job_id, job_destination=DESTINATION)
+    ajs.old_state = model.Job.states.QUEUED
+    return ajs
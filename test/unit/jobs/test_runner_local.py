@@ -1,7 +1,7 @@
 import os
 import threading
 import time
-from unittest import TestCase
+from unittest import mock, TestCase
 
 import psutil
 
@@ -90,6 +90,40 @@ class TestLocalJobRunner(TestCase, UsesApp, UsesTools):
         t.join(1)
         assert not psutil.pid_exists(external_id)
 
+    def test_put_many(self):
+        runner = local.LocalJobRunner(self.app, 1)
+        queued = []
+        runner.mark_as_queued = queued.append
+        runner.put_many([self.job_wrapper])
+        assert queued == [self.job_wrapper]
+        assert self.job_wrapper.state == model.Job.states.QUEUED
+        # State changes are flushed once for all jobs
+        assert self.job_wrapper.enqueue_flushed is False
+
+    def test_put_many_enqueue_failure(self):
+        runner = local.LocalJobRunner(self.app, 1)
+        queued = []
+        runner.mark_as_queued = queued.append
+        failing_job_wrapper = MockJobWrapper(self.app, os.path.join(self.test_directory, "failing"), self.tool)
+        failing_job_wrapper.enqueue = mock.Mock(side_effect=Exception("Failed to set object store ids"))
+        with mock.patch.object(runner.sa_session, "rollback") as rollback:
+            runner.put_many([failing_job_wrapper, self.job_wrapper])
+        rollback.assert_called_once()
+        assert queued == [self.job_wrapper]
+        # The other jobs are enqueued (and flushed) one by one
+        assert self.job_wrapper.enqueue_flushed is True
+
+    def test_put_many_flush_failure(self):
+        runner = local.LocalJobRunner(self.app, 1)
+        queued = []
+        runner.mark_as_queued = queued.append
+        with mock.patch.object(runner.sa_session, "flush", side_effect=Exception("Database unavailable")), \
+                mock.patch.object(runner.sa_session, "rollback") as rollback:
+            runner.put_many([self.job_wrapper])
+        rollback.assert_called_once()
+        assert queued == [self.job_wrapper]
+        assert self.job_wrapper.enqueue_flushed is True
+
     def test_shutdown_no_jobs(self):
         self.app.config.monitor_thread_join_timeout = 5
         runner = local.LocalJobRunner(self.app, 1)
@@ -120,6 +154,7 @@ class MockJobWrapper:
         tool_working_directory = os.path.join(working_directory, "working")
         os.makedirs(tool_working_directory)
         self.app = app
+        self.sa_session = app.model.context
         self.tool = tool
         self.requires_containerization = False
         self.state = model.Job.states.QUEUED
@@ -189,6 +224,10 @@ class MockJobWrapper:
     def change_state(self, state, job=None):
         self.state = state
 
+    def enqueue(self, flush=True):
+        self.state = model.Job.states.QUEUED
+        self.enqueue_flushed = flush
+
     def get_output_fnames(self):
         return []
 
@@ -0,0 +1,59 @@
+import time
+
+from galaxy.jobs.runners import (
+    AsynchronousJobRunner,
+    AsynchronousJobState,
+)
+from galaxy.util import StructuredExecutionTimer
+from galaxy.util.bunch import Bunch
+
+
+class MockAsynchronousJobRunner(AsynchronousJobRunner):
+    runner_name = "MockRunner"
+
+    def __init__(self, **kwargs):
+        app = Bunch(
+            config=Bunch(redact_email_in_job_name=True),
+            model=Bunch(context=None),
+            execution_timer_factory=Bunch(get_timer=StructuredExecutionTimer, galaxy_statsd_client=None),
+        )
+        super().__init__(app, 1, **kwargs)
+        self.checked = []
+        self.states = {}
+
+    def check_watched_items(self):
+        # Like the batching runners, look at all of self.watched at once
+        self.checked.append(sorted(ajs.job_id for ajs in self.watched))
+        for ajs in self.watched:
+            ajs.old_state = self.states.get(ajs.job_id, "queued")
+
+
+def test_backoff():
+    runner = MockAsynchronousJobRunner(monitor_min_poll_interval="1", monitor_max_poll_interval="4", monitor_poll_backoff="2")
+    ajs = AsynchronousJobState(job_id="1")
+    runner.watched.append(ajs)
+    intervals = []
+    for _ in range(4):
+        ajs.next_check_time = 0
+        runner.check_due_watched_items()
+        intervals.append(ajs.check_interval)
+    # The first check finds the state changed from None
+    assert intervals == [1, 2, 4, 4]
+
+    runner.states["1"] = "running"
+    ajs.next_check_time = 0
+    runner.check_due_watched_items()
+    assert ajs.check_interval == 1
+
+
+def test_only_due_items_checked():
+    runner = MockAsynchronousJobRunner(monitor_max_poll_interval="60")
+    due = AsynchronousJobState(job_id="1")
+    not_due = AsynchronousJobState(job_id="2")
+    not_due.check_interval = 30
+    not_due.next_check_time = time.time() + 30
+    runner.watched.extend([due, not_due])
+    runner.check_due_watched_items()
+    assert runner.checked == [["1"]]
+    assert runner.watched == [due, not_due]
+    assert not_due.check_interval == 30
@@ -0,0 +1,88 @@
+import threading
+import time
+
+from galaxy.jobs.runners import BaseJobRunner
+from galaxy.util import StructuredExecutionTimer
+from galaxy.util.bunch import Bunch
+
+
+class MockJobRunner(BaseJobRunner):
+    runner_name = "MockRunner"
+
+    def __init__(self, nworkers=1, **kwargs):
+        app = Bunch(
+            config=Bunch(redact_email_in_job_name=True, monitor_thread_join_timeout=5),
+            model=Bunch(context=None),
+            # Start worker threads right away instead of after forking
+            application_stack=Bunch(register_postfork_function=lambda f: f()),
+            execution_timer_factory=Bunch(get_timer=StructuredExecutionTimer, galaxy_statsd_client=None),
+        )
+        super().__init__(app, nworkers, **kwargs)
+        self.finish_started = threading.Event()
+        self.finish_release = threading.Event()
+        self.queued = []
+        self._init_worker_threads()
+
+    def queue_job(self, job_wrapper):
+        self.queued.append(job_wrapper.get_id_tag())
+
+    def finish_job(self, job_state):
+        self.finish_started.set()
+        self.finish_release.wait(5)
+
+
+def test_finish_workers_do_not_block_submission():
+    runner = MockJobRunner(finish_workers="1")
+    try:
+        assert [work_pool.name for work_pool in runner.work_pools] == ["work", "finish"]
+        runner.work_queue.put((runner.finish_job, _job_wrapper(1)))
+        assert runner.finish_started.wait(5)
+        # The only submission worker is free while the job finishes
+        runner.work_queue.put((runner.queue_job, _job_wrapper(2)))
+        _wait_for(lambda: runner.queued == [2])
+    finally:
+        runner.finish_release.set()
+        runner.shutdown()
+
+
+def test_shared_pool_by_default():
+    runner = MockJobRunner()
+    try:
+        assert len(runner.work_pools) == 1
+        runner.work_queue.put((runner.finish_job, _job_wrapper(1)))
+        assert runner.finish_started.wait(5)
+        runner.work_queue.put((runner.queue_job, _job_wrapper(2)))
+        time.sleep(0.2)
+        assert runner.queued == []
+        runner.finish_release.set()
+        _wait_for(lambda: runner.queued == [2])
+    finally:
+        runner.finish_release.set()
+        runner.shutdown()
+
+
+def test_autoscaling():
+    runner = MockJobRunner(max_workers="3")
+    work_pool = runner.work_pools[0]
+    work_pool.idle_timeout = 0.2
+    try:
+        for i in range(3):
+            runner.work_queue.put((runner.finish_job, _job_wrapper(i)))
+        _wait_for(lambda: len(work_pool.threads) == 3)
+        runner.finish_release.set()
+        # Additional workers stop once idle
+        _wait_for(lambda: len(work_pool.threads) == 1)
+    finally:
+        runner.finish_release.set()
+        runner.shutdown()
+
+
+def _job_wrapper(job_id):
+    return Bunch(get_id_tag=lambda: job_id)
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "Timed out"
+        time.sleep(0.01)
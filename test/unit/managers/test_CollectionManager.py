@@ -3,7 +3,7 @@
 """
 import unittest
 
-from galaxy import model
+from galaxy import exceptions, model
 from galaxy.managers.collections import DatasetCollectionManager
 from galaxy.managers.datasets import DatasetManager
 from galaxy.managers.hdas import HDAManager
@@ -80,6 +80,52 @@ class DatasetCollectionManagerTestCase(BaseTestCase, CreatesCollectionsMixin):
         hdca2 = self.collection_manager.create(self.trans, history, 'test collection 2', 'list', elements=elements)
         self.assertIsInstance(hdca2, model.HistoryDatasetCollectionAssociation)
 
+    def test_create_nested_list_copying_elements(self):
+        owner = self.user_manager.create(**user2_data)
+        self.trans.set_user(owner)
+        history = self.history_manager.create(name='history1', user=owner)
+        hdas = [self.hda_manager.create(name=f'hda{i}', history=history, dataset=self.dataset_manager.create()) for i in range(6)]
+        self.hda_manager.set_tags(hdas[0], ['tag-one'], user=owner)
+        self.hda_manager.annotate(hdas[0], 'an annotation', user=owner)
+
+        self.log("should be able to create a nested collection copying, hiding and tagging elements")
+        element_identifiers = []
+        for i in range(3):
+            pair = self.build_element_identifiers(hdas[i * 2:i * 2 + 2])
+            pair[0]['name'], pair[1]['name'] = 'forward', 'reverse'
+            for identifier in pair:
+                identifier['tags'] = ['group:a']
+            element_identifiers.append(dict(src='new_collection', collection_type='paired', name=f'sample{i}', element_identifiers=pair))
+        hdca = self.collection_manager.create(self.trans, history, 'test collection', 'list:paired',
+                                              element_identifiers=element_identifiers, copy_elements=True, hide_source_items=True, history=history)
+        copies = hdca.collection.dataset_instances
+        self.assertEqual([copy.copied_from_history_dataset_association for copy in copies], hdas)
+        self.assertEqual([copy.hid for copy in copies], list(range(7, 13)))
+        self.assertEqual(hdca.hid, 13)
+        self.assertTrue(all(not hda.visible for hda in hdas + copies))
+        self.assertEqual(sorted(self.hda_manager.get_tags(copies[0])), ['group:a', 'tag-one'])
+        self.assertEqual(self.hda_manager.get_tags(copies[1]), ['group:a'])
+        self.assertEqual(self.hda_manager.annotation(copies[0]), 'an annotation')
+        self.assertEqual(self.trans.sa_session.query(model.Tag).filter(model.Tag.name == 'group').count(), 1)
+
+        self.log("should not charge the owner for copies of their datasets")
+        for hda in hdas:
+            hda.dataset.total_size = 10
+        self.trans.sa_session.flush()
+        owner.calculate_and_set_disk_usage()
+        self.assertEqual(owner.get_disk_usage(), 60)
+        self.collection_manager.create(self.trans, history, 'test collection', 'list',
+                                       element_identifiers=self.build_element_identifiers(hdas), copy_elements=True, history=history)
+        self.trans.sa_session.flush()
+        self.trans.sa_session.refresh(owner)
+        self.assertEqual(owner.get_disk_usage(), 60)
+
+        self.log("should not be able to create a collection of unknown datasets")
+        element_identifiers = self.build_element_identifiers(hdas[:1])
+        element_identifiers[0]['id'] = self.trans.security.encode_id(12345)
+        with self.assertRaises(exceptions.ObjectNotFound):
+            self.collection_manager.create(self.trans, history, 'test collection', 'list', element_identifiers=element_identifiers)
+
     def test_update_from_dict(self):
         owner = self.user_manager.create(**user2_data)
 
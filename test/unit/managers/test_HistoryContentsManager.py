@@ -6,7 +6,8 @@ import unittest
 
 from sqlalchemy import column, desc, false, true
 
-from galaxy.managers import base, collections, hdas, history_contents
+from galaxy import exceptions
+from galaxy.managers import base, collections, hdas, hdcas, history_contents
 from galaxy.managers.histories import HistoryManager
 from .base import BaseTestCase
 from .base import CreatesCollectionsMixin
@@ -198,6 +199,88 @@ class HistoryAsContainerTestCase(HistoryAsContainerBaseTestCase):
         self.assertEqual(self.contents_manager.subcontainers(history),
             self.contents_manager.contents(history, filters=[parsed_filter("orm", HDA.name.like('%collect%'))]))
 
+    def test_after(self):
+        user2 = self.user_manager.create(**user2_data)
+        history = self.history_manager.create(name='history', user=user2)
+        contents = []
+        contents.extend([self.add_hda_to_history(history, name=('hda-' + str(x))) for x in range(3)])
+        contents.append(self.add_list_collection_to_history(history, contents[:3]))
+        contents.extend([self.add_hda_to_history(history, name=('hda-' + str(x))) for x in range(4, 6)])
+        contents.append(self.add_list_collection_to_history(history, contents[4:6]))
+
+        self.log("should be able to page through contents with after")
+        for order_by, ordered in [(None, contents), (desc('hid'), contents[::-1])]:
+            pages = []
+            after = None
+            while True:
+                page = self.contents_manager.contents(history, limit=3, order_by=order_by, after=after)
+                if not page:
+                    break
+                pages.extend(page)
+                after = page[-1].type_id
+            self.assertEqual(pages, ordered)
+
+        self.log("contents with the same update_time should be neither skipped nor repeated")
+        for content in contents:
+            content.update_time = contents[0].update_time
+        self.app.model.context.flush()
+        first_page = self.contents_manager.contents(history, limit=4, order_by=desc('update_time'))
+        second_page = self.contents_manager.contents(history, limit=4, order_by=desc('update_time'), after=first_page[-1].type_id)
+        self.assertEqual(sorted(c.type_id for c in first_page + second_page), sorted(c.type_id for c in contents))
+
+        self.log("should be able to page through rows with after")
+        rows = self.contents_manager.contents(history, limit=2, after=contents[3].type_id, expand_models=False)
+        self.assertEqual([row.type_id for row in rows], [contents[4].type_id, contents[5].type_id])
+
+        self.log("should not be able to page after with other orders or unknown contents")
+        self.assertRaises(exceptions.RequestParameterInvalidException,
+            self.contents_manager.contents, history, order_by=desc('name'), after=contents[0].type_id)
+        self.assertRaises(exceptions.RequestParameterInvalidException,
+            self.contents_manager.contents, history, after='dataset-12345')
+
+    def test_annotation_filter(self):
+        user2 = self.user_manager.create(**user2_data)
+        history = self.history_manager.create(name='history', user=user2)
+        contents = [self.add_hda_to_history(history, name=('hda-' + str(x))) for x in range(3)]
+        contents.append(self.add_list_collection_to_history(history, contents[:3]))
+        self.hda_manager.annotate(contents[1], 'an interesting dataset', user=user2)
+        self.hda_manager.annotate(contents[2], 'an interesting dataset', user=self.admin_user)
+        contents[3].add_item_annotation(self.app.model.context, user2, contents[3], 'interesting collection')
+        self.app.model.context.flush()
+
+        self.log("should filter by the owner's annotation in the query, before limits")
+        filters = self.history_contents_filters.parse_filters([('annotation', 'has', 'interesting')])
+        self.assertEqual(filters[0].filter_type, 'orm_function')
+        self.assertEqual(self.contents_manager.contents(history, filters=filters), [contents[1], contents[3]])
+        self.assertEqual(self.contents_manager.contents(history, filters=filters, limit=1, offset=1), [contents[3]])
+
+    def test_serialize_rows(self):
+        user2 = self.user_manager.create(**user2_data)
+        history = self.history_manager.create(name='history', user=user2)
+        hda = self.add_hda_to_history(history, name='hda-1')
+        hdca = self.add_list_collection_to_history(history, [hda])
+        serializer = self.app[history_contents.HistoryContentsSerializer]
+
+        self.log("should serialize the summary of contents from rows")
+        rows = self.contents_manager.contents(history, expand_models=False)
+        serialized = [serializer.serialize_to_view(row, view='summary') for row in rows]
+        self.assertEqual([s['type_id'] for s in serialized],
+            [f"dataset-{self.app.security.encode_id(hda.id)}", f"dataset_collection-{self.app.security.encode_id(hdca.id)}"])
+        self.assertEqual(serialized[0]['name'], 'hda-1')
+        self.assertEqual(serialized[0]['history_id'], self.app.security.encode_id(history.id))
+        self.assertEqual(serialized[0]['dataset_id'], self.app.security.encode_id(hda.dataset_id))
+        self.assertEqual(serialized[0]['update_time'], hda.update_time.isoformat())
+        self.assertEqual(serialized[1]['collection_id'], self.app.security.encode_id(hdca.collection_id))
+
+        self.log("should serialize the same keys from rows as from models")
+        keys = list(serializer.views['summary'])
+        self.assertFalse(serializer.can_serialize_rows(keys))
+        keys = [key for key in keys if serializer.can_serialize_rows([key])]
+        self.assertTrue(serializer.can_serialize_rows(keys))
+        model_serializers = [self.app[hdas.HDASerializer], self.app[hdcas.HDCASerializer]]
+        for row, content, model_serializer in zip(rows, [hda, hdca], model_serializers):
+            self.assertEqual(serializer.serialize_row(row, keys), model_serializer.serialize_to_view(content, keys=keys))
+
     def test_order_by(self):
         user2 = self.user_manager.create(**user2_data)
         history = self.history_manager.create(name='history', user=user2)
@@ -0,0 +1,172 @@
+import os
+import time
+from functools import partial
+
+import pytest
+
+from galaxy.exceptions import ObjectNotFound
+from galaxy.objectstore.caching import (
+    BlockCache,
+    CacheIndex,
+    CacheIndexMixin,
+    CacheMonitor,
+    RangedReadMixin,
+)
+from galaxy.objectstore.cloud import Cloud
+from galaxy.util.bunch import Bunch
+
+
+class CachingStore(CacheIndexMixin):
+
+    def __init__(self, staging_path, cache_size):
+        self.staging_path = staging_path
+        self.cache_size = cache_size
+
+    def _get_cache_path(self, rel_path):
+        return os.path.join(self.staging_path, rel_path)
+
+    def _in_cache(self, rel_path):
+        return self._cache_accessed(rel_path, self._get_cache_path(rel_path))
+
+
+def test_evicts_least_recently_used(tmp_path):
+    store = CachingStore(str(tmp_path), 100)
+    store._start_cache_index(enable_cache_monitor=False)
+    for i in range(4):
+        _write(tmp_path, f"000/dataset_{i}.dat", 20)
+        store._cache_updated(f"000/dataset_{i}.dat")
+        time.sleep(0.01)
+    # dataset_0 is used again, so dataset_1 becomes the least recently used file
+    assert store._in_cache("000/dataset_0.dat")
+    assert not store._in_cache("000/dataset_5.dat")
+    _write(tmp_path, "000/dataset_4.dat", 20)
+    store._cache_updated("000/dataset_4.dat")
+
+    monitor = CacheMonitor(store.cache_index, store.cache_size)
+    monitor.check()
+
+    assert store.cache_index.total_size == 80
+    assert sorted(os.listdir(tmp_path / "000")) == ["dataset_0.dat", "dataset_2.dat", "dataset_3.dat", "dataset_4.dat"]
+    assert store.cache_stats() == {"hits": 1, "misses": 1, "evictions": 1, "evicted_bytes": 20}
+
+
+def test_remove(tmp_path):
+    store = CachingStore(str(tmp_path), 100)
+    store._start_cache_index(enable_cache_monitor=False)
+    for rel_path in ["000/dataset_1.dat", "000/dataset_1_files/a.txt", "000/dataset_1_files/b/c.txt"]:
+        _write(tmp_path, rel_path, 10)
+        store._cache_updated(rel_path)
+    store.cache_index.flush()
+    assert store.cache_index.total_size == 30
+
+    store._cache_removed("000/dataset_1_files", entire_dir=True)
+    assert store.cache_index.total_size == 10
+    store._cache_removed("000/dataset_1.dat")
+    assert store.cache_index.total_size == 0
+
+
+def test_populate_existing_cache(tmp_path):
+    _write(tmp_path, "000/dataset_1.dat", 10)
+    _write(tmp_path, "000/dataset_2.dat", 5)
+    os.utime(tmp_path / "000" / "dataset_1.dat", (0, 0))
+    cache_index = CacheIndex(str(tmp_path))
+    assert not cache_index.populated
+    cache_index.populate()
+    assert cache_index.populated
+    assert cache_index.total_size == 15
+
+    # The index persists across processes
+    cache_index = CacheIndex(str(tmp_path))
+    assert cache_index.populated
+    assert cache_index.evict(1) == 10
+    assert not (tmp_path / "000" / "dataset_1.dat").exists()
+
+
+class RemoteStore(RangedReadMixin, CachingStore):
+
+    def __init__(self, staging_path, objects):
+        super().__init__(staging_path, -1)
+        self.objects = objects
+        self.reads = []
+
+    def _construct_path(self, obj, **kwargs):
+        return f"000/dataset_{obj.id}.dat"
+
+    def _get_remote_size(self, rel_path):
+        if rel_path in self.objects:
+            return len(self.objects[rel_path])
+
+    def _read_remote_range(self, rel_path, start, end):
+        self.reads.append((rel_path, start, end))
+        return self.objects[rel_path][start:end]
+
+
+def test_block_cache():
+    data = bytes(range(20))
+    reads = []
+
+    def read_range(key, start, end):
+        reads.append((start, end))
+        return data[start:end]
+
+    block_cache = BlockCache(block_size=4, block_count=2)
+    assert b"".join(block_cache.iter_range("a", len(data), 3, 6, read_range)) == data[3:9]
+    assert reads == [(0, 4), (4, 8), (8, 12)]
+    assert b"".join(block_cache.iter_range("a", len(data), 16, -1, read_range)) == data[16:]
+    assert b"".join(block_cache.iter_range("a", len(data), 17, 1, read_range)) == data[17:18]
+    assert reads[3:] == [(16, 20)]
+    block_cache.invalidate("a")
+    assert b"".join(block_cache.iter_range("a", len(data), 17, 1, read_range)) == data[17:18]
+    assert reads[4:] == [(16, 20)]
+
+
+def test_ranged_reads(tmp_path):
+    store = RemoteStore(str(tmp_path), {"000/dataset_1.dat": b"Hello World!" * 1000})
+    store._get_block_cache().block_size = 100
+    assert store._get_data(Bunch(id=1), start=1, count=6) == "ello W"
+    assert b"".join(store._iter_data(Bunch(id=1), start=1, count=6)) == b"ello W"
+    # The object is not pulled into the cache, and only its first block is read
+    assert not os.path.exists(tmp_path / "000" / "dataset_1.dat")
+    assert store.reads == [("000/dataset_1.dat", 0, 100)]
+    with pytest.raises(ObjectNotFound):
+        store._iter_data(Bunch(id=2))
+
+    # Objects in the cache are read from there
+    _write(tmp_path, "000/dataset_1.dat", 10)
+    assert store._get_data(Bunch(id=1)) == "x" * 10
+
+
+def test_cloud_ranged_reads(tmp_path):
+    data = bytes(range(256)) * 100
+    streamed = []
+
+    def iter_content():
+        for i in range(0, len(data), 1000):
+            streamed.append(i)
+            yield data[i:i + 1000]
+
+    def pull_into_cache(rel_path):
+        (tmp_path / rel_path).write_bytes(data)
+        return True
+
+    store = Bunch(
+        bucket=Bunch(objects=Bunch(get=lambda rel_path: Bunch(iter_content=iter_content))),
+        _in_cache=lambda rel_path: (tmp_path / rel_path).exists(),
+        _pull_into_cache=pull_into_cache,
+        _get_cache_path=lambda rel_path: str(tmp_path / rel_path),
+    )
+    block_cache = BlockCache(block_size=4096)
+    # the first block is streamed from the object
+    assert b"".join(block_cache.iter_range("dataset_1.dat", len(data), 0, 10, partial(Cloud._read_remote_range, store))) == data[:10]
+    assert streamed == [0, 1000, 2000, 3000, 4000]
+    assert not (tmp_path / "dataset_1.dat").exists()
+    # reading further pulls the object into the cache once
+    assert b"".join(block_cache.iter_range("dataset_1.dat", len(data), 0, -1, partial(Cloud._read_remote_range, store))) == data
+    assert len(streamed) == 5
+    assert (tmp_path / "dataset_1.dat").exists()
+
+
+def _write(staging_path, rel_path, size):
+    path = staging_path / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
@@ -1,4 +1,5 @@
 import os
+import threading
 from tempfile import mkdtemp
 from uuid import uuid4
 
@@ -6,6 +7,7 @@ from galaxy.exceptions import ObjectInvalid
 from galaxy.objectstore.azure_blob import AzureBlobObjectStore
 from galaxy.objectstore.cloud import Cloud
 from galaxy.objectstore.pithos import PithosObjectStore
+from galaxy.objectstore.pulsar import PulsarObjectStore
 from galaxy.objectstore.s3 import S3ObjectStore
 from galaxy.util import directory_hash_id
 from ..unittest_utils.objectstore_helpers import (
@@ -42,6 +44,9 @@ def test_disk_store():
             data = object_store.get_data(hello_world_dataset, start=1, count=6)
             assert data == "ello W"
 
+            # Test iter_data
+            assert b"".join(object_store.iter_data(hello_world_dataset, start=1, count=6)) == b"ello W"
+
             # Test Size
 
             # Test absent and empty datasets yield size of 0.
@@ -372,6 +377,66 @@ def test_distributed_store():
 
             extra_dirs = as_dict["extra_dirs"]
             assert len(extra_dirs) == 2
+            assert [b["weight"] for b in as_dict["backends"]] == [2, 1]
+
+            assert object_store.placement_stats()["placements"] == {"files1": backend_1_count, "files2": backend_2_count}
+
+
+def test_distributed_store_locates_objects():
+    with TestConfig(DISTRIBUTED_TEST_CONFIG) as (directory, object_store):
+        directory.write("Hello World!", "files2/000/dataset_1.dat")
+        dataset = MockDataset(1)
+        assert object_store.get_data(dataset) == "Hello World!"
+        assert dataset.object_store_id == "files2"
+        assert object_store.placement_stats()["probes"] == 2
+
+        # The location is remembered (across object store instances sharing
+        # the cache), so the object is found without checking all backends
+        object_store = object_store.__class__(object_store.config, object_store.to_dict())
+        dataset = MockDataset(1)
+        dataset.object_store_id = "invalid"
+        assert object_store.exists(dataset)
+        assert dataset.object_store_id == "files2"
+        stats = object_store.placement_stats()
+        assert stats["probes"] == 1
+        assert stats["location_cache_hits"] == 1
+
+        assert not object_store.exists(MockDataset(2))
+
+
+def test_distributed_store_probes_without_object():
+    with TestConfig(DISTRIBUTED_TEST_CONFIG) as (directory, object_store):
+        directory.write("Hello World!", "files2/000/dataset_1.dat")
+        dataset = ThreadCheckingDataset(1)
+        assert object_store.exists(dataset)
+        assert dataset.object_store_id == "files2"
+        assert dataset.threads == {threading.get_ident()}
+
+
+class MockPulsarClient:
+
+    def __init__(self, data):
+        self.data = data
+        self.reads = []
+
+    def get_data(self, object_id, start=0, count=-1):
+        self.reads.append((start, count))
+        return self.data[start:] if count < 0 else self.data[start:start + count]
+
+
+class UnitializedPulsarObjectStore(PulsarObjectStore):
+
+    def __init__(self, pulsar_client):
+        self.pulsar_client = pulsar_client
+
+
+def test_pulsar_store_iter_data():
+    data = b"Hello World!" * 100000
+    pulsar_client = MockPulsarClient(data)
+    object_store = UnitializedPulsarObjectStore(pulsar_client)
+    assert b"".join(object_store.iter_data(MockDataset(1), start=1, count=6)) == b"ello W"
+    assert pulsar_client.reads == [(1, 6)]
+    assert b"".join(object_store.iter_data(MockDataset(1), start=2)) == data[2:]
 
 
 # Unit testing the cloud and advanced infrastructure object stores is difficult, but
@@ -469,6 +534,7 @@ S3_TEST_CONFIG = """<object_store type="s3">
      <auth access_key="access_moo" secret_key="secret_cow" />
      <bucket name="unique_bucket_name_all_lowercase" use_reduced_redundancy="False" />
      <cache path="database/object_store_cache" size="1000" />
+     <transfer part_size="32" concurrency="4" />
      <extra_dir type="job_work" path="database/job_working_directory_s3"/>
      <extra_dir type="temp" path="database/tmp_s3"/>
 </object_store>
@@ -489,6 +555,10 @@ cache:
   path: database/object_store_cache
   size: 1000
 
+transfer:
+  part_size: 32
+  concurrency: 4
+
 extra_dirs:
 - type: job_work
   path: database/job_working_directory_s3
@@ -514,13 +584,16 @@ def test_config_parse_s3():
 
             assert object_store.cache_size == 1000
             assert object_store.staging_path == "database/object_store_cache"
+            assert object_store.transfer_config.part_size == 32
+            assert object_store.transfer_config.concurrency == 4
             assert object_store.extra_dirs["job_work"] == "database/job_working_directory_s3"
             assert object_store.extra_dirs["temp"] == "database/tmp_s3"
 
             as_dict = object_store.to_dict()
-            _assert_has_keys(as_dict, ["auth", "bucket", "connection", "cache", "extra_dirs", "type"])
+            _assert_has_keys(as_dict, ["auth", "bucket", "connection", "cache", "transfer", "extra_dirs", "type"])
 
             _assert_key_has_value(as_dict, "type", "s3")
+            _assert_key_has_value(as_dict["transfer"], "part_size", 32)
 
             auth_dict = as_dict["auth"]
             bucket_dict = as_dict["bucket"]
@@ -789,6 +862,23 @@ class MockDataset:
         return rel_path
 
 
+class ThreadCheckingDataset(MockDataset):
+    """Records the threads reading the id, as a mapped object would load it."""
+
+    def __init__(self, id):
+        self.threads = set()
+        super().__init__(id)
+
+    @property
+    def id(self):
+        self.threads.add(threading.get_ident())
+        return self._id
+
+    @id.setter
+    def id(self, id):
+        self._id = id
+
+
 def _assert_has_keys(the_dict, keys):
     for key in keys:
         assert key in the_dict, f"key [{key}] not in [{the_dict}]"
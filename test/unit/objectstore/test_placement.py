@@ -0,0 +1,56 @@
+from galaxy.objectstore.placement import (
+    LocationCache,
+    PlacementEngine,
+)
+from galaxy.util.bunch import Bunch
+
+
+def test_weights_follow_free_space():
+    usage = {"files1": 10.0, "files2": 50.0, "files3": 50.0}
+    engine = PlacementEngine(
+        {"files1": 1, "files2": 1, "files3": 2},
+        {"files1": 0, "files2": 90.0, "files3": 60.0},
+        get_usage_percent=usage.get,
+        refresh_interval=0,
+    )
+    weights = engine.effective_weights()
+    assert weights["files1"] == 1
+    assert round(weights["files2"], 3) == round(40 / 90, 3)
+    assert round(weights["files3"], 3) == round(2 * 10 / 60, 3)
+
+    usage["files1"] = 95.0
+    usage["files2"] = 95.0
+    # files1 has no limit, files3 gets no new objects once it is over its limit
+    usage["files3"] = 61.0
+    assert engine.effective_weights() == {"files1": 1, "files2": 0, "files3": 0}
+    assert {engine.choose() for _ in range(20)} == {"files1"}
+    assert engine.placements == {"files1": 20, "files2": 0, "files3": 0}
+
+
+def test_no_backend_available():
+    engine = PlacementEngine({"files1": 1}, {"files1": 50.0}, get_usage_percent=lambda backend_id: 60.0)
+    assert engine.choose() is None
+
+
+def test_unmonitored_usage():
+    engine = PlacementEngine({"files1": 1, "files2": 0}, {"files1": 50.0, "files2": 0})
+    assert not engine.monitored
+    assert engine.choose() == "files1"
+
+
+def test_location_cache(tmp_path):
+    dataset = Bunch(id=1)
+    for path in [None, str(tmp_path / "locations.sqlite")]:
+        location_cache = LocationCache(path, max_size=1)
+        assert location_cache.get(dataset) is None
+        location_cache.set(dataset, "files1")
+        assert location_cache.get(dataset) == "files1"
+        location_cache.remove(dataset)
+        assert location_cache.get(dataset) is None
+        location_cache.set(dataset, "files2")
+    assert LocationCache(str(tmp_path / "locations.sqlite")).get(dataset) == "files2"
+
+    location_cache = LocationCache(max_size=1)
+    location_cache.set(Bunch(id=1), "files1")
+    location_cache.set(Bunch(id=2), "files1")
+    assert location_cache.get(Bunch(id=1)) is None
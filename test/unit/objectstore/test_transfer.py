@@ -0,0 +1,145 @@
+import os
+import threading
+
+import pytest
+
+from galaxy.objectstore.transfer import (
+    DEFAULT_PART_SIZE,
+    MIN_PART_SIZE,
+    TransferConfig,
+    TransferManager,
+)
+
+DATA = os.urandom(2 * MIN_PART_SIZE + 1000)
+
+
+def test_download_in_parts(tmp_path):
+    manager = _transfer_manager(tmp_path)
+    reads = []
+
+    def read_range(start, end):
+        reads.append((start, end))
+        return DATA[start:end]
+
+    destination = str(tmp_path / "dataset_1.dat")
+    manager.download("000/dataset_1.dat", len(DATA), read_range, destination)
+
+    assert sorted(reads) == [(0, MIN_PART_SIZE), (MIN_PART_SIZE, 2 * MIN_PART_SIZE), (2 * MIN_PART_SIZE, len(DATA))]
+    with open(destination, "rb") as fh:
+        assert fh.read() == DATA
+    assert not os.path.exists(f"{destination}.part")
+    assert os.listdir(tmp_path / "transfers") == []
+
+
+def test_resume_download(tmp_path):
+    manager = _transfer_manager(tmp_path)
+    destination = str(tmp_path / "dataset_1.dat")
+
+    def failing_read_range(start, end):
+        if start == MIN_PART_SIZE:
+            raise OSError("Connection reset")
+        return DATA[start:end]
+
+    with pytest.raises(OSError):
+        manager.download("000/dataset_1.dat", len(DATA), failing_read_range, destination)
+    assert not os.path.exists(destination)
+
+    reads = []
+
+    def read_range(start, end):
+        reads.append((start, end))
+        return DATA[start:end]
+
+    manager.download("000/dataset_1.dat", len(DATA), read_range, destination)
+    assert reads == [(MIN_PART_SIZE, 2 * MIN_PART_SIZE)]
+    with open(destination, "rb") as fh:
+        assert fh.read() == DATA
+
+
+def test_resume_upload(tmp_path):
+    manager = _transfer_manager(tmp_path)
+    source_file = tmp_path / "dataset_1.dat"
+    source_file.write_bytes(DATA)
+    uploads = []
+    uploaded = {}
+    completed = []
+    failures = []
+
+    def initiate():
+        uploads.append(f"upload{len(uploads)}")
+        return uploads[-1]
+
+    def upload_part(upload_id, part_number, data):
+        if part_number == 2 and not failures:
+            failures.append(part_number)
+            raise OSError("Connection reset")
+        uploaded[part_number] = data
+        return f"etag{part_number}"
+
+    def complete(upload_id, etags):
+        completed.append((upload_id, etags))
+
+    with pytest.raises(OSError):
+        manager.upload("000/dataset_1.dat", str(source_file), initiate, upload_part, complete)
+    assert sorted(uploaded) == [1, 3]
+
+    manager.upload("000/dataset_1.dat", str(source_file), initiate, upload_part, complete)
+    assert uploads == ["upload0"]
+    assert completed == [("upload0", ["etag1", "etag2", "etag3"])]
+    assert b"".join(uploaded[part_number] for part_number in sorted(uploaded)) == DATA
+
+
+def test_retries(tmp_path):
+    manager = _transfer_manager(tmp_path, retries=1)
+    failures = []
+
+    def read_range(start, end):
+        if start == 0 and not failures:
+            failures.append(start)
+            raise OSError("Connection reset")
+        return DATA[start:end]
+
+    destination = str(tmp_path / "dataset_1.dat")
+    manager.download("000/dataset_1.dat", len(DATA), read_range, destination)
+    assert failures == [0]
+    with open(destination, "rb") as fh:
+        assert fh.read() == DATA
+
+
+def test_concurrent_downloads(tmp_path):
+    manager = _transfer_manager(tmp_path)
+    destination = str(tmp_path / "dataset_1.dat")
+    reads = []
+    started = threading.Event()
+    proceed = threading.Event()
+
+    def read_range(start, end):
+        reads.append((start, end))
+        started.set()
+        proceed.wait(10)
+        return DATA[start:end]
+
+    threads = [threading.Thread(target=manager.download, args=("000/dataset_1.dat", len(DATA), read_range, destination)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    started.wait(10)
+    proceed.set()
+    for thread in threads:
+        thread.join(10)
+
+    # The second download waited for the first one and found the object in place
+    assert len(reads) == 3
+    with open(destination, "rb") as fh:
+        assert fh.read() == DATA
+    assert os.listdir(tmp_path / "transfers") == []
+
+
+def test_max_chunk_size_limits_part_size():
+    assert TransferConfig.from_dict({"part_size": 16}, max_chunk_size=8).part_size == 8
+    assert TransferConfig.from_dict({"part_size": 16}, max_chunk_size=250).part_size == 16
+    assert TransferConfig.from_dict(None).part_size == DEFAULT_PART_SIZE
+
+
+def _transfer_manager(tmp_path, retries=0):
+    config = TransferConfig(part_size=MIN_PART_SIZE / 1024 / 1024, concurrency=2, retries=retries)
+    return TransferManager(config, str(tmp_path / "transfers"))
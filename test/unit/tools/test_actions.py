@@ -7,7 +7,8 @@ from galaxy.tool_util.parser.output_objects import ToolOutput
 from galaxy.tools.actions import (
     DefaultToolAction,
     determine_output_format,
-    on_text_for_names
+    on_text_for_names,
+    ToolExecutionCache,
 )
 from galaxy.util import XML
 from .. import tools_support
@@ -119,6 +120,44 @@ class DefaultToolActionTestCase(unittest.TestCase, tools_support.UsesApp, tools_
             return
         raise AssertionError("Tool execution succeeded for inactive user!")
 
+    def test_bulk_execution(self):
+        role = model.Role(name="history_role")
+        manage_action = self.app.security_agent.permitted_actions.DATASET_MANAGE_PERMISSIONS.action
+        self.history.default_permissions = [model.DefaultHistoryPermissions(self.history, manage_action, role)]
+        self.app.model.context.flush()
+        self._init_tool(tools_support.SIMPLE_TOOL_CONTENTS)
+
+        execution_cache = ToolExecutionCache(self.trans, bulk=True)
+        jobs = []
+        for value in ["moo", "cow"]:
+            job, output, _ = self.action.execute(
+                tool=self.tool,
+                trans=self.trans,
+                history=self.history,
+                incoming=dict(param1=value),
+                execution_cache=execution_cache,
+                flush_job=False,
+            )
+            jobs.append((job, output["out1"]))
+        assert len(execution_cache.deferred_job_parameters) == 2
+        assert len(execution_cache.deferred_dataset_permissions) == 2
+        execution_cache.insert_deferred_rows()
+        assert not execution_cache.deferred_job_parameters
+
+        expected_job, expected_output, _ = self.action.execute(
+            tool=self.tool,
+            trans=self.trans,
+            history=self.history,
+            incoming=dict(param1="moo"),
+        )
+        expected_parameters = {p.name: p.value for p in expected_job.parameters}
+        for job, output in jobs:
+            parameters = {p.name: p.value for p in job.parameters}
+            assert parameters.keys() == expected_parameters.keys()
+            assert [(dp.action, dp.role_id) for dp in output.dataset.actions] == [(manage_action, role.id)]
+        assert {p.name: p.value for p in jobs[0][0].parameters} == expected_parameters
+        assert "cow" in {p.name: p.value for p in jobs[1][0].parameters}["param1"]
+
     def __add_dataset(self, state='ok'):
         hda = model.HistoryDatasetAssociation()
         hda.dataset = model.Dataset()
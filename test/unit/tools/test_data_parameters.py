@@ -1,4 +1,13 @@
+from datetime import timedelta
+
+from sqlalchemy import inspect
+
 from galaxy import model
+from galaxy.tools.parameters.dataset_matcher import (
+    get_dataset_matcher_factory,
+    set_dataset_matcher_factory,
+    unset_dataset_matcher_factory,
+)
 from .util import BaseParameterTestCase
 from ..unittest_utils import galaxy_mock
 
@@ -137,6 +146,44 @@ class DataToolParameterTestCase(BaseParameterTestCase):
         self.stub_active_datasets(hda1)
         assert hda1 == self.param.get_initial_value(self.trans, {}), hda1
 
+    def test_history_matches_shared_by_parameters(self):
+        hda1 = MockHistoryDatasetAssociation(name="hda1", id=1)
+        hda2 = MockHistoryDatasetAssociation(name="hda2", id=2)
+        self.stub_active_datasets(hda1, hda2)
+        set_dataset_matcher_factory(self.trans, None)
+        try:
+            # the initial value alone is found without indexing the history
+            assert hda2 == self.param.get_initial_value(self.trans, {})
+            assert get_dataset_matcher_factory(self.trans).existing_history_dataset_index(self.test_history) is None
+            field = self._simple_field()
+            assert len(field['options']['hda']) == 2
+            hda1.conversion_destination = (False, None, None)
+            # the matches found for the field are reused
+            assert hda2 == self.param.get_initial_value(self.trans, {})
+            field = self._simple_field()
+            assert len(field['options']['hda']) == 2
+            # until the history is updated
+            self.test_history.update_time = self.test_history.update_time + timedelta(seconds=1)
+            field = self._simple_field()
+            assert len(field['options']['hda']) == 1
+            assert field['options']['hda'][0]['name'] == "hda2"
+        finally:
+            unset_dataset_matcher_factory(self.trans)
+
+    def test_history_implicit_conversions_loaded(self):
+        hda = self._new_hda()
+        hda.history = self.test_history
+        hda.dataset.state = model.Dataset.states.OK
+        converted = self._new_hda()
+        self.app.model.context.add(model.ImplicitlyConvertedDatasetAssociation(parent=hda, dataset=converted, file_type="tabular"))
+        self.app.model.context.flush()
+        self.app.model.context.expire(hda, ['implicitly_converted_datasets'])
+        self.stub_active_datasets(hda)
+        index = get_dataset_matcher_factory(self.trans).history_dataset_index(self.test_history)
+        assert index.hdas == [hda]
+        assert 'implicitly_converted_datasets' not in inspect(hda).unloaded
+        assert hda.get_converted_files_by_type("tabular") == converted
+
     def _new_hda(self):
         hda = model.HistoryDatasetAssociation()
         hda.visible = True
@@ -0,0 +1,106 @@
+import tempfile
+
+from galaxy.tools.search import (
+    InMemoryToolBoxSearch,
+    ToolBoxSearch,
+)
+from galaxy.util.bunch import Bunch
+
+BOOSTS = dict(
+    tool_name_boost=9,
+    tool_id_boost=9,
+    tool_section_boost=3,
+    tool_description_boost=2,
+    tool_label_boost=1,
+    tool_stub_boost=5,
+    tool_help_boost=0.5,
+    tool_search_limit=20,
+    tool_ngram_minsize=3,
+    tool_ngram_maxsize=4,
+)
+
+
+class MockToolCache:
+
+    def __init__(self, tools):
+        self.tools = {tool.id: tool for tool in tools}
+        self._tool_paths_by_id = {tool.id: f"{tool.id}.xml" for tool in tools}
+        self._new_tool_ids = set(self.tools)
+        self._removed_tool_ids = set()
+
+    def get_tool_by_id(self, tool_id):
+        return self.tools.get(tool_id)
+
+
+def mock_tool(id, name, description="", section="", help="", hidden=False, is_latest_version=True, lineage=None):
+    return Bunch(
+        id=id,
+        name=name,
+        description=description,
+        get_panel_section=lambda: (None, section),
+        guid=None,
+        labels=[],
+        raw_help=help,
+        tool_type="default",
+        hidden=hidden,
+        is_latest_version=is_latest_version,
+        lineage=lineage,
+    )
+
+
+def mock_tools():
+    return [
+        mock_tool("bowtie2", "Bowtie2", "map reads against reference genome", "Mapping", "Fast and sensitive read alignment"),
+        mock_tool("bwa", "Map with BWA", "for short reads", "Mapping", "Burrows-Wheeler aligner"),
+        mock_tool("cat1", "Concatenate datasets", "tail-to-head", "Text Manipulation"),
+        mock_tool("sort1", "Sort", "data in ascending or descending order", "Filter and Sort", "Sorts reads of a dataset"),
+    ]
+
+
+def search(toolbox_search, q, ngram=False, **kwds):
+    boosts = dict(BOOSTS, **kwds)
+    return toolbox_search.search(q=q, tool_enable_ngram_search=ngram, **boosts)
+
+
+def test_in_memory_search():
+    toolbox_search = InMemoryToolBoxSearch(None)
+    toolbox_search.build_index(MockToolCache(mock_tools()))
+    assert search(toolbox_search, "bowtie")[0] == "bowtie2"
+    # Partial words match
+    assert search(toolbox_search, "catenat") == ["cat1"]
+    # The name is boosted over the help
+    assert search(toolbox_search, "sort")[0] == "sort1"
+    assert set(search(toolbox_search, "reads")) == {"bowtie2", "bwa", "sort1"}
+    assert search(toolbox_search, "reads", tool_search_limit=1) == ["bwa"]
+    assert search(toolbox_search, "map with bw")[0] == "bwa"
+    assert search(toolbox_search, "bowtei", ngram=True)[0] == "bowtie2"
+    assert search(toolbox_search, "missing") == []
+
+
+def test_in_memory_search_finds_whoosh_hits():
+    tool_cache = MockToolCache(mock_tools())
+    in_memory_search = InMemoryToolBoxSearch(None)
+    in_memory_search.build_index(tool_cache)
+    whoosh_search = ToolBoxSearch(None, index_dir=tempfile.mkdtemp())
+    whoosh_search.build_index(tool_cache)
+    for q in ["bowtie", "map", "reads", "sort data", "text manip", "bowtei"]:
+        for ngram in [False, True]:
+            assert set(search(in_memory_search, q, ngram)) == set(search(whoosh_search, q, ngram))
+
+
+def test_in_memory_search_rebuild():
+    tools = mock_tools()
+    tool_cache = MockToolCache(tools)
+    toolbox_search = InMemoryToolBoxSearch(None)
+    toolbox_search.build_index(tool_cache)
+    assert search(toolbox_search, "bowtie") == ["bowtie2"]
+    # A hidden latest version is replaced by the latest visible version
+    old_bowtie = mock_tool("bowtie2_old", "Bowtie2 (old)")
+    tool_cache.tools["bowtie2_old"] = old_bowtie
+    tools[0].hidden = True
+    tools[0].lineage = Bunch(get_versions=lambda: [Bunch(id="bowtie2_old"), Bunch(id="bowtie2")])
+    # Results are cached until the index is rebuilt
+    assert search(toolbox_search, "bowtie") == ["bowtie2"]
+    toolbox_search.build_index(tool_cache)
+    assert toolbox_search.index_count == 1
+    assert search(toolbox_search, "bowtie") == ["bowtie2_old"]
@@ -3,8 +3,11 @@ import json
 import logging
 import os
 import string
+import tempfile
 import time
 import unittest
+from multiprocessing.util import register_after_fork
+from unittest import mock
 
 import pytest
 import routes
@@ -12,6 +15,7 @@ import routes
 from galaxy import model
 from galaxy.config_watchers import ConfigWatchers
 from galaxy.model import tool_shed_install
+from galaxy.model.orm.engine_factory import build_engine
 from galaxy.model.tool_shed_install import mapping
 from galaxy.tools import ToolBox
 from galaxy.tools.cache import ToolCache
@@ -190,6 +194,67 @@ class ToolBoxTestCase(BaseToolBoxTestCase):
         assert tool is not None
         assert len(tool._macro_paths) == 1
 
+    def test_parse_tools_in_processes(self):
+        self.app.config.tool_parsing_processes = 2
+        self.app.config.enable_tool_document_cache = True
+        self._init_tool()
+        self._init_tool(filename="tool_with_macro.xml",
+                        tool_contents=SIMPLE_TOOL_WITH_MACRO,
+                        extra_file_contents=SIMPLE_MACRO.substitute(tool_version="2.0"),
+                        extra_file_path="external.xml")
+        with open(self._tool_path("broken_tool.xml"), "w") as out:
+            out.write("certainly not a valid tool")
+        self._add_config("""<toolbox>
+    <section id="tid" name="TID"><tool file="tool_with_macro.xml"/></section>
+    <tool file="broken_tool.xml"/>
+    <tool file="tool.xml"/>
+</toolbox>""")
+        toolbox = self.toolbox
+        assert toolbox.get_tool("test_tool") is not None
+        tool = toolbox.get_tool("tool_with_macro")
+        assert tool.version == "2.0"
+        assert len(tool._macro_paths) == 1
+        assert not toolbox._preloaded_tool_documents
+        cache = toolbox.get_cache_region(self.app.config.tool_cache_data_dir)
+        assert cache.get(self._tool_path("tool.xml"))
+        assert cache.get(self._tool_path("tool_with_macro.xml"))
+        toolbox.persist_cache()
+
+        # tools in the tool document cache are not parsed again
+        self.app.tool_cache = ToolCache()
+        self._toolbox = None
+        with mock.patch("galaxy.tools.ProcessPoolExecutor") as executor:
+            assert self.toolbox.get_tool("tool_with_macro").version == "2.0"
+        executor.assert_not_called()
+
+    def test_parse_tools_in_processes_keeps_engine(self):
+        self.app.config.tool_parsing_processes = 2
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = build_engine("sqlite:///%s" % os.path.join(tmp, "test.sqlite"), {})
+            marker = os.path.join(tmp, "forked")
+
+            def touch_marker(obj):
+                open(marker, "w").close()
+
+            register_after_fork(engine, touch_marker)
+            with engine.connect() as connection:
+                self._init_tool()
+                self._init_tool(filename="tool_with_macro.xml",
+                                tool_contents=SIMPLE_TOOL_WITH_MACRO,
+                                extra_file_contents=SIMPLE_MACRO.substitute(tool_version="2.0"),
+                                extra_file_path="external.xml")
+                self._add_config("""<toolbox>
+    <tool file="tool_with_macro.xml"/>
+    <tool file="tool.xml"/>
+</toolbox>""")
+                toolbox = self.toolbox
+                assert toolbox.get_tool("tool_with_macro").version == "2.0"
+                assert toolbox.get_tool("test_tool") is not None
+                # workers are not forked, so the engine's connections are not disposed
+                assert not os.path.exists(marker)
+                assert connection.exec_driver_sql("select 1").scalar() == 1
+            engine.dispose()
+
     @pytest.mark.xfail(raises=AssertionError)
     def test_tool_reload_when_macro_is_altered(self):
         self._init_tool(filename="tool_with_macro.xml",
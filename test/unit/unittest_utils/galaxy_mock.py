@@ -101,7 +101,7 @@ class MockApp(di.Container):
         self.application_stack = ApplicationStack()
         self.auth_manager = AuthManager(self.config)
         self.user_manager = UserManager(self)
-        self.execution_timer_factory = Bunch(get_timer=StructuredExecutionTimer)
+        self.execution_timer_factory = Bunch(get_timer=StructuredExecutionTimer, galaxy_statsd_client=None)
         self.is_job_handler = False
         rebind_container_to_task(self)
 
@@ -174,6 +174,7 @@ class MockAppConfig(Bunch):
 
         self.umask = 0o77
         self.flush_per_n_datasets = 0
+        self.discovered_datasets_workers = 1
 
         # Compliance related config
         self.redact_email_in_job_name = False
@@ -195,6 +196,7 @@ class MockAppConfig(Bunch):
         self.enable_tool_document_cache = False
         self.tool_cache_data_dir = os.path.join(root, 'tool_cache')
         self.delay_tool_initialization = True
+        self.tool_parsing_processes = 1
         self.external_chown_script = None
 
         self.config_file = None
@@ -3,7 +3,11 @@ import sys
 import pytest
 from Cheetah.NameMapper import NotFound
 
-from galaxy.util.template import fill_template
+from galaxy.util import template
+from galaxy.util.template import (
+    CompiledTemplateCache,
+    fill_template,
+)
 
 SIMPLE_TEMPLATE = """#for item in $a_list:
     echo $item
@@ -86,3 +90,40 @@ def test_fix_template_two_to_three():
 def test_fix_template_invalid_cheetah():
     template_str = fill_template(INVALID_CHEETAH_SYNTAX, python_template_version='2', retry=1)
     assert template_str == "1 is 1\n"
+
+
+def test_compiled_template_cache(monkeypatch):
+    cache = CompiledTemplateCache()
+    monkeypatch.setattr(template, "template_cache", cache)
+    assert fill_template(SIMPLE_TEMPLATE, {'a_list': [1, 2]}) == FILLED_SIMPLE_TEMPLATE
+    assert fill_template(SIMPLE_TEMPLATE, {'a_list': [3]}) == "    echo 3\n"
+    assert (cache.hits, cache.misses) == (1, 1)
+    # Python 2 templates are fixed up once.
+    compile_calls = []
+    _compile = template.Template.compile
+
+    def compile(*args, **kwargs):
+        compile_calls.append(kwargs)
+        return _compile(*args, **kwargs)
+
+    monkeypatch.setattr(template.Template, "compile", compile)
+    assert fill_template(TWO_TO_THREE_TEMPLATE, python_template_version='2') == 'a a 1'
+    assert len(compile_calls) == 2
+    assert fill_template(TWO_TO_THREE_TEMPLATE, python_template_version='2') == 'a a 1'
+    assert len(compile_calls) == 2
+
+
+def test_compiled_template_cache_persisted(monkeypatch, tmp_path):
+    monkeypatch.setattr(template, "template_cache", CompiledTemplateCache(str(tmp_path)))
+    assert fill_template(TWO_TO_THREE_TEMPLATE, python_template_version='2') == 'a a 1'
+
+    # A new process reuses the generated module code without compiling the template.
+    cache = CompiledTemplateCache(str(tmp_path))
+    monkeypatch.setattr(template, "template_cache", cache)
+
+    def compile(*args, **kwargs):
+        raise AssertionError("Template compiled")
+
+    monkeypatch.setattr(template.Template, "compile", compile)
+    assert fill_template(TWO_TO_THREE_TEMPLATE, python_template_version='2') == 'a a 1'
+    assert cache.hits == 1
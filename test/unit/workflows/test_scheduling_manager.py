@@ -0,0 +1,63 @@
+import threading
+
+from galaxy.util.bunch import Bunch
+from galaxy.workflow.scheduling_manager import (
+    fair_invocation_order,
+    WorkflowSchedulingPool,
+)
+
+
+def test_fair_invocation_order():
+    # (id, history_id, user_id) rows, in id order
+    invocations = [(1, 1, 1), (2, 1, 1), (3, 1, 1), (4, 2, 2), (5, 3, 3), (6, 2, 2)]
+    assert [i[0] for i in fair_invocation_order(invocations)] == [1, 4, 5, 2, 6, 3]
+
+
+def test_scheduling_pool():
+    app = _mock_app(parallelize_workflow_scheduling_within_histories=False)
+    release = threading.Event()
+    scheduled = []
+
+    def attempt_schedule(invocation_id, workflow_scheduler):
+        scheduled.append(invocation_id)
+        if invocation_id == 1:
+            # A large invocation, taking a while to schedule
+            release.wait(5)
+
+    pool = WorkflowSchedulingPool(app, 2, attempt_schedule)
+    try:
+        pool.submit([(1, 1, 1), (2, 1, 1), (3, 2, 2)], None)
+        # Invocation 2 waits for invocation 1 in the same history, invocation 3
+        # is scheduled concurrently
+        _wait_for(lambda: pool.in_flight() == [1])
+        assert sorted(scheduled) == [1, 3]
+
+        # Invocations being scheduled are not queued again
+        pool.submit([(1, 1, 1), (3, 2, 2)], None)
+        _wait_for(lambda: pool.in_flight() == [1])
+        assert sorted(scheduled) == [1, 3, 3]
+
+        release.set()
+        _wait_for(lambda: not pool.in_flight())
+        pool.submit([(2, 1, 1)], None)
+        _wait_for(lambda: not pool.in_flight())
+        assert sorted(scheduled) == [1, 2, 3, 3]
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def _mock_app(**config):
+    return Bunch(
+        config=Bunch(**config),
+        execution_timer_factory=Bunch(galaxy_statsd_client=None),
+    )
+
+
+def _wait_for(condition, timeout=5):
+    event = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        event.wait(0.01)
+    assert condition()
@@ -170,6 +170,45 @@ class WorkflowProgressTestCase(unittest.TestCase):
         replacement = progress.replacement_for_input(self._step(4), step_dict)
         assert replacement is hda3
 
+    def test_remaining_steps_recovers_frontier(self):
+        self._setup_workflow(TEST_WORKFLOW_YAML)
+        hda1 = model.HistoryDatasetAssociation()
+        self._set_previous_progress([
+            (100, {"output": hda1}),
+            (101, {"output": model.HistoryDatasetAssociation()}),
+            (102, {"out_file1": model.HistoryDatasetAssociation()}),
+            (103, {"out_file1": model.HistoryDatasetAssociation()}),
+            (104, UNSCHEDULED_STEP),
+        ])
+        progress = self._new_workflow_progress()
+        progress.remaining_steps()
+        # Only step 102 is connected to the remaining step
+        assert list(progress.outputs) == [102]
+        assert sorted(progress.unrecovered_step_invocations) == [100, 101, 103]
+
+        # Outputs of other steps are recovered when used
+        conn = model.WorkflowStepConnection()
+        conn.output_name = "output"
+        conn.output_step = self._step(0)
+        assert progress.replacement_for_connection(conn) is hda1
+        assert sorted(progress.unrecovered_step_invocations) == [101, 103]
+
+    def test_delayed_dependency(self):
+        self._setup_workflow(TEST_WORKFLOW_YAML)
+        self._set_previous_progress([
+            (100, {"output": model.HistoryDatasetAssociation()}),
+            (101, {"output": model.HistoryDatasetAssociation()}),
+            (102, UNSCHEDULED_STEP),
+            (103, UNSCHEDULED_STEP),
+            (104, UNSCHEDULED_STEP),
+        ])
+        progress = self._new_workflow_progress()
+        progress.remaining_steps()
+        assert progress.delayed_dependency(self._step(4)) is None
+        progress.mark_step_outputs_delayed(self._step(2))
+        assert progress.delayed_dependency(self._step(3)) is None
+        assert progress.delayed_dependency(self._step(4)) == 102
+
     # TODO: Replace multiple true HDA with HDCA
     # TODO: Test explicit delay
     # TODO: Test cancel on collection invalid